@@ -0,0 +1 @@
+"""Benchmarks for LAM (run as ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,129 @@
+"""Archive payload throughput: tarfile streaming vs. kernel-side copies.
+
+"before" is the previous TAR writer (``tarfile.addfile`` with a hashing
+reader); the other rows run :func:`lam.pack.packager.create_archive` with
+the payload transfer method pinned. Each archive is written to --output
+(default: a temporary directory next to the sample, i.e. the same file
+system), so ``copy_file_range`` may reflink on btrfs/XFS.
+
+Usage::
+
+    python -m benchmarks.archive_payload --size-mb 1024 --files 2000
+    python -m benchmarks.archive_payload --format iso --output /mnt/other-disk
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from lam.pack import manifest, packager, payload
+from lam.pack.scan import FileTable, scan
+
+
+def _make_sample(root: Path, size_mb: int, files: int) -> int:
+    """Write *size_mb* MiB in 16 MiB files plus *files* small files; return bytes."""
+    chunk = os.urandom(1024 * 1024)
+    total = 0
+    big = root / "big"
+    big.mkdir(parents=True)
+    for i in range(0, size_mb, 16):
+        with (big / f"{i:05d}.bin").open("wb") as fh:
+            for j in range(min(16, size_mb - i)):
+                fh.write((i + j).to_bytes(8, "little") + chunk[8:])
+                total += len(chunk)
+    small = root / "small"
+    small.mkdir()
+    for i in range(files):
+        data = chunk[i % 1000 : i % 1000 + 1 + i * 37 % 60_000]
+        (small / f"{i:06d}.jpg").write_bytes(data)
+        total += len(data)
+    return total
+
+
+def _tarfile_writer(table: FileTable, output_dir: Path, name: str) -> Path:
+    """The TAR writer as it was before payloads went through the kernel."""
+    archive_path = output_dir / f"{name}.tar"
+    entries = []
+    with tarfile.open(archive_path, mode="w:", copybufsize=1024 * 1024) as tf:
+        for record in table:
+            arcname = f"{name}/{record.path}" if record.path else name
+            info = packager._tarinfo(record, arcname, table.root)
+            if info is None:
+                continue
+            if not info.isreg():
+                tf.addfile(info)
+                continue
+            with (table.root / record.path).open("rb") as fh:
+                reader = manifest.HashingReader(fh)
+                tf.addfile(info, reader)
+            entries.append(
+                manifest.ManifestEntry(arcname, info.size, int(info.mtime), reader.hexdigest())
+            )
+    manifest.write(manifest.manifest_path(archive_path), entries)
+    return archive_path
+
+
+def _run(label: str, write, output: Path) -> tuple[float, float]:
+    target = output / label
+    target.mkdir()
+    os.sync()
+    wall = time.perf_counter()
+    cpu = os.times()
+    write(target)
+    wall = time.perf_counter() - wall
+    after = os.times()
+    shutil.rmtree(target)
+    return wall, (after.user + after.system) - (cpu.user + cpu.system)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--files", type=int, default=2000, help="small files in the sample")
+    parser.add_argument("--format", choices=["tar", "iso"], default="tar")
+    parser.add_argument("--output", type=Path, help="directory for the archives")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="lam-bench-") as tmp:
+        source = Path(tmp) / "Sample"
+        total = _make_sample(source, args.size_mb, args.files)
+        table = scan(source)
+        output = Path(tempfile.mkdtemp(prefix="lam-bench-out-", dir=args.output or tmp))
+        runs = []
+        if args.format == "tar":
+            runs.append(("before", lambda out: _tarfile_writer(table, out, source.name), None))
+        for method in payload.METHODS:
+            runs.append(
+                (
+                    method,
+                    lambda out: packager.create_archive(
+                        source, out, fmt=args.format, table=table  # type: ignore[arg-type]
+                    ),
+                    method,
+                )
+            )
+        original = payload.METHODS
+        print(f"{'method':<16} {'wall s':>8} {'cpu s':>8} {'MB/s':>8} {'cpu s/GB':>9}")
+        try:
+            for label, write, method in runs:
+                if method is not None:
+                    payload.METHODS = (method,)
+                wall, cpu = _run(label, write, output)
+                gigabytes = total / 1e9
+                print(
+                    f"{label:<16} {wall:8.2f} {cpu:8.2f} "
+                    f"{total / 1e6 / wall:8.1f} {cpu / gigabytes:9.2f}"
+                )
+        finally:
+            payload.METHODS = original
+            shutil.rmtree(output, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
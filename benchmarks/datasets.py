@@ -0,0 +1,214 @@
+"""Deterministic synthetic source trees for the benchmark suite.
+
+Four shapes cover the trees LAM packs in practice:
+
+``tiny``
+    Very many small files (1 000 000 at scale 1), 1000 per directory.
+``large``
+    A few multi-GB files (3 × 4 GiB at scale 1).
+``deep``
+    Long directory chains (64 levels) with a few files on every level.
+``mixed``
+    A photo/video library: JPEG, PNG and MP4 files with realistic headers and
+    log-normal sizes, plus small XMP sidecars (50 000 files at scale 1).
+
+The same shape, scale and seed always produce byte-identical trees, so a
+baseline measured on one run stays comparable with the next. A generated
+tree is described by ``dataset.json`` next to it and reused when the
+description matches.
+
+Usage::
+
+    python -m benchmarks.datasets mixed --scale 0.01 --workdir /tmp/lam-bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+SHAPES = ("tiny", "large", "deep", "mixed")
+DEFAULT_SEED = 2025
+
+_MIB = 1024 * 1024
+_JPEG = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+_PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+_MP4 = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+
+@dataclass(frozen=True, slots=True)
+class Dataset:
+    """A generated source tree."""
+
+    shape: str
+    scale: float
+    seed: int
+    root: Path
+    files: int
+    directories: int
+    total_size: int
+
+
+def dataset_dir(workdir: Path, shape: str, scale: float) -> Path:
+    return workdir / f"{shape}-s{scale:g}"
+
+
+def generate(
+    shape: str, workdir: Path, scale: float = 0.01, seed: int = DEFAULT_SEED
+) -> Dataset:
+    """Generate (or reuse) the *shape* tree at *scale* below *workdir*.
+
+    Raises
+    ------
+    ValueError
+        If *shape* is unknown or *scale* is not positive.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown dataset shape: {shape!r}. Choose one of: {', '.join(SHAPES)}.")
+    if scale <= 0:
+        raise ValueError(f"Scale must be positive, got {scale}")
+    base = dataset_dir(workdir, shape, scale)
+    description = base / "dataset.json"
+    root = base / shape.capitalize()
+    if description.exists():
+        data = json.loads(description.read_text())
+        if data.get("seed") == seed and root.is_dir():
+            return Dataset(**{**data, "root": root})
+    if base.exists():
+        shutil.rmtree(base)
+    root.mkdir(parents=True)
+    writer = _Writer(root, random.Random(f"{shape}:{scale}:{seed}"))
+    _GENERATORS[shape](writer, scale)
+    dataset = Dataset(shape, scale, seed, root, writer.files, writer.directories, writer.size)
+    description.write_text(
+        json.dumps({**asdict(dataset), "root": None}, indent=2) + "\n", encoding="utf-8"
+    )
+    return dataset
+
+
+# ---------------------------------------------------------------------------
+# Shapes
+# ---------------------------------------------------------------------------
+
+
+class _Writer:
+    def __init__(self, root: Path, rng: random.Random) -> None:
+        self.root = root
+        self.rng = rng
+        self.files = 0
+        self.directories = 0
+        self.size = 0
+        self._block = rng.randbytes(_MIB)
+
+    def directory(self, relative: str) -> Path:
+        path = self.root / relative
+        missing = path
+        while missing != self.root and not missing.exists():
+            self.directories += 1
+            missing = missing.parent
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def small(self, path: Path, size: int, header: bytes = b"") -> None:
+        body = self.rng.randbytes(max(0, size - len(header)))
+        path.write_bytes((header + body)[: max(size, 1)])
+        self.files += 1
+        self.size += max(size, 1)
+
+    def large(self, path: Path, size: int, header: bytes = b"") -> None:
+        """Write *size* bytes built from a shared random block, varied per MiB."""
+        with path.open("wb") as fh:
+            fh.write(header)
+            written = len(header)
+            number = self.rng.getrandbits(32) << 32
+            while written < size:
+                count = min(_MIB, size - written)
+                fh.write(((number + written // _MIB).to_bytes(8, "little") + self._block)[:count])
+                written += count
+        self.files += 1
+        self.size += max(size, len(header))
+
+
+def _tiny(writer: _Writer, scale: float) -> None:
+    count = max(1, int(1_000_000 * scale))
+    for i in range(count):
+        if i % 1000 == 0:
+            directory = writer.directory(f"d{i // 1000:04d}")
+        writer.small(directory / f"f{i:07d}.dat", writer.rng.randint(1, 4096))
+
+
+def _large(writer: _Writer, scale: float) -> None:
+    size = max(_MIB, int(4 * 1024 * _MIB * scale))
+    for i in range(3):
+        writer.large(writer.root / f"image{i}.raw", size)
+
+
+def _deep(writer: _Writer, scale: float) -> None:
+    branches = max(1, int(200 * scale))
+    for branch in range(branches):
+        relative = f"b{branch:03d}"
+        for level in range(64):
+            directory = writer.directory(relative)
+            for n in range(2):
+                size = writer.rng.randint(1, 64 * 1024)
+                writer.small(directory / f"l{level:02d}_{n}.txt", size)
+            relative += f"/level{level:02d}"
+
+
+def _mixed(writer: _Writer, scale: float) -> None:
+    count = max(4, int(50_000 * scale))
+    # Below scale 0.1 the files shrink too, so small runs stay small.
+    factor = min(1.0, scale * 10)
+    # Log-normal size parameters (median ≈ e^mu bytes at full size), capped per kind.
+    kinds = [
+        (0.70, "jpg", _JPEG, 14.5, 0.6, 32 * _MIB),  # ~2 MB photos
+        (0.15, "png", _PNG, 13.0, 1.0, 64 * _MIB),  # ~440 KB screenshots
+        (0.05, "mp4", _MP4, 17.5, 0.8, 2048 * _MIB),  # ~40 MB clips
+        (0.10, "xmp", b"<?xpacket begin=", 8.0, 0.3, _MIB),  # ~3 KB sidecars
+    ]
+    for i in range(count):
+        if i % 250 == 0:
+            directory = writer.directory(f"{2000 + i // 5000}/{i // 250 % 20 + 1:02d}")
+        roll = writer.rng.random()
+        for share, ext, header, mu, sigma, cap in kinds:
+            roll -= share
+            if roll < 0 or ext == "xmp":
+                break
+        size = int(writer.rng.lognormvariate(mu, sigma) * factor)
+        size = min(cap, max(len(header) + 1, size))
+        path = directory / f"IMG_{i:06d}.{ext}"
+        if size > _MIB:
+            writer.large(path, size, header)
+        else:
+            writer.small(path, size, header)
+
+
+_GENERATORS: dict[str, Callable[[_Writer, float], None]] = {
+    "tiny": _tiny,
+    "large": _large,
+    "deep": _deep,
+    "mixed": _mixed,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("shape", choices=SHAPES)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workdir", type=Path, default=Path("/tmp/lam-bench"))
+    args = parser.parse_args()
+    dataset = generate(args.shape, args.workdir, args.scale, args.seed)
+    print(
+        f"{dataset.root}: {dataset.files} files, {dataset.directories} directories, "
+        f"{dataset.total_size / 1e6:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Metadata pass of ``lam pack``: per-stage walks vs. one shared FileTable.
+
+"before" is the metadata work of the pipeline before the FileTable: the
+validator collected a list of ``Path`` objects with ``rglob("*")`` and
+stat'ed every file, then ``tarfile`` walked and ``lstat``'ed the tree again
+to build its headers. "after" is :func:`lam.pack.scan.scan` once, with the
+validator and the TAR headers reading the table. No file data is read or
+written, so the numbers are the metadata cost alone.
+
+Each variant runs in a fresh interpreter, so its peak RSS is its own.
+Metadata syscalls (``stat`` family and ``getdents64``) are counted with
+``strace -f -c`` when strace is installed and reported as ``n/a`` otherwise.
+
+Usage::
+
+    python -m benchmarks.file_table --files 200000
+    python -m benchmarks.file_table --root /mnt/smb/Projekt
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from lam.pack import packager, validator
+from lam.pack.scan import scan
+
+VARIANTS = ("before", "after")
+_STAT_CALLS = ("stat", "lstat", "fstat", "newfstatat", "fstatat64", "statx", "getdents64")
+
+
+def _make_sample(root: Path, files: int) -> None:
+    """Write *files* small files, 200 per directory, two levels deep."""
+    for i in range(files):
+        directory = root / f"{i // 20000:03d}" / f"{i // 200:05d}"
+        if i % 200 == 0:
+            directory.mkdir(parents=True)
+        (directory / f"{i:07d}.txt").write_bytes(b"x" * (1 + i % 500))
+
+
+def _before(root: Path) -> int:
+    all_files = [p for p in root.rglob("*") if p.is_file()]
+    if not all_files or any(p.stat().st_size == 0 for p in all_files):
+        raise SystemExit("sample is empty or has 0-byte files")
+    headers = 0
+    with tarfile.open(os.devnull, "w:") as tf:
+        for directory, dirs, names in os.walk(root):
+            dirs.sort()
+            for name in sorted(dirs + names):
+                path = os.path.join(directory, name)
+                tf.gettarinfo(path, arcname=os.path.relpath(path, root.parent))
+                headers += 1
+    return headers
+
+
+def _after(root: Path) -> int:
+    table = validator.validate(root, table=scan(root))
+    return sum(1 for r in table if packager._tarinfo(r, r.path, root) is not None)
+
+
+def _child(variant: str, root: Path) -> None:
+    started = time.perf_counter()
+    entries = (_before if variant == "before" else _after)(root)
+    wall = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(f"{entries} {wall:.3f} {peak}")
+
+
+def _measure(variant: str, root: Path) -> tuple[int, float, int, str]:
+    cmd = [sys.executable, "-m", "benchmarks.file_table", "--child", variant, "--root", str(root)]
+    syscalls = "n/a"
+    strace = shutil.which("strace")
+    with tempfile.NamedTemporaryFile("r", suffix=".strace") as log:
+        if strace:
+            cmd = [strace, "-f", "-c", "-o", log.name, *cmd]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        if strace:
+            syscalls = str(
+                sum(
+                    int(fields[3])
+                    for fields in (line.split() for line in log)
+                    if len(fields) >= 5 and fields[-1] in _STAT_CALLS and fields[3].isdigit()
+                )
+            )
+    entries, wall, peak = out.split()
+    return int(entries), float(wall), int(peak), syscalls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000, help="files in the sample")
+    parser.add_argument("--root", type=Path, help="an existing tree instead of the sample")
+    parser.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.root)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="lam-bench-") as tmp:
+        root = args.root
+        if root is None:
+            root = Path(tmp) / "Sample"
+            _make_sample(root, args.files)
+        print(f"{'variant':<8} {'entries':>9} {'wall s':>8} {'peak RSS MiB':>13} {'syscalls':>9}")
+        for variant in VARIANTS:
+            entries, wall, peak, syscalls = _measure(variant, root)
+            print(f"{variant:<8} {entries:9d} {wall:8.2f} {peak / 1024:13.1f} {syscalls:>9}")
+
+
+if __name__ == "__main__":
+    main()
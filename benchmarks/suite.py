@@ -0,0 +1,243 @@
+"""Pipeline benchmark suite with JSON baselines and regression thresholds.
+
+Runs ``scan``, ``validate``, TAR creation and PAR2 creation on a synthetic
+dataset (see :mod:`benchmarks.datasets`) and compares each stage's
+throughput – entries/s for scan and validate, bytes/s for TAR and PAR2 –
+with a stored baseline. The run exits with status 1 when any stage is
+slower than the baseline by more than ``--threshold`` (a fraction).
+
+PAR2 uses par2cmdline when it is installed and the built-in engine as a
+local stand-in otherwise (the baseline records which one was measured;
+stages measured with a different engine are not compared).
+
+Results are taken with a warm page cache: the dataset was just written or
+read, so they reflect LAM's own overhead rather than the disk.
+
+Usage::
+
+    # Record a baseline for this machine, then check later changes against it
+    python -m benchmarks.suite mixed --scale 0.01 --save-baseline
+    python -m benchmarks.suite mixed --scale 0.01 --threshold 0.15
+    python -m benchmarks.suite tiny --scale 0.1 --repeat 3 --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Collection
+
+from benchmarks.datasets import SHAPES, Dataset, generate
+from lam.pack import packager, par2, validator
+from lam.pack.metrics import PipelineMetrics
+from lam.pack.scan import scan
+
+STAGES = ("scan", "validate", "tar", "par2")
+BASELINE_DIR = Path(__file__).parent / "baselines"
+DEFAULT_THRESHOLD = 0.15
+
+
+def run_suite(
+    dataset: Dataset,
+    output_dir: Path,
+    repeat: int = 1,
+    stages: Collection[str] = STAGES,
+) -> dict[str, Any]:
+    """Measure *stages* on *dataset*; the best of *repeat* runs counts.
+
+    Returns the result document that is stored as a baseline.
+    """
+    engine = "par2cmdline" if shutil.which("par2") or shutil.which("par2create") else "native"
+    entries = dataset.files + dataset.directories + 1
+    best: dict[str, dict[str, Any]] = {}
+    for _ in range(repeat):
+        run = PipelineMetrics()
+        table = None
+        if "scan" in stages:
+            with run.stage("scan"):
+                table = scan(dataset.root)
+        if "validate" in stages:
+            with run.stage("validate"):
+                validator.validate(dataset.root)
+        if "tar" not in stages and "par2" not in stages:
+            continue
+        with run.stage("tar") as stage:
+            archive = packager.create_archive(dataset.root, output_dir, "tar", table=table)
+            archive_size = archive.stat().st_size
+            stage.add(read=dataset.total_size, written=archive_size)
+        if engine == "native" and not _numpy_available():
+            engine = ""  # neither par2cmdline nor the native engine's NumPy
+        if engine and "par2" in stages:
+            with run.stage("par2") as stage:
+                files = par2.create(archive, 15, 1, engine=engine)  # type: ignore[arg-type]
+                stage.add(read=archive_size, written=sum(p.stat().st_size for p in files))
+        for path in output_dir.iterdir():
+            path.unlink()
+
+        for stage in run.stages:
+            if stage.name not in stages:
+                continue  # e.g. the TAR needed as PAR2 input
+            if stage.name in ("scan", "validate"):
+                unit, amount = "entries/s", entries
+            else:
+                unit, amount = "bytes/s", max(stage.bytes_read, stage.bytes_written)
+            current = {
+                "seconds": round(stage.wall_seconds, 6),
+                "cpu_seconds": round(stage.cpu_seconds, 6),
+                "peak_rss": stage.peak_rss,
+                "throughput": round(amount / max(stage.wall_seconds, 1e-9), 1),
+                "unit": unit,
+            }
+            if stage.name == "par2":
+                current["engine"] = engine
+            previous = best.get(stage.name)
+            if previous is None or current["throughput"] > previous["throughput"]:
+                best[stage.name] = current
+    return {
+        "dataset": {
+            "shape": dataset.shape,
+            "scale": dataset.scale,
+            "seed": dataset.seed,
+            "files": dataset.files,
+            "directories": dataset.directories,
+            "total_size": dataset.total_size,
+        },
+        "host": {"python": platform.python_version(), "machine": platform.machine()},
+        "repeat": repeat,
+        "stages": best,
+    }
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[tuple[str, float, float, bool]]:
+    """Compare stage throughputs with *baseline*.
+
+    Returns ``(stage, baseline, current, regressed)`` rows for every stage
+    present in both (and measured with the same PAR2 engine). A stage has
+    regressed when it is slower than ``baseline × (1 - threshold)``.
+
+    Raises
+    ------
+    ValueError
+        If the baseline was measured on a different dataset.
+    """
+    if results["dataset"] != baseline["dataset"]:
+        raise ValueError("Baseline was recorded for a different dataset (shape, scale or seed).")
+    rows = []
+    for name, current in results["stages"].items():
+        previous = baseline["stages"].get(name)
+        if previous is None or previous.get("engine") != current.get("engine"):
+            continue
+        limit = previous["throughput"] * (1 - threshold)
+        rows.append(
+            (name, previous["throughput"], current["throughput"], current["throughput"] < limit)
+        )
+    return rows
+
+
+def baseline_path(shape: str, scale: float) -> Path:
+    return BASELINE_DIR / f"{shape}-s{scale:g}.json"
+
+
+def _numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _format(value: float, unit: str) -> str:
+    if unit == "bytes/s":
+        return f"{value / 1e6:9.1f} MB/s"
+    return f"{value:9.0f} ent/s"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("shape", choices=SHAPES)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help="comma-separated stages to run (default: %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage; the best counts")
+    parser.add_argument("--workdir", type=Path, help="where datasets are generated and kept")
+    parser.add_argument("--baseline", type=Path, help="baseline JSON (default: per dataset)")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slowdown as a fraction of the baseline (default: %(default)s)",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="store results as baseline")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args()
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    workdir = args.workdir or Path(tempfile.gettempdir()) / "lam-bench"
+    dataset = generate(args.shape, workdir, args.scale)
+    print(
+        f"Dataset {dataset.shape} (scale {dataset.scale:g}): {dataset.files} files, "
+        f"{dataset.directories} directories, {dataset.total_size / 1e6:.1f} MB"
+    )
+    with tempfile.TemporaryDirectory(prefix="lam-bench-out-", dir=workdir) as out:
+        results = run_suite(dataset, Path(out), args.repeat, stages)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    path = args.baseline or baseline_path(args.shape, args.scale)
+    baseline = json.loads(path.read_text()) if path.exists() else None
+    if args.save_baseline:
+        saved = results
+        if baseline is not None and baseline["dataset"] == results["dataset"]:
+            # Stages not run this time keep their recorded values.
+            saved = {**results, "stages": {**baseline["stages"], **results["stages"]}}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(saved, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {path}")
+        baseline = None
+    rows = {}
+    if baseline is not None:
+        try:
+            rows = {name: row for name, *row in compare(results, baseline, args.threshold)}
+        except ValueError as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            sys.exit(2)
+
+    print(f"{'stage':<10} {'seconds':>9} {'cpu s':>8} {'throughput':>15} {'baseline':>15}")
+    for name, stage in results["stages"].items():
+        line = (
+            f"{name:<10} {stage['seconds']:9.3f} {stage['cpu_seconds']:8.2f} "
+            f"{_format(stage['throughput'], stage['unit'])}"
+        )
+        if name in rows:
+            previous, _, regressed = rows[name]
+            change = stage["throughput"] / previous - 1
+            line += f" {_format(previous, stage['unit'])}  {change:+.0%}"
+            if regressed:
+                line += "  REGRESSION"
+        print(line)
+    if baseline is None and not args.save_baseline:
+        print(f"No baseline at {path}; run with --save-baseline to record one.")
+    regressed = [name for name, (_, _, bad) in rows.items() if bad]
+    if regressed:
+        print(
+            f"Throughput regressed by more than {args.threshold:.0%} in: {', '.join(regressed)}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,54 @@
 
 from __future__ import annotations
 
+import contextlib
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Any, Iterable, Optional
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
 from lam import config as cfg
-from lam.pack import packager, par2, validator
 
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
+
+    from lam.pack import batch, metrics, par2_tuning
+    from lam.pack.fingerprint import FingerprintCache, PackSettings
+    from lam.pack.scan import FileTable
+
+# Plain click help and errors: rich's help formatter alone costs more start-up
+# time than everything else `lam --help` and `lam config get` need.
 app = typer.Typer(
     name="lam",
     help="Langzeitarchiv-Manager – long-term digital archiving tool.",
     no_args_is_help=True,
+    rich_markup_mode=None,
 )
 
-console = Console()
+
+class _LazyConsole:
+    """Stand-in for :class:`rich.console.Console`, created on first use.
+
+    Importing rich costs tens of milliseconds; commands such as
+    ``lam config get`` never print through it.
+    """
+
+    _console: Console | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.instance(), name)
+
+    def instance(self) -> Console:
+        """Return the real console (for rich widgets that need one)."""
+        if self._console is None:
+            from rich.console import Console
+
+            type(self)._console = Console()
+        return self._console
+
+
+console = _LazyConsole()
 
 # ---------------------------------------------------------------------------
 # lam pack
@@ -30,11 +61,20 @@ def pack(
     source_dir: Annotated[Path, typer.Argument(help="Source directory to archive.")],
     fmt: Annotated[
         str,
-        typer.Option("--format", "-f", help="Archive format: tar, iso, or dmg."),
+        typer.Option(
+            "--format",
+            "-f",
+            help="Archive format: tar, iso, dmg, or loose (copy files, PAR2 per directory).",
+        ),
     ] = "",
     output: Annotated[
-        Optional[Path],
-        typer.Option("--output", "-o", help="Output directory for archive + PAR2 files."),
+        Optional[list[Path]],
+        typer.Option(
+            "--output",
+            "-o",
+            help="Output directory for archive + PAR2 files; repeat to copy the package "
+            "to further destinations (read once, written in parallel, verified).",
+        ),
     ] = None,
     redundancy: Annotated[
         Optional[int],
@@ -44,18 +84,91 @@ def pack(
         Optional[int],
         typer.Option("--par2-volumes", "-n", help="Number of PAR2 volume files (default: 1)."),
     ] = None,
+    force: Annotated[
+        bool,
+        typer.Option("--force", help="Rebuild even if SOURCE_DIR is unchanged since last pack."),
+    ] = False,
+    disc: Annotated[
+        str,
+        typer.Option("--disc", help="Disc ID recorded in the master index (e.g. BD-0042)."),
+    ] = "",
+    skip_duplicates: Annotated[
+        bool,
+        typer.Option(
+            "--skip-duplicates",
+            help=(
+                "TAR only: store files identical to an earlier one in the package as hard "
+                "links, and list files the master index already holds in other packages."
+            ),
+        ),
+    ] = False,
+    restart: Annotated[
+        bool,
+        typer.Option("--restart", help="Ignore checkpoints of an interrupted run; start over."),
+    ] = False,
+    read_order: Annotated[
+        str,
+        typer.Option(
+            "--read-order",
+            help="TAR only: walk, or physical (prefetch source files in on-disk order).",
+        ),
+    ] = "",
+    content: Annotated[
+        str,
+        typer.Option(
+            "--content",
+            help="Media content check: off, headers (structure) or decode (ffmpeg, slow).",
+        ),
+    ] = "",
+    metrics_json: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--metrics-json",
+            help="Write per-stage time, CPU, I/O and memory metrics to this JSON file.",
+        ),
+    ] = None,
+    progress: Annotated[
+        bool,
+        typer.Option("--progress", help="Show a live display of the running stage."),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Run under cProfile; stats go next to the archive."),
+    ] = False,
 ) -> None:
     """Pack SOURCE_DIR into an archive and create PAR2 redundancy data."""
+    from lam.pack import metrics
+
     # --- Resolve defaults from config ---
     if not fmt:
         fmt = str(cfg.get("pack.default_format") or "tar")
-    if fmt not in ("tar", "iso", "dmg"):
-        console.print(f"[red]Unknown format: {fmt!r}. Choose tar, iso, or dmg.[/red]")
+    if fmt not in ("tar", "iso", "dmg", "loose"):
+        console.print(f"[red]Unknown format: {fmt!r}. Choose tar, iso, dmg, or loose.[/red]")
+        raise typer.Exit(code=1)
+    if skip_duplicates and fmt != "tar":
+        console.print("[red]--skip-duplicates is only supported for TAR archives.[/red]")
+        raise typer.Exit(code=1)
+    if read_order and fmt != "tar":
+        console.print("[red]--read-order is only supported for TAR archives.[/red]")
+        raise typer.Exit(code=1)
+    if not read_order:
+        read_order = str(cfg.get("pack.read_order") or "walk") if fmt == "tar" else "walk"
+    if read_order not in ("walk", "physical"):
+        console.print(f"[red]Unknown read order: {read_order!r}. Choose walk or physical.[/red]")
+        raise typer.Exit(code=1)
+    if not content:
+        content = str(cfg.get("content.check") or "headers")
+    if content not in ("off", "headers", "decode"):
+        console.print(
+            f"[red]Unknown content check: {content!r}. Choose off, headers, or decode.[/red]"
+        )
         raise typer.Exit(code=1)
 
-    if output is None:
+    if not output:
         raw_output = cfg.get("pack.output_dir") or str(Path.home() / "LAM" / "staging")
-        output = Path(str(raw_output)).expanduser()
+        output = [Path(str(raw_output)).expanduser()]
+    # The package is built in the first output and copied from there to the others.
+    primary, copies = output[0], output[1:]
 
     if redundancy is None:
         redundancy = int(cfg.get("pack.redundancy_percent"))
@@ -63,56 +176,1565 @@ def pack(
     if par2_volumes is None:
         par2_volumes = int(cfg.get("pack.par2_volumes"))
 
-    # --- Validate ---
-    console.print(f"[bold]Validating[/bold] {source_dir} …")
+    scan_workers = int(cfg.get("pack.scan_workers"))
+    par2_engine = str(cfg.get("pack.par2_engine"))
+
+    stages = metrics.PipelineMetrics()
+    display = _StageProgress(stages) if progress else None
+    profiler = None
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    outcome = "failed"
     try:
-        validator.validate(source_dir)
-    except validator.ValidationError as exc:
-        console.print(f"[red]Validation failed:[/red] {exc}")
-        raise typer.Exit(code=1) from exc
-    console.print("[green]✓ Validation passed.[/green]")
+        with display if display is not None else contextlib.nullcontext():
+            if profiler is not None:
+                profiler.enable()
+            try:
+                result = _run_pack(
+                    source_dir,
+                    primary,
+                    fmt,
+                    redundancy,
+                    par2_volumes,
+                    force=force,
+                    restart=restart,
+                    disc=disc,
+                    skip_duplicates=skip_duplicates,
+                    read_order=read_order,
+                    content=content,
+                    scan_workers=scan_workers,
+                    par2_engine=par2_engine,
+                    stages=stages,
+                )
+                if copies:
+                    name = source_dir.name if fmt == "loose" else f"{source_dir.name}.{fmt}"
+                    _replicate([primary / name], copies, stages=stages)
+                outcome = result
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        if profiler is not None:
+            primary.mkdir(parents=True, exist_ok=True)
+            stats_path = primary / f"{source_dir.name}.pstats"
+            profiler.dump_stats(stats_path)
+            console.print(f"[dim]Profile written to {stats_path}.[/dim]")
+        if metrics_json is not None:
+            stages.write_json(
+                metrics_json,
+                source=str(source_dir),
+                output=str(primary),
+                format=fmt,
+                outcome=outcome,
+            )
+            console.print(f"[dim]Metrics written to {metrics_json}.[/dim]")
+
+
+def _run_pack(
+    source_dir: Path,
+    output: Path,
+    fmt: str,
+    redundancy: int,
+    par2_volumes: int,
+    *,
+    force: bool,
+    restart: bool,
+    disc: str,
+    skip_duplicates: bool,
+    read_order: str,
+    content: str,
+    scan_workers: int,
+    par2_engine: str,
+    stages: metrics.PipelineMetrics,
+) -> str:
+    """The stages of ``lam pack``; returns ``"packed"`` or ``"unchanged"``."""
+    import dataclasses
+
+    from rich.table import Table
+
+    from lam.pack import (
+        dedup,
+        fingerprint,
+        journal,
+        manifest,
+        packager,
+        par2,
+        tarindex,
+        validator,
+    )
+    from lam.pack.scan import scan
+
+    # --- Scan + validate ---
+    console.print(f"[bold]Validating[/bold] {source_dir} …")
+    with stages.stage("scan"):
+        # A missing source is reported by the validator.
+        try:
+            scanned = scan(source_dir, workers=scan_workers) if source_dir.is_dir() else None
+        except OSError as exc:
+            console.print(
+                f"[red]Validation failed:[/red] Cannot read {exc.filename or source_dir}: "
+                f"{exc.strerror or exc}"
+            )
+            raise typer.Exit(code=1) from exc
+    with stages.stage("validate"):
+        try:
+            table = validator.validate(source_dir, table=scanned)
+        except validator.ValidationError as exc:
+            console.print(f"[red]Validation failed:[/red] {exc}")
+            raise typer.Exit(code=1) from exc
+    console.print(
+        f"[green]✓ Validation passed:[/green] {table.file_count} file(s), "
+        f"{_human_size(table.total_size)}"
+    )
+
+    # --- Fingerprint ---
+    settings = fingerprint.PackSettings(
+        fmt, redundancy, par2_volumes, skip_duplicates, par2_engine=par2_engine
+    )
+    cache = fingerprint.FingerprintCache(output)
+    with stages.stage("fingerprint"):
+        digest = fingerprint.tree_digest(table)
+        if not force:
+            # An unchanged tree gives the archive recorded last time, and its PAR2 blocks.
+            expected = settings
+            previous = cache.archive_size(source_dir.name)
+            if previous and fmt != "loose":
+                block_size = _par2_profile(previous, redundancy).block_size
+                expected = dataclasses.replace(settings, par2_block_size=block_size)
+            outputs = cache.current_outputs(source_dir.name, digest, expected)
+            changed = cache.changed_files(source_dir.name, table) if outputs is None else []
+    if not force:
+        if outputs is not None:
+            console.print(
+                f"[green]✓ Unchanged since the last pack:[/green] {len(outputs)} output file(s) "
+                f"in {output} are current. Use --force to rebuild."
+            )
+            return "unchanged"
+        if changed:
+            console.print(f"[yellow]{len(changed)} path(s) changed since the last pack.[/yellow]")
+
+    # --- Checkpoints of an interrupted run ---
+    checkpoints = None
+    if fmt != "loose":
+        identity = {"tree_digest": digest, "settings": settings.as_dict()}
+        checkpoints = journal.PackJournal(output, source_dir.name, identity, restart=restart)
+        if checkpoints.resumable:
+            console.print(
+                "[yellow]Resuming an interrupted pack[/yellow] (--restart to start over)."
+            )
+
+    # --- Content ---
+    if content != "off":
+        _check_content(table, content, stages)
+
+    # --- Duplicates ---
+    links: dict[str, str] = {}
+    if skip_duplicates:
+        console.print("[bold]Checking for duplicates[/bold] …")
+        with stages.stage("duplicates") as stage:
+            try:
+                report = dedup.find_duplicates([table], workers=int(cfg.get("dedup.workers")))
+            except dedup.DedupError as exc:
+                console.print(f"[red]Duplicate check failed:[/red] {exc}")
+                raise typer.Exit(code=1) from exc
+            stage.add(read=report.bytes_read)
+        links = dedup.link_targets(report.groups)
+        console.print(
+            f"[green]✓ Duplicate check:[/green] {len(links)} duplicate file(s) "
+            f"({_human_size(report.wasted)}) will be stored as hard links "
+            f"[dim](read {_human_size(report.bytes_read)} of "
+            f"{_human_size(report.bytes_scanned)})[/dim]"
+        )
 
     # --- Pack ---
-    console.print(f"[bold]Creating {fmt.upper()} archive[/bold] in {output} …")
-    try:
-        archive_path = packager.create_archive(source_dir, output, fmt=fmt)  # type: ignore[arg-type]
-    except packager.PackagerError as exc:
-        console.print(f"[red]Packaging failed:[/red] {exc}")
-        raise typer.Exit(code=1) from exc
-    archive_size = archive_path.stat().st_size
-    console.print(f"[green]✓ Archive created:[/green] {archive_path} ({_human_size(archive_size)})")
+    done = checkpoints.completed("archive") if checkpoints is not None else None
+    if fmt == "loose":
+        console.print(f"[bold]Copying files[/bold] to {output / source_dir.name} …")
+    elif done is None:
+        console.print(f"[bold]Creating {fmt.upper()} archive[/bold] in {output} …")
+    with stages.stage("archive") as stage:
+        if done is not None:
+            archive_path = done[0]
+        else:
+            try:
+                archive_path = packager.create_archive(
+                    source_dir,
+                    output,
+                    fmt=fmt,  # type: ignore[arg-type]
+                    table=table,
+                    links=links,
+                    journal=checkpoints,
+                    read_order=read_order,  # type: ignore[arg-type]
+                )
+            except packager.PackagerError as exc:
+                console.print(f"[red]Packaging failed:[/red] {exc}")
+                raise typer.Exit(code=1) from exc
+        # A loose package is a directory: its size is that of the copied files.
+        archive_size = table.total_size if fmt == "loose" else archive_path.stat().st_size
+        manifest_file = manifest.manifest_path(archive_path)
+        manifest_size = manifest_file.stat().st_size if manifest_file.exists() else 0
+        index_file = tarindex.index_path(archive_path)
+        index_size = index_file.stat().st_size if fmt == "tar" and index_file.exists() else 0
+        sidecars = [manifest_file] if manifest_size else []
+        sidecars += [index_file] if index_size else []
+        if done is None:
+            linked = sum(r.size for r in table.files() if r.path in links)
+            stage.add(
+                read=table.total_size - linked,
+                written=archive_size + manifest_size + index_size,
+            )
+            if checkpoints is not None:
+                checkpoints.complete_stage("archive", [archive_path, *sidecars])
+    if done is not None:
+        console.print(
+            f"[green]✓ Archive already complete:[/green] {archive_path} "
+            f"({_human_size(archive_size)})"
+        )
+    elif fmt == "loose":
+        console.print(
+            f"[green]✓ Files copied:[/green] {archive_path} "
+            f"({table.file_count} file(s), {_human_size(archive_size)})"
+        )
+    else:
+        console.print(
+            f"[green]✓ Archive created:[/green] {archive_path} ({_human_size(archive_size)})"
+        )
+    if manifest_size and done is None:
+        console.print(f"[green]✓ SHA-256 manifest written:[/green] {manifest_file.name}")
+    if skip_duplicates and manifest_size:
+        _report_archived_elsewhere(manifest_file, source_dir.name)
 
     # --- PAR2 ---
-    console.print(f"[bold]Creating PAR2 redundancy data[/bold] ({redundancy}%) …")
+    if fmt == "loose":
+        return _protect_loose(
+            source_dir,
+            table,
+            archive_path,
+            manifest_file,
+            redundancy,
+            par2_volumes,
+            par2_engine=par2_engine,
+            disc=disc,
+            cache=cache,
+            settings=settings,
+            stages=stages,
+        )
+    profile = _par2_profile(archive_size, redundancy)
+    settings = dataclasses.replace(settings, par2_block_size=profile.block_size)
+    console.print(
+        f"[bold]Creating PAR2 redundancy data[/bold] ({redundancy}%, "
+        f"{profile.block_count} × {_human_size(profile.block_size)} blocks, "
+        f"{profile.threads} thread(s), {profile.memory_mb} MB) …"
+    )
+    with stages.stage("par2") as stage:
+        par2_files = checkpoints.completed("par2") if checkpoints is not None else None
+        if par2_files is None:
+            try:
+                par2_files = par2.create(
+                    archive_path,
+                    redundancy,
+                    par2_volumes,
+                    engine=par2_engine,  # type: ignore[arg-type]
+                    profile=profile,
+                )
+            except par2.Par2Error as exc:
+                console.print(f"[red]PAR2 creation failed:[/red] {exc}")
+                raise typer.Exit(code=1) from exc
+            stage.add(read=archive_size)
+            if checkpoints is not None:
+                checkpoints.complete_stage("par2", par2_files)
+        par2_sizes = {p: p.stat().st_size for p in par2_files}
+        par2_size = sum(par2_sizes.values())
+        stage.add(written=par2_size)
+    console.print(
+        f"[green]✓ PAR2 files created:[/green] {len(par2_files)} file(s) "
+        f"({_human_size(par2_size)})"
+    )
+
+    # --- Summary ---
+    with stages.stage("summary"):
+        outputs = [archive_path, *sidecars, *par2_files]
+        cache.record(source_dir.name, table, settings, outputs)
+        _add_to_index([archive_path], disc)
+        if checkpoints is not None:
+            checkpoints.discard()
+
+        console.print()
+        summary = Table(title="Summary", show_header=True, header_style="bold cyan")
+        summary.add_column("File")
+        summary.add_column("Size", justify="right")
+        summary.add_row(
+            f"[dim]Source: {table.file_count} file(s)[/dim]",
+            f"[dim]{_human_size(table.total_size)}[/dim]",
+        )
+        summary.add_row(str(archive_path.name), _human_size(archive_size))
+        if manifest_size:
+            summary.add_row(str(manifest_file.name), _human_size(manifest_size))
+        if index_size:
+            summary.add_row(str(index_file.name), _human_size(index_size))
+        for p, size in par2_sizes.items():
+            summary.add_row(str(p.name), _human_size(size))
+        total = archive_size + manifest_size + index_size + par2_size
+        summary.add_row("[bold]Total[/bold]", _human_size(total), style="bold")
+        console.print(summary)
+    console.print(f"[bold green]Done.[/bold green] Redundancy: {redundancy}%")
+    return "packed"
+
+
+def _check_content(table: FileTable, level: str, stages: metrics.PipelineMetrics) -> None:
+    """Content stage of ``lam pack``: exits after listing every problem found."""
+    from lam.pack import content
+
+    console.print(f"[bold]Checking file contents[/bold] ({level}) …")
+    cache = content.ContentCache(Path(str(cfg.get("content.cache_path"))).expanduser())
+    decoder = None
+    with stages.stage("content") as stage:
+        try:
+            if level == "decode":
+                decoder = content.FfmpegDecoder(str(cfg.get("content.ffmpeg")))
+            report = content.check_content(
+                table,
+                level,  # type: ignore[arg-type]
+                decoder=decoder,
+                workers=int(cfg.get("content.workers")) or None,
+                cache=cache,
+            )
+        except content.ContentError as exc:
+            console.print(f"[red]Content check failed:[/red] {exc}")
+            raise typer.Exit(code=1) from exc
+        stage.add(read=report.bytes_checked)
+    if report.issues:
+        console.print(f"[red]Content check failed for {len(report.issues)} file(s):[/red]")
+        for issue in report.issues:
+            console.print(f"  {issue.path} [dim]({issue.check})[/dim]: {issue.message}")
+        raise typer.Exit(code=1)
+    console.print(
+        f"[green]✓ Content check passed:[/green] {report.checked} file(s) checked "
+        f"[dim]({report.cached} unchanged since their last check)[/dim]"
+    )
+
+
+def _protect_loose(
+    source_dir: Path,
+    table: FileTable,
+    package_dir: Path,
+    manifest_file: Path,
+    redundancy: int,
+    par2_volumes: int,
+    *,
+    par2_engine: str,
+    disc: str,
+    cache: FingerprintCache,
+    settings: PackSettings,
+    stages: metrics.PipelineMetrics,
+) -> str:
+    """PAR2 and summary stages of ``lam pack --format loose``."""
+    from rich.table import Table
+
+    from lam.pack import loose, par2
+
     try:
-        par2_files = par2.create(archive_path, redundancy, par2_volumes)
-    except par2.Par2Error as exc:
+        batches = loose.plan_sets(
+            table,
+            source_dir.name,
+            max_files=int(cfg.get("loose.max_set_files")),
+            max_size=int(cfg.get("loose.max_set_mb")) * 1024 * 1024,
+        )
+    except loose.LooseError as exc:
         console.print(f"[red]PAR2 creation failed:[/red] {exc}")
         raise typer.Exit(code=1) from exc
-    par2_size = sum(p.stat().st_size for p in par2_files)
+    workers = int(cfg.get("loose.par2_workers"))
     console.print(
-        f"[green]✓ PAR2 files created:[/green] {len(par2_files)} file(s) "
-        f"({_human_size(par2_size)})"
+        f"[bold]Creating PAR2 redundancy data[/bold] ({redundancy}%, {len(batches)} set(s), "
+        f"up to {workers} in parallel) …"
+    )
+    with stages.stage("par2") as stage:
+        try:
+            par2_files = loose.protect(
+                package_dir,
+                batches,
+                redundancy,
+                par2_volumes,
+                engine=par2_engine,  # type: ignore[arg-type]
+                workers=workers,
+            )
+        except par2.Par2Error as exc:
+            console.print(f"[red]PAR2 creation failed:[/red] {exc}")
+            raise typer.Exit(code=1) from exc
+        par2_size = sum(p.stat().st_size for p in par2_files)
+        stage.add(read=table.total_size, written=par2_size)
+    console.print(
+        f"[green]✓ PAR2 files created:[/green] {len(par2_files)} file(s) in "
+        f"{len(batches)} set(s) ({_human_size(par2_size)})"
+    )
+
+    with stages.stage("summary"):
+        copied = [package_dir / record.path for record in table.files()]
+        cache.record(source_dir.name, table, settings, [*copied, manifest_file, *par2_files])
+        _add_to_index([package_dir], disc)
+
+        manifest_size = manifest_file.stat().st_size
+        console.print()
+        summary = Table(title="Summary", show_header=True, header_style="bold cyan")
+        summary.add_column("File")
+        summary.add_column("Size", justify="right")
+        summary.add_row(
+            f"{package_dir.name}/ ({table.file_count} file(s))", _human_size(table.total_size)
+        )
+        summary.add_row(manifest_file.name, _human_size(manifest_size))
+        summary.add_row(
+            f"PAR2: {len(par2_files)} file(s) in {len(batches)} set(s)", _human_size(par2_size)
+        )
+        total = table.total_size + manifest_size + par2_size
+        summary.add_row("[bold]Total[/bold]", _human_size(total), style="bold")
+        console.print(summary)
+    console.print(f"[bold green]Done.[/bold green] Redundancy: {redundancy}%")
+    return "packed"
+
+
+# ---------------------------------------------------------------------------
+# lam pack-batch
+# ---------------------------------------------------------------------------
+
+
+@app.command("pack-batch")
+def pack_batch(
+    sources: Annotated[list[Path], typer.Argument(help="Source directories to archive.")],
+    children: Annotated[
+        bool,
+        typer.Option(
+            "--children",
+            help="Treat each SOURCE as a parent directory and pack its subdirectories.",
+        ),
+    ] = False,
+    fmt: Annotated[
+        str,
+        typer.Option("--format", "-f", help="Archive format: tar, iso, or dmg."),
+    ] = "",
+    output: Annotated[
+        Optional[Path],
+        typer.Option("--output", "-o", help="Output directory for archive + PAR2 files."),
+    ] = None,
+    redundancy: Annotated[
+        Optional[int],
+        typer.Option("--redundancy", "-r", help="PAR2 redundancy in percent (e.g. 15)."),
+    ] = None,
+    par2_volumes: Annotated[
+        Optional[int],
+        typer.Option("--par2-volumes", "-n", help="Number of PAR2 volume files (default: 1)."),
+    ] = None,
+    archive_workers: Annotated[
+        Optional[int],
+        typer.Option("--archive-workers", help="Archives written concurrently."),
+    ] = None,
+    par2_workers: Annotated[
+        Optional[int],
+        typer.Option("--par2-workers", help="PAR2 sets computed concurrently."),
+    ] = None,
+    force: Annotated[
+        bool,
+        typer.Option("--force", help="Rebuild packages that are unchanged since last pack."),
+    ] = False,
+    disc: Annotated[
+        str,
+        typer.Option("--disc", help="Disc ID recorded in the master index (e.g. BD-0042)."),
+    ] = "",
+) -> None:
+    """Pack many directories, overlapping archive writing with PAR2 computation."""
+    import dataclasses
+
+    from rich.table import Table
+
+    from lam.pack import batch, fingerprint
+
+    if not fmt:
+        fmt = str(cfg.get("pack.default_format") or "tar")
+    if fmt == "loose":
+        console.print("[red]--format loose is only supported by lam pack.[/red]")
+        raise typer.Exit(code=1)
+    if fmt not in ("tar", "iso", "dmg"):
+        console.print(f"[red]Unknown format: {fmt!r}. Choose tar, iso, or dmg.[/red]")
+        raise typer.Exit(code=1)
+    if output is None:
+        raw_output = cfg.get("pack.output_dir") or str(Path.home() / "LAM" / "staging")
+        output = Path(str(raw_output)).expanduser()
+    if redundancy is None:
+        redundancy = int(cfg.get("pack.redundancy_percent"))
+    if par2_volumes is None:
+        par2_volumes = int(cfg.get("pack.par2_volumes"))
+    if archive_workers is None:
+        archive_workers = int(cfg.get("pack.archive_workers"))
+    if par2_workers is None:
+        par2_workers = int(cfg.get("pack.par2_workers"))
+
+    if children:
+        packages = []
+        for parent in sources:
+            if not parent.is_dir():
+                console.print(f"[red]Not a directory:[/red] {parent}")
+                raise typer.Exit(code=1)
+            try:
+                packages.extend(batch.child_directories(parent))
+            except OSError as exc:
+                console.print(f"[red]Cannot read {parent}:[/red] {exc.strerror or exc}")
+                raise typer.Exit(code=1) from exc
+    else:
+        packages = list(sources)
+    if not packages:
+        console.print("[yellow]No source directories to pack.[/yellow]")
+        raise typer.Exit(code=1)
+
+    def par2_profile(archive_size: int) -> par2_tuning.Par2Profile:
+        # PAR2 jobs running side by side share the cores.
+        profile = _par2_profile(archive_size, redundancy)
+        return dataclasses.replace(profile, threads=max(1, profile.threads // par2_workers))
+
+    def on_event(result: batch.PackageResult, stage: str, event: str) -> None:
+        name = result.source_dir.name
+        if event == "start":
+            label = "Archiving" if stage == "archive" else "Creating PAR2 for"
+            console.print(f"[bold]{label}[/bold] {name} …")
+        elif event == "done":
+            size = result.archive_size if stage == "archive" else result.par2_size
+            label = "Archive" if stage == "archive" else "PAR2"
+            console.print(f"[green]✓ {label} done:[/green] {name} ({_human_size(size)})")
+        elif event == "skipped":
+            console.print(f"[green]✓ Unchanged:[/green] {name} (skipped)")
+        else:
+            console.print(f"[red]✗ {name} failed during {stage}[/red]")
+
+    console.print(
+        f"[bold]Packing {len(packages)} package(s)[/bold] as {fmt.upper()} into {output} "
+        f"(archive workers: {archive_workers}, PAR2 workers: {par2_workers}) …"
+    )
+    results = batch.run_batch(
+        packages,
+        output,
+        fmt,  # type: ignore[arg-type]
+        redundancy,
+        par2_volumes,
+        engine=str(cfg.get("pack.par2_engine")),  # type: ignore[arg-type]
+        archive_workers=archive_workers,
+        par2_workers=par2_workers,
+        scan_workers=int(cfg.get("pack.scan_workers")),
+        par2_profile=par2_profile,
+        cache=fingerprint.FingerprintCache(output),
+        force=force,
+        on_event=on_event,
     )
 
     # --- Summary ---
     console.print()
-    table = Table(title="Summary", show_header=True, header_style="bold cyan")
-    table.add_column("File")
+    summary = Table(title="Batch summary", show_header=True, header_style="bold cyan")
+    summary.add_column("Package")
+    summary.add_column("Files", justify="right")
+    summary.add_column("Archive", justify="right")
+    summary.add_column("PAR2", justify="right")
+    summary.add_column("Total", justify="right")
+    summary.add_column("Status")
+    for r in results:
+        if not r.ok:
+            status = f"[red]failed ({r.failed_stage})[/red]"
+        else:
+            status = "[green]skipped (unchanged)[/green]" if r.skipped else "[green]ok[/green]"
+        summary.add_row(
+            r.source_dir.name,
+            str(r.file_count),
+            _human_size(r.archive_size),
+            f"{len(r.par2_files)} file(s), {_human_size(r.par2_size)}",
+            _human_size(r.total_size),
+            status,
+        )
+    succeeded = [r for r in results if r.ok]
+    summary.add_row(
+        "[bold]Total[/bold]",
+        str(sum(r.file_count for r in succeeded)),
+        _human_size(sum(r.archive_size for r in succeeded)),
+        _human_size(sum(r.par2_size for r in succeeded)),
+        _human_size(sum(r.total_size for r in succeeded)),
+        f"{len(succeeded)}/{len(results)} ok",
+        style="bold",
+    )
+    console.print(summary)
+    _add_to_index([r.archive_path for r in succeeded if r.archive_path and not r.skipped], disc)
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        console.print()
+        console.print(f"[red bold]{len(failed)} package(s) failed:[/red bold]")
+        for r in failed:
+            console.print(
+                f"  [red]✗[/red] {r.source_dir} [dim]({r.failed_stage})[/dim]: {r.error}"
+            )
+        raise typer.Exit(code=1)
+    console.print(f"[bold green]Done.[/bold green] Redundancy: {redundancy}%")
+
+
+# ---------------------------------------------------------------------------
+# lam plan
+# ---------------------------------------------------------------------------
+
+
+@app.command("plan")
+def plan(
+    source_dir: Annotated[
+        Path, typer.Argument(help="Ingest directory; each subdirectory is one package.")
+    ],
+    media: Annotated[
+        str,
+        typer.Option("--media", "-m", help="Target medium: bd25, bd50, or bd100."),
+    ] = "",
+    capacity_gb: Annotated[
+        Optional[float],
+        typer.Option("--capacity-gb", help="Custom medium capacity in GB (overrides --media)."),
+    ] = None,
+    fmt: Annotated[
+        str,
+        typer.Option("--format", "-f", help="Archive format: tar, iso, or dmg."),
+    ] = "",
+    redundancy: Annotated[
+        Optional[int],
+        typer.Option("--redundancy", "-r", help="PAR2 redundancy in percent (e.g. 15)."),
+    ] = None,
+    refine: Annotated[
+        bool,
+        typer.Option("--refine/--no-refine", help="Branch-and-bound refinement after FFD."),
+    ] = True,
+    show_packages: Annotated[
+        bool,
+        typer.Option("--show-packages", help="List the packages assigned to each disc."),
+    ] = False,
+    csv_path: Annotated[
+        Optional[Path],
+        typer.Option("--csv", help="Write the plan (disc, package, bytes) to a CSV file."),
+    ] = None,
+) -> None:
+    """Plan how the packages in SOURCE_DIR fill discs without splitting any package."""
+    import csv
+    import time
+
+    from rich.table import Table
+
+    from lam.pack import planner
+
+    if not media:
+        media = str(cfg.get("plan.media") or "bd25")
+    if capacity_gb is not None:
+        capacity = int(capacity_gb * 1_000_000_000)
+        media = f"{capacity_gb:g} GB"
+    elif media in planner.MEDIA:
+        capacity = planner.MEDIA[media]
+    else:
+        console.print(
+            f"[red]Unknown medium: {media!r}. Choose {', '.join(planner.MEDIA)}"
+            " or use --capacity-gb.[/red]"
+        )
+        raise typer.Exit(code=1)
+    if not fmt:
+        fmt = str(cfg.get("pack.default_format") or "tar")
+    if redundancy is None:
+        redundancy = int(cfg.get("pack.redundancy_percent"))
+    if not source_dir.is_dir():
+        console.print(f"[red]Not a directory:[/red] {source_dir}")
+        raise typer.Exit(code=1)
+
+    started = time.perf_counter()
+    console.print(f"[bold]Scanning[/bold] {source_dir} …")
+    packages = planner.estimate_packages(
+        source_dir,
+        fmt,
+        redundancy,
+        int(cfg.get("pack.par2_volumes")),
+        scan_workers=int(cfg.get("pack.scan_workers")),
+    )
+    try:
+        result = planner.plan(packages, capacity, refine=refine)
+    except planner.PlanError as exc:
+        console.print(f"[red]Planning failed:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+    elapsed = time.perf_counter() - started
+
+    table = Table(
+        title=f"Disc plan ({media}, {fmt.upper()} + {redundancy}% PAR2)",
+        show_header=True,
+        header_style="bold cyan",
+    )
+    table.add_column("Disc", justify="right")
+    table.add_column("Packages", justify="right")
+    table.add_column("Used", justify="right")
+    table.add_column("Free", justify="right")
+    table.add_column("Fill", justify="right")
+    if show_packages:
+        table.add_column("Contents")
+    for number, disc in enumerate(result.discs, start=1):
+        row = [
+            str(number),
+            str(len(disc.packages)),
+            _human_size(disc.used),
+            _human_size(disc.capacity - disc.used),
+            f"{disc.fill_ratio:.1%}",
+        ]
+        if show_packages:
+            row.append(", ".join(p.name for p in disc.packages))
+        table.add_row(*row)
+    console.print(table)
+    console.print(
+        f"{len(packages)} package(s), {_human_size(result.total_size)} → "
+        f"[bold]{len(result.discs)} disc(s)[/bold] (lower bound {result.lower_bound}), "
+        f"overall fill {result.fill_ratio:.1%}"
+        + (", refined by branch-and-bound" if result.refined else "")
+        + f" [dim]({elapsed:.2f} s)[/dim]"
+    )
+
+    if csv_path is not None:
+        with csv_path.open("w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("disc", "package", "estimated_bytes"))
+            for number, disc in enumerate(result.discs, start=1):
+                for package in disc.packages:
+                    writer.writerow((number, package.name, package.size))
+        console.print(f"[green]✓ Plan written:[/green] {csv_path}")
+
+
+# ---------------------------------------------------------------------------
+# lam par2
+# ---------------------------------------------------------------------------
+
+par2_app = typer.Typer(help="PAR2 tuning tools.", rich_markup_mode=None)
+app.add_typer(par2_app, name="par2")
+
+
+@par2_app.command("calibrate")
+def par2_calibrate(
+    sample_mb: Annotated[
+        int,
+        typer.Option("--sample-mb", help="Size of the generated sample file in MB."),
+    ] = 128,
+    redundancy: Annotated[
+        Optional[int],
+        typer.Option("--redundancy", "-r", help="PAR2 redundancy in percent (e.g. 15)."),
+    ] = None,
+) -> None:
+    """Benchmark PAR2 profiles on a sample file and store the fastest in the config."""
+    import os
+    import tempfile
+
+    from rich.table import Table
+
+    from lam.pack import par2, par2_tuning
+
+    if redundancy is None:
+        redundancy = int(cfg.get("pack.redundancy_percent"))
+    engine = str(cfg.get("pack.par2_engine"))
+
+    def run(sample: Path, profile: par2_tuning.Par2Profile) -> None:
+        par2.create(sample, redundancy, 1, engine=engine, profile=profile)  # type: ignore[arg-type]
+
+    with tempfile.TemporaryDirectory(prefix="lam-calibrate-") as tmp:
+        sample = Path(tmp) / "sample.bin"
+        with sample.open("wb") as fh:
+            for _ in range(sample_mb):
+                fh.write(os.urandom(1024 * 1024))
+        profiles = par2_tuning.candidates(sample.stat().st_size, redundancy)
+        console.print(
+            f"[bold]Calibrating[/bold] {len(profiles)} profile(s) on a {sample_mb} MB sample "
+            f"({engine}) …"
+        )
+        try:
+            results = par2_tuning.calibrate(sample, run, profiles)
+        except par2.Par2Error as exc:
+            console.print(f"[red]Calibration failed:[/red] {exc}")
+            raise typer.Exit(code=1) from exc
+
+    table = Table(title="PAR2 calibration", show_header=True, header_style="bold cyan")
+    table.add_column("Blocks", justify="right")
+    table.add_column("Block size", justify="right")
+    table.add_column("Threads", justify="right")
+    table.add_column("Memory", justify="right")
+    table.add_column("Time", justify="right")
+    table.add_column("Throughput", justify="right")
+    for profile, seconds in results:
+        table.add_row(
+            str(profile.block_count),
+            _human_size(profile.block_size),
+            str(profile.threads),
+            f"{profile.memory_mb} MB",
+            f"{seconds:.2f} s",
+            f"{_human_size(int(sample_mb * 1024 * 1024 / seconds))}/s",
+        )
+    console.print(table)
+
+    # The block count, not the size: tune() scales it to every archive's size.
+    best, _ = results[0]
+    cfg.set_value("par2.block_count", str(best.block_count))
+    cfg.set_value("par2.threads", str(best.threads))
+    console.print(
+        f"[green]✓ Stored profile:[/green] par2.block_count = {best.block_count}, "
+        f"par2.threads = {best.threads}"
+    )
+
+
+# ---------------------------------------------------------------------------
+# lam dedup
+# ---------------------------------------------------------------------------
+
+
+@app.command("dedup")
+def dedup_command(
+    directories: Annotated[list[Path], typer.Argument(help="Directories to compare.")],
+    workers: Annotated[
+        Optional[int],
+        typer.Option("--workers", help="Files hashed concurrently."),
+    ] = None,
+    limit: Annotated[
+        int,
+        typer.Option("--limit", help="Number of duplicate groups to show."),
+    ] = 20,
+    csv_path: Annotated[
+        Optional[Path],
+        typer.Option("--csv", help="Write every duplicate (group, sha256, size, path) to a CSV."),
+    ] = None,
+) -> None:
+    """Find files with identical content across DIRECTORIES."""
+    import csv
+
+    from rich.table import Table
+
+    from lam.pack import dedup
+    from lam.pack.scan import scan
+
+    if workers is None:
+        workers = int(cfg.get("dedup.workers"))
+    for directory in directories:
+        if not directory.is_dir():
+            console.print(f"[red]Not a directory:[/red] {directory}")
+            raise typer.Exit(code=1)
+
+    console.print(f"[bold]Scanning[/bold] {len(directories)} directory(ies) …")
+    scan_workers = int(cfg.get("pack.scan_workers"))
+    tables = [scan(d, workers=scan_workers) for d in directories]
+    try:
+        report = dedup.find_duplicates(tables, workers=workers)
+    except dedup.DedupError as exc:
+        console.print(f"[red]Duplicate check failed:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+
+    if report.groups:
+        table = Table(title="Duplicate groups", show_header=True, header_style="bold cyan")
+        table.add_column("Wasted", justify="right")
+        table.add_column("Size", justify="right")
+        table.add_column("Copies", justify="right")
+        table.add_column("SHA-256")
+        table.add_column("Files")
+        for group in report.groups[:limit]:
+            table.add_row(
+                _human_size(group.wasted),
+                _human_size(group.size),
+                str(len(group.files)),
+                group.sha256[:16] + "…",
+                "\n".join(str(f.absolute) for f in group.files),
+            )
+        console.print(table)
+        if len(report.groups) > limit:
+            console.print(
+                f"[dim]{len(report.groups) - limit} more group(s) not shown "
+                "(use --limit or --csv).[/dim]"
+            )
+    share = report.bytes_read / report.bytes_scanned if report.bytes_scanned else 0.0
+    console.print(
+        f"{report.files_scanned} file(s), {_human_size(report.bytes_scanned)} scanned → "
+        f"[bold]{len(report.groups)} duplicate group(s), {_human_size(report.wasted)} wasted[/bold]"
+        f" [dim](read {_human_size(report.bytes_read)}, {share:.1%})[/dim]"
+    )
+
+    if csv_path is not None:
+        with csv_path.open("w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("group", "sha256", "size", "path"))
+            for number, group in enumerate(report.groups, start=1):
+                for ref in group.files:
+                    writer.writerow((number, group.sha256, group.size, str(ref.absolute)))
+        console.print(f"[green]✓ Report written:[/green] {csv_path}")
+
+
+# ---------------------------------------------------------------------------
+# lam hash
+# ---------------------------------------------------------------------------
+
+
+@app.command("hash")
+def hash_command(
+    roots: Annotated[
+        list[Path], typer.Argument(help="Directories (or single files, e.g. archives) to hash.")
+    ],
+    fmt: Annotated[
+        str,
+        typer.Option("--format", "-f", help="Manifest format: csv (LAM manifest) or sha256sum."),
+    ] = "csv",
+    output: Annotated[
+        Optional[Path],
+        typer.Option("--output", "-o", help="Manifest file (one root only; default: next to it)."),
+    ] = None,
+    workers: Annotated[
+        Optional[int],
+        typer.Option("--workers", "-w", help="Files hashed concurrently per device."),
+    ] = None,
+    readers_per_device: Annotated[
+        Optional[int],
+        typer.Option("--readers-per-device", help="Fixed readers per disk (default: auto)."),
+    ] = None,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Read every file, even if unchanged since the last run."),
+    ] = False,
+    force: Annotated[
+        bool,
+        typer.Option("--force", help="Overwrite existing manifests."),
+    ] = False,
+) -> None:
+    """Write a SHA-256 manifest, sorted by path, for each of ROOTS."""
+    import time
+
+    from lam.pack import hashing
+
+    if fmt not in hashing.FORMATS:
+        console.print(f"[red]Unknown format {fmt!r}; use {' or '.join(hashing.FORMATS)}.[/red]")
+        raise typer.Exit(code=1)
+    if output is not None and len(roots) > 1:
+        console.print("[red]--output needs a single root.[/red]")
+        raise typer.Exit(code=1)
+    for root in roots:
+        if not root.exists():
+            console.print(f"[red]Not found:[/red] {root}")
+            raise typer.Exit(code=1)
+    manifest_format: hashing.ManifestFormat = fmt  # type: ignore[assignment]
+    outputs = [output or hashing.default_output(root, manifest_format) for root in roots]
+    existing = [path for path in outputs if path.exists()]
+    if existing and not force:
+        # A manifest is the reference that later checks compare against.
+        for path in existing:
+            console.print(f"[red]Manifest exists:[/red] {path}")
+        console.print("Use --force to overwrite, or --output to write elsewhere.")
+        raise typer.Exit(code=1)
+    if workers is None:
+        workers = int(cfg.get("hash.workers")) or None
+    if readers_per_device is None:
+        readers_per_device = int(cfg.get("hash.readers_per_device")) or None
+    cache = None
+    if not no_cache:
+        cache = hashing.HashCache(Path(str(cfg.get("hash.cache_path"))).expanduser())
+
+    console.print(f"[bold]Hashing[/bold] {len(roots)} tree(s) …")
+    started = time.monotonic()
+    try:
+        reports = hashing.hash_trees(
+            roots,
+            workers=workers,
+            readers_per_device=readers_per_device,
+            cache=cache,
+            scan_workers=int(cfg.get("pack.scan_workers")),
+        )
+    except hashing.HashError as exc:
+        console.print(f"[red]✗ Hashing failed:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+    seconds = time.monotonic() - started
+
+    failed = 0
+    for report, path in zip(reports, outputs):
+        for name, message in report.errors:
+            console.print(f"[red]✗ Cannot read[/red] {name}: {message}")
+        failed += len(report.errors)
+        hashing.write_manifest(path, report.entries, manifest_format)
+        console.print(
+            f"[green]✓ Manifest written:[/green] {path} ({len(report.entries)} file(s), "
+            f"{report.cached} unchanged since the last run)"
+        )
+    hashed = sum(r.bytes_hashed for r in reports)
+    rate = hashed / seconds if seconds else 0.0
+    console.print(
+        f"Read {_human_size(hashed)} in {seconds:.1f}s [dim]({_human_size(int(rate))}/s)[/dim]"
+    )
+    if failed:
+        console.print(f"[red]✗ {failed} file(s) could not be read and are missing.[/red]")
+        raise typer.Exit(code=1)
+
+
+# ---------------------------------------------------------------------------
+# lam find / lam index
+# ---------------------------------------------------------------------------
+
+
+@app.command("find")
+def find(
+    query: Annotated[str, typer.Argument(help="SHA-256 hash or (part of) a file name.")],
+    limit: Annotated[int, typer.Option("--limit", help="Maximum number of name matches.")] = 50,
+) -> None:
+    """Look up which disc holds a file, by SHA-256 hash or file name."""
+    from rich.table import Table
+
+    from lam.index import master
+
+    index = master.MasterIndex(_index_path())
+    try:
+        if master.is_sha256(query):
+            entries = index.find_hash(query)
+        else:
+            entries = index.find_name(query, limit=limit)
+    except master.MasterIndexError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1) from exc
+    if not entries:
+        console.print(f"[yellow]No match for[/yellow] {query!r}")
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Matches for {query!r}", show_header=True, header_style="bold cyan")
+    table.add_column("Disc")
+    table.add_column("Package")
+    table.add_column("Path")
     table.add_column("Size", justify="right")
-    table.add_row(str(archive_path.name), _human_size(archive_size))
-    for p in par2_files:
-        table.add_row(str(p.name), _human_size(p.stat().st_size))
-    table.add_row("[bold]Total[/bold]", _human_size(archive_size + par2_size), style="bold")
+    table.add_column("SHA-256")
+    for entry in entries:
+        table.add_row(
+            entry.disc or "[dim]–[/dim]",
+            entry.package,
+            entry.path,
+            _human_size(entry.size),
+            entry.sha256[:16] + "…",
+        )
     console.print(table)
-    console.print(f"[bold green]Done.[/bold green] Redundancy: {redundancy}%")
+    if len(entries) >= limit and not master.is_sha256(query):
+        console.print(f"[dim]Showing the first {limit} matches (use --limit for more).[/dim]")
+
+
+index_app = typer.Typer(help="Master index maintenance.", rich_markup_mode=None)
+app.add_typer(index_app, name="index")
+
+
+@index_app.command("add")
+def index_add(
+    manifests: Annotated[list[Path], typer.Argument(help="Manifest files (*.manifest.csv).")],
+    disc: Annotated[str, typer.Option("--disc", help="Disc ID for these packages.")] = "",
+) -> None:
+    """Add package manifests to the master index, replacing their earlier rows on the disc."""
+    from lam.index import master
+    from lam.pack import manifest
+
+    index = master.MasterIndex(_index_path())
+    for manifest_file in manifests:
+        package = manifest_file.name.removesuffix(manifest.MANIFEST_SUFFIX)
+        rows = index.add_manifest(manifest_file, package, disc)
+        console.print(f"[green]✓ Indexed[/green] {package}: {rows} file(s)")
+
+
+@index_app.command("rebuild")
+def index_rebuild() -> None:
+    """Rebuild the hash and name lookup sidecars from the master index CSV."""
+    from lam.index import master
+
+    index = master.MasterIndex(_index_path())
+    if not index.csv_path.exists():
+        console.print(f"[red]Master index not found:[/red] {index.csv_path}")
+        raise typer.Exit(code=1)
+    index.refresh(force=True)
+    console.print(
+        f"[green]✓ Rebuilt[/green] {index.hash_path.name} and {index.names_path.name}"
+    )
+
+
+# ---------------------------------------------------------------------------
+# lam extract
+# ---------------------------------------------------------------------------
+
+
+@app.command("extract")
+def extract(
+    archive: Annotated[Path, typer.Argument(help="TAR archive (e.g. on a mounted disc).")],
+    members: Annotated[
+        list[str], typer.Argument(help="Member paths, e.g. Familie_2025/Urlaub/clip.mp4.")
+    ],
+    output: Annotated[
+        Path, typer.Option("--output", "-o", help="Directory to extract into.")
+    ] = Path("."),
+    rebuild_index: Annotated[
+        bool,
+        typer.Option("--rebuild-index", help="Re-read the member offsets from the TAR headers."),
+    ] = False,
+) -> None:
+    """Extract single files (or directories) from a TAR without reading all of it.
+
+    The member offset index next to the archive (Name.index.csv) is used to seek
+    straight to each member; without it, the TAR headers are scanned once. Files
+    are checked against the SHA-256 manifest when there is one.
+    """
+    from lam.pack import tarindex
+
+    if not archive.is_file():
+        console.print(f"[red]Not found:[/red] {archive}")
+        raise typer.Exit(code=1)
+    try:
+        report = tarindex.extract(archive, members, output, rebuild=rebuild_index)
+    except (tarindex.TarIndexError, OSError) as exc:
+        console.print(f"[red]✗ Extraction failed:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+    if report.scanned:
+        console.print(
+            f"[dim]No usable member index; scanned the headers of {archive.name}.[/dim]"
+        )
+    for path in report.mismatches:
+        console.print(f"[red]✗ SHA-256 mismatch:[/red] {path}")
+    console.print(
+        f"[green]✓ Extracted[/green] {len(report.extracted)} member(s) "
+        f"({_human_size(report.bytes_copied)}) to {output}"
+        + (f", {report.verified} verified against the manifest" if report.verified else "")
+    )
+    if report.mismatches:
+        raise typer.Exit(code=1)
+
+
+# ---------------------------------------------------------------------------
+# lam replicate
+# ---------------------------------------------------------------------------
+
+
+@app.command("replicate")
+def replicate_command(
+    packages: Annotated[
+        list[Path],
+        typer.Argument(help="Packages: archives (Name.tar, .iso, .dmg) or loose package dirs."),
+    ],
+    to: Annotated[
+        list[Path], typer.Option("--to", "-t", help="Destination directory; repeat for each copy.")
+    ],
+    queue_depth: Annotated[
+        Optional[int],
+        typer.Option("--queue-depth", help="8 MiB chunks buffered per destination."),
+    ] = None,
+    no_verify: Annotated[
+        bool, typer.Option("--no-verify", help="Skip reading the copies back.")
+    ] = False,
+    force: Annotated[
+        bool,
+        typer.Option("--force", help="Rewrite files already present with the same size and mtime."),
+    ] = False,
+) -> None:
+    """Copy packages with their manifests and PAR2 sets to several destinations at once.
+
+    Every file is read once and written to all destinations in parallel; each copy
+    is then read back and compared with the SHA-256 taken while reading.
+    """
+    _replicate(packages, to, queue_depth=queue_depth, verify=not no_verify, force=force)
+
+
+def _replicate(
+    packages: list[Path],
+    destinations: list[Path],
+    *,
+    queue_depth: int | None = None,
+    verify: bool = True,
+    force: bool = False,
+    stages: metrics.PipelineMetrics | None = None,
+) -> None:
+    """Copy *packages* to *destinations* and print a report; exit 1 on any failure."""
+    from rich.table import Table
+
+    from lam.pack import replicate
+
+    if queue_depth is None:
+        queue_depth = int(cfg.get("replicate.queue_depth"))
+    files: list[replicate.PackageFile] = []
+    try:
+        for package in packages:
+            files.extend(replicate.package_files(package))
+    except replicate.ReplicateError as exc:
+        console.print(f"[red]✗ {exc}[/red]")
+        raise typer.Exit(code=1) from exc
+    console.print(
+        f"[bold]Copying[/bold] {len(files)} file(s) ({_human_size(sum(f.size for f in files))}) "
+        f"to {len(destinations)} destination(s) …"
+    )
+    with stages.stage("replicate") if stages is not None else contextlib.nullcontext() as stage:
+        try:
+            reports = replicate.replicate(
+                files, destinations, queue_depth=queue_depth, verify=verify, force=force
+            )
+        except replicate.ReplicateError as exc:
+            console.print(f"[red]✗ Copying failed:[/red] {exc}")
+            raise typer.Exit(code=1) from exc
+        if stage is not None:
+            stage.add(written=sum(r.bytes_written for r in reports))
+
+    table = Table(title="Copies", show_header=True, header_style="bold cyan")
+    table.add_column("Destination")
+    table.add_column("Written", justify="right")
+    table.add_column("Skipped", justify="right")
+    table.add_column("Verified", justify="right")
+    table.add_column("Status")
+    for report in reports:
+        if report.error:
+            status = f"[red]failed: {report.error}[/red]"
+        elif report.mismatches:
+            status = f"[red]{len(report.mismatches)} mismatch(es)[/red]"
+        else:
+            status = "[green]ok[/green]"
+        table.add_row(
+            str(report.destination),
+            f"{report.written} ({_human_size(report.bytes_written)})",
+            str(report.skipped),
+            str(report.verified) if verify else "–",
+            status,
+        )
+    console.print(table)
+    for report in reports:
+        for name in report.mismatches:
+            console.print(f"[red]✗ SHA-256 mismatch:[/red] {report.destination / name}")
+    bad = [r for r in reports if not r.ok]
+    if bad:
+        console.print(f"[red]✗ {len(bad)} of {len(reports)} destination(s) failed.[/red]")
+        raise typer.Exit(code=1)
+    checked = " and verified" if verify else ""
+    console.print(f"[green]✓ All {len(reports)} destination(s) complete{checked}.[/green]")
+
+
+# ---------------------------------------------------------------------------
+# lam sync
+# ---------------------------------------------------------------------------
+
+
+@app.command("sync")
+def sync(
+    destination: Annotated[Path, typer.Argument(help="Backup directory holding the packages.")],
+    source: Annotated[
+        Optional[Path],
+        typer.Option("--from", help="Mirror this directory into DESTINATION with rsync first."),
+    ] = None,
+    log: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--log", help="Itemized log of an rsync run into DESTINATION ('-' for stdin)."
+        ),
+    ] = None,
+    delete: Annotated[
+        bool,
+        typer.Option("--delete", help="Remove files missing from the source (with --from)."),
+    ] = False,
+    depth: Annotated[
+        int,
+        typer.Option("--depth", help="Path components that name a package (default: 1)."),
+    ] = 1,
+    workers: Annotated[
+        Optional[int],
+        typer.Option("--workers", "-w", help="Packages whose PAR2 sets are computed at once."),
+    ] = None,
+    dry_run: Annotated[
+        bool,
+        typer.Option("--dry-run", help="Only list the packages that would be refreshed."),
+    ] = False,
+) -> None:
+    """Update a backup disk and recompute PAR2 only for the packages that changed.
+
+    With --from, rsync copies SOURCE into DESTINATION (PAR2 files excluded); with
+    --log, the output of an `rsync --itemize-changes` run is read instead. Packages
+    not refreshed because of an interruption are remembered and refreshed next time.
+    """
+    import sys
+
+    from rich.table import Table
+
+    from lam.sync import refresh as sync_refresh
+    from lam.sync import rsync
+
+    if (source is None) == (log is None):
+        console.print("[red]Pass exactly one of --from and --log.[/red]")
+        raise typer.Exit(code=1)
+    if depth < 1:
+        console.print("[red]--depth must be at least 1.[/red]")
+        raise typer.Exit(code=1)
+    if not destination.is_dir():
+        console.print(f"[red]Not a directory:[/red] {destination}")
+        raise typer.Exit(code=1)
+    if workers is None:
+        workers = int(cfg.get("sync.workers"))
+
+    state_dir = Path(str(cfg.get("sync.state_dir"))).expanduser()
+    pending = sync_refresh.PendingPackages(sync_refresh.state_path(state_dir, destination))
+    if len(pending):
+        console.print(f"[dim]{len(pending)} package(s) left over from an earlier run.[/dim]")
+
+    changes = rsync.ChangeSet()
+    try:
+        with contextlib.ExitStack() as stack:
+            if source is not None:
+                if not source.is_dir():
+                    console.print(f"[red]Not a directory:[/red] {source}")
+                    raise typer.Exit(code=1)
+                console.print(f"[bold]Syncing[/bold] {source} → {destination}")
+                lines: Iterable[str] = stack.enter_context(
+                    contextlib.closing(rsync.run(source, destination, delete=delete))
+                )
+            elif str(log) == "-":
+                lines = sys.stdin
+            else:
+                assert log is not None
+                lines = stack.enter_context(log.open(encoding="utf-8", errors="surrogateescape"))
+            for line in lines:
+                known = len(changes.packages)
+                changes.add(line, depth)
+                if not dry_run and len(changes.packages) > known:
+                    # Remember packages as soon as rsync touches them: an
+                    # interrupted transfer does not repeat their changes.
+                    pending.add(changes.packages)
+    except (rsync.SyncError, OSError) as exc:
+        console.print(f"[red]✗ Sync failed:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+
+    for path in changes.outside:
+        console.print(f"[yellow]Not in a package (not protected):[/yellow] {path}")
+    packages = sorted(set(changes.packages) | set(pending))
+    console.print(
+        f"{changes.lines} log line(s), {sum(changes.packages.values())} changed file(s) "
+        f"in {len(changes.packages)} package(s)"
+    )
+    if not packages:
+        console.print("[green]✓ No package changed; PAR2 sets are up to date.[/green]")
+        return
+    if dry_run:
+        for package in packages:
+            console.print(f"  would refresh {package}")
+        return
+
+    engine = str(cfg.get("pack.par2_engine"))
+    console.print(
+        f"[bold]Refreshing PAR2[/bold] for {len(packages)} package(s) "
+        f"(engine: {engine}, {workers} at a time)"
+    )
+    colours = {"updated": "green", "removed": "dim", "error": "red"}
+
+    def on_done(update: sync_refresh.PackageUpdate) -> None:
+        colour = colours[update.status]
+        console.print(
+            f"  [{colour}]{update.status:<8}[/{colour}] {update.package} "
+            f"[dim]({update.sets} set(s), {update.seconds:.1f}s)[/dim]"
+        )
+
+    updates = sync_refresh.refresh(
+        destination,
+        packages,
+        int(cfg.get("pack.redundancy_percent")),
+        int(cfg.get("pack.par2_volumes")),
+        engine=engine,  # type: ignore[arg-type]
+        workers=workers,
+        max_files=int(cfg.get("loose.max_set_files")),
+        max_size=int(cfg.get("loose.max_set_mb")) * 1024 * 1024,
+        pending=pending,
+        on_done=on_done,
+    )
+
+    table = Table(title="PAR2 refresh", show_header=True, header_style="bold cyan")
+    table.add_column("Package")
+    table.add_column("Status")
+    table.add_column("Files", justify="right")
+    table.add_column("Sets", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("PAR2", justify="right")
+    table.add_column("Detail")
+    for update in updates:
+        colour = colours[update.status]
+        table.add_row(
+            update.package,
+            f"[{colour}]{update.status}[/{colour}]",
+            str(changes.packages.get(update.package, "–")),
+            str(update.sets),
+            _human_size(update.size),
+            _human_size(update.par2_size),
+            update.detail,
+        )
+    console.print(table)
+
+    failed = [u for u in updates if not u.ok]
+    if failed:
+        console.print(
+            f"[red]✗ {len(failed)} package(s) failed; they are retried on the next run.[/red]"
+        )
+        raise typer.Exit(code=1)
+    console.print(f"[green]✓ PAR2 sets of {len(updates)} package(s) refreshed.[/green]")
+
+
+# ---------------------------------------------------------------------------
+# lam coverage
+# ---------------------------------------------------------------------------
+
+
+@app.command("coverage")
+def coverage(
+    root: Annotated[
+        Optional[Path],
+        typer.Argument(help="NAS directory to check (default: backup.nas_root)."),
+    ] = None,
+    min_size: Annotated[
+        int,
+        typer.Option("--min-size", help="Hide gaps smaller than this many MB."),
+    ] = 0,
+) -> None:
+    """List the directories of the NAS that are not assigned to any backup disk.
+
+    Assignments are read from the backup.disks table of the config file, e.g.
+    ARCHIV_A = ["/vault/2010", "/vault/2011"]. Exits with status 1 if there are gaps.
+    """
+    from rich.table import Table
+
+    from lam.sync import coverage as cov
+
+    if root is None:
+        raw_root = str(cfg.get("backup.nas_root") or "")
+        if not raw_root:
+            console.print("[red]No NAS root given and backup.nas_root is not set.[/red]")
+            raise typer.Exit(code=1)
+        root = Path(raw_root).expanduser()
+    try:
+        assignments = cov.parse_assignments(cfg.get("backup.disks") or {})
+        report = cov.find_gaps(root, assignments)
+    except cov.CoverageError as exc:
+        console.print(f"[red]✗ {exc}[/red]")
+        raise typer.Exit(code=1) from exc
+    if not assignments:
+        console.print("[yellow]No directories are assigned to backup disks.[/yellow]")
+
+    for path, disks in report.missing:
+        console.print(f"[yellow]Assigned to {', '.join(disks)} but missing:[/yellow] {path}")
+    for path, message in report.errors:
+        console.print(f"[red]Cannot read[/red] {path}: {message}")
+    shown = [g for g in report.gaps if g.size >= min_size * 1024 * 1024]
+    if shown:
+        table = Table(title="Not on any backup disk", show_header=True, header_style="bold cyan")
+        table.add_column("Path")
+        table.add_column("Files", justify="right")
+        table.add_column("Size", justify="right")
+        for gap in shown:
+            label = str(gap.path) if gap.kind == "tree" else f"{gap.path} [dim](files only)[/dim]"
+            table.add_row(label, str(gap.files), _human_size(gap.size))
+        console.print(table)
+    hidden = len(report.gaps) - len(shown)
+    console.print(
+        f"[dim]{report.directories} directories listed, "
+        f"{len(report.covered)} assigned path(s) found"
+        + (f", {hidden} gap(s) under {min_size} MB hidden" if hidden else "")
+        + "[/dim]"
+    )
+    if report.gaps:
+        console.print(
+            f"[red]✗ {len(report.gaps)} gap(s), {_human_size(report.uncovered_size)} "
+            f"not on any backup disk.[/red]"
+        )
+        raise typer.Exit(code=1)
+    console.print(
+        f"[green]✓ Everything below {report.root} is assigned to a backup disk.[/green]"
+    )
+
+
+# ---------------------------------------------------------------------------
+# lam verify
+# ---------------------------------------------------------------------------
+
+
+@app.command("verify")
+def verify(
+    roots: Annotated[
+        list[Path], typer.Argument(help="Directories (or .par2 files) holding packages.")
+    ],
+    max_devices: Annotated[
+        Optional[int],
+        typer.Option("--max-devices", help="Physical devices verified concurrently."),
+    ] = None,
+    restart: Annotated[
+        bool,
+        typer.Option("--restart", help="Ignore the saved progress of an interrupted scrub."),
+    ] = False,
+) -> None:
+    """Verify every PAR2 set below ROOTS, one package at a time per physical device.
+
+    Progress is saved after every package; running the same command again after
+    an interruption resumes where it stopped.
+    """
+    from rich.table import Table
+
+    from lam.verify import journal as scrub_journal
+    from lam.verify import scrub
+
+    for root in roots:
+        if not root.exists():
+            console.print(f"[red]Not found:[/red] {root}")
+            raise typer.Exit(code=1)
+    if max_devices is None:
+        max_devices = int(cfg.get("verify.max_devices"))
+    engine = str(cfg.get("pack.par2_engine"))
+
+    index_paths = scrub.discover_sets(roots)
+    if not index_paths:
+        console.print("[yellow]No PAR2 sets found.[/yellow]")
+        raise typer.Exit(code=1)
+    state_dir = Path(str(cfg.get("verify.state_dir"))).expanduser()
+    journal = scrub_journal.ScrubJournal(
+        scrub_journal.journal_path(state_dir, roots), restart=restart
+    )
+    if len(journal):
+        console.print(f"[dim]Resuming: {len(journal)} set(s) already verified.[/dim]")
+    console.print(
+        f"[bold]Verifying[/bold] {len(index_paths)} PAR2 set(s) "
+        f"(engine: {engine}, up to {max_devices} device(s) in parallel)"
+    )
+
+    colours = {"ok": "green", "repairable": "yellow", "damaged": "red", "error": "red"}
+
+    def on_result(result: scrub.ScrubResult) -> None:
+        if result.resumed:
+            return
+        colour = colours[result.status]
+        console.print(
+            f"  [{colour}]{result.status:<10}[/{colour}] {result.index_path.name} "
+            f"[dim]({result.device}, {_human_size(result.size)}, {result.seconds:.1f}s)[/dim]"
+        )
+
+    results = scrub.run_scrub(
+        index_paths, engine, max_devices=max_devices, journal=journal, on_result=on_result
+    )
+    journal.complete()
+
+    table = Table(title="Verification results", show_header=True, header_style="bold cyan")
+    table.add_column("Package")
+    table.add_column("Device")
+    table.add_column("Status")
+    table.add_column("Size", justify="right")
+    table.add_column("Time", justify="right")
+    table.add_column("Detail")
+    for result in results:
+        colour = colours[result.status]
+        status = f"[{colour}]{result.status}[/{colour}]"
+        if result.resumed:
+            status += " [dim](saved)[/dim]"
+        table.add_row(
+            result.index_path.name.removesuffix(".par2"),
+            result.device,
+            status,
+            _human_size(result.size),
+            f"{result.seconds:.1f}s",
+            result.detail,
+        )
+    console.print(table)
+
+    bad = [r for r in results if not r.ok]
+    if bad:
+        console.print(f"[red]✗ {len(bad)} of {len(results)} set(s) not intact.[/red]")
+        raise typer.Exit(code=1)
+    console.print(f"[green]✓ All {len(results)} set(s) intact.[/green]")
 
 
 # ---------------------------------------------------------------------------
 # lam config
 # ---------------------------------------------------------------------------
 
-config_app = typer.Typer(help="Manage LAM configuration.")
+config_app = typer.Typer(help="Manage LAM configuration.", rich_markup_mode=None)
 app.add_typer(config_app, name="config")
 
 
@@ -123,7 +1745,7 @@ def config_set(
 ) -> None:
     """Set a configuration value."""
     cfg.set_value(key, value)
-    console.print(f"[green]✓ Set[/green] {key} = {value!r}")
+    typer.echo(typer.style("✓ Set", fg=typer.colors.GREEN) + f" {key} = {value!r}")
 
 
 @config_app.command("get")
@@ -131,16 +1753,19 @@ def config_get(
     key: Annotated[str, typer.Argument(help="Config key to retrieve.")],
 ) -> None:
     """Get a configuration value."""
+    # Plain echo: this runs in shell loops, so it avoids importing rich.
     value = cfg.get(key)
     if value is None:
-        console.print(f"[yellow]Key not found:[/yellow] {key}")
+        typer.secho(f"Key not found: {key}", fg=typer.colors.YELLOW)
         raise typer.Exit(code=1)
-    console.print(f"{key} = {value!r}")
+    typer.echo(f"{key} = {value!r}")
 
 
 @config_app.command("list")
 def config_list() -> None:
     """List all configuration values."""
+    from rich.table import Table
+
     data = cfg.list_all()
     table = Table(title="LAM Configuration", show_header=True, header_style="bold cyan")
     table.add_column("Key")
@@ -163,6 +1788,153 @@ def _human_size(n: int) -> str:
     return f"{size:.1f} PB"
 
 
+def _par2_profile(archive_size: int, redundancy: int) -> par2_tuning.Par2Profile:
+    """Tune PAR2 for *archive_size*, honouring a calibrated profile from the config."""
+    from lam.pack import par2_tuning
+
+    block_count = cfg.get("par2.block_count")
+    # A fixed block size is a manual override; a calibrated block count wins.
+    block_size = None if block_count else cfg.get("par2.block_size")
+    threads = cfg.get("par2.threads")
+    memory_mb = cfg.get("par2.memory_mb")
+    return par2_tuning.tune(
+        archive_size,
+        redundancy,
+        block_count=int(block_count) if block_count else None,
+        block_size=int(block_size) if block_size else None,
+        threads=int(threads) if threads else None,
+        memory_mb=int(memory_mb) if memory_mb else None,
+    )
+
+
+class _StageProgress:
+    """Live display of the running pack stage (``lam pack --progress``).
+
+    Running stages show CPU time, disk I/O and peak RSS so far; finished
+    stages their throughput.
+    """
+
+    def __init__(self, stages: metrics.PipelineMetrics) -> None:
+        from rich.progress import (
+            Progress,
+            ProgressColumn,
+            SpinnerColumn,
+            TextColumn,
+            TimeElapsedColumn,
+        )
+        from rich.text import Text
+
+        display = self
+
+        class _DetailColumn(ProgressColumn):
+            def render(self, task: Any) -> Text:
+                return Text(display._detail(task), style="dim")
+
+        self._stages = stages
+        self._tasks: dict[int, Any] = {}
+        self._progress = Progress(
+            SpinnerColumn(finished_text="✓"),
+            TextColumn("{task.description:<12}"),
+            TimeElapsedColumn(),
+            _DetailColumn(),
+            console=console.instance(),
+        )
+        stages.on_stage = self.update
+
+    def __enter__(self) -> _StageProgress:
+        self._progress.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._progress.stop()
+
+    def update(self, event: str, stage: metrics.StageMetrics) -> None:
+        if event == "start":
+            self._tasks[id(stage)] = self._progress.add_task(stage.name, total=1, detail="")
+            return
+        task = self._tasks.pop(id(stage))
+        if stage.status == "ok":
+            detail = f"cpu {stage.cpu_seconds:.1f}s, peak RSS {_human_size(stage.peak_rss)}"
+            if stage.throughput:
+                detail = f"{_human_size(int(stage.throughput))}/s, {detail}"
+        else:
+            detail = "failed"
+        self._progress.update(task, completed=1, detail=detail)
+        self._progress.stop_task(task)
+
+    def _detail(self, task: Any) -> str:
+        if task.finished:
+            return str(task.fields["detail"])
+        live = self._stages.live()
+        if live is None:
+            return ""
+        return (
+            f"cpu {live.cpu_seconds:.1f}s, disk read {_human_size(live.disk_read)}, "
+            f"written {_human_size(live.disk_written)}, peak RSS {_human_size(live.peak_rss)}"
+        )
+
+
+def _index_path() -> Path:
+    return Path(str(cfg.get("index.path"))).expanduser()
+
+
+def _add_to_index(archives: list[Path], disc: str) -> None:
+    """Add the manifests of *archives* to the master index (never fatal).
+
+    A repacked package replaces its earlier rows on the same disc.
+    """
+    from lam.index import master
+
+    index = master.MasterIndex(_index_path())
+    try:
+        rows = sum(index.add_archive(a, disc) for a in archives)
+    except OSError as exc:
+        console.print(f"[yellow]Master index not updated:[/yellow] {exc}")
+        return
+    if rows:
+        console.print(
+            f"[green]✓ Master index updated:[/green] {rows} row(s) → {index.csv_path}"
+        )
+
+
+def _report_archived_elsewhere(manifest_file: Path, package: str, limit: int = 10) -> None:
+    """List files of *package* the master index already holds in other packages (never fatal).
+
+    Such files are kept in the package – it must restore on its own – but
+    the user learns which content is archived twice.
+    """
+    from lam.index import master
+    from lam.pack import manifest
+
+    index_path = _index_path()
+    if not index_path.exists():
+        return
+    try:
+        entries = manifest.read(manifest_file)
+        found = master.MasterIndex(index_path).find_hashes(e.sha256 for e in entries)
+    except (OSError, ValueError, master.MasterIndexError) as exc:
+        console.print(f"[yellow]Master index not searched:[/yellow] {exc}")
+        return
+    elsewhere = []
+    for entry in entries:
+        rows = [r for r in found.get(entry.sha256.lower(), []) if r.package != package]
+        if rows:
+            elsewhere.append((entry, rows[0]))
+    if not elsewhere:
+        console.print("[green]✓ No file is archived in another package yet.[/green]")
+        return
+    size = sum(entry.size for entry, _ in elsewhere)
+    console.print(
+        f"[yellow]{len(elsewhere)} file(s) ({_human_size(size)}) are already archived in "
+        f"other packages:[/yellow]"
+    )
+    for entry, row in elsewhere[:limit]:
+        disc = f" on {row.disc}" if row.disc else ""
+        console.print(f"  {entry.path} [dim]= {row.path} ({row.package}{disc})[/dim]")
+    if len(elsewhere) > limit:
+        console.print(f"  … and {len(elsewhere) - limit} more")
+
+
 def _flatten_table(table: Table, data: dict, prefix: str = "") -> None:
     for key, value in data.items():
         full_key = f"{prefix}{key}" if not prefix else f"{prefix}.{key}"
@@ -1,16 +1,19 @@
 """Config management for LAM.
 
 Storage: ~/.config/langzeitarchiv-manager/config.toml
+
+The merged config (user settings on top of :data:`DEFAULTS`) is parsed once
+per process and cached; the cache is invalidated when the file's mtime,
+size or inode changes, and by :func:`set_value`.
 """
 
 from __future__ import annotations
 
+import os
 import tomllib
 from pathlib import Path
 from typing import Any
 
-import tomli_w
-
 CONFIG_DIR = Path.home() / ".config" / "langzeitarchiv-manager"
 CONFIG_FILE = CONFIG_DIR / "config.toml"
 
@@ -20,10 +23,59 @@ DEFAULTS: dict[str, Any] = {
         "par2_volumes": 1,
         "output_dir": str(Path.home() / "LAM" / "staging"),
         "default_format": "tar",
-    }
+        "scan_workers": 1,
+        "par2_engine": "par2cmdline",
+        "archive_workers": 1,
+        "par2_workers": 1,
+        "read_order": "walk",
+    },
+    "plan": {
+        "media": "bd25",
+    },
+    "dedup": {
+        "workers": 4,
+    },
+    "content": {
+        "check": "headers",
+        "workers": 0,
+        "ffmpeg": "ffmpeg",
+        "cache_path": str(Path.home() / "LAM" / "content-cache.json"),
+    },
+    "hash": {
+        "workers": 0,
+        "readers_per_device": 0,
+        "cache_path": str(Path.home() / "LAM" / "hash-cache.json"),
+    },
+    "loose": {
+        "max_set_files": 1000,
+        "max_set_mb": 4096,
+        "par2_workers": 4,
+    },
+    "index": {
+        "path": str(Path.home() / "LAM" / "master_index.csv"),
+    },
+    "verify": {
+        "state_dir": str(Path.home() / "LAM" / "verify-state"),
+        "max_devices": 4,
+    },
+    "replicate": {
+        "queue_depth": 8,
+    },
+    "sync": {
+        "state_dir": str(Path.home() / "LAM" / "sync-state"),
+        "workers": 2,
+    },
+    "backup": {
+        "nas_root": "",
+        "disks": {},  # disk label → directories of the NAS it holds
+    },
 }
 
 
+# (config file, stat signature) → merged config; see _merged().
+_snapshot: tuple[Path, tuple[int, int, int] | None, dict[str, Any]] | None = None
+
+
 def _load_raw() -> dict[str, Any]:
     """Load the raw TOML config, returning an empty dict if the file doesn't exist."""
     if not CONFIG_FILE.exists():
@@ -33,9 +85,34 @@ def _load_raw() -> dict[str, Any]:
 
 
 def _save_raw(data: dict[str, Any]) -> None:
+    global _snapshot
+    import tomli_w
+
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     with CONFIG_FILE.open("wb") as fh:
         tomli_w.dump(data, fh)
+    _snapshot = None
+
+
+def _signature(path: Path) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _merged() -> dict[str, Any]:
+    """Return the cached merged config, re-reading the file only if it changed."""
+    global _snapshot
+    path = CONFIG_FILE
+    signature = _signature(path)
+    if _snapshot is not None and _snapshot[0] == path and _snapshot[1] == signature:
+        return _snapshot[2]
+    merged = _copy(DEFAULTS)
+    _deep_merge(merged, _load_raw() if signature is not None else {})
+    _snapshot = (path, signature, merged)
+    return merged
 
 
 def _get_nested(data: dict[str, Any], key: str) -> Any:
@@ -61,12 +138,12 @@ def _set_nested(data: dict[str, Any], key: str, value: Any) -> None:
 
 
 def get(key: str) -> Any:
-    """Return the value for *key*, falling back to the hard-coded default."""
-    data = _load_raw()
-    value = _get_nested(data, key)
-    if value is None:
-        value = _get_nested(DEFAULTS, key)
-    return value
+    """Return the value for *key*, falling back to the hard-coded default.
+
+    Tables and lists are returned as copies, so callers cannot change the
+    cached config by modifying them.
+    """
+    return _copy(_get_nested(_merged(), key))
 
 
 def set_value(key: str, raw_value: str) -> None:
@@ -91,12 +168,17 @@ def set_value(key: str, raw_value: str) -> None:
 
 def list_all() -> dict[str, Any]:
     """Return merged config (user settings on top of defaults)."""
-    import copy
+    return _copy(_merged())
 
-    merged: dict[str, Any] = copy.deepcopy(DEFAULTS)
-    user = _load_raw()
-    _deep_merge(merged, user)
-    return merged
+
+def _copy(value: Any) -> Any:
+    # Config values are scalars, lists and nested tables; only the
+    # containers need copying.
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
 
 
 def _deep_merge(base: dict[str, Any], override: dict[str, Any]) -> None:
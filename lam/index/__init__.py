@@ -0,0 +1 @@
+"""Index sub-package for LAM (master index and lookup sidecars)."""
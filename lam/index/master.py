@@ -0,0 +1,408 @@
+"""Master index: which file (hash/name) lives on which medium.
+
+The master index is a UTF-8 CSV file (spec section 2.5)::
+
+    sha256,path,size,mtime,package,disc
+    9f86d08…,Familie_2025/photo.jpg,103,2025-12-24T18:00:00Z,Familie_2025,BD-0042
+
+Rows are appended; adding a package again (a repack) first drops its
+earlier rows on the same disc (:meth:`MasterIndex.replace`).
+
+The CSV is authoritative. Two sidecars make it searchable without reading
+it (see :mod:`lam.index.sidecar`):
+
+* ``<index>.sha256.idx`` – raw SHA-256 digests, for exact hash lookups;
+* ``<index>.names.idx`` – trigrams of the case-folded file name, for
+  substring search. Names are padded with two NUL bytes, so every
+  one- or two-byte substring is the prefix of some trigram.
+
+Rows appended after the sidecars were built are scanned linearly until the
+unindexed tail grows past :data:`MAX_TAIL_BYTES`; the next lookup (or
+:meth:`MasterIndex.refresh`) then merges them into the sidecars in one
+sequential pass.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from lam.index.sidecar import Builder, Sidecar, SidecarError
+from lam.pack import manifest
+
+FIELDS = ("sha256", "path", "size", "mtime", "package", "disc")
+HASH_SUFFIX = ".sha256.idx"
+NAMES_SUFFIX = ".names.idx"
+HASH_KEY = 32
+NAME_KEY = 3
+# Unindexed CSV bytes tolerated before a lookup merges them into the sidecars.
+MAX_TAIL_BYTES = 4 * 1024 * 1024
+# Posting lists longer than this are not intersected, only verified row by row.
+MAX_INTERSECT = 65536
+
+_KeyFunc = Callable[["IndexEntry"], Iterable[bytes]]
+
+
+class MasterIndexError(Exception):
+    """Raised when the master index cannot be read or updated."""
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    """One row of the master index."""
+
+    sha256: str
+    path: str
+    size: int
+    mtime: str
+    package: str
+    disc: str
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+
+def entries_from_manifest(manifest_file: Path, package: str, disc: str = "") -> list[IndexEntry]:
+    """Return master index rows for every file listed in *manifest_file*."""
+    with manifest_file.open("r", encoding="utf-8", errors="surrogateescape", newline="") as fh:
+        return [
+            IndexEntry(row["sha256"], row["path"], int(row["size"]), row["mtime"], package, disc)
+            for row in csv.DictReader(fh)
+        ]
+
+
+def is_sha256(query: str) -> bool:
+    """Return ``True`` if *query* looks like a hex SHA-256 digest."""
+    return len(query) == 64 and all(c in "0123456789abcdefABCDEF" for c in query)
+
+
+class MasterIndex:
+    """The master index CSV and its lookup sidecars (thread-safe appends)."""
+
+    def __init__(self, csv_path: Path) -> None:
+        self.csv_path = csv_path
+        self.hash_path = csv_path.with_name(csv_path.name + HASH_SUFFIX)
+        self.names_path = csv_path.with_name(csv_path.name + NAMES_SUFFIX)
+        self._lock = threading.Lock()
+
+    # -- writing -------------------------------------------------------------
+
+    def append(self, entries: Iterable[IndexEntry]) -> int:
+        """Append *entries* to the CSV and return the number of rows written.
+
+        Sidecars are not touched; the new rows are part of the unindexed tail
+        until the next :meth:`refresh`.
+        """
+        rows, count = _format_rows(entries)
+        if not count:
+            return 0
+        with self._lock:
+            self._write_rows(rows)
+        return count
+
+    def replace(self, entries: Iterable[IndexEntry], package: str, disc: str = "") -> int:
+        """Replace the rows of *package* on *disc* with *entries*; return the rows written.
+
+        A repacked package must not keep its old rows: they would list every
+        file twice, or files the package no longer holds. If the CSV has rows
+        of *package* on *disc*, it is rewritten without them (atomically) and
+        both sidecars are rebuilt; otherwise this is a plain :meth:`append`.
+        """
+        rows, count = _format_rows(entries)
+        with self._lock:
+            removed = self._remove_rows(package, disc)
+            if count:
+                self._write_rows(rows)
+        if removed:
+            self.refresh(force=True)
+        return count
+
+    def add_manifest(self, manifest_file: Path, package: str, disc: str = "") -> int:
+        """Add the rows of a package manifest in place of the package's rows on *disc*.
+
+        Returns the number of rows written (see :meth:`replace`).
+        """
+        return self.replace(entries_from_manifest(manifest_file, package, disc), package, disc)
+
+    def add_archive(self, archive_path: Path, disc: str = "") -> int:
+        """Add the manifest rows of *archive_path*, if it has a manifest."""
+        manifest_file = manifest.manifest_path(archive_path)
+        if not manifest_file.exists():
+            return 0
+        return self.add_manifest(manifest_file, manifest.package_name(archive_path), disc)
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the sidecars up to date with the CSV.
+
+        Parameters
+        ----------
+        force:
+            Rebuild both sidecars from scratch. Otherwise the unindexed tail
+            is merged in only when it exceeds the tail threshold, and a
+            sidecar is rebuilt only if the CSV was rewritten.
+        """
+        if not self.csv_path.exists():
+            return
+        with self._lock:
+            end = self.csv_path.stat().st_size
+            # (builder, key function, existing sidecar, first offset to add)
+            pending: list[tuple[Builder, _KeyFunc, Sidecar | None, int]] = []
+            for path, key_size, keys in (
+                (self.hash_path, HASH_KEY, _hash_keys),
+                (self.names_path, NAME_KEY, _name_keys),
+            ):
+                existing = None if force else _open(path, key_size, self.csv_path)
+                start = existing.covered if existing is not None else 0
+                if existing is not None and not _tail_too_large(start, end):
+                    existing.close()
+                    continue
+                pending.append((Builder(path, key_size), keys, existing, start))
+            if not pending:
+                return
+            # One pass over the CSV feeds every sidecar that needs updating.
+            for offset, entry in self._rows(min(p[3] for p in pending), end):
+                for builder, keys, _, start in pending:
+                    if offset >= start:
+                        builder.add(keys(entry), offset)
+            for builder, _, existing, _ in pending:
+                builder.commit(self.csv_path, end, existing)
+
+    def _write_rows(self, rows: str) -> None:
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        new = not self.csv_path.exists() or self.csv_path.stat().st_size == 0
+        with self.csv_path.open(
+            "a", encoding="utf-8", errors="surrogateescape", newline=""
+        ) as fh:
+            if new:
+                csv.writer(fh).writerow(FIELDS)
+            fh.write(rows)
+
+    def _remove_rows(self, package: str, disc: str) -> int:
+        """Rewrite the CSV without the rows of *package* on *disc*; return how many."""
+        if not self.csv_path.exists():
+            return 0
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="").writerow((package, disc))
+        marker = b"," + buffer.getvalue().encode("utf-8", "surrogateescape")
+        # Cheap byte search first: most packages are added only once.
+        if not _contains(self.csv_path, marker):
+            return 0
+        removed = 0
+        tmp = self.csv_path.with_name(f".{self.csv_path.name}.tmp")
+        with self.csv_path.open("rb") as src, tmp.open("wb") as out:
+            while record := _read_record(src):
+                entry = _parse(record)
+                if entry is not None and entry.package == package and entry.disc == disc:
+                    removed += 1
+                else:
+                    out.write(record)
+        # Row offsets change: sidecars must not survive the rewrite, even if
+        # the rebuild in replace() never runs.
+        self.hash_path.unlink(missing_ok=True)
+        self.names_path.unlink(missing_ok=True)
+        tmp.replace(self.csv_path)
+        return removed
+
+    # -- queries -------------------------------------------------------------
+
+    def find_hash(self, digest: str) -> list[IndexEntry]:
+        """Return every row whose SHA-256 equals *digest* (hex)."""
+        return self.find_hashes([digest]).get(digest.lower(), [])
+
+    def find_hashes(self, digests: Iterable[str]) -> dict[str, list[IndexEntry]]:
+        """Return the rows of every digest in *digests* found in the index.
+
+        The result maps lower-case hex digests to their rows; digests not in
+        the index are left out. The sidecar is opened and the unindexed tail
+        scanned once for all digests, so checking a whole manifest costs one
+        pass, not one per file.
+        """
+        wanted = {d.lower(): bytes.fromhex(d) for d in digests}
+        index, start = self._lookup_sidecar(self.hash_path, HASH_KEY)
+        results: dict[str, list[IndexEntry]] = {}
+        with self.csv_path.open("rb") as fh:
+            if index is not None:
+                try:
+                    for digest, key in sorted(wanted.items()):
+                        rows = [
+                            _row_at(fh, offset)
+                            for offset in index.offsets(index.prefix_range(key))
+                        ]
+                        if rows:
+                            results[digest] = rows
+                finally:
+                    index.close()
+            for _, entry in _iter_rows(fh, start):
+                digest = entry.sha256.lower()
+                if digest in wanted:
+                    results.setdefault(digest, []).append(entry)
+        return results
+
+    def find_name(self, query: str, limit: int = 50) -> list[IndexEntry]:
+        """Return up to *limit* rows whose file name contains *query* (case-insensitive)."""
+        needle = query.casefold()
+        encoded = needle.encode("utf-8", "surrogateescape")
+        if not encoded:
+            return []
+        index, start = self._lookup_sidecar(self.names_path, NAME_KEY)
+        results: list[IndexEntry] = []
+        with self.csv_path.open("rb") as fh:
+            if index is not None:
+                for offset in _name_candidates(index, encoded):
+                    entry = _row_at(fh, offset)
+                    if needle in entry.name.casefold():
+                        results.append(entry)
+                        if len(results) >= limit:
+                            break
+                index.close()
+            if len(results) < limit:
+                for _, entry in _iter_rows(fh, start):
+                    if needle in entry.name.casefold():
+                        results.append(entry)
+                        if len(results) >= limit:
+                            break
+        return results
+
+    def _lookup_sidecar(self, path: Path, key_size: int) -> tuple[Sidecar | None, int]:
+        """Open a sidecar for a query; return it and the first unindexed CSV offset."""
+        if not self.csv_path.exists():
+            raise MasterIndexError(f"Master index not found: {self.csv_path}")
+        try:
+            self.refresh()
+        except OSError:
+            pass  # read-only share: fall back to scanning the tail
+        index = _open(path, key_size, self.csv_path)
+        return index, index.covered if index is not None else 0
+
+    def _rows(self, start: int, end: int) -> Iterator[tuple[int, IndexEntry]]:
+        with self.csv_path.open("rb") as fh:
+            for offset, entry in _iter_rows(fh, start):
+                if offset >= end:
+                    break
+                yield offset, entry
+
+
+def _open(path: Path, key_size: int, csv_path: Path) -> Sidecar | None:
+    try:
+        index = Sidecar(path, key_size)
+    except SidecarError:
+        return None
+    if not index.is_current_for(csv_path):
+        index.close()
+        return None
+    return index
+
+
+def _format_rows(entries: Iterable[IndexEntry]) -> tuple[str, int]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for entry in entries:
+        writer.writerow(
+            (entry.sha256, entry.path, entry.size, entry.mtime, entry.package, entry.disc)
+        )
+        count += 1
+    return buffer.getvalue(), count
+
+
+def _contains(path: Path, needle: bytes, chunk_size: int = 8 * 1024 * 1024) -> bool:
+    """Return ``True`` if the bytes of *path* contain *needle* (chunked search)."""
+    with path.open("rb") as fh:
+        tail = b""
+        while chunk := fh.read(chunk_size):
+            window = tail + chunk
+            if needle in window:
+                return True
+            tail = window[max(0, len(window) - len(needle) + 1) :]
+    return False
+
+
+def _tail_too_large(covered: int, end: int) -> bool:
+    return end - covered > MAX_TAIL_BYTES
+
+
+def _hash_keys(entry: IndexEntry) -> tuple[bytes, ...]:
+    try:
+        return (bytes.fromhex(entry.sha256),)
+    except ValueError:
+        return ()
+
+
+def _name_keys(entry: IndexEntry) -> set[bytes]:
+    padded = entry.name.casefold().encode("utf-8", "surrogateescape") + b"\0\0"
+    return {padded[i : i + NAME_KEY] for i in range(len(padded) - NAME_KEY + 1)}
+
+
+def _name_candidates(index: Sidecar, encoded: bytes) -> Iterator[int]:
+    """Yield CSV offsets whose file name may contain *encoded* (superset)."""
+    if len(encoded) < NAME_KEY:
+        seen: set[int] = set()
+        for offset in index.offsets(index.prefix_range(encoded)):
+            if offset not in seen:
+                seen.add(offset)
+                yield offset
+        return
+    grams = {encoded[i : i + NAME_KEY] for i in range(len(encoded) - NAME_KEY + 1)}
+    ranges = sorted((index.prefix_range(g) for g in grams), key=len)
+    filters = [set(index.offsets(r)) for r in ranges[1:] if len(r) <= MAX_INTERSECT]
+    for offset in index.offsets(ranges[0]):
+        if all(offset in f for f in filters):
+            yield offset
+
+
+def _read_record(fh: BinaryIO) -> bytes:
+    # A quoted field may contain newlines; read until the quotes balance.
+    line = fh.readline()
+    while line.count(b'"') % 2:
+        more = fh.readline()
+        if not more:
+            break
+        line += more
+    return line
+
+
+def _parse(line: bytes) -> IndexEntry | None:
+    return _entry(next(csv.reader([line.decode("utf-8", "surrogateescape")]), None))
+
+
+def _entry(row: list[str] | None) -> IndexEntry | None:
+    if not row or len(row) != len(FIELDS) or tuple(row) == FIELDS:
+        return None
+    try:
+        return IndexEntry(row[0], row[1], int(row[2]), row[3], row[4], row[5])
+    except ValueError:
+        return None  # a damaged row costs only that row
+
+
+def _iter_rows(fh: BinaryIO, start: int) -> Iterator[tuple[int, IndexEntry]]:
+    """Yield ``(offset, entry)`` for every row from byte *start* to the end."""
+    fh.seek(start)
+    consumed = start
+
+    def lines() -> Iterator[str]:
+        nonlocal consumed
+        while raw := fh.readline():
+            consumed += len(raw)
+            yield raw.decode("utf-8", "surrogateescape")
+
+    # csv.reader pulls lines only until a record is complete, so *consumed*
+    # marks the start of the next row after every record.
+    offset = start
+    for row in csv.reader(lines()):
+        entry = _entry(row)
+        if entry is not None:
+            yield offset, entry
+        offset = consumed
+
+
+def _row_at(fh: BinaryIO, offset: int) -> IndexEntry:
+    fh.seek(offset)
+    entry = _parse(_read_record(fh))
+    if entry is None:
+        raise MasterIndexError(f"Damaged master index row at byte {offset}")
+    return entry
@@ -0,0 +1,245 @@
+"""Sorted, memory-mapped lookup files that sit next to the master index CSV.
+
+A sidecar is a flat file of fixed-width records ``key || offset`` sorted by
+key, where *offset* is the big-endian byte offset of a row in the CSV. It
+is opened with :mod:`mmap` and searched by bisection, so a lookup touches
+O(log n) pages regardless of how large the index grows.
+
+File layout (all integers big-endian)::
+
+    magic (8 bytes) | key size (u32) | covered (u64) | anchor (32 bytes) | records…
+
+*covered* is the CSV length the sidecar was built from and *anchor* the
+SHA-256 of the (up to) 64 bytes before it. Rows appended to the CSV later
+are merged in incrementally; if the CSV was rewritten instead (anchor
+mismatch or shorter file) the sidecar is rebuilt from scratch.
+
+Sidecars are caches: deleting them is always safe.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+MAGIC = b"LAMIDX01"
+_HEADER = struct.Struct(">8sIQ32s")
+OFFSET_SIZE = 8
+# Records sorted in memory before a run is spilled to a temporary file.
+RUN_RECORDS = 2_000_000
+_ANCHOR_BYTES = 64
+_WRITE_CHUNK = 1 << 20
+
+
+class SidecarError(Exception):
+    """Raised when a sidecar file is missing or damaged."""
+
+
+def csv_anchor(csv_path: Path, covered: int) -> bytes:
+    """Return the anchor hash of *csv_path* at length *covered*."""
+    start = max(0, covered - _ANCHOR_BYTES)
+    with csv_path.open("rb") as fh:
+        fh.seek(start)
+        return hashlib.sha256(fh.read(covered - start)).digest()
+
+
+class Sidecar:
+    """Read-only view of a sidecar file.
+
+    Parameters
+    ----------
+    path:
+        Sidecar file.
+    key_size:
+        Expected key width in bytes.
+
+    Raises
+    ------
+    SidecarError
+        If the file is missing or its header does not match.
+    """
+
+    def __init__(self, path: Path, key_size: int) -> None:
+        self.path = path
+        self.key_size = key_size
+        self.record_size = key_size + OFFSET_SIZE
+        self._map: mmap.mmap | None = None
+        try:
+            with path.open("rb") as fh:
+                header = fh.read(_HEADER.size)
+                magic, stored_key_size, self.covered, self.anchor = _HEADER.unpack(header)
+                if magic != MAGIC or stored_key_size != key_size:
+                    raise SidecarError(f"Not a LAM index sidecar: {path}")
+                size = os.fstat(fh.fileno()).st_size
+                if (size - _HEADER.size) % self.record_size:
+                    raise SidecarError(f"Truncated index sidecar: {path}")
+                self._count = (size - _HEADER.size) // self.record_size
+                if self._count:
+                    self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, struct.error) as exc:
+            raise SidecarError(f"Cannot open index sidecar {path}: {exc}") from exc
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def is_current_for(self, csv_path: Path) -> bool:
+        """Return ``True`` if the CSV still starts with the bytes this sidecar covers."""
+        try:
+            if csv_path.stat().st_size < self.covered:
+                return False
+            return csv_anchor(csv_path, self.covered) == self.anchor
+        except OSError:
+            return False
+
+    def record(self, index: int) -> bytes:
+        assert self._map is not None
+        start = _HEADER.size + index * self.record_size
+        return self._map[start : start + self.record_size]
+
+    def offset(self, index: int) -> int:
+        return int.from_bytes(self.record(index)[self.key_size :], "big")
+
+    def prefix_range(self, prefix: bytes) -> range:
+        """Return the record indices whose key starts with *prefix*."""
+        return range(self.bisect(prefix, upper=False), self.bisect(prefix, upper=True))
+
+    def offsets(self, indices: range) -> Iterator[int]:
+        for index in indices:
+            yield self.offset(index)
+
+    def bisect(self, prefix: bytes, upper: bool = False) -> int:
+        """Leftmost record whose leading bytes are >= (or > when *upper*) *prefix*."""
+        lo, hi = 0, self._count
+        width = len(prefix)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self.record(mid)[:width]
+            if probe < prefix or (upper and probe == prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def raw(self, start: int, stop: int) -> bytes:
+        """Return records ``start:stop`` as one contiguous byte string."""
+        if self._map is None or start >= stop:
+            return b""
+        base = _HEADER.size
+        return self._map[base + start * self.record_size : base + stop * self.record_size]
+
+
+class Builder:
+    """Collect ``(key, offset)`` records and write them as a sorted sidecar.
+
+    Records are kept as packed byte strings – for fixed-width big-endian
+    records byte order equals ``(key, offset)`` order, so they sort without
+    a key function. Every :data:`RUN_RECORDS` records the buffer is sorted
+    and spilled to a temporary run file; runs are merged on :meth:`commit`.
+    """
+
+    def __init__(self, path: Path, key_size: int) -> None:
+        self.path = path
+        self.key_size = key_size
+        self._chunk: list[bytes] = []
+        self._runs: list[Path] = []
+        self._spill_dir: tempfile.TemporaryDirectory[str] | None = None
+
+    def add(self, keys: Iterable[bytes], offset: int) -> None:
+        """Add one record per key, all pointing at the CSV row at *offset*."""
+        suffix = offset.to_bytes(OFFSET_SIZE, "big")
+        self._chunk.extend(key + suffix for key in keys)
+        if len(self._chunk) >= RUN_RECORDS:
+            self._spill()
+
+    def commit(self, csv_path: Path, covered: int, existing: Sidecar | None = None) -> None:
+        """Write the sidecar for the first *covered* bytes of *csv_path*.
+
+        With *existing*, its records are kept and the new ones merged in: each
+        new record is placed by bisection and the existing records between
+        insertion points are copied in bulk. The file is replaced atomically.
+        """
+        self._chunk.sort()
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        handles: list[BinaryIO] = []
+        try:
+            with tmp.open("wb") as out:
+                header = _HEADER.pack(MAGIC, self.key_size, covered, csv_anchor(csv_path, covered))
+                out.write(header)
+                if self._runs:
+                    handles = [p.open("rb") for p in self._runs]
+                    runs = [_read_run(h, self.key_size + OFFSET_SIZE) for h in handles]
+                    records: Iterable[bytes] = heapq.merge(*runs, self._chunk)
+                else:
+                    records = self._chunk
+                if existing is not None:
+                    _merge_into(out, existing, records)
+                else:
+                    _write_records(out, records)
+        finally:
+            for handle in handles:
+                handle.close()
+            if existing is not None:
+                existing.close()
+            self._cleanup()
+        os.replace(tmp, self.path)
+
+    def _spill(self) -> None:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory(
+                prefix="lam-index-", dir=self.path.parent
+            )
+        self._chunk.sort()
+        run = Path(self._spill_dir.name) / f"run{len(self._runs)}"
+        with run.open("wb") as fh:
+            _write_records(fh, self._chunk)
+        self._runs.append(run)
+        self._chunk = []
+
+    def _cleanup(self) -> None:
+        self._chunk = []
+        self._runs = []
+        if self._spill_dir is not None:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
+
+
+def _write_records(out: BinaryIO, records: Iterable[bytes]) -> None:
+    if isinstance(records, list):
+        for start in range(0, len(records), 65536):
+            out.write(b"".join(records[start : start + 65536]))
+        return
+    batch: list[bytes] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= _WRITE_CHUNK // 16:
+            out.write(b"".join(batch))
+            batch.clear()
+    out.write(b"".join(batch))
+
+
+def _merge_into(out: BinaryIO, existing: Sidecar, records: Iterable[bytes]) -> None:
+    position = 0
+    for record in records:
+        insert_at = existing.bisect(record, upper=True)
+        if insert_at > position:
+            out.write(existing.raw(position, insert_at))
+            position = insert_at
+        out.write(record)
+    out.write(existing.raw(position, len(existing)))
+
+
+def _read_run(handle: BinaryIO, record_size: int) -> Iterator[bytes]:
+    while block := handle.read(record_size * 8192):
+        for start in range(0, len(block), record_size):
+            yield block[start : start + record_size]
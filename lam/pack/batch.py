@@ -0,0 +1,239 @@
+"""Pipelined packing of many source directories.
+
+Each package passes through two stages – *archive* (validate + write the
+container) and *PAR2* – that run on separate worker pools. As soon as a
+package's archive is written it is handed to the PAR2 pool, so the disk
+keeps writing the next archive while the CPU computes recovery data for
+the previous one.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Literal
+
+from lam.pack import manifest, packager, par2, tarindex, validator
+from lam.pack.fingerprint import FingerprintCache, PackSettings, tree_digest
+from lam.pack.packager import ArchiveFormat
+from lam.pack.par2 import Par2Engine
+from lam.pack.par2_tuning import Par2Profile, tune
+from lam.pack.scan import FileTable
+
+Stage = Literal["archive", "par2"]
+Event = Literal["start", "done", "failed", "skipped"]
+
+
+@dataclass(slots=True)
+class PackageResult:
+    """Outcome of packing one source directory."""
+
+    source_dir: Path
+    file_count: int = 0
+    source_size: int = 0
+    archive_path: Path | None = None
+    archive_size: int = 0
+    manifest_size: int = 0
+    index_size: int = 0  # TAR member index
+    par2_files: list[Path] = field(default_factory=list)
+    par2_size: int = 0
+    failed_stage: Stage | None = None
+    error: str | None = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def total_size(self) -> int:
+        return self.archive_size + self.manifest_size + self.index_size + self.par2_size
+
+
+# Called when a package starts or finishes a stage: (result, stage, event).
+EventCallback = Callable[[PackageResult, Stage, Event], None]
+
+
+def child_directories(parent: Path) -> list[Path]:
+    """Return the immediate, non-hidden subdirectories of *parent*, sorted by name."""
+    return sorted(p for p in parent.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def run_batch(
+    sources: list[Path],
+    output_dir: Path,
+    fmt: ArchiveFormat,
+    redundancy_percent: int,
+    volumes: int = 1,
+    *,
+    engine: Par2Engine = "par2cmdline",
+    archive_workers: int = 1,
+    par2_workers: int = 1,
+    scan_workers: int = 1,
+    par2_profile: Callable[[int], Par2Profile] | None = None,
+    cache: FingerprintCache | None = None,
+    force: bool = False,
+    on_event: EventCallback | None = None,
+) -> list[PackageResult]:
+    """Pack every directory in *sources* into *output_dir*.
+
+    Parameters
+    ----------
+    sources:
+        Source directories; each becomes one package.
+    output_dir, fmt, redundancy_percent, volumes, engine:
+        As for :func:`lam.pack.packager.create_archive` and
+        :func:`lam.pack.par2.create`.
+    archive_workers, par2_workers:
+        Concurrency limit per stage.
+    scan_workers:
+        Passed to the validator's scan (see :func:`lam.pack.scan.scan`).
+    par2_profile:
+        Returns the PAR2 profile for an archive of the given size;
+        auto-tuned per archive when omitted.
+    cache:
+        Fingerprint cache of *output_dir*. Packages whose fingerprint and
+        outputs are unchanged are skipped (``skipped=True``, stage
+        ``"archive"``, event ``"skipped"``); packed ones are recorded.
+    force:
+        Rebuild every package even if the cache says it is current.
+    on_event:
+        Progress callback, invoked from worker threads.
+
+    Returns
+    -------
+    list[PackageResult]
+        One result per source, in input order. Failures are recorded on
+        the result instead of being raised, so one broken package does not
+        stop the batch.
+    """
+    results = [PackageResult(source_dir=s) for s in sources]
+    settings = PackSettings(fmt, redundancy_percent, volumes, par2_engine=engine)
+    # Scan tables of archived packages, kept until their PAR2 set is recorded.
+    tables: dict[Path, FileTable] = {}
+
+    def tuned(archive_size: int) -> Par2Profile:
+        if par2_profile is not None:
+            return par2_profile(archive_size)
+        return tune(archive_size, redundancy_percent)
+
+    def notify(result: PackageResult, stage: Stage, event: Event) -> None:
+        if on_event is not None:
+            on_event(result, stage, event)
+
+    def fail(result: PackageResult, stage: Stage, exc: Exception) -> None:
+        result.failed_stage = stage
+        result.error = str(exc)
+        notify(result, stage, "failed")
+
+    def archive_stage(result: PackageResult) -> bool:
+        notify(result, "archive", "start")
+        try:
+            table = validator.validate(result.source_dir, scan_workers=scan_workers)
+            result.file_count = table.file_count
+            result.source_size = table.total_size
+            if cache is not None and not force:
+                # An unchanged tree gives the archive recorded last time, and its PAR2 blocks.
+                expected = settings
+                previous = cache.archive_size(result.source_dir.name)
+                if previous:
+                    expected = replace(settings, par2_block_size=tuned(previous).block_size)
+                outputs = cache.current_outputs(
+                    result.source_dir.name, tree_digest(table), expected
+                )
+                if outputs is not None:
+                    _adopt_outputs(result, outputs)
+                    notify(result, "archive", "skipped")
+                    return False
+            result.archive_path = packager.create_archive(
+                result.source_dir, output_dir, fmt=fmt, table=table
+            )
+        except (validator.ValidationError, packager.PackagerError, OSError) as exc:
+            fail(result, "archive", exc)
+            return False
+        result.archive_size = result.archive_path.stat().st_size
+        manifest_file = manifest.manifest_path(result.archive_path)
+        if manifest_file.exists():
+            result.manifest_size = manifest_file.stat().st_size
+        index_file = tarindex.index_path(result.archive_path)
+        if index_file.exists():
+            result.index_size = index_file.stat().st_size
+        if cache is not None:
+            tables[result.source_dir] = table
+        notify(result, "archive", "done")
+        return True
+
+    def par2_stage(result: PackageResult) -> None:
+        assert result.archive_path is not None
+        notify(result, "par2", "start")
+        profile = tuned(result.archive_size)
+        try:
+            result.par2_files = par2.create(
+                result.archive_path, redundancy_percent, volumes, engine=engine, profile=profile
+            )
+        except (par2.Par2Error, OSError) as exc:
+            fail(result, "par2", exc)
+            return
+        result.par2_size = sum(p.stat().st_size for p in result.par2_files)
+        table = tables.pop(result.source_dir, None)
+        if cache is not None and table is not None:
+            extra = [
+                path
+                for path, size in (
+                    (manifest.manifest_path(result.archive_path), result.manifest_size),
+                    (tarindex.index_path(result.archive_path), result.index_size),
+                )
+                if size
+            ]
+            cache.record(
+                result.source_dir.name,
+                table,
+                replace(settings, par2_block_size=profile.block_size),
+                [result.archive_path, *extra, *result.par2_files],
+            )
+        notify(result, "par2", "done")
+
+    # Packages sharing a directory name would overwrite each other's archive.
+    pending: list[PackageResult] = []
+    names: set[str] = set()
+    for result in results:
+        if result.source_dir.name in names:
+            duplicate = ValueError(f"Duplicate package name: {result.source_dir.name}")
+            fail(result, "archive", duplicate)
+        else:
+            names.add(result.source_dir.name)
+            pending.append(result)
+
+    with (
+        ThreadPoolExecutor(archive_workers, thread_name_prefix="lam-archive") as archive_pool,
+        ThreadPoolExecutor(par2_workers, thread_name_prefix="lam-par2") as par2_pool,
+    ):
+        archived: dict[Future[bool], PackageResult] = {
+            archive_pool.submit(archive_stage, r): r for r in pending
+        }
+        par2_jobs = [
+            par2_pool.submit(par2_stage, archived[future])
+            for future in as_completed(archived)
+            if future.result()
+        ]
+        for job in par2_jobs:
+            job.result()
+    return results
+
+
+def _adopt_outputs(result: PackageResult, outputs: list[Path]) -> None:
+    """Fill *result* from the cached outputs of an unchanged package."""
+    result.skipped = True
+    for path in outputs:
+        size = path.stat().st_size
+        if path.suffix == ".par2":
+            result.par2_files.append(path)
+            result.par2_size += size
+        elif path.name.endswith(manifest.MANIFEST_SUFFIX):
+            result.manifest_size = size
+        elif path.name.endswith(tarindex.INDEX_SUFFIX):
+            result.index_size = size
+        else:
+            result.archive_path = path
+            result.archive_size = size
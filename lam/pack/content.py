@@ -0,0 +1,421 @@
+"""Content validation: structural checks and full decodes of media files.
+
+The structural validator (:mod:`lam.pack.validator`) only looks at the
+tree. Spec section 2.1 also asks for the media itself to be checked before
+it is archived – a truncated JPEG or a video with glitch frames must not
+end up on a disc as the only copy. :func:`check_content` runs two levels:
+
+``headers``
+    Cheap in-process structure checks: JPEG marker segments up to the
+    end-of-image marker, PNG chunk CRCs up to ``IEND``, the top-level box
+    layout of MP4/MOV files. These catch truncated copies and unfinished
+    recordings in milliseconds per file.
+``decode``
+    Additionally decodes every video and image stream to nowhere
+    (``ffmpeg -f null``), which finds corrupt frames inside structurally
+    sound files – at minutes per video. The decodes run in parallel, one
+    single-threaded ffmpeg process per CPU core by default.
+
+Both levels are pluggable: :data:`HEADER_CHECKS` maps file suffixes to
+check functions and any callable taking a path can replace the ffmpeg
+decoder. Results are cached by (device, inode, size, mtime_ns) in
+:class:`ContentCache`, so files that did not change since their last check
+are not read again. All problems of a run are collected and reported
+together.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import struct
+import subprocess
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Literal, Mapping
+
+from lam.pack.scan import FileRecord, FileTable
+
+ContentLevel = Literal["off", "headers", "decode"]
+LEVELS: tuple[ContentLevel, ...] = ("off", "headers", "decode")
+
+# Returns a description of the problem, or None if the file is fine.
+HeaderCheck = Callable[[Path], "str | None"]
+Decoder = Callable[[Path], "str | None"]
+
+_READ_SIZE = 1024 * 1024
+_CACHE_VERSION = 1
+
+
+class ContentError(Exception):
+    """Raised when content validation cannot run (e.g. ffmpeg is missing)."""
+
+
+@dataclass(frozen=True, slots=True)
+class ContentIssue:
+    """A problem found in one file."""
+
+    path: str  # relative to the scanned root
+    check: str  # "headers" or "decode"
+    message: str
+
+
+@dataclass(slots=True)
+class ContentReport:
+    """Outcome of :func:`check_content`."""
+
+    checked: int = 0  # files checked in this run
+    cached: int = 0  # files whose results came from the cache
+    bytes_checked: int = 0
+    issues: list[ContentIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+
+# ---------------------------------------------------------------------------
+# Structural checks
+# ---------------------------------------------------------------------------
+
+
+def check_jpeg(path: Path) -> str | None:
+    """Walk the JPEG marker segments and look for the end-of-image marker."""
+    with path.open("rb") as fh:
+        if fh.read(2) != b"\xff\xd8":
+            return "not a JPEG file (no start-of-image marker)"
+        frame = False
+        while True:
+            byte = fh.read(1)
+            if byte != b"\xff":
+                if not byte:
+                    return "truncated in the header segments"
+                return f"invalid marker at offset {fh.tell() - 1}"
+            marker = fh.read(1)
+            while marker == b"\xff":  # fill bytes
+                marker = fh.read(1)
+            if not marker:
+                return "truncated in the header segments"
+            code = marker[0]
+            if code == 0xD9:
+                return "no image data (end-of-image before start-of-scan)"
+            if 0xD0 <= code <= 0xD7 or code == 0x01:
+                continue  # markers without a length
+            raw = fh.read(2)
+            if len(raw) < 2:
+                return "truncated in the header segments"
+            length = struct.unpack(">H", raw)[0]
+            if length < 2:
+                return f"invalid segment length at offset {fh.tell() - 2}"
+            if code == 0xDA:
+                fh.seek(length - 2, os.SEEK_CUR)
+                break
+            if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                frame = True
+            fh.seek(length - 2, os.SEEK_CUR)
+        if not frame:
+            return "no frame header before the image data"
+        # Entropy-coded data stuffs every 0xFF with 0x00, so the first FF D9
+        # after the scan header is the end-of-image marker. Data after it
+        # (camera trailers, padding) is allowed.
+        previous = b""
+        while chunk := fh.read(_READ_SIZE):
+            if b"\xff\xd9" in previous + chunk:
+                return None
+            previous = chunk[-1:]
+    return "truncated (no end-of-image marker)"
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def check_png(path: Path) -> str | None:
+    """Verify the CRC of every PNG chunk from ``IHDR`` to ``IEND``."""
+    with path.open("rb") as fh:
+        if fh.read(8) != _PNG_SIGNATURE:
+            return "not a PNG file (bad signature)"
+        first = True
+        while True:
+            offset = fh.tell()
+            header = fh.read(8)
+            if len(header) < 8:
+                return "truncated (no IEND chunk)"
+            length, kind = struct.unpack(">I4s", header)
+            if first and kind != b"IHDR":
+                return "first chunk is not IHDR"
+            first = False
+            crc = zlib.crc32(kind)
+            remaining = length
+            while remaining:
+                data = fh.read(min(remaining, _READ_SIZE))
+                if not data:
+                    return f"truncated in chunk {kind.decode('latin-1')!r} at offset {offset}"
+                crc = zlib.crc32(data, crc)
+                remaining -= len(data)
+            stored = fh.read(4)
+            if len(stored) < 4:
+                return f"truncated in chunk {kind.decode('latin-1')!r} at offset {offset}"
+            if struct.unpack(">I", stored)[0] != crc:
+                return f"CRC mismatch in chunk {kind.decode('latin-1')!r} at offset {offset}"
+            if kind == b"IEND":
+                return None
+
+
+def check_mp4(path: Path) -> str | None:
+    """Walk the top-level boxes of an ISO base media file (MP4, MOV, 3GP)."""
+    with path.open("rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        seen: set[bytes] = set()
+        offset = 0
+        while offset < size:
+            fh.seek(offset)
+            header = fh.read(8)
+            if len(header) < 8:
+                return f"truncated box header at offset {offset}"
+            box_size, kind = struct.unpack(">I4s", header)
+            header_size = 8
+            if box_size == 1:
+                large = fh.read(8)
+                if len(large) < 8:
+                    return f"truncated box header at offset {offset}"
+                box_size = struct.unpack(">Q", large)[0]
+                header_size = 16
+            elif box_size == 0:  # extends to the end of the file
+                box_size = size - offset
+            if not all(32 <= b < 127 or b == 0xA9 for b in kind):
+                return f"invalid box type at offset {offset}"
+            name = kind.decode("latin-1")
+            if box_size < header_size:
+                return f"invalid size of box {name!r} at offset {offset}"
+            if offset + box_size > size:
+                return (
+                    f"truncated: box {name!r} at offset {offset} needs {box_size} bytes, "
+                    f"{size - offset} present"
+                )
+            seen.add(kind)
+            offset += box_size
+    if b"moov" not in seen:
+        return "no 'moov' box (unfinished recording?)"
+    return None
+
+
+HEADER_CHECKS: dict[str, HeaderCheck] = {
+    ".jpg": check_jpeg,
+    ".jpeg": check_jpeg,
+    ".png": check_png,
+    ".mp4": check_mp4,
+    ".m4v": check_mp4,
+    ".mov": check_mp4,
+    ".3gp": check_mp4,
+}
+
+# Files handed to the decoder at level "decode".
+_VIDEO_SUFFIXES = ".mp4 .m4v .mov .3gp .mkv .webm .avi .mts .m2ts .mpg .mpeg .wmv"
+_IMAGE_SUFFIXES = ".jpg .jpeg .png .heic .tif .tiff"
+DECODE_SUFFIXES = frozenset(f"{_VIDEO_SUFFIXES} {_IMAGE_SUFFIXES}".split())
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+
+class FfmpegDecoder:
+    """Decode all video and audio streams of a file with ffmpeg, discarding the output.
+
+    Every error ffmpeg logs (corrupt frames, broken slices, …) counts as a
+    failure. Each call runs one ffmpeg process limited to one thread, so
+    *n* concurrent calls keep *n* cores busy.
+
+    Raises
+    ------
+    ContentError
+        If *binary* cannot be found.
+    """
+
+    def __init__(self, binary: str = "ffmpeg") -> None:
+        resolved = shutil.which(binary)
+        if resolved is None:
+            raise ContentError(
+                f"{binary} not found. Install ffmpeg or check content at level 'headers'."
+            )
+        self.binary = resolved
+
+    def __call__(self, path: Path) -> str | None:
+        cmd = [self.binary, "-nostdin", "-hide_banner", "-v", "error", "-threads", "1"]
+        cmd += ["-i", str(path), "-map", "0:v?", "-map", "0:a?", "-f", "null", "-"]
+        result = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+        lines = [line.strip() for line in result.stderr.splitlines() if line.strip()]
+        if result.returncode == 0 and not lines:
+            return None
+        if not lines:
+            return f"ffmpeg exited with status {result.returncode}"
+        more = f" (and {len(lines) - 1} more error(s))" if len(lines) > 1 else ""
+        return f"{lines[0]}{more}"
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+
+class ContentCache:
+    """Check results keyed by (device, inode, size, mtime_ns), stored as JSON at *path*.
+
+    A file that is modified or replaced gets a new key, so a cached result
+    always belongs to the bytes it was computed from. Failures are cached
+    too; fixing the file invalidates them. The device keeps files on
+    different disks apart that share inode, size and mtime.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, dict[str, str]] = {}
+        self._dirty = False
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}  # a damaged cache only costs a re-check
+            if data.get("version") == _CACHE_VERSION:
+                self._entries = data.get("entries", {})
+
+    @staticmethod
+    def key(record: FileRecord) -> str:
+        return f"{record.device}:{record.inode}:{record.size}:{record.mtime_ns}"
+
+    def get(self, record: FileRecord, check: str) -> str | None:
+        """Return the cached result of *check*: ``""`` if it passed, the problem
+        if it failed, ``None`` if the file has not been checked."""
+        return self._entries.get(self.key(record), {}).get(check)
+
+    def put(self, record: FileRecord, check: str, problem: str | None) -> None:
+        self._entries.setdefault(self.key(record), {})[check] = problem or ""
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache if anything changed (atomically replaced)."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps({"version": _CACHE_VERSION, "entries": self._entries}), encoding="utf-8"
+        )
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+
+def check_content(
+    table: FileTable,
+    level: ContentLevel = "headers",
+    *,
+    decoder: Decoder | None = None,
+    workers: int | None = None,
+    cache: ContentCache | None = None,
+    checks: Mapping[str, HeaderCheck] = HEADER_CHECKS,
+    decode_suffixes: frozenset[str] = DECODE_SUFFIXES,
+) -> ContentReport:
+    """Check the media files of *table* at *level*.
+
+    Structural checks run first; at level ``"decode"`` every file with a
+    suffix in *decode_suffixes* that passed them is then decoded. Results
+    found in *cache* are reused, new ones are added to it (and saved, even
+    if the run is interrupted).
+
+    Parameters
+    ----------
+    table:
+        Scan of the source tree.
+    level:
+        ``"off"``, ``"headers"`` or ``"decode"``.
+    decoder:
+        Decodes one file and returns the problem found or ``None``; by
+        default an :class:`FfmpegDecoder`.
+    workers:
+        Files checked concurrently (default: the number of CPU cores).
+    checks:
+        Structural check per lower-case file suffix.
+
+    Returns
+    -------
+    ContentReport
+        Every problem found, sorted by path.
+
+    Raises
+    ------
+    ContentError
+        If decoding is requested and no decoder is available.
+    ValueError
+        If *level* is unknown.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown content check level: {level!r}")
+    report = ContentReport()
+    if level == "off":
+        return report
+    workers = max(1, workers or os.cpu_count() or 1)
+    records = list(table.files())
+
+    def run(check: str, candidates: list[FileRecord], function: HeaderCheck) -> set[str]:
+        """Run *function* on *candidates* not cached yet; return the failed paths."""
+        failed: set[str] = set()
+        pending: list[FileRecord] = []
+        for record in candidates:
+            cached = cache.get(record, check) if cache is not None else None
+            if cached is None:
+                pending.append(record)
+                continue
+            report.cached += 1
+            if cached:
+                report.issues.append(ContentIssue(record.path, check, cached))
+                failed.add(record.path)
+
+        def job(record: FileRecord) -> str | None:
+            try:
+                return function(table.root / record.path)
+            except OSError as exc:
+                return f"cannot be read: {exc.strerror or exc}"
+
+        with ThreadPoolExecutor(workers, thread_name_prefix=f"lam-{check}") as pool:
+            futures = [(record, pool.submit(job, record)) for record in pending]
+            for record, future in futures:
+                problem = future.result()
+                report.checked += 1
+                report.bytes_checked += record.size
+                if cache is not None:
+                    cache.put(record, check, problem)
+                if problem:
+                    report.issues.append(ContentIssue(record.path, check, problem))
+                    failed.add(record.path)
+        return failed
+
+    def structural(path: Path) -> str | None:
+        return checks[path.suffix.lower()](path)
+
+    try:
+        failed = run("headers", [r for r in records if _suffix(r) in checks], structural)
+        if level == "decode":
+            if decoder is None:
+                decoder = FfmpegDecoder()
+            candidates = [
+                r for r in records if _suffix(r) in decode_suffixes and r.path not in failed
+            ]
+            run("decode", candidates, decoder)
+    finally:
+        if cache is not None:
+            cache.save()
+    report.issues.sort(key=lambda issue: issue.path)
+    return report
+
+
+def _suffix(record: FileRecord) -> str:
+    return os.path.splitext(record.path)[1].lower()
@@ -0,0 +1,192 @@
+"""Duplicate detection with size → partial hash → full hash bucketing.
+
+Hashing every file of a multi-TB ingest only to find duplicates is far too
+slow, and almost all files can be ruled out without reading them:
+
+1. Files are bucketed by size (from the scan – no I/O). A file with a
+   unique size has no duplicate.
+2. Within a size bucket, files larger than ``2 × partial_size`` are
+   bucketed by a BLAKE2b hash of their first and last *partial_size* bytes.
+   Smaller files are hashed in full right away, since the partial hash
+   would read them completely anyway.
+3. Only files that still collide are hashed in full with SHA-256.
+
+In the common case only a tiny fraction of the bytes is read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, TypeVar
+
+from lam.pack.scan import FileTable
+
+# Bytes read from each end of a file for the partial hash.
+PARTIAL_SIZE = 2 * 1024 * 1024
+_READ_SIZE = 1024 * 1024
+
+_K = TypeVar("_K")
+
+
+class DedupError(Exception):
+    """Raised when a candidate file cannot be read."""
+
+
+@dataclass(frozen=True, slots=True)
+class FileRef:
+    """A file found by a scan: the scan root and the path relative to it."""
+
+    root: Path
+    path: str
+
+    @property
+    def absolute(self) -> Path:
+        return self.root / self.path
+
+
+@dataclass(slots=True)
+class DuplicateGroup:
+    """Files with identical content, in scan order (the first is the original)."""
+
+    size: int
+    sha256: str
+    files: list[FileRef]
+
+    @property
+    def wasted(self) -> int:
+        """Bytes taken up by all copies but the first."""
+        return self.size * (len(self.files) - 1)
+
+
+@dataclass(slots=True)
+class DedupReport:
+    """Result of :func:`find_duplicates`."""
+
+    groups: list[DuplicateGroup] = field(default_factory=list)
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    bytes_read: int = 0
+
+    @property
+    def wasted(self) -> int:
+        return sum(g.wasted for g in self.groups)
+
+
+def find_duplicates(
+    tables: Iterable[FileTable],
+    *,
+    partial_size: int = PARTIAL_SIZE,
+    workers: int = 1,
+) -> DedupReport:
+    """Find files with identical content across all *tables*.
+
+    Parameters
+    ----------
+    tables:
+        Scans of the directories to compare (see :func:`lam.pack.scan.scan`).
+    partial_size:
+        Bytes hashed from each end of a file in the partial-hash stage.
+    workers:
+        Files hashed concurrently.
+
+    Returns
+    -------
+    DedupReport
+        Duplicate groups sorted by wasted bytes (largest first), plus how
+        many bytes were scanned and actually read.
+
+    Raises
+    ------
+    DedupError
+        If a candidate file cannot be read.
+    """
+    report = DedupReport()
+    tables = list(tables)
+    # Stage 1: sizes only. Refs are built just for files whose size collides.
+    counts: Counter[int] = Counter()
+    for table in tables:
+        for record in table.files():
+            size = record.size
+            report.files_scanned += 1
+            report.bytes_scanned += size
+            counts[size] += 1
+    sizes: dict[FileRef, int] = {}  # insertion order is scan order
+    for table in tables:
+        for record in table.files():
+            if record.size > 0 and counts[record.size] > 1:
+                sizes[FileRef(table.root, record.path)] = record.size
+    order = {ref: position for position, ref in enumerate(sizes)}
+
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="lam-dedup") as pool:
+
+        def bucket(
+            refs: list[FileRef], digest: Callable[[FileRef], tuple[_K, int]]
+        ) -> list[tuple[_K, list[FileRef]]]:
+            """Split *refs* by *digest*; keep groups of two or more, in scan order."""
+            buckets: dict[_K, list[FileRef]] = defaultdict(list)
+            for ref, (key, read) in zip(refs, pool.map(digest, refs)):
+                report.bytes_read += read
+                buckets[key].append(ref)
+            return [(key, group) for key, group in buckets.items() if len(group) > 1]
+
+        # Stage 2: partial hash of large files; small ones go straight to stage 3.
+        large = [ref for ref, size in sizes.items() if size > 2 * partial_size]
+        small = [ref for ref, size in sizes.items() if size <= 2 * partial_size]
+        survivors = [
+            ref
+            for _, group in bucket(large, lambda ref: _partial_hash(ref, sizes[ref], partial_size))
+            for ref in group
+        ]
+        # Stage 3: full SHA-256 of everything that still collides.
+        for (size, sha256), group in bucket(
+            sorted(small + survivors, key=order.__getitem__),
+            lambda ref: _full_hash(ref, sizes[ref]),
+        ):
+            report.groups.append(DuplicateGroup(size, sha256, group))
+    report.groups.sort(key=lambda g: (-g.wasted, str(g.files[0].absolute)))
+    return report
+
+
+def link_targets(groups: Iterable[DuplicateGroup]) -> dict[str, str]:
+    """Map every duplicate's relative path to the path of its group's first file.
+
+    Intended for a single scan root (``lam pack --skip-duplicates``), where the
+    duplicates become TAR hard-link members pointing at the first copy.
+    """
+    targets: dict[str, str] = {}
+    for group in groups:
+        original = group.files[0].path
+        for ref in group.files[1:]:
+            targets[ref.path] = original
+    return targets
+
+
+def _partial_hash(
+    ref: FileRef, size: int, partial_size: int
+) -> tuple[tuple[int, bytes], int]:
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with ref.absolute.open("rb") as fh:
+            digest.update(fh.read(partial_size))
+            fh.seek(size - partial_size)
+            digest.update(fh.read(partial_size))
+    except OSError as exc:
+        raise DedupError(f"Cannot read {ref.absolute}: {exc}") from exc
+    return (size, digest.digest()), 2 * partial_size
+
+
+def _full_hash(ref: FileRef, size: int) -> tuple[tuple[int, str], int]:
+    digest = hashlib.sha256()
+    read = 0
+    try:
+        with ref.absolute.open("rb") as fh:
+            while chunk := fh.read(_READ_SIZE):
+                digest.update(chunk)
+                read += len(chunk)
+    except OSError as exc:
+        raise DedupError(f"Cannot read {ref.absolute}: {exc}") from exc
+    return (size, digest.hexdigest()), read
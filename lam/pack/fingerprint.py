@@ -0,0 +1,166 @@
+"""Fingerprint cache that lets ``lam pack`` skip unchanged packages.
+
+A package's fingerprint is a SHA-256 tree digest over every entry's
+relative path, inode, size, mtime_ns and mode, taken from the scan that
+validation performs anyway – no file contents are read. The cache lives
+in the staging area (``<output>/.lam-cache/``) and records, per package,
+the digest, the pack settings (including the PAR2 engine and the block size
+the archive was protected with) and the size/mtime of every output file.
+A package is current when the digest and settings match and all recorded
+outputs are still present and untouched.
+
+Per-file fingerprints are kept next to the index as
+``<package>.files.tsv`` so a rebuild can report which files changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from lam.pack.scan import FileTable
+
+CACHE_DIRNAME = ".lam-cache"
+INDEX_FILENAME = "fingerprints.json"
+
+
+@dataclass(frozen=True, slots=True)
+class PackSettings:
+    """Pack options that affect the outputs; a change invalidates the cache entry."""
+
+    fmt: str
+    redundancy_percent: int
+    volumes: int
+    skip_duplicates: bool = False
+    par2_engine: str = ""
+    par2_block_size: int = 0  # effective PAR2 block size of the archive; 0 if not tuned
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "fmt": self.fmt,
+            "redundancy_percent": self.redundancy_percent,
+            "volumes": self.volumes,
+            "skip_duplicates": self.skip_duplicates,
+            "par2_engine": self.par2_engine,
+            "par2_block_size": self.par2_block_size,
+        }
+
+
+def tree_digest(table: FileTable) -> str:
+    """Return the hex SHA-256 tree digest of *table* (metadata only)."""
+    digest = hashlib.sha256()
+    for line in _fingerprint_lines(table):
+        digest.update(line.encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+class FingerprintCache:
+    """Per-staging-area cache of package fingerprints (thread-safe)."""
+
+    def __init__(self, output_dir: Path) -> None:
+        self.directory = output_dir / CACHE_DIRNAME
+        self.index_path = self.directory / INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        if self.index_path.exists():
+            try:
+                self._entries = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = {}  # a damaged cache only costs a rebuild
+
+    def current_outputs(
+        self, name: str, digest: str, settings: PackSettings
+    ) -> list[Path] | None:
+        """Return the recorded outputs of *name* if they are still valid, else ``None``."""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry.get("tree_digest") != digest:
+            return None
+        if entry.get("settings") != settings.as_dict():
+            return None
+        outputs: list[Path] = []
+        for raw_path, (size, mtime_ns) in entry.get("outputs", {}).items():
+            path = Path(raw_path)
+            try:
+                st = path.stat()
+            except OSError:
+                return None
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                return None
+            outputs.append(path)
+        return outputs or None
+
+    def archive_size(self, name: str) -> int | None:
+        """Return the size of the archive recorded for *name*, if any.
+
+        The PAR2 block size depends on it: for an unchanged tree it is the
+        size the archive will have again, so the expected settings can be
+        worked out before the archive is written.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+        return entry.get("archive_size") if entry is not None else None
+
+    def changed_files(self, name: str, table: FileTable) -> list[str]:
+        """Return non-directory paths added, removed or modified since *name* was recorded."""
+        previous = self._files_path(name)
+        if not previous.exists():
+            return []
+        old = set(previous.read_text(encoding="utf-8", errors="surrogateescape").splitlines())
+        new = {line.rstrip("\n") for line in _fingerprint_lines(table)}
+        changed: set[str] = set()
+        for line in old ^ new:
+            path, _, _, _, mode = line.rsplit("\t", 4)
+            if not stat.S_ISDIR(int(mode, 8)):
+                changed.add(path)
+        return sorted(changed)
+
+    def record(
+        self, name: str, table: FileTable, settings: PackSettings, outputs: list[Path]
+    ) -> None:
+        """Store the fingerprint of *name* together with its output files (the archive first)."""
+        lines = list(_fingerprint_lines(table))
+        digest = hashlib.sha256()
+        for line in lines:
+            digest.update(line.encode("utf-8", "surrogateescape"))
+        entry = {
+            "tree_digest": digest.hexdigest(),
+            "settings": settings.as_dict(),
+            "archive_size": outputs[0].stat().st_size if outputs else 0,
+            "outputs": {
+                str(p.resolve()): [p.stat().st_size, p.stat().st_mtime_ns] for p in outputs
+            },
+        }
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _atomic_write(
+                self._files_path(name),
+                "".join(lines).encode("utf-8", "surrogateescape"),
+            )
+            self._entries[name] = entry
+            _atomic_write(
+                self.index_path,
+                json.dumps(self._entries, indent=1, sort_keys=True).encode("utf-8"),
+            )
+
+    def _files_path(self, name: str) -> Path:
+        return self.directory / f"{name}.files.tsv"
+
+
+def _fingerprint_lines(table: FileTable) -> Iterator[str]:
+    for record in table:
+        yield (
+            f"{record.path}\t{record.inode}\t{record.size}\t{record.mtime_ns}\t{record.mode:o}\n"
+        )
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
@@ -0,0 +1,300 @@
+"""Parallel SHA-256 manifests of directory trees.
+
+``lam hash`` records the SHA-256 of every file below a directory – a loose
+package, a photo library, a folder of finished archives – in a manifest
+sorted by path. To be limited by the disks rather than by one core:
+
+* files are hashed on a thread pool; :mod:`hashlib` releases the GIL while
+  it hashes, so the threads use all cores;
+* files up to :data:`SMALL_FILE` are read with a single ``read``, larger
+  ones through :func:`lam.pack.readahead.read_chunks` (one reusable 8 MiB
+  buffer, kernel read-ahead, consumed pages dropped from the page cache);
+* readers are capped per physical device: a spinning disk gets
+  :data:`ROTATIONAL_READERS`, so it is not thrashed by seeks between
+  files, an SSD as many as there are workers;
+* a file whose device, inode, size and mtime are unchanged since an earlier run
+  is taken from the :class:`HashCache` and not read at all.
+
+Two manifest formats are written: the CSV manifest LAM writes next to its
+archives (``path,size,mtime,sha256``, see :mod:`lam.pack.manifest`) and the
+``sha256sum`` format, which ``sha256sum -c`` checks from the directory the
+tree lives in.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Literal
+
+from lam.pack import manifest, readahead
+from lam.pack.manifest import ManifestEntry
+from lam.pack.scan import FileRecord, scan
+from lam.verify.scrub import physical_device
+
+ManifestFormat = Literal["csv", "sha256sum"]
+FORMATS: tuple[ManifestFormat, ...] = ("csv", "sha256sum")
+
+SMALL_FILE = 1024 * 1024
+ROTATIONAL_READERS = 2
+SHA256SUM_SUFFIX = ".sha256"
+_CACHE_VERSION = 1
+_SYS_BLOCK = Path("/sys/block")
+
+
+class HashError(Exception):
+    """Raised when a tree cannot be hashed or its manifest cannot be written."""
+
+
+@dataclass(slots=True)
+class HashReport:
+    """Outcome of hashing one tree."""
+
+    root: Path
+    entries: list[ManifestEntry] = field(default_factory=list)  # sorted by path
+    hashed: int = 0  # files read
+    cached: int = 0  # files taken from the cache
+    bytes_hashed: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)  # (path, message)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class HashCache:
+    """SHA-256 digests keyed by (device, inode, size, mtime_ns), stored as JSON at *path*.
+
+    A file that is modified or replaced gets a new key, so a cached digest
+    always belongs to the bytes it was computed from. The cache is shared by
+    all roots; the device keeps files on different disks that happen to have
+    the same inode, size and mtime apart.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, str] = {}
+        self._dirty = False
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}  # a damaged cache only costs a re-hash
+            if data.get("version") == _CACHE_VERSION:
+                self._entries = data.get("entries", {})
+
+    @staticmethod
+    def key(record: FileRecord) -> str:
+        return f"{record.device}:{record.inode}:{record.size}:{record.mtime_ns}"
+
+    def get(self, record: FileRecord) -> str | None:
+        return self._entries.get(self.key(record))
+
+    def put(self, record: FileRecord, sha256: str) -> None:
+        self._entries[self.key(record)] = sha256
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache if anything changed (atomically replaced)."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps({"version": _CACHE_VERSION, "entries": self._entries}), encoding="utf-8"
+        )
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+def hash_file(path: Path, size: int = -1) -> str:
+    """Return the SHA-256 of *path*; *size* (if known) selects the read strategy."""
+    if 0 <= size <= SMALL_FILE:
+        with open(path, "rb", buffering=0) as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    digest = hashlib.sha256()
+    for chunk in readahead.read_chunks(path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def readers_for(device: str, workers: int) -> int:
+    """Concurrent readers for *device*: few on spinning disks, *workers* otherwise."""
+    try:
+        rotational = (_SYS_BLOCK / device / "queue" / "rotational").read_text().strip()
+    except OSError:
+        return workers  # unknown (macOS, network file systems): assume no seek penalty
+    return min(workers, ROTATIONAL_READERS) if rotational == "1" else workers
+
+
+@dataclass(frozen=True, slots=True)
+class _Job:
+    report: HashReport
+    path: Path  # file to read
+    name: str  # path in the manifest
+    record: FileRecord
+
+
+def hash_trees(
+    roots: Iterable[Path],
+    *,
+    workers: int | None = None,
+    readers_per_device: int | None = None,
+    cache: HashCache | None = None,
+    scan_workers: int = 1,
+    device_of: Callable[[Path], str] = physical_device,
+) -> list[HashReport]:
+    """Hash every regular file below each of *roots*.
+
+    Parameters
+    ----------
+    roots:
+        Directories (or single files such as finished archives). Manifest
+        paths start with the root's name, as in LAM's package manifests.
+    workers:
+        Upper bound of concurrent readers per device (default: CPU count).
+    readers_per_device:
+        Fixed number of readers per device instead of
+        :func:`readers_for`'s choice.
+    cache:
+        Digests of unchanged files are taken from here; new digests are
+        stored (the cache is saved even if hashing is interrupted).
+    scan_workers:
+        Threads listing directories (see :func:`lam.pack.scan.scan`).
+    device_of:
+        Maps a root to its physical device name.
+
+    Returns
+    -------
+    list[HashReport]
+        One report per root, in the order of *roots*. Unreadable files are
+        reported in :attr:`HashReport.errors`, not raised.
+
+    Raises
+    ------
+    HashError
+        If a root does not exist.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    reports: list[HashReport] = []
+    queues: dict[str, deque[_Job]] = defaultdict(deque)
+    for root in roots:
+        report = HashReport(root)
+        reports.append(report)
+        try:
+            device = device_of(root)
+            if root.is_dir():
+                table = scan(root, workers=scan_workers)
+                jobs = [
+                    _Job(report, root / r.path, f"{root.name}/{r.path}", r) for r in table.files()
+                ]
+            else:
+                st = root.stat()
+                record = FileRecord(
+                    "",
+                    st.st_size,
+                    st.st_mtime_ns,
+                    st.st_mode,
+                    st.st_uid,
+                    st.st_gid,
+                    st.st_ino,
+                    st.st_dev,
+                )
+                jobs = [_Job(report, root, root.name, record)]
+        except OSError as exc:
+            raise HashError(f"Cannot read {root}: {exc}") from exc
+        for job in jobs:
+            digest = cache.get(job.record) if cache is not None else None
+            if digest is None:
+                queues[device].append(job)
+            else:
+                report.entries.append(_entry(job, digest))
+                report.cached += 1
+
+    lock = threading.Lock()
+
+    def drain(queue: deque[_Job]) -> None:
+        while True:
+            try:
+                job = queue.popleft()
+            except IndexError:
+                return
+            try:
+                digest = hash_file(job.path, job.record.size)
+            except OSError as exc:
+                with lock:
+                    job.report.errors.append((job.name, exc.strerror or str(exc)))
+                continue
+            with lock:
+                job.report.entries.append(_entry(job, digest))
+                job.report.hashed += 1
+                job.report.bytes_hashed += job.record.size
+                if cache is not None:
+                    cache.put(job.record, digest)
+
+    readers = {
+        device: max(1, min(len(queue), readers_per_device or readers_for(device, workers)))
+        for device, queue in queues.items()
+    }
+    try:
+        if queues:
+            with ThreadPoolExecutor(sum(readers.values()), thread_name_prefix="lam-hash") as pool:
+                futures = [
+                    pool.submit(drain, queues[device])
+                    for device, count in readers.items()
+                    for _ in range(count)
+                ]
+                for future in futures:
+                    future.result()
+    finally:
+        if cache is not None:
+            cache.save()
+    for report in reports:
+        report.entries.sort(key=lambda e: e.path)
+        report.errors.sort()
+    return reports
+
+
+def _entry(job: _Job, digest: str) -> ManifestEntry:
+    return ManifestEntry(job.name, job.record.size, job.record.mtime_ns // 1_000_000_000, digest)
+
+
+# ---------------------------------------------------------------------------
+# Manifests
+# ---------------------------------------------------------------------------
+
+
+def default_output(root: Path, fmt: ManifestFormat = "csv") -> Path:
+    """Return the manifest path next to *root* (``Name.manifest.csv`` / ``Name.sha256``)."""
+    if fmt == "sha256sum":
+        return root.parent / f"{root.name}{SHA256SUM_SUFFIX}"
+    if root.is_dir():
+        return manifest.manifest_path(root)  # where a loose package's manifest lives
+    # Not Name.manifest.csv: that is the member manifest of the archive Name.tar.
+    return root.parent / f"{root.name}{manifest.MANIFEST_SUFFIX}"
+
+
+def write_manifest(
+    path: Path, entries: Iterable[ManifestEntry], fmt: ManifestFormat = "csv"
+) -> Path:
+    """Write *entries* to *path* in *fmt* and return *path*."""
+    if fmt == "csv":
+        return manifest.write(path, entries)
+    if fmt != "sha256sum":
+        raise ValueError(f"Unknown manifest format: {fmt!r}")
+    with path.open("w", encoding="utf-8", errors="surrogateescape", newline="\n") as fh:
+        for entry in entries:
+            name = entry.path
+            if "\\" in name or "\n" in name:
+                # sha256sum's escaping: a leading backslash marks an escaped name.
+                name = name.replace("\\", "\\\\").replace("\n", "\\n")
+                fh.write(f"\\{entry.sha256}  {name}\n")
+            else:
+                fh.write(f"{entry.sha256}  {name}\n")
+    return path
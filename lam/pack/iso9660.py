@@ -0,0 +1,748 @@
+"""Streaming ISO 9660 image writer with Rock Ridge and Joliet extensions.
+
+The image is laid out completely from a :class:`~lam.pack.scan.FileTable`
+before any payload is read: directory records, path tables and volume
+descriptors depend only on names and sizes, so every file's extent is
+known up front. File contents are then streamed from the source straight
+into their sectors – no staging copy, and memory use depends on the
+number of entries, not on the image size.
+
+Image structure::
+
+    system area (16 sectors) | primary VD | Joliet VD | terminator
+    | path tables (ISO L/M, Joliet L/M) | ISO directories | Joliet directories
+    | Rock Ridge continuation areas | file data
+
+* The primary tree uses upper-case ``8.3``-style d-character names (up to
+  30 characters) carrying Rock Ridge entries (POSIX mode, owner, mtime,
+  the original name and symlink targets). Linux ``mount -o loop`` and
+  ``isoinfo -R`` show the original names and permissions.
+* The Joliet tree holds the same files under UCS-2 names of up to 64
+  characters for Windows and macOS. Symlinks are Rock Ridge only.
+* Files of 4 GiB and more are stored as multi-extent files (ISO 9660
+  level 3).
+
+Directories nested deeper than eight levels are written as they are
+(without Rock Ridge relocation); Linux, macOS and Windows read them fine.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+from lam.pack.manifest import ManifestEntry
+from lam.pack.payload import PayloadCopier
+from lam.pack.scan import FileTable
+
+SECTOR = 2048
+# Largest single extent: the biggest multiple of the sector size below 4 GiB.
+MAX_EXTENT = 0xFFFFF800
+# Path table records store the parent directory number in 16 bits.
+MAX_DIRECTORIES = 0xFFFF
+ISO_NAME_LENGTH = 30
+JOLIET_NAME_LENGTH = 64
+
+_SYSTEM_AREA = 16
+_MAX_RECORD = 254  # directory records are at most 255 bytes and of even length
+_CE_LENGTH = 28
+_SL_BODY = 250  # component bytes per Rock Ridge SL entry
+_D_CHARACTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+_JOLIET_FORBIDDEN = frozenset("*/:;?\\")
+_FLAG_DIRECTORY = 0x02
+_FLAG_MULTI_EXTENT = 0x80
+
+_SP = b"SP\x07\x01\xbe\xef\x00"
+_ER_ID = b"RRIP_1991A"
+_ER_DESCRIPTOR = (
+    b"THE ROCK RIDGE INTERCHANGE PROTOCOL PROVIDES SUPPORT FOR POSIX FILE SYSTEM SEMANTICS"
+)
+_ER_SOURCE = (
+    b"PLEASE CONTACT DISC PUBLISHER FOR SPECIFICATION SOURCE.  SEE PUBLISHER IDENTIFIER "
+    b"IN PRIMARY VOLUME DESCRIPTOR FOR CONTACT INFORMATION."
+)
+_ER = (
+    b"ER"
+    + bytes([8 + len(_ER_ID) + len(_ER_DESCRIPTOR) + len(_ER_SOURCE), 1])
+    + bytes([len(_ER_ID), len(_ER_DESCRIPTOR), len(_ER_SOURCE), 1])
+    + _ER_ID
+    + _ER_DESCRIPTOR
+    + _ER_SOURCE
+)
+
+
+class Iso9660Error(Exception):
+    """Raised when the source tree cannot be written as an ISO 9660 image."""
+
+
+def write_image(table: FileTable, image_path: Path, volume_name: str) -> list[ManifestEntry]:
+    """Write the tree scanned into *table* as an ISO 9660 image at *image_path*.
+
+    Parameters
+    ----------
+    table:
+        Scan of the source directory; it becomes the root of the volume.
+        Sockets and other special files are skipped.
+    image_path:
+        Output file (overwritten).
+    volume_name:
+        Volume label; also the first component of the manifest paths, as
+        in TAR archives.
+
+    Returns
+    -------
+    list[ManifestEntry]
+        SHA-256 manifest rows for every regular file, in data order,
+        computed while the payload was streamed.
+
+    Raises
+    ------
+    Iso9660Error
+        If the tree has too many directories, or a file cannot be read or
+        changed size while being written.
+    """
+    image = _Image(table, volume_name)
+    with image_path.open("wb") as out:
+        return image.write(out)
+
+
+def image_size(table: FileTable, rows: range | None = None) -> int:
+    """Return the size in bytes of the image :func:`write_image` writes for *table*.
+
+    The size comes from the layout alone – volume descriptors, both path
+    tables of both trees, ISO and Joliet directories, Rock Ridge
+    continuation areas and sector-aligned file data – so nothing is read
+    but symlink targets.
+
+    Parameters
+    ----------
+    table:
+        Scan of the tree.
+    rows:
+        Rows of one directory and everything below it, to size that
+        subtree as if it had been scanned on its own (e.g. one package
+        of an ingest directory). Defaults to the whole table.
+
+    Raises
+    ------
+    Iso9660Error
+        If the tree has too many directories for one image.
+    """
+    return _Image(table, "", rows).total_sectors * SECTOR
+
+
+# ---------------------------------------------------------------------------
+# Tree and names
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True, eq=False)
+class _Node:
+    name: str
+    index: int  # row in the file table
+    mode: int
+    size: int
+    mtime_ns: int
+    uid: int
+    gid: int
+    parent: _Node | None
+    is_dir: bool = False
+    link: str = ""  # symlink target
+    nlink: int = 1
+    children: list[_Node] = field(default_factory=list)  # sorted by ISO name
+    joliet_children: list[_Node] = field(default_factory=list)  # sorted by Joliet name
+    iso_name: bytes = b""
+    joliet_name: bytes = b""
+    extent: int = 0  # file data, or the ISO directory
+    dir_size: int = 0
+    joliet_extent: int = 0
+    joliet_size: int = 0
+
+
+def _build_tree(table: FileTable, rows: range | None = None) -> tuple[_Node, list[_Node]]:
+    """Return the root node and all regular files in table (= data) order.
+
+    *rows* selects a subtree: its first row is the directory that becomes
+    the root.
+    """
+    if rows is None:
+        rows = range(len(table))
+    directories: dict[str, _Node] = {}
+    files: list[_Node] = []
+    root: _Node | None = None
+    prefix = table.path(rows.start) if rows else ""
+    skip = len(prefix) + 1 if prefix else 0
+    for index in rows:
+        record = table[index]
+        if not (record.is_dir or record.is_file or record.is_symlink):
+            continue  # sockets and other special files are not archived
+        path = record.path[skip:] if index != rows.start else ""
+        parent_path, _, name = path.rpartition("/")
+        parent = directories.get(parent_path) if path else None
+        node = _Node(
+            name, index, record.mode, record.size if record.is_file else 0,
+            record.mtime_ns, record.uid, record.gid, parent,
+        )
+        if not path:
+            root = node
+        elif parent is None:
+            continue
+        else:
+            parent.children.append(node)
+        if record.is_dir:
+            node.is_dir = True
+            node.nlink = 2
+            directories[path] = node
+            if parent is not None:
+                parent.nlink += 1
+        elif record.is_file:
+            files.append(node)
+        else:
+            node.link = os.readlink(table.root / record.path)
+    if root is None:
+        raise Iso9660Error(f"Not a directory scan: {table.root}")
+    for directory in directories.values():
+        _assign_names(directory)
+    return root, files
+
+
+def _assign_names(directory: _Node) -> None:
+    taken: set[bytes] = set()
+    for child in directory.children:
+        child.iso_name = _unique(child, taken, _iso_name)
+    directory.children.sort(key=lambda c: c.iso_name)
+    taken = set()
+    for child in directory.children:
+        if not child.link:
+            child.joliet_name = _unique(child, taken, _joliet_name)
+            directory.joliet_children.append(child)
+    directory.joliet_children.sort(key=lambda c: c.joliet_name)
+
+
+_NameFunc = Callable[[_Node, int], bytes]
+
+
+def _unique(node: _Node, taken: set[bytes], make: _NameFunc) -> bytes:
+    name = make(node, 0)
+    counter = 0
+    while name in taken:
+        counter += 1
+        name = make(node, counter)
+    taken.add(name)
+    return name
+
+
+def _iso_name(node: _Node, counter: int) -> bytes:
+    """Primary-tree identifier: d-characters, ``NAME.EXT;1`` for files."""
+    base, dot, ext = node.name.upper().rpartition(".")
+    if not dot or node.is_dir or not base:
+        base, ext = node.name.upper(), ""
+    base = "".join(c if c in _D_CHARACTERS else "_" for c in base) or "_"
+    ext = "".join(c if c in _D_CHARACTERS else "_" for c in ext)[:8]
+    suffix = f"_{counter}" if counter else ""
+    room = ISO_NAME_LENGTH - len(suffix) - (len(ext) + 1 if not node.is_dir else 0)
+    base = base[:room] + suffix
+    if node.is_dir:
+        return base.encode("ascii")
+    return f"{base}.{ext};1".encode("ascii")
+
+
+def _joliet_name(node: _Node, counter: int) -> bytes:
+    """Joliet identifier: UCS-2 big-endian, at most 64 characters."""
+    name = "".join(
+        "_" if c in _JOLIET_FORBIDDEN or ord(c) > 0xFFFF or 0xD800 <= ord(c) <= 0xDFFF else c
+        for c in node.name
+    )
+    suffix = f"~{counter}" if counter else ""
+    if len(name) + len(suffix) > JOLIET_NAME_LENGTH or suffix:
+        base, dot, ext = name.rpartition(".")
+        if not dot or node.is_dir or len(ext) > 16:
+            base, dot, ext = name, "", ""
+        room = JOLIET_NAME_LENGTH - len(suffix) - len(dot) - len(ext)
+        name = f"{base[:room]}{suffix}{dot}{ext}"
+    return name.encode("utf-16-be")
+
+
+def _breadth_first(root: _Node, joliet: bool) -> list[_Node]:
+    """Directories in path table order: by level, then parent, then name."""
+    order = [root]
+    for directory in order:
+        children = directory.joliet_children if joliet else directory.children
+        order.extend(c for c in children if c.is_dir)
+    return order
+
+
+# ---------------------------------------------------------------------------
+# Layout and writing
+# ---------------------------------------------------------------------------
+
+
+# (block, offset, length) of a Rock Ridge continuation area; blocks are
+# relative to the start of the continuation region until written.
+_Location = tuple[int, int, int]
+
+
+class _Image:
+    def __init__(self, table: FileTable, volume_name: str, rows: range | None = None) -> None:
+        self.table = table
+        self.volume_name = volume_name
+        self.root, self.files = _build_tree(table, rows)
+        self.iso_dirs = _breadth_first(self.root, joliet=False)
+        self.joliet_dirs = _breadth_first(self.root, joliet=True)
+        if len(self.iso_dirs) > MAX_DIRECTORIES:
+            raise Iso9660Error(
+                f"{len(self.iso_dirs)} directories exceed the ISO 9660 limit of "
+                f"{MAX_DIRECTORIES}; split the package."
+            )
+        # Continuation areas of records whose Rock Ridge entries do not fit,
+        # by record and by directory (keyed by file table row).
+        self._continuations: dict[tuple[int, str], list[_Location]] = {}
+        self._areas: dict[int, list[tuple[list[bytes], _Location, _Location | None]]] = {}
+        self._ce_cursor = (0, 0)
+        self._measuring = True
+        self._layout()
+
+    # -- layout --------------------------------------------------------------
+
+    def _layout(self) -> None:
+        self.iso_table_size = sum(_path_record_size(d.iso_name) for d in self.iso_dirs)
+        self.joliet_table_size = sum(_path_record_size(d.joliet_name) for d in self.joliet_dirs)
+        iso_table_sectors = _sectors(self.iso_table_size)
+        joliet_table_sectors = _sectors(self.joliet_table_size)
+        cursor = _SYSTEM_AREA + 3
+        self.iso_l_table, cursor = cursor, cursor + iso_table_sectors
+        self.iso_m_table, cursor = cursor, cursor + iso_table_sectors
+        self.joliet_l_table, cursor = cursor, cursor + joliet_table_sectors
+        self.joliet_m_table, cursor = cursor, cursor + joliet_table_sectors
+
+        # Record lengths do not depend on extents, so directories can be
+        # sized before anything is placed.
+        for directory in self.iso_dirs:
+            self._ce_cursor = (0, 0)
+            directory.dir_size = _directory_size(self._iso_records(directory))
+        for directory in self.joliet_dirs:
+            directory.joliet_size = _directory_size(self._joliet_records(directory))
+        self._measuring = False
+        for directory in self.iso_dirs:
+            directory.extent, cursor = cursor, cursor + directory.dir_size // SECTOR
+            # Continuation areas directly follow their directory: sequential
+            # readers such as libarchive only pick them up there.
+            areas = self._areas.get(directory.index)
+            if areas:
+                cursor += areas[-1][1][0] + 1
+        for directory in self.joliet_dirs:
+            directory.joliet_extent, cursor = cursor, cursor + directory.joliet_size // SECTOR
+        for node in self.files:
+            node.extent, cursor = cursor, cursor + _sectors(node.size)
+        self.total_sectors = cursor
+
+    def _allocate(
+        self, directory: _Node, key: tuple[int, str], areas: list[list[bytes]]
+    ) -> None:
+        locations: list[_Location] = []
+        block, offset = self._ce_cursor
+        for number, entries in enumerate(areas):
+            length = sum(map(len, entries)) + (_CE_LENGTH if number + 1 < len(areas) else 0)
+            if offset + length > SECTOR:
+                block, offset = block + 1, 0
+            locations.append((block, offset, length))
+            offset += length
+        self._ce_cursor = (block, offset)
+        self._continuations[key] = locations
+        chained: list[_Location | None] = [*locations[1:], None]
+        self._areas.setdefault(directory.index, []).extend(zip(areas, locations, chained))
+
+    # -- directory records ---------------------------------------------------
+
+    def _iso_records(self, directory: _Node) -> Iterator[bytes]:
+        parent = directory.parent or directory
+        is_root = directory.parent is None
+        yield self._record(
+            directory, b"\0", directory.extent, directory.dir_size, directory, _FLAG_DIRECTORY,
+            self._rock_ridge(directory, "dot", None, is_root),
+        )
+        yield self._record(
+            directory, b"\1", parent.extent, parent.dir_size, parent, _FLAG_DIRECTORY,
+            self._rock_ridge(parent, "dotdot", None, False),
+        )
+        for child in directory.children:
+            name = os.fsencode(child.name)
+            entries = self._rock_ridge(child, "child", name, False)
+            if child.is_dir:
+                yield self._record(
+                    directory, child.iso_name, child.extent, child.dir_size, child,
+                    _FLAG_DIRECTORY, entries,
+                )
+                continue
+            for extent, length, flags in _extents(child):
+                yield self._record(directory, child.iso_name, extent, length, child, flags, entries)
+
+    def _joliet_records(self, directory: _Node) -> Iterator[bytes]:
+        parent = directory.parent or directory
+        yield _record(
+            b"\0", directory.joliet_extent, directory.joliet_size, directory.mtime_ns,
+            _FLAG_DIRECTORY,
+        )
+        yield _record(
+            b"\1", parent.joliet_extent, parent.joliet_size, parent.mtime_ns, _FLAG_DIRECTORY
+        )
+        for child in directory.joliet_children:
+            if child.is_dir:
+                yield _record(
+                    child.joliet_name, child.joliet_extent, child.joliet_size, child.mtime_ns,
+                    _FLAG_DIRECTORY,
+                )
+                continue
+            for extent, length, flags in _extents(child):
+                yield _record(child.joliet_name, extent, length, child.mtime_ns, flags)
+
+    def _record(
+        self,
+        directory: _Node,
+        identifier: bytes,
+        extent: int,
+        size: int,
+        node: _Node,
+        flags: int,
+        rock_ridge: tuple[tuple[int, str], list[bytes]],
+    ) -> bytes:
+        """Build a primary-tree record, moving Rock Ridge overflow to continuation areas."""
+        key, entries = rock_ridge
+        budget = _MAX_RECORD - _fixed_length(identifier)
+        if sum(map(len, entries)) <= budget:
+            return _record(identifier, extent, size, node.mtime_ns, flags, b"".join(entries))
+        inline, areas = _split(entries, budget - _CE_LENGTH)
+        if self._measuring:
+            if key not in self._continuations:
+                self._allocate(directory, key, areas)
+            block, offset, length = 0, 0, sum(map(len, areas[0]))
+        else:
+            block, offset, length = self._continuations[key][0]
+            block += directory.extent + directory.dir_size // SECTOR
+        system_use = b"".join(inline) + _ce(block, offset, length)
+        return _record(identifier, extent, size, node.mtime_ns, flags, system_use)
+
+    def _rock_ridge(
+        self, node: _Node, role: str, name: bytes | None, is_root: bool
+    ) -> tuple[tuple[int, str], list[bytes]]:
+        entries = [_SP] if is_root else []
+        entries.append(_px(node))
+        entries.append(_tf(node.mtime_ns))
+        if name is not None:
+            entries.extend(_nm(name))
+        if node.link and role == "child":
+            entries.extend(_sl(node.link))
+        if is_root:
+            entries.append(_ER)
+        return (node.index, role), entries
+
+    # -- writing -------------------------------------------------------------
+
+    def write(self, out: BinaryIO) -> list[ManifestEntry]:
+        out.write(bytes(_SYSTEM_AREA * SECTOR))
+        out.write(self._volume_descriptor(joliet=False))
+        out.write(self._volume_descriptor(joliet=True))
+        out.write(_pad(b"\xffCD001\x01", SECTOR, b"\0"))
+        for dirs, joliet in ((self.iso_dirs, False), (self.joliet_dirs, True)):
+            numbers = {id(d): number for number, d in enumerate(dirs, start=1)}
+            for big_endian in (False, True):
+                table = b"".join(
+                    _path_record(
+                        d.joliet_name if joliet else d.iso_name,
+                        d.joliet_extent if joliet else d.extent,
+                        numbers[id(d.parent or d)],
+                        big_endian,
+                    )
+                    for d in dirs
+                )
+                out.write(_pad(table, _sectors(len(table)) * SECTOR, b"\0"))
+        for directory in self.iso_dirs:
+            _write_directory(out, self._iso_records(directory), directory.dir_size)
+            self._write_continuations(out, directory)
+        for directory in self.joliet_dirs:
+            _write_directory(out, self._joliet_records(directory), directory.joliet_size)
+        out.flush()  # file payloads bypass the buffer (see lam.pack.payload)
+        return self._write_files(PayloadCopier(out.fileno()))
+
+    def _volume_descriptor(self, joliet: bool) -> bytes:
+        if joliet:
+            root = _record(
+                b"\0", self.root.joliet_extent, self.root.joliet_size, self.root.mtime_ns,
+                _FLAG_DIRECTORY,
+            )
+            table_size = self.joliet_table_size
+            l_table, m_table = self.joliet_l_table, self.joliet_m_table
+            volume_id = _pad(self.volume_name[:16].encode("utf-16-be", "replace"), 32, b"\0 ")
+            escapes = b"%/E"
+            text = lambda value, size: _pad(value.encode("utf-16-be"), size, b"\0 ")  # noqa: E731
+        else:
+            root = _record(
+                b"\0", self.root.extent, self.root.dir_size, self.root.mtime_ns, _FLAG_DIRECTORY
+            )
+            table_size = self.iso_table_size
+            l_table, m_table = self.iso_l_table, self.iso_m_table
+            label = "".join(c if c in _D_CHARACTERS else "_" for c in self.volume_name.upper())
+            volume_id = _pad(label[:32].encode("ascii"), 32)
+            escapes = b""
+            text = lambda value, size: _pad(value.encode("ascii"), size)  # noqa: E731
+        date = _long_date(self.root.mtime_ns)
+        body = b"".join(
+            (
+                bytes([2 if joliet else 1]),
+                b"CD001\x01\x00",
+                text("", 32),  # system identifier
+                volume_id,
+                bytes(8),
+                _both32(self.total_sectors),
+                _pad(escapes, 32, b"\0"),
+                _both16(1),  # volume set size
+                _both16(1),  # volume sequence number
+                _both16(SECTOR),
+                _both32(table_size),
+                struct.pack("<I", l_table),
+                bytes(4),
+                struct.pack(">I", m_table),
+                bytes(4),
+                root,
+                text("", 128),  # volume set
+                text("", 128),  # publisher
+                text("", 128),  # data preparer
+                text("LAM", 128),  # application
+                b" " * 37 * 3,  # copyright, abstract and bibliographic file
+                date,
+                date,
+                b"0" * 16 + b"\0",  # expiration
+                date,  # effective
+                b"\x01",
+            )
+        )
+        return _pad(body, SECTOR, b"\0")
+
+    def _write_continuations(self, out: BinaryIO, directory: _Node) -> None:
+        areas = self._areas.get(directory.index)
+        if not areas:
+            return
+        base = directory.extent + directory.dir_size // SECTOR
+        written = 0
+        for entries, location, chained in areas:
+            block, offset, _ = location
+            position = block * SECTOR + offset
+            out.write(bytes(position - written))
+            data = b"".join(entries)
+            if chained is not None:
+                data += _ce(chained[0] + base, chained[1], chained[2])
+            out.write(data)
+            written = position + len(data)
+        out.write(bytes(-written % SECTOR))
+
+    def _write_files(self, copier: PayloadCopier) -> list[ManifestEntry]:
+        entries: list[ManifestEntry] = []
+        for node in self.files:
+            relative = self.table.path(node.index)
+            path = self.table.root / relative
+            digest = hashlib.sha256()
+            try:
+                copier.copy_file(path, node.size, digest, padding=-node.size % SECTOR)
+                changed = path.stat().st_size != node.size
+            except OSError as exc:
+                raise Iso9660Error(f"Failed to archive {relative}: {exc}") from exc
+            if changed:
+                raise Iso9660Error(f"{relative} changed size while it was being archived")
+            entries.append(
+                ManifestEntry(
+                    f"{self.volume_name}/{relative}",
+                    node.size,
+                    node.mtime_ns // 1_000_000_000,
+                    digest.hexdigest(),
+                )
+            )
+        return entries
+
+
+# ---------------------------------------------------------------------------
+# Encoding helpers
+# ---------------------------------------------------------------------------
+
+
+def _both16(value: int) -> bytes:
+    return struct.pack("<H", value) + struct.pack(">H", value)
+
+
+def _both32(value: int) -> bytes:
+    return struct.pack("<I", value) + struct.pack(">I", value)
+
+
+def _pad(data: bytes, size: int, fill: bytes = b" ") -> bytes:
+    missing = size - len(data)
+    return data + (fill * (missing // len(fill) + 1))[:missing]
+
+
+def _sectors(size: int) -> int:
+    return -(-size // SECTOR)
+
+
+def _utc(mtime_ns: int) -> datetime:
+    # Recording dates store the year as an offset from 1900 in one byte.
+    seconds = min(max(mtime_ns // 1_000_000_000, -2208988800), 5958575999)
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def _short_date(mtime_ns: int) -> bytes:
+    t = _utc(mtime_ns)
+    return bytes([t.year - 1900, t.month, t.day, t.hour, t.minute, t.second, 0])
+
+
+def _long_date(mtime_ns: int) -> bytes:
+    t = _utc(max(mtime_ns, 0))
+    return t.strftime("%Y%m%d%H%M%S00").encode("ascii").rjust(16, b"0") + b"\0"
+
+
+def _fixed_length(identifier: bytes) -> int:
+    return 33 + len(identifier) + (1 - len(identifier) % 2)
+
+
+def _record(
+    identifier: bytes, extent: int, size: int, mtime_ns: int, flags: int, system_use: bytes = b""
+) -> bytes:
+    length = _fixed_length(identifier) + len(system_use)
+    length += length % 2
+    record = b"".join(
+        (
+            bytes([length, 0]),
+            _both32(extent),
+            _both32(size),
+            _short_date(mtime_ns),
+            bytes([flags, 0, 0]),
+            _both16(1),
+            bytes([len(identifier)]),
+            identifier,
+        )
+    )
+    return _pad(record + bytes(1 - len(identifier) % 2) + system_use, length, b"\0")
+
+
+def _extents(node: _Node) -> Iterator[tuple[int, int, int]]:
+    """Yield ``(sector, length, flags)`` of every extent of a file (or symlink)."""
+    if node.size == 0:
+        yield 0, 0, 0
+        return
+    extent, remaining = node.extent, node.size
+    while remaining > MAX_EXTENT:
+        yield extent, MAX_EXTENT, _FLAG_MULTI_EXTENT
+        extent += MAX_EXTENT // SECTOR
+        remaining -= MAX_EXTENT
+    yield extent, remaining, 0
+
+
+def _directory_size(records: Iterator[bytes]) -> int:
+    used, sectors = 0, 1
+    for record in records:
+        if used + len(record) > SECTOR:
+            sectors, used = sectors + 1, 0
+        used += len(record)
+    return sectors * SECTOR
+
+
+def _write_directory(out: BinaryIO, records: Iterator[bytes], size: int) -> None:
+    # Records never span a sector boundary; the rest of a sector is zero-filled.
+    buffer = bytearray()
+    used = 0
+    for record in records:
+        if used + len(record) > SECTOR:
+            buffer += bytes(SECTOR - used)
+            used = 0
+        buffer += record
+        used += len(record)
+    out.write(_pad(bytes(buffer), size, b"\0"))
+
+
+def _path_record_size(identifier: bytes) -> int:
+    length = max(1, len(identifier))
+    return 8 + length + length % 2
+
+
+def _path_record(identifier: bytes, extent: int, parent: int, big_endian: bool) -> bytes:
+    identifier = identifier or b"\0"
+    fmt = ">BBIH" if big_endian else "<BBIH"
+    record = struct.pack(fmt, len(identifier), 0, extent, parent) + identifier
+    return record + bytes(len(identifier) % 2)
+
+
+def _split(entries: list[bytes], budget: int) -> tuple[list[bytes], list[list[bytes]]]:
+    """Split SUSP *entries* into those kept in the record and continuation areas."""
+    inline: list[bytes] = []
+    used = 0
+    position = 0
+    while position < len(entries) and used + len(entries[position]) <= budget:
+        used += len(entries[position])
+        inline.append(entries[position])
+        position += 1
+    areas: list[list[bytes]] = [[]]
+    used = 0
+    for number, entry in enumerate(entries[position:], start=position):
+        reserve = _CE_LENGTH if number + 1 < len(entries) else 0
+        if used + len(entry) + reserve > SECTOR:
+            areas.append([])
+            used = 0
+        areas[-1].append(entry)
+        used += len(entry)
+    return inline, areas
+
+
+# -- System Use Sharing Protocol / Rock Ridge entries ------------------------
+
+
+def _ce(block: int, offset: int, length: int) -> bytes:
+    return b"CE\x1c\x01" + _both32(block) + _both32(offset) + _both32(length)
+
+
+def _px(node: _Node) -> bytes:
+    return (
+        b"PX\x24\x01"
+        + _both32(node.mode)
+        + _both32(node.nlink)
+        + _both32(node.uid & 0xFFFFFFFF)
+        + _both32(node.gid & 0xFFFFFFFF)
+    )
+
+
+def _tf(mtime_ns: int) -> bytes:
+    # Modification, access and attribute-change time, all set to the mtime.
+    return b"TF\x1a\x01\x0e" + _short_date(mtime_ns) * 3
+
+
+def _nm(name: bytes) -> list[bytes]:
+    chunks = [name[i : i + 250] for i in range(0, len(name), 250)] or [b""]
+    return [
+        b"NM" + bytes([5 + len(chunk), 1, 1 if number + 1 < len(chunks) else 0]) + chunk
+        for number, chunk in enumerate(chunks)
+    ]
+
+
+def _sl(target: str) -> list[bytes]:
+    # "." and ".." are stored as plain text components, so every component
+    # can be split. An SL entry only ever ends inside a component (component
+    # flag 1): at a component boundary readers disagree about adding "/".
+    entries: list[bytes] = []
+    body = bytearray(b"\x08\x00" if target.startswith("/") else b"")
+    parts = [os.fsencode(part) for part in target.split("/") if part]
+    for number, part in enumerate(parts):
+        last = number + 1 == len(parts)
+        while part:
+            room = _SL_BODY - len(body) - 2
+            if len(part) + (0 if last else 3) <= room:
+                body += bytes([0, len(part)]) + part
+                break
+            take = min(room, len(part) - 1)
+            if take > 0:
+                body += bytes([1, take]) + part[:take]
+                part = part[take:]
+            entries.append(b"SL" + bytes([5 + len(body), 1, 1]) + body)
+            body = bytearray()
+    entries.append(b"SL" + bytes([5 + len(body), 1, 0]) + body)
+    return entries
@@ -0,0 +1,216 @@
+"""Checkpoint journal that lets an interrupted ``lam pack`` resume.
+
+Packing a large bundle takes hours; without a journal a crash, a killed
+process or a lost mount 40 GB into the TAR means starting over. The
+journal (``<output>/.lam-cache/<package>.journal.jsonl``) is a JSON-lines file
+that records:
+
+* the identity of the run – the source's tree digest (see
+  :mod:`lam.pack.fingerprint`) and the pack settings. A journal written
+  for a different tree or different settings is ignored and replaced;
+* TAR checkpoints: the number of members completely written, the archive
+  offset after them, the header offset and path of the last one and the
+  manifest rows of the files among them;
+* completed stages with the size and mtime of their output files.
+
+Checkpoints are taken at member boundaries every :data:`CHECKPOINT_BYTES`
+bytes or :data:`CHECKPOINT_SECONDS` seconds, whichever comes first, and
+when the writer is interrupted. The archive is fsynced before a checkpoint
+is appended (and the journal after it), so a checkpoint never refers to
+data that did not reach the disk. A resumed TAR is truncated to the last
+checkpoint and appended to; a stage whose outputs are intact is skipped.
+The journal is removed once the package is complete.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+from lam.pack.fingerprint import CACHE_DIRNAME
+from lam.pack.manifest import ManifestEntry
+
+CHECKPOINT_BYTES = 256 * 1024 * 1024
+CHECKPOINT_SECONDS = 30.0
+_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class TarCheckpoint:
+    """Position of a TAR writer after a completely written member."""
+
+    members: int  # members written so far
+    end: int  # archive offset after the last of them
+    last_path: str  # relative path of the last member
+    last_offset: int  # offset of its header
+
+
+class PackJournal:
+    """Checkpoints of one package's pack run in *output_dir*.
+
+    Parameters
+    ----------
+    output_dir:
+        The staging area the package is written to.
+    name:
+        Package name.
+    identity:
+        JSON-serialisable description of the run (tree digest and
+        settings); a journal recorded with a different identity is ignored.
+    restart:
+        Ignore the checkpoints of an earlier run even if the identity matches.
+    """
+
+    def __init__(
+        self, output_dir: Path, name: str, identity: dict[str, Any], restart: bool = False
+    ) -> None:
+        self.path = output_dir / CACHE_DIRNAME / f"{name}.journal.jsonl"
+        self.identity = identity
+        self.checkpoint_bytes = CHECKPOINT_BYTES
+        self.checkpoint_seconds = CHECKPOINT_SECONDS
+        self.tar: TarCheckpoint | None = None
+        self.entries: list[ManifestEntry] = []  # manifest rows up to self.tar
+        self._stages: dict[str, dict[str, list[int]]] = {}
+        self._fh: IO[str] | None = None
+        self._fresh = True  # the file on disk does not belong to this run yet
+        self._pending: list[ManifestEntry] = []
+        self._latest: TarCheckpoint | None = None
+        self._synced_at = time.monotonic()
+        if not restart:
+            self._load()
+
+    @property
+    def resumable(self) -> bool:
+        """True if an earlier run of the same package left checkpoints."""
+        return self.tar is not None or bool(self._stages)
+
+    # -- stages -------------------------------------------------------------
+
+    def completed(self, stage: str) -> list[Path] | None:
+        """Return the outputs of *stage* if it completed and they are untouched."""
+        outputs = self._stages.get(stage)
+        if outputs is None:
+            return None
+        paths = []
+        for raw_path, (size, mtime_ns) in outputs.items():
+            try:
+                st = os.stat(raw_path)
+            except OSError:
+                return None
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                return None
+            paths.append(Path(raw_path))
+        return paths
+
+    def complete_stage(self, stage: str, outputs: list[Path]) -> None:
+        """Record that *stage* completed with *outputs* (in order)."""
+        recorded = {}
+        for path in outputs:
+            st = path.stat()
+            recorded[str(path.resolve())] = [st.st_size, st.st_mtime_ns]
+        self._append({"stage": stage, "outputs": recorded})
+        self._stages[stage] = recorded
+
+    # -- TAR checkpoints ------------------------------------------------------
+
+    def member_written(
+        self, checkpoint: TarCheckpoint, entry: ManifestEntry | None, archive_fd: int
+    ) -> None:
+        """Note a completely written member; checkpoint if one is due."""
+        if entry is not None:
+            self._pending.append(entry)
+        self._latest = checkpoint
+        synced = self.tar.end if self.tar is not None else 0
+        if (
+            checkpoint.end - synced >= self.checkpoint_bytes
+            or time.monotonic() - self._synced_at >= self.checkpoint_seconds
+        ):
+            self.checkpoint(archive_fd)
+
+    def checkpoint(self, archive_fd: int) -> None:
+        """Make the members noted so far durable: fsync the archive, then record them."""
+        latest = self._latest
+        if latest is None or latest == self.tar:
+            return
+        os.fsync(archive_fd)
+        self._append(
+            {
+                "tar": [latest.members, latest.end, latest.last_path, latest.last_offset],
+                "entries": [[e.path, e.size, e.mtime, e.sha256] for e in self._pending],
+            }
+        )
+        self.tar = latest
+        self.entries += self._pending
+        self._pending = []
+        self._synced_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Forget all checkpoints; the next record starts a new journal."""
+        self.close()
+        self.tar = self._latest = None
+        self.entries, self._pending = [], []
+        self._stages = {}
+        self._fresh = True
+
+    # -- file -----------------------------------------------------------------
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def discard(self) -> None:
+        """Remove the journal (the package is complete)."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        try:
+            lines = self.path.read_text(encoding="utf-8", errors="surrogateescape").splitlines()
+        except OSError:
+            return
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            return
+        if header.get("version") != _VERSION or header.get("identity") != self.identity:
+            return
+        self._fresh = False
+        for number, line in enumerate(lines[1:], 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn last line of an interrupted write: keep what precedes it.
+                self.path.write_text(
+                    "".join(f"{valid}\n" for valid in lines[:number]),
+                    encoding="utf-8",
+                    errors="surrogateescape",
+                )
+                break
+            if "stage" in record:
+                self._stages[record["stage"]] = record["outputs"]
+            elif "tar" in record:
+                self.tar = TarCheckpoint(*record["tar"])
+                self.entries += [ManifestEntry(*row) for row in record["entries"]]
+        self._latest = self.tar
+
+    def _append(self, record: dict[str, Any]) -> None:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self._fresh:
+                self._fh = self.path.open("w", encoding="utf-8", errors="surrogateescape")
+                self._write({"version": _VERSION, "identity": self.identity})
+                self._fresh = False
+            else:
+                self._fh = self.path.open("a", encoding="utf-8", errors="surrogateescape")
+        self._write(record)
+
+    def _write(self, record: dict[str, Any]) -> None:
+        assert self._fh is not None
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
@@ -0,0 +1,280 @@
+"""Loose-file packages: the source tree copied as-is, protected by batched PAR2 sets.
+
+Media is best archived as plain files with sidecar PAR2 data (spec 2.1):
+every file stays directly readable and no multi-GB container has to be
+built just to protect it. :func:`copy_tree` copies the tree into
+``<output>/<Name>/`` – payloads via :mod:`lam.pack.payload`, hashed on the
+way into the usual SHA-256 manifest – and :func:`protect` adds the PAR2
+sets.
+
+One PAR2 set covering thousands of files would exceed par2cmdline's
+command-line limits and the 32768 slice limit, and pay per-file overhead
+on every photo. :func:`plan_sets` therefore groups the files of each
+directory into sets bounded by file count, total size and the size ratio
+of their largest to smallest file (a set's slice size follows its largest
+files, so tiny files next to huge ones would waste most of a slice). The
+sets are written into the directory they protect, so ``par2 repair`` works
+there without further arguments, and independent sets are computed in
+parallel.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import stat
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from lam.pack import par2
+from lam.pack.manifest import ManifestEntry
+from lam.pack.par2 import Par2Engine, Par2Error
+from lam.pack.par2_tuning import Par2Profile, tune
+from lam.pack.payload import PayloadCopier
+from lam.pack.scan import FileTable
+
+MAX_SET_FILES = 1000
+MAX_SET_SIZE = 4 * 1024**3
+# Largest file in a set is at most this many times the smallest.
+SIZE_RATIO = 64
+
+
+class LooseError(Exception):
+    """Raised when a loose-file package cannot be created."""
+
+
+@dataclass(frozen=True, slots=True)
+class Par2Batch:
+    """One planned PAR2 set: files of one directory, relative to the package."""
+
+    directory: str  # relative directory ("" for the package root)
+    stem: str  # set name; the index file is ``<directory>/<stem>.par2``
+    files: tuple[str, ...]
+    sizes: tuple[int, ...]  # of *files*, in the same order
+
+    @property
+    def size(self) -> int:
+        return sum(self.sizes)
+
+
+def plan_sets(
+    table: FileTable,
+    package_name: str,
+    *,
+    max_files: int = MAX_SET_FILES,
+    max_size: int = MAX_SET_SIZE,
+    size_ratio: int = SIZE_RATIO,
+) -> list[Par2Batch]:
+    """Group the regular files of *table* into PAR2 sets.
+
+    Files are grouped per directory; within a directory they are taken in
+    order of size and a new set starts whenever the current one would hold
+    more than *max_files* files or *max_size* bytes, or its largest file
+    would be more than *size_ratio* times its smallest. Sets are named after
+    their directory (*package_name* for the root), numbered ``.01``, ``.02``
+    … when a directory needs more than one.
+
+    Raises
+    ------
+    LooseError
+        If a source file would be replaced by a set's index or volume
+        files (see :func:`lam.pack.par2.is_set_file`).
+    """
+    by_directory: dict[str, list[tuple[int, str]]] = defaultdict(list)
+    par2_names: dict[str, list[str]] = defaultdict(list)
+    for record in table.files():
+        directory, _, name = record.path.rpartition("/")
+        by_directory[directory].append((record.size, record.path))
+        if name.lower().endswith(".par2"):
+            par2_names[directory].append(name)
+
+    batches: list[Par2Batch] = []
+    for directory, files in by_directory.items():
+        groups: list[list[tuple[int, str]]] = []
+        current: list[tuple[int, str]] = []
+        current_size = 0
+        for size, path in sorted(files):
+            if current and (
+                len(current) >= max_files
+                or current_size + size > max_size
+                or size > current[0][0] * size_ratio
+            ):
+                groups.append(current)
+                current, current_size = [], 0
+            current.append((size, path))
+            current_size += size
+        groups.append(current)
+
+        label = directory.rpartition("/")[2] or package_name
+        for number, group in enumerate(groups, 1):
+            stem = label if len(groups) == 1 else f"{label}.{number:02d}"
+            clashes = sorted(n for n in par2_names[directory] if par2.is_set_file(n, stem))
+            if clashes:
+                raise LooseError(
+                    f"PAR2 set {directory or '.'}/{stem}.par2 would overwrite the source "
+                    f"file {clashes[0]}."
+                )
+            batches.append(
+                Par2Batch(
+                    directory,
+                    stem,
+                    tuple(path for _, path in group),
+                    tuple(size for size, _ in group),
+                )
+            )
+    return batches
+
+
+def copy_tree(table: FileTable, target: Path, name: str) -> list[ManifestEntry]:
+    """Copy the tree scanned into *table* to *target*, replacing an older copy.
+
+    The copy is assembled next to *target* and renamed into place, so an
+    interrupted run never leaves a half-written package under the final
+    name. Modes and mtimes are kept, symlinks are copied as symlinks,
+    sockets and other special files are skipped.
+
+    Returns
+    -------
+    list[ManifestEntry]
+        SHA-256 manifest rows (``<name>/<path>``) of every copied file.
+
+    Raises
+    ------
+    LooseError
+        If *target* and the source overlap, a file cannot be copied, or it
+        changed size while being copied.
+    """
+    source = table.root.resolve()
+    resolved = target.resolve()
+    if resolved == source or source in resolved.parents or resolved in source.parents:
+        raise LooseError(f"Output {target} overlaps the source directory {table.root}.")
+    staging = target.with_name(f".{target.name}.lam-partial")
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+
+    entries: list[ManifestEntry] = []
+    directories: list[tuple[Path, int, int]] = []
+    for record in table:
+        src = table.root / record.path
+        dst = staging / record.path if record.path else staging
+        try:
+            if record.is_dir:
+                dst.mkdir(exist_ok=True)
+                directories.append((dst, record.mode, record.mtime_ns))
+            elif record.is_symlink:
+                os.symlink(os.readlink(src), dst)
+                os.utime(dst, ns=(record.mtime_ns, record.mtime_ns), follow_symlinks=False)
+            elif record.is_file:
+                digest = hashlib.sha256()
+                fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                try:
+                    PayloadCopier(fd).copy_file(src, record.size, digest)
+                finally:
+                    os.close(fd)
+                if src.stat().st_size != record.size:
+                    raise LooseError(f"{record.path} changed size while it was being copied")
+                os.chmod(dst, stat.S_IMODE(record.mode))
+                os.utime(dst, ns=(record.mtime_ns, record.mtime_ns))
+                entries.append(
+                    ManifestEntry(
+                        f"{name}/{record.path}",
+                        record.size,
+                        record.mtime_ns // 1_000_000_000,
+                        digest.hexdigest(),
+                    )
+                )
+        except OSError as exc:
+            raise LooseError(f"Failed to copy {record.path or '.'}: {exc}") from exc
+    # Directory metadata last (and deepest first): creating entries bumps mtimes.
+    for path, mode, mtime_ns in reversed(directories):
+        os.chmod(path, stat.S_IMODE(mode))
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    if target.exists() or target.is_symlink():
+        if target.is_dir() and not target.is_symlink():
+            shutil.rmtree(target)
+        else:
+            target.unlink()
+    os.rename(staging, target)
+    return entries
+
+
+def protect(
+    package_dir: Path,
+    batches: list[Par2Batch],
+    redundancy_percent: int,
+    volumes: int = 1,
+    *,
+    engine: Par2Engine = "par2cmdline",
+    workers: int = 4,
+    par2_profile: Callable[[tuple[int, ...]], Par2Profile] | None = None,
+    on_done: Callable[[Par2Batch, list[Path]], None] | None = None,
+) -> list[Path]:
+    """Create the PAR2 sets planned in *batches* inside *package_dir*.
+
+    Parameters
+    ----------
+    package_dir:
+        The copied package (see :func:`copy_tree`).
+    batches:
+        Sets from :func:`plan_sets`.
+    redundancy_percent, volumes, engine:
+        As for :func:`lam.pack.par2.create`, per set.
+    workers:
+        Sets computed concurrently.
+    par2_profile:
+        Returns the PAR2 profile for a set whose files have the given
+        sizes (see the *file_sizes* of :func:`lam.pack.par2_tuning.tune`);
+        by default it is tuned with the CPU cores shared between the
+        *workers*.
+    on_done:
+        Called from the worker threads as every set is finished.
+
+    Returns
+    -------
+    list[Path]
+        All generated .par2 files, sorted.
+
+    Raises
+    ------
+    Par2Error
+        If any set cannot be created (the remaining sets are still awaited).
+    """
+    workers = max(1, min(workers, len(batches)))
+    if par2_profile is None:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        par2_profile = lambda sizes: tune(  # noqa: E731
+            sum(sizes), redundancy_percent, threads=threads, file_sizes=sizes
+        )
+    profile_for = par2_profile
+
+    def create(batch: Par2Batch) -> list[Path]:
+        base = package_dir / batch.directory / batch.stem
+        files = [package_dir / path for path in batch.files]
+        try:
+            written = par2.create_set(
+                base, files, redundancy_percent, volumes, engine, profile_for(batch.sizes)
+            )
+        except OSError as exc:
+            raise Par2Error(f"Failed to create {base}.par2: {exc}") from exc
+        if on_done is not None:
+            on_done(batch, written)
+        return written
+
+    created: list[Path] = []
+    errors: list[Par2Error] = []
+    with ThreadPoolExecutor(workers, thread_name_prefix="lam-par2") as pool:
+        for future in [pool.submit(create, batch) for batch in batches]:
+            try:
+                created += future.result()
+            except Par2Error as exc:
+                errors.append(exc)
+    if errors:
+        more = f" (and {len(errors) - 1} more set(s))" if len(errors) > 1 else ""
+        raise Par2Error(f"{errors[0]}{more}")
+    return sorted(created)
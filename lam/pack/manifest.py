@@ -0,0 +1,104 @@
+"""SHA-256 manifest sidecar written next to an archive.
+
+The manifest is a UTF-8 CSV file with one row per archived file::
+
+    path,size,mtime,sha256
+    Familie_2025/photo.jpg,103,2025-12-24T18:00:00Z,9f86d08…
+
+``path`` is the member name inside the archive, ``mtime`` is UTC in
+ISO 8601 format. Rows are written in archive order. File names that are
+not valid UTF-8 are kept byte for byte with ``surrogateescape``, as in the
+TAR headers.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+MANIFEST_SUFFIX = ".manifest.csv"
+FIELDS = ("path", "size", "mtime", "sha256")
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestEntry:
+    """One archived file: member path, size in bytes, mtime (epoch seconds) and hash."""
+
+    path: str
+    size: int
+    mtime: int
+    sha256: str
+
+
+class HashingReader:
+    """File wrapper that feeds every byte read through SHA-256.
+
+    Used to hash file contents while they are copied into an archive, so no
+    second read pass over the source is needed.
+    """
+
+    def __init__(self, fileobj: BinaryIO) -> None:
+        self._fileobj = fileobj
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self._hash.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def package_name(package: Path) -> str:
+    """Return the name of the package at *package*: ``Name`` of ``Name.tar`` or of a directory.
+
+    Only archives lose their suffix; a loose package directory such as
+    ``Reise.2024`` keeps its full name.
+    """
+    return package.name if package.is_dir() else package.stem
+
+
+def manifest_path(archive_path: Path) -> Path:
+    """Return the manifest sidecar path for *archive_path* (``Name.manifest.csv``).
+
+    *archive_path* may also be a loose package directory (see :func:`package_name`).
+    """
+    return archive_path.parent / f"{package_name(archive_path)}{MANIFEST_SUFFIX}"
+
+
+def write(path: Path, entries: Iterable[ManifestEntry]) -> Path:
+    """Write *entries* to the manifest file at *path* and return *path*."""
+    with path.open("w", encoding="utf-8", errors="surrogateescape", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(FIELDS)
+        for entry in entries:
+            writer.writerow((entry.path, entry.size, _format_mtime(entry.mtime), entry.sha256))
+    return path
+
+
+def read(path: Path) -> list[ManifestEntry]:
+    """Read a manifest written by :func:`write`."""
+    with path.open("r", encoding="utf-8", errors="surrogateescape", newline="") as fh:
+        return [
+            ManifestEntry(
+                path=row["path"],
+                size=int(row["size"]),
+                mtime=_parse_mtime(row["mtime"]),
+                sha256=row["sha256"],
+            )
+            for row in csv.DictReader(fh)
+        ]
+
+
+def _format_mtime(mtime: int) -> str:
+    return datetime.fromtimestamp(mtime, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_mtime(value: str) -> int:
+    parsed = datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
@@ -0,0 +1,201 @@
+"""Per-stage timing, throughput and resource metrics of a pack run.
+
+A run is split into stages (scan, validate, archive, PAR2, …). For every
+stage :class:`PipelineMetrics` records:
+
+* wall-clock and CPU time (user + system, including child processes such
+  as par2cmdline);
+* payload bytes read and written, as reported by the stage itself, and the
+  throughput derived from them;
+* block-device I/O from ``getrusage`` (bytes that actually reached or came
+  from the disk, not from the page cache);
+* the peak resident set size of LAM and its child processes so far.
+
+The result is written as JSON (``lam pack --metrics-json``) for monitoring.
+Resource figures are 0 where the platform does not provide them (Windows
+has no :mod:`resource` module).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+StageStatus = Literal["running", "ok", "error"]
+
+# getrusage reports block I/O in 512-byte units and ru_maxrss in KiB
+# (bytes on macOS).
+_BLOCK = 512
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclass(slots=True)
+class StageMetrics:
+    """Measurements of one pipeline stage."""
+
+    name: str
+    status: StageStatus = "running"
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    disk_read: int = 0
+    disk_written: int = 0
+    peak_rss: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Payload bytes per second (the larger of reads and writes)."""
+        if self.wall_seconds <= 0:
+            return 0.0
+        return max(self.bytes_read, self.bytes_written) / self.wall_seconds
+
+    def add(self, read: int = 0, written: int = 0) -> None:
+        """Account *read* and *written* payload bytes to this stage."""
+        self.bytes_read += read
+        self.bytes_written += written
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["wall_seconds"] = round(self.wall_seconds, 6)
+        data["cpu_seconds"] = round(self.cpu_seconds, 6)
+        data["throughput"] = round(self.throughput, 1)
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class _Sample:
+    wall: float
+    cpu: float
+    disk_read: int
+    disk_written: int
+    peak_rss: int
+
+
+# Called with ("start" | "end", stage) around every stage.
+StageCallback = Callable[[str, StageMetrics], None]
+
+
+class PipelineMetrics:
+    """Collect :class:`StageMetrics` for the stages of one run.
+
+    Parameters
+    ----------
+    on_stage:
+        Called when a stage starts and ends, e.g. to drive a progress display.
+    """
+
+    def __init__(self, on_stage: StageCallback | None = None) -> None:
+        self.stages: list[StageMetrics] = []
+        self.on_stage = on_stage
+        self._started = _sample()
+        self._current: tuple[StageMetrics, _Sample] | None = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Measure the enclosed block as stage *name*.
+
+        The stage is recorded even if the block raises; its status is then
+        ``"error"``. Stages must not be nested.
+        """
+        if self._current is not None:
+            raise RuntimeError(f"stage {name!r} started inside {self._current[0].name!r}")
+        metrics = StageMetrics(name)
+        before = _sample()
+        self.stages.append(metrics)
+        self._current = (metrics, before)
+        if self.on_stage is not None:
+            self.on_stage("start", metrics)
+        try:
+            yield metrics
+        except BaseException:
+            metrics.status = "error"
+            raise
+        else:
+            metrics.status = "ok"
+        finally:
+            self._current = None
+            after = _sample()
+            metrics.wall_seconds = after.wall - before.wall
+            metrics.cpu_seconds = after.cpu - before.cpu
+            metrics.disk_read = after.disk_read - before.disk_read
+            metrics.disk_written = after.disk_written - before.disk_written
+            metrics.peak_rss = after.peak_rss
+            if self.on_stage is not None:
+                self.on_stage("end", metrics)
+
+    def live(self) -> StageMetrics | None:
+        """Return a snapshot of the running stage (times and disk I/O so far)."""
+        current = self._current
+        if current is None:
+            return None
+        metrics, before = current
+        now = _sample()
+        return StageMetrics(
+            metrics.name,
+            "running",
+            now.wall - before.wall,
+            now.cpu - before.cpu,
+            metrics.bytes_read,
+            metrics.bytes_written,
+            now.disk_read - before.disk_read,
+            now.disk_written - before.disk_written,
+            now.peak_rss,
+        )
+
+    def totals(self) -> StageMetrics:
+        """Return the whole run so far as one pseudo-stage named ``total``."""
+        now = _sample()
+        failed = any(s.status == "error" for s in self.stages)
+        return StageMetrics(
+            "total",
+            "error" if failed else "ok",
+            now.wall - self._started.wall,
+            now.cpu - self._started.cpu,
+            sum(s.bytes_read for s in self.stages),
+            sum(s.bytes_written for s in self.stages),
+            now.disk_read - self._started.disk_read,
+            now.disk_written - self._started.disk_written,
+            now.peak_rss,
+        )
+
+    def as_dict(self, **context: Any) -> dict[str, Any]:
+        """Return the metrics as a JSON-serialisable dict; *context* is added as-is."""
+        return {
+            **context,
+            "stages": [s.as_dict() for s in self.stages],
+            "total": self.totals().as_dict(),
+        }
+
+    def write_json(self, path: Path, **context: Any) -> None:
+        """Write :meth:`as_dict` to *path* (atomically replaced)."""
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.as_dict(**context), indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def _sample() -> _Sample:
+    times = os.times()
+    cpu = times.user + times.system + times.children_user + times.children_system
+    if resource is None:
+        return _Sample(time.perf_counter(), cpu, 0, 0, 0)
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return _Sample(
+        time.perf_counter(),
+        cpu,
+        (own.ru_inblock + children.ru_inblock) * _BLOCK,
+        (own.ru_oublock + children.ru_oublock) * _BLOCK,
+        max(own.ru_maxrss, children.ru_maxrss) * _RSS_UNIT,
+    )
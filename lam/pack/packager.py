@@ -1,14 +1,30 @@
-"""Archive creation for TAR, ISO, and DMG formats."""
+"""Archive creation for TAR, ISO, and DMG formats, and loose-file packages."""
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import itertools
+import os
 import shutil
+import stat
 import subprocess
 import tarfile
 from pathlib import Path
-from typing import Literal
+from typing import Iterator, Literal
 
-ArchiveFormat = Literal["tar", "iso", "dmg"]
+from lam.pack import iso9660, loose, manifest, tarindex
+from lam.pack.journal import PackJournal, TarCheckpoint
+from lam.pack.manifest import ManifestEntry
+from lam.pack.payload import PayloadCopier
+from lam.pack.prefetch import ReadOrder, ReadScheduler, SourceFile
+from lam.pack.scan import FileRecord, FileTable, scan
+
+ArchiveFormat = Literal["tar", "iso", "dmg", "loose"]
+
+# Header encoding of tarfile.open(..., "w"): archives stay byte-identical.
+_TAR_ENCODING = tarfile.ENCODING
+_TAR_ERRORS = "surrogateescape"
 
 
 class PackagerError(Exception):
@@ -19,6 +35,10 @@ def create_archive(
     source_dir: Path,
     output_dir: Path,
     fmt: ArchiveFormat = "tar",
+    table: FileTable | None = None,
+    links: dict[str, str] | None = None,
+    journal: PackJournal | None = None,
+    read_order: ReadOrder = "walk",
 ) -> Path:
     """Create an archive of *source_dir* inside *output_dir*.
 
@@ -29,27 +49,66 @@ def create_archive(
     output_dir:
         Destination directory (created if it doesn't exist).
     fmt:
-        Archive format: ``"tar"``, ``"iso"``, or ``"dmg"``.
+        Archive format: ``"tar"``, ``"iso"``, or ``"dmg"``; ``"loose"``
+        copies the tree as-is into ``output_dir/<name>/`` instead.
+    table:
+        File table of *source_dir* from an earlier scan (e.g. returned by
+        :func:`lam.pack.validator.validate`). Scanned on demand if omitted.
+    links:
+        TAR only: maps relative paths of duplicate files to the relative path
+        of an identical file earlier in the scan (see
+        :func:`lam.pack.dedup.link_targets`). They are stored as hard-link
+        members, so the payload is written only once.
+    journal:
+        TAR only: checkpoint the archive in this journal and, if it holds a
+        checkpoint of an interrupted run, resume after it (see
+        :mod:`lam.pack.journal`).
+    read_order:
+        TAR only: ``"physical"`` prefetches the source files in on-disk
+        order a bounded window ahead of the writer and drops them from the
+        page cache once archived (see :mod:`lam.pack.prefetch`); the member
+        order is unchanged.
 
     Returns
     -------
     Path
-        Path to the created archive file.
+        Path to the created archive file (the package directory for
+        ``"loose"``). For TAR archives, loose packages and ISO images
+        written by the built-in writer, a SHA-256 manifest
+        (``Name.manifest.csv``) is written next to it; for TAR archives
+        also a member offset index (``Name.index.csv``, see
+        :mod:`lam.pack.tarindex`).
 
     Raises
     ------
     PackagerError
         If the chosen format's external tool is unavailable or fails.
+
+    Notes
+    -----
+    ISO images are created with ``hdiutil`` where it exists (macOS, UDF
+    hybrid) and with the built-in streaming writer
+    (:mod:`lam.pack.iso9660`, ISO 9660 + Rock Ridge + Joliet) everywhere else.
     """
     output_dir.mkdir(parents=True, exist_ok=True)
     archive_name = source_dir.name  # e.g. "Familie_2025"
 
     if fmt == "tar":
-        return _create_tar(source_dir, output_dir, archive_name)
+        if table is None:
+            table = scan(source_dir)
+        return _create_tar(table, output_dir, archive_name, links or {}, journal, read_order)
     elif fmt == "iso":
+        if shutil.which("hdiutil") is None:
+            if table is None:
+                table = scan(source_dir)
+            return _create_native_iso(table, output_dir, archive_name)
         return _create_iso(source_dir, output_dir, archive_name)
     elif fmt == "dmg":
         return _create_dmg(source_dir, output_dir, archive_name)
+    elif fmt == "loose":
+        if table is None:
+            table = scan(source_dir)
+        return _create_loose(table, output_dir, archive_name)
     else:
         raise PackagerError(f"Unknown format: {fmt!r}")
 
@@ -59,13 +118,222 @@ def create_archive(
 # ---------------------------------------------------------------------------
 
 
-def _create_tar(source_dir: Path, output_dir: Path, name: str) -> Path:
+def _create_tar(
+    table: FileTable,
+    output_dir: Path,
+    name: str,
+    links: dict[str, str],
+    journal: PackJournal | None = None,
+    read_order: ReadOrder = "walk",
+) -> Path:
+    # Headers and padding are built with tarfile (PAX format, as tarfile.open
+    # writes them); payloads are moved by the kernel where possible.
     archive_path = output_dir / f"{name}.tar"
-    with tarfile.open(archive_path, mode="w:") as tf:
-        tf.add(source_dir, arcname=name)
+    entries: list[ManifestEntry] = []
+    index: list[tarindex.IndexEntry] = []
+    targets = set(links.values())
+    digests: dict[str, str] = {}  # hashes of archived link targets, by relative path
+    members = _tar_members(table, name, links, digests)
+    count = offset = 0
+    resume = journal.tar if journal is not None else None
+    if journal is not None and resume is not None:
+        for entry in journal.entries:
+            path = entry.path.removeprefix(f"{name}/")
+            if path in targets:
+                digests[path] = entry.sha256
+        if _can_resume(archive_path, resume, itertools.islice(members, resume.members)):
+            entries = list(journal.entries)
+            count, offset = resume.members, resume.end
+        else:
+            journal.reset()
+            digests.clear()
+            members = _tar_members(table, name, links, digests)
+
+    scheduler = None
+    positions: dict[str, int] = {}  # payload files by relative path → scheduler position
+    if read_order == "physical":
+        payloads = [r for r in table.files() if r.path not in links]
+        positions = {r.path: i for i, r in enumerate(payloads)}
+        scheduler = ReadScheduler(
+            [SourceFile(table.root / r.path, r.size, r.inode) for r in payloads]
+        )
+        written = [positions.get(e.path.removeprefix(f"{name}/"), -1) for e in entries]
+
+    with archive_path.open("r+b" if count else "wb", buffering=0) as out:
+        if count:
+            out.truncate(offset)
+            out.seek(offset)
+            # Offsets of the members already written, from their headers.
+            index = tarindex.scan_members(archive_path)
+        copier = PayloadCopier(out.fileno())
+        if scheduler is not None:
+            scheduler.start(max(written, default=-1) + 1)  # after a resumed run's files
+        try:
+            for record, arcname, info in members:
+                start = offset
+                header = info.tobuf(tarfile.PAX_FORMAT, _TAR_ENCODING, _TAR_ERRORS)
+                index.append(tarindex.IndexEntry.from_tarinfo(info, start, start + len(header)))
+                entry = None
+                if info.islnk():
+                    entry = ManifestEntry(
+                        arcname, record.size, int(info.mtime), digests[links[record.path]]
+                    )
+                if not info.isreg():  # directories, symlinks and hard links: header only
+                    copier.write(header)
+                    offset += len(header)
+                else:
+                    padding = -info.size % tarfile.BLOCKSIZE
+                    digest = hashlib.sha256()
+                    try:
+                        copier.copy_file(
+                            table.root / record.path,
+                            info.size,
+                            digest,
+                            header=header,
+                            padding=padding,
+                        )
+                    except OSError as exc:
+                        raise PackagerError(f"Failed to archive {record.path}: {exc}") from exc
+                    if scheduler is not None and record.path in positions:
+                        scheduler.consumed(positions[record.path])
+                    offset += len(header) + info.size + padding
+                    entry = ManifestEntry(arcname, info.size, int(info.mtime), digest.hexdigest())
+                    if record.path in targets:
+                        digests[record.path] = digest.hexdigest()
+                if entry is not None:
+                    entries.append(entry)
+                count += 1
+                if journal is not None:
+                    checkpoint = TarCheckpoint(count, offset, record.path, start)
+                    journal.member_written(checkpoint, entry, out.fileno())
+        except BaseException:
+            if journal is not None:
+                # Keep the members written so far for the next run.
+                try:
+                    journal.checkpoint(out.fileno())
+                except OSError:
+                    pass
+            raise
+        finally:
+            if scheduler is not None:
+                scheduler.close()
+        # End-of-archive marker, then pad to a full record (as tarfile does).
+        offset += 2 * tarfile.BLOCKSIZE
+        copier.write(bytes(2 * tarfile.BLOCKSIZE + -offset % tarfile.RECORDSIZE))
+    manifest.write(manifest.manifest_path(archive_path), entries)
+    tarindex.write(tarindex.index_path(archive_path), index)
     return archive_path
 
 
+def _tar_members(
+    table: FileTable, name: str, links: dict[str, str], digests: dict[str, str]
+) -> Iterator[tuple[FileRecord, str, tarfile.TarInfo]]:
+    """Yield the members of the TAR of *table* in archive order.
+
+    Duplicates become hard links once their target is in *digests*, which
+    the writer fills as it archives the targets.
+    """
+    for record in table:
+        arcname = f"{name}/{record.path}" if record.path else name
+        info = _tarinfo(record, arcname, table.root)
+        if info is None:
+            continue  # sockets and other special files are not archived
+        target = links.get(record.path)
+        if info.isreg() and target is not None and target in digests:
+            info.type = tarfile.LNKTYPE
+            info.linkname = f"{name}/{target}"
+            info.size = 0
+        yield record, arcname, info
+
+
+def _can_resume(
+    archive_path: Path,
+    checkpoint: TarCheckpoint,
+    written: Iterator[tuple[FileRecord, str, tarfile.TarInfo]],
+) -> bool:
+    """True if *archive_path* holds the members *written* up to *checkpoint*.
+
+    The member count and last path must match and the last member's header
+    must be in place byte for byte; whatever follows it is discarded.
+    """
+    count, last = 0, None
+    for last in written:
+        count += 1
+    if last is None or count != checkpoint.members or last[0].path != checkpoint.last_path:
+        return False
+    header = last[2].tobuf(tarfile.PAX_FORMAT, _TAR_ENCODING, _TAR_ERRORS)
+    try:
+        with archive_path.open("rb") as fh:
+            if os.fstat(fh.fileno()).st_size < checkpoint.end:
+                return False
+            fh.seek(checkpoint.last_offset)
+            return fh.read(len(header)) == header
+    except OSError:
+        return False
+
+
+def _tarinfo(record: FileRecord, arcname: str, root: Path) -> tarfile.TarInfo | None:
+    """Build the TAR header for *record* from scanned metadata (no extra stat)."""
+    info = tarfile.TarInfo(arcname)
+    if record.is_file:
+        info.type = tarfile.REGTYPE
+        info.size = record.size
+    elif record.is_dir:
+        info.type = tarfile.DIRTYPE
+    elif record.is_symlink:
+        info.type = tarfile.SYMTYPE
+        info.linkname = os.readlink(root / record.path)
+    else:
+        return None
+    info.mode = stat.S_IMODE(record.mode)
+    info.mtime = record.mtime_ns // 1_000_000_000
+    info.uid = record.uid
+    info.gid = record.gid
+    info.uname = _user_name(record.uid)
+    info.gname = _group_name(record.gid)
+    return info
+
+
+@functools.cache
+def _user_name(uid: int) -> str:
+    try:
+        import pwd
+
+        return pwd.getpwuid(uid).pw_name
+    except (ImportError, KeyError):
+        return ""
+
+
+@functools.cache
+def _group_name(gid: int) -> str:
+    try:
+        import grp
+
+        return grp.getgrgid(gid).gr_name
+    except (ImportError, KeyError):
+        return ""
+
+
+def _create_native_iso(table: FileTable, output_dir: Path, name: str) -> Path:
+    archive_path = output_dir / f"{name}.iso"
+    try:
+        entries = iso9660.write_image(table, archive_path, name)
+    except (OSError, iso9660.Iso9660Error) as exc:
+        raise PackagerError(f"Failed to write ISO image: {exc}") from exc
+    manifest.write(manifest.manifest_path(archive_path), entries)
+    return archive_path
+
+
+def _create_loose(table: FileTable, output_dir: Path, name: str) -> Path:
+    package_dir = output_dir / name
+    try:
+        entries = loose.copy_tree(table, package_dir, name)
+    except loose.LooseError as exc:
+        raise PackagerError(str(exc)) from exc
+    manifest.write(manifest.manifest_path(package_dir), entries)
+    return package_dir
+
+
 def _create_iso(source_dir: Path, output_dir: Path, name: str) -> Path:
     archive_path = output_dir / f"{name}.iso"
     binary = shutil.which("hdiutil")
@@ -1,17 +1,43 @@
-"""PAR2 redundancy-data creation via par2cmdline."""
+"""PAR2 redundancy-data creation and verification via par2cmdline or the native engine."""
 
 from __future__ import annotations
 
+import glob
+import re
 import shutil
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Literal
+
+from lam.pack.par2_tuning import Par2Profile, tune
+
+Par2Engine = Literal["par2cmdline", "native"]
+ENGINES: tuple[str, ...] = ("par2cmdline", "native")
+Par2Status = Literal["ok", "repairable", "damaged"]
+
+_VOLUME_RE = re.compile(r"\.vol\d+\+\d+\.par2", re.IGNORECASE)
 
 
 class Par2Error(Exception):
     """Raised when par2create fails or is not available."""
 
 
-def create(archive_path: Path, redundancy_percent: int, volumes: int = 1) -> list[Path]:
+@dataclass(frozen=True, slots=True)
+class Par2Verification:
+    """Outcome of :func:`verify`."""
+
+    status: Par2Status
+    detail: str = ""
+
+
+def create(
+    archive_path: Path,
+    redundancy_percent: int,
+    volumes: int = 1,
+    engine: Par2Engine = "par2cmdline",
+    profile: Par2Profile | None = None,
+) -> list[Path]:
     """Create PAR2 sidecar files next to *archive_path*.
 
     Parameters
@@ -23,6 +49,13 @@ def create(archive_path: Path, redundancy_percent: int, volumes: int = 1) -> lis
     volumes:
         Number of PAR2 volume files to create (``-n`` flag). Defaults to 1,
         which consolidates all recovery data into a single volume file.
+    engine:
+        ``"par2cmdline"`` (default) shells out to ``par2`` / ``par2create``;
+        ``"native"`` uses the in-process engine in :mod:`lam.pack.par2_native`.
+    profile:
+        Block size, thread count and memory budget. Auto-tuned from the
+        archive size and host resources (:func:`lam.pack.par2_tuning.tune`)
+        when omitted.
 
     Returns
     -------
@@ -35,25 +68,77 @@ def create(archive_path: Path, redundancy_percent: int, volumes: int = 1) -> lis
         If ``par2`` / ``par2create`` is not on PATH or the subprocess exits
         with a non-zero return code.
     """
+    return create_set(
+        archive_path.parent / archive_path.stem,  # e.g. "Familie_2025"
+        [archive_path],
+        redundancy_percent,
+        volumes,
+        engine,
+        profile,
+    )
+
+
+def create_set(
+    par2_base: Path,
+    files: list[Path],
+    redundancy_percent: int,
+    volumes: int = 1,
+    engine: Par2Engine = "par2cmdline",
+    profile: Par2Profile | None = None,
+) -> list[Path]:
+    """Create one PAR2 set ``par2_base.par2`` (+ volumes) protecting *files*.
+
+    Like :func:`create`, but for several files. File names inside the set
+    are stored relative to ``par2_base.parent``, so *files* should live in
+    that directory or below it. The profile is tuned for the files' sizes
+    when omitted.
+    """
+    if engine not in ENGINES:
+        raise Par2Error(f"Unknown PAR2 engine: {engine!r}. Choose one of: {', '.join(ENGINES)}.")
+    if not files:
+        raise Par2Error("No files to protect.")
+    if profile is None:
+        sizes = [p.stat().st_size for p in files]
+        profile = tune(sum(sizes), redundancy_percent, file_sizes=sizes)
+    # Files of an earlier (outdated or interrupted) set: par2cmdline refuses
+    # to overwrite them, and stale volumes must not mix with the new set.
+    for stale in set_files(par2_base):
+        stale.unlink()
+
+    if engine == "native":
+        from lam.pack import par2_native
+
+        return par2_native.create_set(
+            par2_base,
+            files,
+            redundancy_percent,
+            volumes,
+            block_size=profile.block_size,
+            workers=profile.threads,
+            memory_mb=profile.memory_mb,
+        )
+
     # par2cmdline exposes either "par2" or "par2create"
     binary = shutil.which("par2") or shutil.which("par2create")
     if binary is None:
         raise Par2Error(
             "par2 / par2create not found. "
             "Install it first (e.g. `brew install par2` on macOS or "
-            "`apt install par2` on Debian/Ubuntu)."
+            "`apt install par2` on Debian/Ubuntu), or use the built-in engine "
+            "with `lam config set pack.par2_engine native`."
         )
 
-    base_name = archive_path.stem  # e.g. "Familie_2025"
-    par2_base = archive_path.parent / base_name
-
     cmd = [
         binary,
         "create",
         f"-r{redundancy_percent}",
         f"-n{volumes}",
+        f"-s{profile.block_size}",
+        f"-t{profile.threads}",
+        f"-m{profile.memory_mb}",
+        f"-B{par2_base.parent}",
         str(par2_base),
-        str(archive_path),
+        *(str(p) for p in files),
     ]
 
     result = subprocess.run(cmd, capture_output=True, text=True)
@@ -63,6 +148,86 @@ def create(archive_path: Path, redundancy_percent: int, volumes: int = 1) -> lis
             f"stdout: {result.stdout}\nstderr: {result.stderr}"
         )
 
-    # Collect generated .par2 files (they live next to the archive)
-    par2_files = sorted(archive_path.parent.glob(f"{base_name}*.par2"))
-    return par2_files
+    return set_files(par2_base)
+
+
+def set_files(par2_base: Path) -> list[Path]:
+    """Return the .par2 files of the set *par2_base* (index + volumes), sorted.
+
+    Other sets sharing the directory have different base names.
+    """
+    return sorted(
+        p
+        for p in par2_base.parent.glob(f"{glob.escape(par2_base.name)}*.par2")
+        if is_set_file(p.name, par2_base.name)
+    )
+
+
+def is_set_file(name: str, stem: str) -> bool:
+    """Return ``True`` if *name* is the index or a volume file of the set *stem*.
+
+    These are the files :func:`create_set` replaces before it writes the set.
+    """
+    if not name.startswith(stem):
+        return False
+    rest = name[len(stem) :]
+    return rest == ".par2" or _VOLUME_RE.fullmatch(rest) is not None
+
+
+def verify(index_path: Path, engine: Par2Engine = "par2cmdline") -> Par2Verification:
+    """Verify the files protected by the PAR2 set whose index file is *index_path*.
+
+    Parameters
+    ----------
+    index_path:
+        The set's index file (``Name.par2``).
+    engine:
+        ``"par2cmdline"`` runs ``par2 verify``; ``"native"`` checks the files
+        in-process (:func:`lam.pack.par2_native.verify`, no NumPy needed).
+
+    Returns
+    -------
+    Par2Verification
+        ``ok`` if all files are intact, ``repairable`` if damage is within the
+        available recovery data, ``damaged`` otherwise.
+
+    Raises
+    ------
+    Par2Error
+        If the engine is unknown or unavailable, or the set is unreadable.
+    """
+    if engine not in ENGINES:
+        raise Par2Error(f"Unknown PAR2 engine: {engine!r}. Choose one of: {', '.join(ENGINES)}.")
+
+    if engine == "native":
+        from lam.pack import par2_native
+
+        result = par2_native.verify(index_path)
+        if result.ok:
+            return Par2Verification("ok", f"{result.total_slices} slice(s) intact")
+        detail = (
+            f"{result.damaged_slices} of {result.total_slices} slice(s) damaged, "
+            f"{result.recovery_slices} recovery slice(s) available"
+        )
+        if result.missing_files:
+            detail += f"; missing: {', '.join(result.missing_files)}"
+        return Par2Verification("repairable" if result.repairable else "damaged", detail)
+
+    binary = shutil.which("par2") or shutil.which("par2verify")
+    if binary is None:
+        raise Par2Error(
+            "par2 / par2verify not found. Install par2cmdline or use the built-in "
+            "engine with `lam config set pack.par2_engine native`."
+        )
+    result = subprocess.run(
+        [binary, "verify", "-q", "--", str(index_path)], capture_output=True, text=True
+    )
+    # par2cmdline: 0 = all files correct, 1 = repair possible, 2 = repair not possible.
+    status: dict[int, Par2Status] = {0: "ok", 1: "repairable", 2: "damaged"}
+    if result.returncode not in status:
+        raise Par2Error(
+            f"par2 verify exited with code {result.returncode}.\n"
+            f"stdout: {result.stdout}\nstderr: {result.stderr}"
+        )
+    lines = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    return Par2Verification(status[result.returncode], lines[-1] if lines else "")
@@ -0,0 +1,173 @@
+"""Choose PAR2 block size, thread count and memory budget for an archive.
+
+par2cmdline's defaults (2000 blocks, a small memory limit, single-threaded
+on older builds) make it re-read large archives several times and leave
+most cores idle. :func:`tune` derives a profile from the archive size, the
+core count and the available RAM; :func:`calibrate` benchmarks a few
+profiles on a sample file so the best one can be stored in the config.
+A calibrated profile is stored as a block *count*, not a block size: the
+sample is far smaller than a real archive, and a block size measured on it
+would give a real archive many thousands of tiny blocks.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+TARGET_BLOCK_COUNT = 2000
+MAX_BLOCK_COUNT = 32768
+SECTOR_SIZE = 2048
+MIN_MEMORY_MB = 64
+# Share of the available RAM that PAR2 may claim.
+MEMORY_SHARE = 0.5
+
+_MIB = 1024 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class Par2Profile:
+    """Tuned PAR2 parameters for one archive."""
+
+    block_size: int
+    block_count: int
+    threads: int
+    memory_mb: int
+
+
+def tune(
+    archive_size: int,
+    redundancy_percent: int = 15,
+    *,
+    cpu_count: int | None = None,
+    available_memory: int | None = None,
+    block_count: int | None = None,
+    block_size: int | None = None,
+    threads: int | None = None,
+    memory_mb: int | None = None,
+    file_sizes: Sequence[int] | None = None,
+) -> Par2Profile:
+    """Return a :class:`Par2Profile` for an archive of *archive_size* bytes.
+
+    Parameters
+    ----------
+    archive_size:
+        Size of the data to protect in bytes.
+    redundancy_percent:
+        PAR2 redundancy; determines how much recovery data must fit in memory.
+    cpu_count, available_memory:
+        Host resources; detected when omitted.
+    block_count:
+        Preferred number of blocks (e.g. from a calibration run); the block
+        size is scaled to the archive size accordingly.
+    block_size, threads, memory_mb:
+        Preferred values; *block_size* takes precedence over
+        *block_count*. They are kept as long as they satisfy PAR2's limits,
+        otherwise adjusted.
+    file_sizes:
+        Sizes of the individual files when one set protects several (they
+        add up to *archive_size*). PAR2 rounds every file up to whole
+        blocks, so the block size is raised until the rounded total fits
+        :data:`MAX_BLOCK_COUNT` – unless more files than that are non-empty.
+
+    Notes
+    -----
+    * Block sizes are multiples of the 2048-byte optical sector size, so a
+      damaged sector run maps onto as few PAR2 blocks as possible.
+    * The memory budget covers all recovery blocks when RAM allows it, so
+      the archive is read in a single pass.
+    """
+    cpus = cpu_count or os.cpu_count() or 1
+    available = available_memory or detect_available_memory()
+
+    if block_size is None:
+        count = max(1, block_count or TARGET_BLOCK_COUNT)
+        block_size = _round_block(-(-archive_size // count))
+    block_size = max(_round_block(block_size), _round_block(-(-archive_size // MAX_BLOCK_COUNT)))
+    block_count = _count_blocks(archive_size, file_sizes, block_size)
+    if file_sizes:
+        largest = max(file_sizes)
+        while block_count > MAX_BLOCK_COUNT and block_size < largest:
+            block_size = _round_block(block_size * block_count // MAX_BLOCK_COUNT + 1)
+            block_count = _count_blocks(archive_size, file_sizes, block_size)
+
+    if memory_mb is None:
+        recovery_blocks = max(1, (block_count * redundancy_percent + 50) // 100)
+        needed_mb = -(-recovery_blocks * block_size * 11 // (10 * _MIB)) + MIN_MEMORY_MB
+        memory_mb = min(needed_mb, int(available * MEMORY_SHARE) // _MIB)
+    memory_mb = max(MIN_MEMORY_MB, memory_mb)
+
+    return Par2Profile(
+        block_size=block_size,
+        block_count=block_count,
+        threads=max(1, threads or cpus),
+        memory_mb=memory_mb,
+    )
+
+
+def detect_available_memory() -> int:
+    """Return the available RAM in bytes (falls back to 4 GiB if unknown)."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return 4 * 1024 * _MIB
+
+
+def candidates(sample_size: int, redundancy_percent: int = 15) -> list[Par2Profile]:
+    """Profiles tried by :func:`calibrate`: block count ×2/×1/×½, all or half the cores."""
+    base = tune(sample_size, redundancy_percent)
+    thread_options = sorted({base.threads, max(1, base.threads // 2)}, reverse=True)
+    profiles: list[Par2Profile] = []
+    for block_count in (TARGET_BLOCK_COUNT * 2, TARGET_BLOCK_COUNT, TARGET_BLOCK_COUNT // 2):
+        for threads in thread_options:
+            profile = tune(
+                sample_size, redundancy_percent, block_count=block_count, threads=threads
+            )
+            if profile not in profiles:
+                profiles.append(profile)
+    return profiles
+
+
+def calibrate(
+    sample_path: Path,
+    run: Callable[[Path, Par2Profile], None],
+    profiles: list[Par2Profile],
+) -> list[tuple[Par2Profile, float]]:
+    """Time *run* for every profile on *sample_path*, fastest first.
+
+    *run* creates PAR2 data for the sample with the given profile; stale
+    ``.par2`` files are removed between runs.
+    """
+    results: list[tuple[Par2Profile, float]] = []
+    for profile in profiles:
+        for old in sample_path.parent.glob(f"{sample_path.stem}*.par2"):
+            old.unlink()
+        start = time.perf_counter()
+        run(sample_path, profile)
+        results.append((profile, time.perf_counter() - start))
+    results.sort(key=lambda item: item[1])
+    return results
+
+
+def _count_blocks(total: int, file_sizes: Sequence[int] | None, block_size: int) -> int:
+    """Return the PAR2 source blocks of *total* bytes, per file if *file_sizes* is given."""
+    if file_sizes is None:
+        return max(1, -(-total // block_size))
+    return max(1, sum(-(-size // block_size) for size in file_sizes))
+
+
+def _round_block(size: int) -> int:
+    """Round *size* up to a multiple of the sector size (or of 4 for tiny blocks)."""
+    if size >= SECTOR_SIZE:
+        return -(-size // SECTOR_SIZE) * SECTOR_SIZE
+    return max(4, -(-size // 4) * 4)
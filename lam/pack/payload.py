@@ -0,0 +1,241 @@
+"""Moving file payloads into archive files without Python-level copies.
+
+Archive writers produce their headers and padding in Python but hand file
+contents to :class:`PayloadCopier`, which lets the kernel move them:
+
+1. ``os.copy_file_range`` – in-kernel copy (or a reflink on btrfs/XFS);
+2. ``os.sendfile`` – in-kernel copy where ``copy_file_range`` is refused,
+   e.g. across file systems on older kernels;
+3. ``readinto`` / ``write`` with one large reusable buffer everywhere else.
+
+A method that fails with an "unsupported" error is dropped for the rest of
+the archive and the copy continues with the next one. When a SHA-256 is
+wanted, the source is memory-mapped and hashed in place, chunk by chunk
+right before the kernel copies the same chunk, so the pages are read from
+the page cache once and never copied into a Python buffer. Files smaller
+than :data:`SMALL_FILE` are read and written together with their header
+in a single ``write``, which beats several system calls per file.
+"""
+
+from __future__ import annotations
+
+import errno
+import mmap
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Protocol, Sequence
+
+from lam.pack import readahead
+
+CHUNK_SIZE = 8 * 1024 * 1024
+SMALL_FILE = 256 * 1024
+
+# Transfer methods in order of preference. Benchmarks and tests may narrow this.
+METHODS: tuple[str, ...] = tuple(
+    m for m in ("copy_file_range", "sendfile") if hasattr(os, m)
+) + ("read",)
+
+# Errors meaning "this method does not work for these files", not "I/O failed".
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EBADF,
+    errno.ESPIPE,
+}
+
+
+class _Digest(Protocol):
+    def update(self, data: bytes | memoryview | bytearray, /) -> None: ...
+
+
+class _RawFile(Protocol):
+    def fileno(self) -> int: ...
+    def seek(self, offset: int, whence: int = 0, /) -> int: ...
+    def readinto(self, buffer: memoryview, /) -> int | None: ...
+
+
+class PayloadCopier:
+    """Write archive data and file payloads to the file descriptor *out_fd*.
+
+    Parameters
+    ----------
+    out_fd:
+        Destination, opened for writing; data is appended at its current
+        offset. Do not mix with buffered writes to the same file.
+    chunk_size:
+        Bytes moved (and hashed) per step.
+    methods:
+        Transfer methods to try, see :data:`METHODS`.
+    """
+
+    def __init__(
+        self,
+        out_fd: int,
+        chunk_size: int = CHUNK_SIZE,
+        methods: Sequence[str] | None = None,
+    ) -> None:
+        self.out_fd = out_fd
+        self.chunk_size = chunk_size
+        self.methods = list(METHODS if methods is None else methods)
+        if "read" not in self.methods:
+            self.methods.append("read")
+        # Payload bytes moved per method, for benchmarks and diagnostics.
+        self.stats: Counter[str] = Counter()
+        self._buffer: memoryview | None = None
+
+    @property
+    def method(self) -> str:
+        """The transfer method currently in use."""
+        return self.methods[0]
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        """Write *data* completely (headers, padding, metadata)."""
+        view = memoryview(data)
+        while view:
+            written = os.write(self.out_fd, view)
+            view = view[written:]
+
+    def copy_file(
+        self,
+        path: Path,
+        size: int,
+        digest: _Digest | None = None,
+        *,
+        header: bytes = b"",
+        padding: int = 0,
+    ) -> None:
+        """Append *header*, the first *size* bytes of *path* and *padding* NUL bytes.
+
+        Parameters
+        ----------
+        path:
+            Source file.
+        size:
+            Payload bytes to copy (the size the archive header announces).
+        digest:
+            Hash object fed with exactly the copied bytes.
+
+        Raises
+        ------
+        OSError
+            If *path* cannot be read, is shorter than *size*, or the write fails.
+        """
+        with open(path, "rb", buffering=0) as src:
+            if size <= SMALL_FILE:
+                self._copy_small(src, path, size, digest, header, padding)
+                return
+            self.write(header)
+            fd = src.fileno()
+            readahead.advise(fd, 0, 0, "sequential")
+            mapping = None
+            if digest is not None and self.method != "read":
+                try:
+                    mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    mapping = None  # e.g. a file system without mmap support
+            try:
+                self._copy_large(src, path, size, digest, mapping)
+            finally:
+                if mapping is not None:
+                    mapping.close()
+            self.write(bytes(padding))
+
+    def _copy_small(
+        self,
+        src: _RawFile,
+        path: Path,
+        size: int,
+        digest: _Digest | None,
+        header: bytes,
+        padding: int,
+    ) -> None:
+        block = bytearray(len(header) + size + padding)
+        block[: len(header)] = header
+        view = memoryview(block)
+        payload = view[len(header) : len(header) + size]
+        filled = 0
+        while filled < size:
+            n = src.readinto(payload[filled:])
+            if not n:
+                raise _short(path, size)
+            filled += n
+        if digest is not None:
+            digest.update(payload)
+        self.stats["small"] += size
+        self.write(view)
+
+    def _copy_large(
+        self,
+        src: _RawFile,
+        path: Path,
+        size: int,
+        digest: _Digest | None,
+        mapping: mmap.mmap | None,
+    ) -> None:
+        fd = src.fileno()
+        mapped = memoryview(mapping) if mapping is not None else None
+        try:
+            offset = 0
+            while offset < size:
+                count = min(self.chunk_size, size - offset)
+                if digest is not None and mapped is None:
+                    data = self._read(src, path, offset, count)
+                    digest.update(data)
+                    self.write(data)
+                    self.stats["read"] += count
+                else:
+                    if digest is not None and mapped is not None:
+                        with mapped[offset : offset + count] as chunk:
+                            if len(chunk) < count:
+                                raise _short(path, size)
+                            digest.update(chunk)
+                    self._transfer(src, path, fd, offset, count)
+                offset += count
+        finally:
+            if mapped is not None:
+                mapped.release()
+
+    def _transfer(self, src: _RawFile, path: Path, fd: int, offset: int, count: int) -> None:
+        """Copy ``count`` bytes from *offset* of *fd* to the output, falling back as needed."""
+        done = 0
+        while done < count:
+            method = self.method
+            try:
+                if method == "copy_file_range":
+                    n = os.copy_file_range(fd, self.out_fd, count - done, offset + done)
+                elif method == "sendfile":
+                    n = os.sendfile(self.out_fd, fd, offset + done, count - done)
+                else:
+                    data = self._read(src, path, offset + done, count - done)
+                    self.write(data)
+                    n = len(data)
+            except OSError as exc:
+                if method != "read" and exc.errno in _UNSUPPORTED:
+                    self.methods.remove(method)
+                    continue
+                raise
+            if n == 0:
+                raise _short(path, offset + count)
+            self.stats[method] += n
+            done += n
+
+    def _read(self, src: _RawFile, path: Path, offset: int, count: int) -> memoryview:
+        if self._buffer is None:
+            self._buffer = memoryview(bytearray(self.chunk_size))
+        view = self._buffer[:count]
+        src.seek(offset)
+        filled = 0
+        while filled < count:
+            n = src.readinto(view[filled:])
+            if not n:
+                raise _short(path, offset + count)
+            filled += n
+        return view
+
+
+def _short(path: Path, size: int) -> OSError:
+    return OSError(f"{path} is shorter than {size} bytes (changed while being archived?)")
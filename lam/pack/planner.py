@@ -0,0 +1,310 @@
+"""Disc bin-packing planner for atomic packages.
+
+Every immediate child of an ingest directory is an atomic package that
+must never be split across discs. :func:`estimate_packages` sizes the
+packages from a metadata-only scan, including container and PAR2
+overhead; :func:`plan` assigns them to discs with first-fit-decreasing
+(O(n log n) via a max segment tree over the remaining capacities) and an
+optional bounded branch-and-bound pass that tries to empty the
+least-filled discs.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from lam.pack import iso9660
+from lam.pack.par2_tuning import tune
+from lam.pack.scan import FileTable, scan
+
+# Usable capacities of common single-session BD-R media in bytes.
+MEDIA: dict[str, int] = {
+    "bd25": 25_025_314_816,
+    "bd50": 50_050_629_632,
+    "bd100": 100_103_356_416,
+}
+
+TAR_BLOCK = 512
+TAR_RECORD = 10240
+ISO_SECTOR = 2048
+# Largest number of packages the branch-and-bound refinement re-packs at once.
+MAX_REFINE = 400
+# Approximate manifest row overhead besides the path (size, mtime, hash, separators).
+MANIFEST_ROW = 96
+
+
+class PlanError(Exception):
+    """Raised when packages cannot be planned onto the configured media."""
+
+
+@dataclass(slots=True)
+class Package:
+    """A candidate package and its estimated on-disc size."""
+
+    name: str
+    file_count: int
+    data_size: int
+    container_size: int
+    par2_size: int
+
+    @property
+    def size(self) -> int:
+        return self.container_size + self.par2_size
+
+
+@dataclass(slots=True)
+class Disc:
+    """One medium of the plan."""
+
+    capacity: int
+    packages: list[Package] = field(default_factory=list)
+    used: int = 0
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.used / self.capacity if self.capacity else 0.0
+
+
+@dataclass(slots=True)
+class Plan:
+    """Result of :func:`plan`."""
+
+    capacity: int
+    discs: list[Disc]
+    lower_bound: int
+    refined: bool = False
+
+    @property
+    def total_size(self) -> int:
+        return sum(d.used for d in self.discs)
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.total_size / (self.capacity * len(self.discs)) if self.discs else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Size estimation
+# ---------------------------------------------------------------------------
+
+
+def estimate_packages(
+    source_dir: Path,
+    fmt: str = "tar",
+    redundancy_percent: int = 15,
+    volumes: int = 1,
+    scan_workers: int = 1,
+    table: FileTable | None = None,
+) -> list[Package]:
+    """Size every immediate child of *source_dir* as an archive package.
+
+    Only metadata is read. Hidden entries (``.name``) are ignored.
+    """
+    if table is None:
+        table = scan(source_dir, workers=scan_workers)
+
+    # Per top-level entry: [file count, data bytes, container bytes, manifest bytes,
+    # first row, end row] – the rows of a package are contiguous in depth-first order.
+    totals: dict[str, list[int]] = {}
+    for index in range(1, len(table)):
+        record = table[index]
+        top = record.path.split("/", 1)[0]
+        if top.startswith("."):
+            continue
+        entry = totals.setdefault(top, [0, 0, 0, 0, index, index])
+        entry[2] += _member_size(record.path, record.size, record.is_dir, fmt)
+        entry[5] = index + 1
+        if record.is_file:
+            entry[0] += 1
+            entry[1] += record.size
+            entry[3] += len(record.path.encode("utf-8")) + MANIFEST_ROW
+
+    packages: list[Package] = []
+    for name, (count, data, container, manifest_bytes, start, end) in sorted(totals.items()):
+        if fmt == "tar":
+            container = _round_up(container + 2 * TAR_BLOCK, TAR_RECORD)
+        elif fmt == "iso" and table[start].is_dir:
+            # The layout of the image itself: both trees' directories, path
+            # tables and Rock Ridge continuation areas.
+            try:
+                container = iso9660.image_size(table, range(start, end))
+            except iso9660.Iso9660Error as exc:
+                raise PlanError(f"{name}: {exc}") from exc
+        elif fmt in ("iso", "dmg"):
+            container += 16 * ISO_SECTOR + 4 * ISO_SECTOR  # system area, descriptors, tables
+        # Loose packages: sector-rounded files; their PAR2 sets are estimated as one.
+        par2_size = par2_overhead(container, redundancy_percent, volumes)
+        if fmt in ("tar", "iso", "loose"):
+            par2_size += manifest_bytes
+        packages.append(Package(name, count, data, container, par2_size))
+    return packages
+
+
+def par2_overhead(size: int, redundancy_percent: int, volumes: int = 1) -> int:
+    """Estimate the bytes of all PAR2 files protecting a file of *size* bytes."""
+    if size <= 0 or redundancy_percent <= 0:
+        return 0
+    profile = tune(size, redundancy_percent, cpu_count=1, available_memory=1 << 30)
+    recovery_blocks = max(1, (profile.block_count * redundancy_percent + 50) // 100)
+    recovery = recovery_blocks * (64 + 4 + profile.block_size)
+    # main + file description + slice checksums + creator, in the index and every volume
+    critical = 92 + 176 + 80 + 20 * profile.block_count + 108
+    return recovery + critical * (1 + min(volumes, recovery_blocks))
+
+
+def _member_size(path: str, size: int, is_dir: bool, fmt: str) -> int:
+    if fmt in ("iso", "dmg", "loose"):
+        return _round_up(size, ISO_SECTOR) + (0 if is_dir else 64)
+    # TAR: header block, PAX header for long/non-ASCII names, padded payload.
+    name = path.encode("utf-8")
+    header = TAR_BLOCK
+    if len(name) > 100 or not path.isascii():
+        header += TAR_BLOCK + _round_up(len(name) + 16, TAR_BLOCK)
+    return header + _round_up(size, TAR_BLOCK)
+
+
+def _round_up(value: int, multiple: int) -> int:
+    return -(-value // multiple) * multiple
+
+
+# ---------------------------------------------------------------------------
+# Bin packing
+# ---------------------------------------------------------------------------
+
+
+def plan(
+    packages: list[Package],
+    capacity: int,
+    refine: bool = True,
+    node_limit: int = 200_000,
+    refine_discs: int = 6,
+) -> Plan:
+    """Assign *packages* to discs of *capacity* bytes.
+
+    Parameters
+    ----------
+    packages:
+        Packages to place; each stays on exactly one disc.
+    capacity:
+        Usable bytes per disc.
+    refine:
+        Run the branch-and-bound refinement after first-fit-decreasing.
+    node_limit:
+        Search-node budget of the refinement.
+    refine_discs:
+        Number of least-filled discs whose packages are re-packed.
+
+    Raises
+    ------
+    PlanError
+        If a package is larger than one disc.
+    """
+    too_big = [p for p in packages if p.size > capacity]
+    if too_big:
+        names = ", ".join(p.name for p in too_big[:5])
+        raise PlanError(f"Package(s) larger than one disc ({capacity} bytes): {names}")
+
+    ordered = sorted(packages, key=lambda p: p.size, reverse=True)
+    discs = _first_fit_decreasing(ordered, capacity)
+    lower_bound = math.ceil(sum(p.size for p in packages) / capacity) if packages else 0
+    result = Plan(capacity=capacity, discs=discs, lower_bound=lower_bound)
+    if refine and len(discs) > lower_bound:
+        result.refined = _refine(result, node_limit, refine_discs)
+    return result
+
+
+def _first_fit_decreasing(ordered: list[Package], capacity: int) -> list[Disc]:
+    # Max segment tree over the remaining capacity of (potential) discs; the
+    # leftmost leaf that still fits is the first-fit disc.
+    n = max(1, len(ordered))
+    size = 1 << (n - 1).bit_length()
+    tree = [capacity] * (2 * size)
+    discs: list[Disc] = []
+    for package in ordered:
+        node = 1
+        while node < size:
+            node = 2 * node if tree[2 * node] >= package.size else 2 * node + 1
+        index = node - size
+        if index == len(discs):
+            discs.append(Disc(capacity))
+        disc = discs[index]
+        disc.packages.append(package)
+        disc.used += package.size
+        tree[node] = capacity - disc.used
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+    return discs
+
+
+def _refine(result: Plan, node_limit: int, refine_discs: int) -> bool:
+    """Try to re-pack the packages of the least-filled discs onto fewer discs."""
+    discs = sorted(result.discs, key=lambda d: d.used)
+    # Bound the search depth: stop adding discs once the pool gets large.
+    k = 0
+    pool_size = 0
+    while k < min(refine_discs, len(discs)) and pool_size + len(discs[k].packages) <= MAX_REFINE:
+        pool_size += len(discs[k].packages)
+        k += 1
+    pool = sorted((p for d in discs[:k] for p in d.packages), key=lambda p: p.size, reverse=True)
+    capacity = result.capacity
+    target = math.ceil(sum(p.size for p in pool) / capacity)
+    if target >= k:
+        return False
+    suffix = [0] * (len(pool) + 1)
+    for i in range(len(pool) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + pool[i].size
+
+    best: list[list[Package]] | None = None
+    nodes = 0
+    loads: list[int] = []
+    bins: list[list[Package]] = []
+
+    def search(i: int) -> bool:
+        nonlocal best, nodes
+        nodes += 1
+        if nodes > node_limit:
+            return True
+        if i == len(pool):
+            best = [list(b) for b in bins]
+            return len(bins) <= target
+        package = pool[i]
+        free = capacity * len(loads) - sum(loads)
+        limit = (k - 1) if best is None else len(best) - 1
+        # Lower bound: packages left over after filling every open disc.
+        if len(bins) + max(0, math.ceil((suffix[i] - free) / capacity)) > limit:
+            return False
+        tried: set[int] = set()
+        for b, load in enumerate(loads):
+            if load + package.size <= capacity and load not in tried:
+                tried.add(load)
+                loads[b] += package.size
+                bins[b].append(package)
+                stop = search(i + 1)
+                bins[b].pop()
+                loads[b] -= package.size
+                if stop:
+                    return True
+        if len(bins) < limit:
+            loads.append(package.size)
+            bins.append([package])
+            stop = search(i + 1)
+            bins.pop()
+            loads.pop()
+            if stop:
+                return True
+        return False
+
+    search(0)
+    if best is None or len(best) >= k:
+        return False
+    kept = discs[k:]
+    for packages in best:
+        disc = Disc(capacity, list(packages), sum(p.size for p in packages))
+        kept.append(disc)
+    kept.sort(key=lambda d: d.used, reverse=True)
+    result.discs = kept
+    return True
@@ -0,0 +1,344 @@
+"""Copying finished packages to several destinations with a single read.
+
+Every package goes onto two media, and often onto a backup disk as well.
+Copying the package once per destination reads the archive and its PAR2
+set once per copy; :func:`replicate` reads every file once and fans the
+bytes out to all destinations at the same time:
+
+* the reader hashes each chunk (SHA-256) and hands it to one writer thread
+  per destination through a queue of at most :data:`QUEUE_DEPTH` chunks,
+  so a slow target holds the others back by no more than its queue;
+* a destination that fails (full disk, lost mount) is dropped and
+  reported, the others carry on;
+* each writer writes to a temporary name, fsyncs, evicts the file from the
+  page cache and only then renames it into place, so the read-back that
+  follows comes from the medium, not from memory;
+* the read-back runs for all destinations in parallel and compares every
+  copy with the hash taken while reading the source.
+
+Files already present at a destination with the same size and mtime are
+neither rewritten nor read back (a rerun after an interruption only copies
+what is missing), unless *force* is given.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Sequence
+
+from lam.pack import manifest, par2, readahead, tarindex
+from lam.pack.hashing import hash_file
+
+QUEUE_DEPTH = 8
+CHUNK_SIZE = 8 * 1024 * 1024
+_PART_SUFFIX = ".lam-part"
+
+
+class ReplicateError(Exception):
+    """Raised when a package cannot be read."""
+
+
+@dataclass(frozen=True, slots=True)
+class PackageFile:
+    """One file (or symlink) of a package, as it is copied."""
+
+    source: Path
+    name: str  # path below the destination, e.g. "Familie_2025.tar"
+    size: int
+    mtime_ns: int
+    mode: int
+    link: str = ""  # symlink target (loose packages)
+
+
+def package_files(package: Path) -> list[PackageFile]:
+    """Return the files of the package *package*, with names relative to its directory.
+
+    *package* is an archive (``Name.tar``, ``.iso``, ``.dmg``), whose SHA-256
+    manifest, member index and PAR2 set are included, or the directory of a
+    loose package, which is included with everything below it (PAR2 sets
+    and symlinks too) plus its manifest.
+
+    Raises
+    ------
+    ReplicateError
+        If *package* does not exist or cannot be listed.
+    """
+    try:
+        if package.is_dir():
+            paths = []
+            for directory, dirs, names in os.walk(package):
+                dirs.sort()
+                # Symlinks to directories are listed in dirs but not walked into.
+                links = [d for d in dirs if os.path.islink(os.path.join(directory, d))]
+                paths.extend(Path(directory, n) for n in sorted(names + links))
+            paths.append(manifest.manifest_path(package))
+        elif package.is_file():
+            paths = [
+                package,
+                manifest.manifest_path(package),
+                tarindex.index_path(package),
+                *par2.set_files(package.parent / package.stem),
+            ]
+        else:
+            raise ReplicateError(f"Package not found: {package}")
+        files = []
+        for path in paths:
+            if not os.path.lexists(path):
+                continue  # a sidecar this package does not have
+            st = path.lstat()
+            link = os.readlink(path) if path.is_symlink() else ""
+            files.append(
+                PackageFile(
+                    path,
+                    path.relative_to(package.parent).as_posix(),
+                    0 if link else st.st_size,
+                    st.st_mtime_ns,
+                    st.st_mode,
+                    link,
+                )
+            )
+    except OSError as exc:
+        raise ReplicateError(f"Cannot read {package}: {exc}") from exc
+    return files
+
+
+@dataclass(slots=True)
+class DestinationReport:
+    """Outcome of copying to one destination."""
+
+    destination: Path
+    written: int = 0  # files copied
+    skipped: int = 0  # files already present
+    bytes_written: int = 0
+    verified: int = 0  # copies whose read-back hash matched
+    mismatches: list[str] = field(default_factory=list)  # copies whose hash differs
+    error: str = ""  # why the destination was given up
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and not self.mismatches
+
+
+def replicate(
+    files: Sequence[PackageFile],
+    destinations: Sequence[Path],
+    *,
+    queue_depth: int = QUEUE_DEPTH,
+    chunk_size: int = CHUNK_SIZE,
+    verify: bool = True,
+    force: bool = False,
+) -> list[DestinationReport]:
+    """Copy *files* into every directory of *destinations*, reading each file once.
+
+    Parameters
+    ----------
+    files:
+        Files to copy (see :func:`package_files`); ``file.name`` is the path
+        below each destination.
+    destinations:
+        Target directories, created if needed.
+    queue_depth:
+        Chunks buffered per destination; how far the fastest destination
+        may run ahead of the slowest.
+    chunk_size:
+        Bytes per read.
+    verify:
+        Read every copy back and compare its SHA-256 with the source's.
+    force:
+        Rewrite files that are already present with the same size and mtime.
+
+    Returns
+    -------
+    list[DestinationReport]
+        One report per destination, in the order of *destinations*.
+        Destinations that fail are reported, not raised.
+
+    Raises
+    ------
+    ReplicateError
+        If a source file cannot be read. Complete copies stay in place;
+        the file being copied is not left behind.
+    """
+    reports = [DestinationReport(d) for d in destinations]
+    writers = [_Writer(r, max(1, queue_depth)) for r in reports]
+    for w in writers:
+        w.wanted = {f.name for f in files if force or not _present(w.report.destination, f)}
+        w.report.skipped = len(files) - len(w.wanted)
+        w.start()
+    digests: dict[str, str] = {}
+    try:
+        for file in files:
+            targets = [w for w in writers if file.name in w.wanted and not w.failed]
+            if targets:
+                digest = _fan_out(file, targets, chunk_size)
+                if digest is not None:
+                    digests[file.name] = digest
+    finally:
+        for w in writers:
+            w.put(None)
+        for w in writers:
+            w.join()
+    if verify:
+        with ThreadPoolExecutor(max(1, len(writers)), thread_name_prefix="lam-verify") as pool:
+            for w in writers:
+                if not w.failed:
+                    pool.submit(_read_back, w.report, w.completed, digests)
+    return reports
+
+
+def _present(destination: Path, file: PackageFile) -> bool:
+    target = destination / file.name
+    try:
+        st = target.lstat()
+    except OSError:
+        return False
+    if file.link:
+        return target.is_symlink() and os.readlink(target) == file.link
+    return not target.is_symlink() and (st.st_size, st.st_mtime_ns) == (file.size, file.mtime_ns)
+
+
+def _fan_out(file: PackageFile, targets: list[_Writer], chunk_size: int) -> str | None:
+    """Send *file* to *targets*; return its SHA-256 (``None`` for symlinks)."""
+    for w in targets:
+        w.put(_Open(file))
+    if file.link:
+        for w in targets:
+            w.put(_Close())
+        return None
+    digest = hashlib.sha256()
+    try:
+        with open(file.source, "rb", buffering=0) as fh:
+            fd = fh.fileno()
+            readahead.advise(fd, 0, 0, "sequential")
+            offset = 0
+            while True:
+                chunk = fh.read(chunk_size)  # a new bytes object: shared by the writers
+                if not chunk:
+                    break
+                digest.update(chunk)
+                for w in targets:
+                    if not w.failed:
+                        w.put(chunk)
+                readahead.advise(fd, offset, len(chunk), "dontneed")
+                offset += len(chunk)
+    except OSError as exc:
+        raise ReplicateError(f"Cannot read {file.source}: {exc}") from exc
+    for w in targets:
+        w.put(_Close())
+    return digest.hexdigest()
+
+
+def _read_back(
+    report: DestinationReport, completed: list[PackageFile], digests: dict[str, str]
+) -> None:
+    for file in completed:
+        if file.link:
+            continue
+        try:
+            digest = hash_file(report.destination / file.name, file.size)
+        except OSError:
+            digest = ""
+        if digest == digests.get(file.name):
+            report.verified += 1
+        else:
+            report.mismatches.append(file.name)
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class _Open:
+    file: PackageFile
+
+
+@dataclass(frozen=True, slots=True)
+class _Close:
+    pass
+
+
+class _Writer(threading.Thread):
+    """Writes the files arriving on its queue below one destination."""
+
+    def __init__(self, report: DestinationReport, depth: int) -> None:
+        super().__init__(name=f"lam-replicate-{report.destination.name}", daemon=True)
+        self.report = report
+        self.wanted: set[str] = set()  # names of the files to write
+        self.completed: list[PackageFile] = []  # files written in full
+        self.failed = False
+        self._queue: queue.Queue[_Open | _Close | bytes | None] = queue.Queue(depth)
+
+    def put(self, item: _Open | _Close | bytes | None) -> None:
+        self._queue.put(item)
+
+    def run(self) -> None:
+        file: PackageFile | None = None
+        out: BinaryIO | None = None
+        while (item := self._queue.get()) is not None:
+            if self.failed:
+                continue  # keep draining, so the reader never blocks on us
+            try:
+                if isinstance(item, _Open):
+                    file = item.file
+                    out = self._open(file)
+                elif isinstance(item, _Close):
+                    assert file is not None
+                    self._close(file, out)
+                    file = out = None
+                else:
+                    assert out is not None
+                    self.write_chunk(out, item)
+            except OSError as exc:
+                self.failed = True
+                self.report.error = f"{file.name if file else ''}: {exc.strerror or exc}"
+        # Given up or interrupted inside a file: no partial copy is left behind.
+        if out is not None:
+            out.close()
+        if file is not None and not file.link:
+            try:
+                _part(self.report.destination / file.name).unlink(missing_ok=True)
+            except OSError:
+                pass  # e.g. the destination is gone
+
+    def _open(self, file: PackageFile) -> BinaryIO | None:
+        target = self.report.destination / file.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return None if file.link else open(_part(target), "wb", buffering=0)
+
+    def write_chunk(self, out: BinaryIO, chunk: bytes) -> None:
+        view = memoryview(chunk)
+        while view:
+            view = view[out.write(view) :]
+
+    def _close(self, file: PackageFile, out: BinaryIO | None) -> None:
+        target = self.report.destination / file.name
+        if out is None:  # a symlink
+            if os.path.lexists(target):
+                target.unlink()
+            os.symlink(file.link, target)
+        else:
+            try:
+                os.fsync(out.fileno())
+                # Evict the copy, so the read-back has to come from the medium.
+                readahead.advise(out.fileno(), 0, 0, "dontneed")
+            finally:
+                out.close()
+            part = _part(target)
+            os.chmod(part, file.mode & 0o7777)
+            os.utime(part, ns=(file.mtime_ns, file.mtime_ns))
+            os.replace(part, target)
+            self.report.bytes_written += file.size
+        self.report.written += 1
+        self.completed.append(file)
+
+
+def _part(target: Path) -> Path:
+    return target.with_name(f".{target.name}{_PART_SUFFIX}")
@@ -0,0 +1,320 @@
+"""Member offset index of TAR archives, and extracting single members with it.
+
+Finding one file in a 25 GB TAR with :mod:`tarfile` means reading the header
+of every member before it – on an optical disc, seeking across the whole
+archive. The TAR writer therefore leaves a sidecar ``Name.index.csv`` next
+to ``Name.tar`` with one row per member, in archive order::
+
+    path,type,mode,mtime,size,header,data,link
+    Familie_2025/Urlaub/clip.mp4,0,420,1735063200,2147483648,1536,2560,
+
+``header`` is the offset of the member's first header block (its PAX
+extended header, if any) and ``data`` that of its payload. ``type`` is the
+TAR type flag (``0`` file, ``1`` hard link, ``2`` symlink, ``5`` directory)
+and ``link`` the hard-link or symlink target.
+
+With the index, :func:`extract` seeks straight to the members asked for.
+Archives without one (made before the index existed, or copied without the
+sidecar) are indexed by :func:`scan_members`, which reads the headers only
+and skips every payload by seeking. Before a payload is copied, the header
+block right in front of it is checked, so a stale index is detected and
+rebuilt instead of producing garbage.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import os
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable
+
+from lam.pack import manifest, readahead
+
+INDEX_SUFFIX = ".index.csv"
+FIELDS = ("path", "type", "mode", "mtime", "size", "header", "data", "link")
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Header encoding of the TAR writer (see lam.pack.packager).
+_TAR_ENCODING = tarfile.ENCODING
+_TAR_ERRORS = "surrogateescape"
+
+# Type flags as stored in the index.
+_FILE, _HARDLINK, _SYMLINK, _DIRECTORY = "0", "1", "2", "5"
+
+
+class TarIndexError(Exception):
+    """Raised when members cannot be found or extracted."""
+
+
+class _StaleIndex(TarIndexError):
+    """The archive does not match its index."""
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    """Position and metadata of one TAR member."""
+
+    path: str  # member name
+    type: str  # TAR type flag
+    mode: int
+    mtime: int  # epoch seconds
+    size: int  # payload bytes (0 for everything but regular files)
+    header: int  # offset of the first header block
+    data: int  # offset of the payload
+    link: str = ""  # hard-link or symlink target
+
+    @classmethod
+    def from_tarinfo(cls, info: tarfile.TarInfo, header: int, data: int) -> IndexEntry:
+        return cls(
+            info.name,
+            _FILE if info.isreg() else info.type.decode("ascii"),
+            info.mode,
+            int(info.mtime),
+            info.size if info.isreg() else 0,
+            header,
+            data,
+            info.linkname if info.islnk() or info.issym() else "",
+        )
+
+
+def index_path(archive_path: Path) -> Path:
+    """Return the index sidecar path for *archive_path* (``Name.index.csv``)."""
+    return archive_path.parent / f"{archive_path.stem}{INDEX_SUFFIX}"
+
+
+def write(path: Path, entries: Iterable[IndexEntry]) -> Path:
+    """Write *entries* to the index file at *path* and return *path*."""
+    with path.open("w", encoding="utf-8", errors=_TAR_ERRORS, newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(FIELDS)
+        for e in entries:
+            writer.writerow((e.path, e.type, e.mode, e.mtime, e.size, e.header, e.data, e.link))
+    return path
+
+
+def read(path: Path) -> list[IndexEntry]:
+    """Read an index written by :func:`write`."""
+    with path.open("r", encoding="utf-8", errors=_TAR_ERRORS, newline="") as fh:
+        rows = csv.reader(fh)
+        if next(rows, None) != list(FIELDS):
+            raise ValueError(f"{path.name} is not a TAR member index")
+        return [
+            IndexEntry(name, kind, int(mode), int(mtime), int(size), int(hdr), int(data), link)
+            for name, kind, mode, mtime, size, hdr, data, link in rows
+        ]
+
+
+def scan_members(archive_path: Path) -> list[IndexEntry]:
+    """Index *archive_path* by reading its headers (payloads are skipped).
+
+    Raises
+    ------
+    TarIndexError
+        If the file is not a readable TAR archive.
+    """
+    try:
+        with tarfile.open(
+            archive_path, "r:", encoding=_TAR_ENCODING, errors=_TAR_ERRORS
+        ) as archive:
+            return [
+                IndexEntry.from_tarinfo(info, info.offset, info.offset_data)
+                for info in archive
+            ]
+    except (OSError, tarfile.TarError) as exc:
+        raise TarIndexError(f"Cannot read {archive_path.name}: {exc}") from exc
+
+
+@dataclass(slots=True)
+class TarIndex:
+    """The members of one archive, by name."""
+
+    archive_path: Path
+    members: dict[str, IndexEntry]
+    scanned: bool = False  # built from the headers, not read from the sidecar
+
+    def select(self, names: Iterable[str]) -> list[IndexEntry]:
+        """Return the members *names* in archive order; a directory selects its contents.
+
+        Raises
+        ------
+        TarIndexError
+            If a name is not in the archive.
+        """
+        selected: dict[str, IndexEntry] = {}
+        missing = []
+        for name in names:
+            name = name.strip("/")
+            entry = self.members.get(name)
+            if entry is None:
+                missing.append(name)
+                continue
+            selected[name] = entry
+            if entry.type == _DIRECTORY:
+                prefix = f"{name}/"
+                selected.update(
+                    (p, e) for p, e in self.members.items() if p.startswith(prefix)
+                )
+        if missing:
+            raise TarIndexError(
+                f"Not in {self.archive_path.name}: {', '.join(missing[:5])}"
+                + (f" and {len(missing) - 5} more" if len(missing) > 5 else "")
+            )
+        return sorted(selected.values(), key=lambda e: e.header)
+
+
+def load(archive_path: Path, *, rebuild: bool = False) -> TarIndex:
+    """Return the member index of *archive_path*.
+
+    The sidecar is used if it exists and *rebuild* is false; otherwise the
+    headers are scanned and the sidecar is (re)written when the directory
+    is writable (archives on read-only media are simply scanned each time).
+    """
+    sidecar = index_path(archive_path)
+    if not rebuild:
+        try:
+            entries = read(sidecar)
+        except (OSError, ValueError):
+            pass
+        else:
+            return TarIndex(archive_path, {e.path: e for e in entries})
+    entries = scan_members(archive_path)
+    try:
+        write(sidecar, entries)
+    except OSError:
+        pass
+    return TarIndex(archive_path, {e.path: e for e in entries}, scanned=True)
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class ExtractReport:
+    """Outcome of :func:`extract`."""
+
+    extracted: list[Path] = field(default_factory=list)
+    bytes_copied: int = 0
+    verified: int = 0  # files whose SHA-256 matched the manifest
+    mismatches: list[str] = field(default_factory=list)  # members whose hash differs
+    scanned: bool = False  # the index had to be built from the headers
+
+
+def extract(
+    archive_path: Path, names: Iterable[str], destination: Path, *, rebuild: bool = False
+) -> ExtractReport:
+    """Copy the members *names* of *archive_path* into *destination*.
+
+    Members keep their archive paths below *destination* (as ``tar -x``
+    does) and are read in archive order, seeking directly to each payload.
+    Hard links are extracted as copies of their target's data. Files are
+    checked against the SHA-256 manifest next to the archive, if there is
+    one.
+
+    Raises
+    ------
+    TarIndexError
+        If a name is not in the archive, a member path would leave
+        *destination*, or the archive cannot be read.
+    """
+    names = list(names)
+    index = load(archive_path, rebuild=rebuild)
+    try:
+        return _extract(index, index.select(names), destination)
+    except _StaleIndex:
+        if index.scanned:
+            raise
+    index = load(archive_path, rebuild=True)
+    return _extract(index, index.select(names), destination)
+
+
+def _extract(index: TarIndex, entries: list[IndexEntry], destination: Path) -> ExtractReport:
+    report = ExtractReport(scanned=index.scanned)
+    expected = _manifest_hashes(index.archive_path)
+    directories = []
+    buffer = memoryview(bytearray(CHUNK_SIZE))
+    with index.archive_path.open("rb", buffering=0) as archive:
+        for entry in entries:
+            target = _target(destination, entry.path)
+            if entry.type == _DIRECTORY:
+                target.mkdir(parents=True, exist_ok=True)
+                directories.append((target, entry))
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if entry.type == _SYMLINK:
+                target.unlink(missing_ok=True)
+                os.symlink(entry.link, target)
+                report.extracted.append(target)
+                continue
+            source = entry
+            if entry.type == _HARDLINK:
+                source = index.members.get(entry.link.strip("/"), entry)
+            if source.type != _FILE:
+                raise TarIndexError(f"{entry.path}: unsupported member type {entry.type!r}")
+            _check_header(archive, source)
+            digest = _copy(archive, source, target, buffer)
+            os.chmod(target, entry.mode)
+            os.utime(target, (entry.mtime, entry.mtime))
+            report.extracted.append(target)
+            report.bytes_copied += source.size
+            if entry.path in expected:
+                if expected[entry.path] == digest:
+                    report.verified += 1
+                else:
+                    report.mismatches.append(entry.path)
+    # Directory times last: creating their contents changed them.
+    for target, entry in reversed(directories):
+        os.chmod(target, entry.mode)
+        os.utime(target, (entry.mtime, entry.mtime))
+        report.extracted.append(target)
+    return report
+
+
+def _target(destination: Path, member: str) -> Path:
+    parts = PurePosixPath(member).parts
+    if not parts or PurePosixPath(member).is_absolute() or ".." in parts:
+        raise TarIndexError(f"Refusing to extract {member!r}: not a relative path")
+    return destination.joinpath(*parts)
+
+
+def _check_header(archive: BinaryIO, entry: IndexEntry) -> None:
+    """Raise :class:`_StaleIndex` unless the header before *entry*'s payload matches."""
+    archive.seek(entry.data - tarfile.BLOCKSIZE)
+    block = archive.read(tarfile.BLOCKSIZE)
+    try:
+        info = tarfile.TarInfo.frombuf(block, _TAR_ENCODING, _TAR_ERRORS)
+    except tarfile.HeaderError as exc:
+        raise _StaleIndex(f"{entry.path}: no TAR header at offset {entry.header}") from exc
+    # Sizes of 8 GiB and more are stored in the PAX header only.
+    if not info.isreg() or (info.size != entry.size and entry.size < 8**11):
+        raise _StaleIndex(f"{entry.path}: header does not match the index")
+
+
+def _copy(archive: BinaryIO, entry: IndexEntry, target: Path, buffer: memoryview) -> str:
+    """Copy *entry*'s payload to *target*; return its SHA-256."""
+    readahead.advise(archive.fileno(), entry.data, entry.size, "sequential")
+    archive.seek(entry.data)
+    digest = hashlib.sha256()
+    with target.open("wb", buffering=0) as out:
+        remaining = entry.size
+        while remaining:
+            n = archive.readinto(buffer[: min(len(buffer), remaining)])
+            if not n:
+                raise TarIndexError(f"{entry.path}: archive ends inside the member")
+            chunk = buffer[:n]
+            digest.update(chunk)
+            while chunk:
+                chunk = chunk[out.write(chunk) :]
+            remaining -= n
+    return digest.hexdigest()
+
+
+def _manifest_hashes(archive_path: Path) -> dict[str, str]:
+    try:
+        return {e.path: e.sha256 for e in manifest.read(manifest.manifest_path(archive_path))}
+    except (OSError, ValueError, KeyError):
+        return {}
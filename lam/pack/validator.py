@@ -4,33 +4,50 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from lam.pack.scan import FileTable, scan
+
 
 class ValidationError(Exception):
     """Raised when the source directory fails a validation check."""
 
 
-def validate(source_dir: Path) -> None:
+def validate(
+    source_dir: Path, table: FileTable | None = None, scan_workers: int = 1
+) -> FileTable:
     """Validate *source_dir* before archiving.
 
     Raises :class:`ValidationError` with a descriptive message on the first
     problem found. Checks performed (in order):
 
-    1. Directory exists.
+    1. Directory exists and every directory below it can be read.
     2. Directory is not empty.
     3. No file is 0 bytes.
+
+    The directory is scanned once; the resulting :class:`FileTable` is
+    returned so archive writers can reuse it instead of walking the tree
+    again. Pass an existing *table* to skip the scan entirely;
+    *scan_workers* > 1 lists directories concurrently (see
+    :func:`lam.pack.scan.scan`).
     """
     if not source_dir.exists():
         raise ValidationError(f"Source directory does not exist: {source_dir}")
     if not source_dir.is_dir():
         raise ValidationError(f"Source path is not a directory: {source_dir}")
 
-    all_files = [p for p in source_dir.rglob("*") if p.is_file()]
+    if table is None:
+        try:
+            table = scan(source_dir, workers=scan_workers)
+        except OSError as exc:
+            raise ValidationError(
+                f"Cannot read {exc.filename or source_dir}: {exc.strerror or exc}"
+            ) from exc
 
-    if not all_files:
+    if not table.file_count:
         raise ValidationError(f"Source directory is empty: {source_dir}")
 
-    zero_byte_files = [p for p in all_files if p.stat().st_size == 0]
+    zero_byte_files = [source_dir / r.path for r in table.files() if r.size == 0]
     if zero_byte_files:
         names = ", ".join(str(p) for p in zero_byte_files[:5])
         extra = f" (and {len(zero_byte_files) - 5} more)" if len(zero_byte_files) > 5 else ""
         raise ValidationError(f"Found 0-byte file(s): {names}{extra}")
+    return table
@@ -0,0 +1 @@
+"""Sync sub-package for LAM (backup disks: updates with incremental PAR2, NAS coverage)."""
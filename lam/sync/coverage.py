@@ -0,0 +1,248 @@
+"""Which parts of the NAS are not assigned to any backup disk?
+
+Backup disks are assigned directories of the NAS in the config::
+
+    [backup.disks]
+    ARCHIV_A = ["/vault/2010", "/vault/2011"]
+    ARCHIV_B = ["/vault/2012", "/vault/Fotos/Familie"]
+
+:func:`find_gaps` walks the NAS once and reports every subtree that no
+disk covers. The assigned paths are stored in a trie of path components,
+and the walk is steered by it:
+
+* an assigned directory is covered with everything below it – it is not
+  entered at all;
+* a directory with no assignment anywhere below it is uncovered as a
+  whole; it is walked only to add up its size, and reported as one gap;
+* only directories on the way to an assignment are listed entry by
+  entry; the files directly inside them are uncovered and reported per
+  directory.
+
+So the work is proportional to the uncovered part of the NAS plus the
+directories leading to assignments, and memory to the depth of the tree
+and the number of assignments – not to the number of directories.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, Mapping
+
+GapKind = Literal["tree", "files"]
+
+
+class CoverageError(Exception):
+    """Raised when the disk assignments are malformed or the root cannot be read."""
+
+
+@dataclass(frozen=True, slots=True)
+class Gap:
+    """Part of the NAS that is on no backup disk."""
+
+    path: Path
+    kind: GapKind  # "tree": the directory and everything below it; "files": its files only
+    files: int
+    size: int  # bytes in regular files
+
+
+@dataclass(slots=True)
+class CoverageReport:
+    """Outcome of :func:`find_gaps`."""
+
+    root: Path
+    gaps: list[Gap] = field(default_factory=list)  # in walk order
+    covered: list[tuple[Path, tuple[str, ...]]] = field(default_factory=list)  # (path, disks)
+    missing: list[tuple[Path, tuple[str, ...]]] = field(default_factory=list)  # not found
+    directories: int = 0  # directories listed
+    errors: list[tuple[Path, str]] = field(default_factory=list)  # unreadable directories
+
+    @property
+    def uncovered_size(self) -> int:
+        return sum(g.size for g in self.gaps)
+
+
+class _Node:
+    __slots__ = ("children", "disks")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.disks: tuple[str, ...] = ()  # disks holding this directory
+
+    def __iter__(self) -> Iterator[tuple[tuple[str, ...], _Node]]:
+        """Every assigned node below (and including) this one, with its relative parts."""
+        stack: list[tuple[tuple[str, ...], _Node]] = [((), self)]
+        while stack:
+            parts, node = stack.pop()
+            if node.disks:
+                yield parts, node
+            stack.extend((parts + (name,), child) for name, child in node.children.items())
+
+
+def parse_assignments(disks: Mapping[str, object]) -> dict[str, list[Path]]:
+    """Normalise the ``backup.disks`` config table to ``{disk: [absolute paths]}``.
+
+    A disk's value is a list of paths or a single path (as ``lam config
+    set backup.disks.ARCHIV_A /vault/2010`` stores it).
+
+    Raises
+    ------
+    CoverageError
+        If a value is neither.
+    """
+    assignments: dict[str, list[Path]] = {}
+    for disk, paths in disks.items():
+        if isinstance(paths, str):
+            paths = [paths]
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            raise CoverageError(f"backup.disks.{disk} must be a path or a list of paths")
+        assignments[disk] = [_absolute(Path(p)) for p in paths]
+    return assignments
+
+
+def find_gaps(
+    root: Path,
+    assignments: Mapping[str, Iterable[Path]],
+    *,
+    on_gap: Callable[[Gap], None] | None = None,
+) -> CoverageReport:
+    """Walk *root* and report the subtrees not assigned to any disk.
+
+    Parameters
+    ----------
+    root:
+        Top of the NAS tree (or any directory in it).
+    assignments:
+        Assigned directories per disk (see :func:`parse_assignments`).
+        Paths outside *root* are ignored.
+    on_gap:
+        Called with every gap as soon as it is found.
+
+    Returns
+    -------
+    CoverageReport
+        Gaps in depth-first order with names sorted; assignments found
+        (:attr:`CoverageReport.covered`) and assigned paths below *root*
+        that do not exist (:attr:`CoverageReport.missing`).
+
+    Raises
+    ------
+    CoverageError
+        If *root* is not a readable directory.
+    """
+    root = _absolute(root)
+    trie = _Node()
+    for disk, paths in assignments.items():
+        for path in paths:
+            node = trie
+            for part in _absolute(path).parts:
+                node = node.children.setdefault(part, _Node())
+            if disk not in node.disks:
+                node.disks += (disk,)
+    report = CoverageReport(root)
+    if not root.is_dir():
+        raise CoverageError(f"Not a directory: {root}")
+
+    # The assignments at or above root decide about root itself.
+    node: _Node | None = trie
+    for part in root.parts:
+        node = node.children.get(part)
+        if node is None or node.disks:
+            break
+    if node is not None and node.disks:
+        report.covered.append((root, node.disks))
+        return report
+
+    def gap(path: str, kind: GapKind, files: int, size: int) -> None:
+        found = Gap(Path(path), kind, files, size)
+        report.gaps.append(found)
+        if on_gap is not None:
+            on_gap(found)
+
+    if node is None:
+        files, size = _tree_size(str(root), report)
+        gap(str(root), "tree", files, size)
+        return report
+
+    # Depth-first over the directories that lead to assignments only.
+    stack: list[tuple[str, _Node]] = [(str(root), node)]
+    while stack:
+        directory, node = stack.pop()
+        entries = _list(directory, report)
+        if entries is None:
+            continue
+        files = size = 0
+        subdirs: list[tuple[str, _Node]] = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                child = node.children.get(entry.name)
+                if child is None:
+                    tree_files, tree_size = _tree_size(entry.path, report)
+                    gap(entry.path, "tree", tree_files, tree_size)
+                elif child.disks:
+                    report.covered.append((Path(entry.path), child.disks))
+                else:
+                    subdirs.append((entry.path, child))
+            elif entry.is_file(follow_symlinks=False):
+                child = node.children.get(entry.name)
+                if child is not None and child.disks:  # a single file assigned to a disk
+                    report.covered.append((Path(entry.path), child.disks))
+                    continue
+                files += 1
+                size += _size(entry)
+        if files:
+            gap(directory, "files", files, size)
+        # Pushed in reverse, so they are walked in name order.
+        stack.extend(reversed(subdirs))
+
+    # Assignments nested in covered directories were not visited: check them directly.
+    for parts, assigned in trie:
+        path = Path(*parts)
+        if path.is_relative_to(root) and not os.path.lexists(path):
+            report.missing.append((path, assigned.disks))
+    report.missing.sort()
+    return report
+
+
+def _absolute(path: Path) -> Path:
+    return Path(os.path.normpath(os.path.abspath(path.expanduser())))
+
+
+def _list(directory: str, report: CoverageReport) -> list[os.DirEntry[str]] | None:
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError as exc:
+        report.errors.append((Path(directory), exc.strerror or str(exc)))
+        return None
+    report.directories += 1
+    return entries
+
+
+def _size(entry: os.DirEntry[str]) -> int:
+    try:
+        return entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        return 0  # vanished since it was listed
+
+
+def _tree_size(directory: str, report: CoverageReport) -> tuple[int, int]:
+    """Return (files, bytes) below *directory*, keeping no more than a stack of paths."""
+    files = size = 0
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files += 1
+                        size += _size(entry)
+        except OSError as exc:
+            report.errors.append((Path(current), exc.strerror or str(exc)))
+            continue
+        report.directories += 1
+    return files, size
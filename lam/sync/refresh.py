@@ -0,0 +1,282 @@
+"""Recomputing the PAR2 sets of changed packages on a backup disk.
+
+A package on the backup disk is either a directory protected like a
+loose-file package (:mod:`lam.pack.loose`): PAR2 sets per directory, named
+after the directory – or an archive (``Name.tar``, ``.iso``, ``.dmg``) with
+one PAR2 set ``Name.par2`` next to it, as ``lam pack`` writes it. When
+rsync changed any of a directory package's files, :func:`refresh_package`
+deletes the package's old sets – recognised by their names, so PAR2 files
+that are not LAM's are kept – plans the sets anew and creates them; the set
+of a changed archive is recreated with :func:`lam.pack.par2.create`.
+Packages are refreshed in parallel; packages that rsync did not touch are
+not read at all.
+
+Packages still to be refreshed are kept in :class:`PendingPackages`
+(outside the backup, so ``rsync --delete`` cannot remove the file): an
+interrupted ``lam sync`` refreshes them on its next run even when rsync
+has nothing new to transfer.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal
+
+from lam.pack import loose, par2
+from lam.pack.par2 import Par2Engine, Par2Error
+from lam.pack.par2_tuning import tune
+from lam.pack.scan import scan
+from lam.sync.rsync import ARCHIVE_SUFFIXES
+
+UpdateStatus = Literal["updated", "removed", "error"]
+
+
+def state_path(state_dir: Path, destination: Path) -> Path:
+    """Return the pending-packages file for the backup at *destination*."""
+    key = str(destination.resolve())
+    return state_dir / f"sync-{hashlib.sha256(key.encode()).hexdigest()[:16]}.json"
+
+
+class PendingPackages:
+    """Packages whose PAR2 sets are outdated, persisted at *path* (thread-safe)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._packages: set[str] = set()
+        if path.exists():
+            try:
+                self._packages = set(json.loads(path.read_text(encoding="utf-8"))["pending"])
+            except (OSError, ValueError, KeyError):
+                self._packages = set()
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._packages))
+
+    def add(self, packages: Iterable[str]) -> None:
+        with self._lock:
+            self._packages.update(packages)
+            self._save()
+
+    def done(self, package: str) -> None:
+        with self._lock:
+            self._packages.discard(package)
+            self._save()
+
+    def _save(self) -> None:
+        if not self._packages:
+            self.path.unlink(missing_ok=True)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        data = {"pending": sorted(self._packages)}
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+@dataclass(frozen=True, slots=True)
+class PackageUpdate:
+    """Outcome of refreshing one package."""
+
+    package: str
+    status: UpdateStatus
+    sets: int = 0
+    par2_files: tuple[Path, ...] = ()
+    size: int = 0  # bytes protected
+    par2_size: int = 0
+    seconds: float = 0.0
+    detail: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "error"
+
+
+def remove_sets(package_dir: Path) -> list[Path]:
+    """Delete the PAR2 sets LAM created in *package_dir*; return the removed files.
+
+    A set in directory ``D`` is named after ``D`` (after the package for
+    its root), optionally numbered – see :func:`lam.pack.loose.plan_sets`.
+    """
+    removed = []
+    for dirpath, _, filenames in os.walk(package_dir):
+        directory = Path(dirpath)
+        label = package_dir.name if directory == package_dir else directory.name
+        pattern = re.compile(
+            rf"{re.escape(label)}(\.\d{{2}})?(\.vol\d+\+\d+)?\.par2", re.IGNORECASE
+        )
+        for name in filenames:
+            if pattern.fullmatch(name):
+                (directory / name).unlink()
+                removed.append(directory / name)
+    return removed
+
+
+def refresh_package(
+    destination: Path,
+    package: str,
+    redundancy_percent: int,
+    volumes: int = 1,
+    *,
+    engine: Par2Engine = "par2cmdline",
+    threads: int | None = None,
+    max_files: int = loose.MAX_SET_FILES,
+    max_size: int = loose.MAX_SET_SIZE,
+) -> PackageUpdate:
+    """Replace the PAR2 sets of ``destination/package``.
+
+    Failures are returned as ``error`` results, never raised. A package
+    that no longer exists is reported as ``removed``.
+    """
+    started = time.monotonic()
+    if package.startswith("/") or ".." in package.split("/"):
+        return PackageUpdate(package, "error", detail="not a path below the destination")
+    package_dir = destination / package
+    if package_dir.is_file():
+        return _refresh_archive(
+            package_dir, package, redundancy_percent, volumes, engine, threads, started
+        )
+    if not package_dir.is_dir():
+        # A deleted archive leaves its PAR2 set behind (rsync does not touch it).
+        base = package_dir.parent / package_dir.stem
+        if package_dir.name.lower().endswith(ARCHIVE_SUFFIXES) and base.parent.is_dir():
+            for stale in par2.set_files(base):
+                stale.unlink()
+        return PackageUpdate(package, "removed")
+    try:
+        remove_sets(package_dir)
+        table = scan(package_dir)
+        batches = loose.plan_sets(
+            table, package_dir.name, max_files=max_files, max_size=max_size
+        )
+        par2_files: list[Path] = []
+        if batches:
+            par2_files = loose.protect(
+                package_dir,
+                batches,
+                redundancy_percent,
+                volumes,
+                engine=engine,
+                workers=1,
+                par2_profile=lambda sizes: tune(
+                    sum(sizes), redundancy_percent, threads=threads, file_sizes=sizes
+                ),
+            )
+    except (OSError, loose.LooseError, Par2Error) as exc:
+        return PackageUpdate(package, "error", detail=str(exc))
+    return PackageUpdate(
+        package,
+        "updated",
+        len(batches),
+        tuple(par2_files),
+        table.total_size,
+        sum(p.stat().st_size for p in par2_files),
+        time.monotonic() - started,
+    )
+
+
+def _refresh_archive(
+    archive_path: Path,
+    package: str,
+    redundancy_percent: int,
+    volumes: int,
+    engine: Par2Engine,
+    threads: int | None,
+    started: float,
+) -> PackageUpdate:
+    try:
+        size = archive_path.stat().st_size
+        par2_files = par2.create(
+            archive_path,
+            redundancy_percent,
+            volumes,
+            engine=engine,
+            profile=tune(size, redundancy_percent, threads=threads),
+        )
+        par2_size = sum(p.stat().st_size for p in par2_files)
+    except (OSError, Par2Error) as exc:
+        return PackageUpdate(package, "error", detail=str(exc))
+    return PackageUpdate(
+        package,
+        "updated",
+        1,
+        tuple(par2_files),
+        size,
+        par2_size,
+        time.monotonic() - started,
+    )
+
+
+def refresh(
+    destination: Path,
+    packages: Iterable[str],
+    redundancy_percent: int,
+    volumes: int = 1,
+    *,
+    engine: Par2Engine = "par2cmdline",
+    workers: int = 2,
+    max_files: int = loose.MAX_SET_FILES,
+    max_size: int = loose.MAX_SET_SIZE,
+    pending: PendingPackages | None = None,
+    on_done: Callable[[PackageUpdate], None] | None = None,
+) -> list[PackageUpdate]:
+    """Refresh the PAR2 sets of *packages* below *destination*, *workers* at a time.
+
+    Parameters
+    ----------
+    packages:
+        Package paths relative to *destination* (see
+        :class:`lam.sync.rsync.ChangeSet`).
+    workers:
+        Packages refreshed concurrently; the CPU cores are shared between
+        them.
+    pending:
+        Every package is added before work starts and marked done once its
+        sets are written (or it no longer exists); failed packages stay
+        pending for the next run.
+    on_done:
+        Called from the worker threads as every package finishes.
+
+    Returns
+    -------
+    list[PackageUpdate]
+        One result per package, sorted by package.
+    """
+    names = sorted(set(packages))
+    if pending is not None:
+        pending.add(names)
+    if not names:
+        return []
+    workers = max(1, min(workers, len(names)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    def run(package: str) -> PackageUpdate:
+        update = refresh_package(
+            destination,
+            package,
+            redundancy_percent,
+            volumes,
+            engine=engine,
+            threads=threads,
+            max_files=max_files,
+            max_size=max_size,
+        )
+        if pending is not None and update.ok:
+            pending.done(package)
+        if on_done is not None:
+            on_done(update)
+        return update
+
+    with ThreadPoolExecutor(workers, thread_name_prefix="lam-sync") as pool:
+        return list(pool.map(run, names))
@@ -0,0 +1,166 @@
+"""Running rsync and parsing its ``--itemize-changes`` output.
+
+Every line of an itemized transfer log names one changed entry, e.g.::
+
+    >f+++++++++ Familie_2025/Urlaub/IMG_0001.jpg   (new file received)
+    >f.st...... Familie_2025/notes.txt             (content changed)
+    .f...p..... Familie_2025/notes.txt             (permissions only)
+    *deleting   Familie_2025/old.jpg
+
+The first character is the update type (``<``/``>`` transferred, ``c``
+created locally, ``h`` hard link, ``.`` attributes only), the second the
+entry type (``f`` file, ``d`` directory, ``L`` symlink, ``D``/``S``
+devices and specials). PAR2 sets only cover regular files' names and
+contents, so only transferred, created, hard-linked and deleted files make
+a package stale; attribute updates, directories and symlinks do not.
+
+A package is a directory at the package level (a loose package) or an
+archive there (``Familie_2025.tar``, ``.iso``, ``.dmg``). The manifest and
+member index next to an archive are not covered by its PAR2 set, so
+changes to them are ignored.
+
+The log is consumed line by line – from a running rsync or a saved log –
+and only the set of affected packages is kept, so logs of millions of
+lines cost no memory.
+"""
+
+from __future__ import annotations
+
+import re
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+_ITEM_RE = re.compile(r"([<>ch.])([fdLDS])(.{9}) (.+)")
+_DELETING_RE = re.compile(r"\*deleting +(.+)")
+_ESCAPE_RE = re.compile(rb"\\#([0-7]{3})")
+
+# PAR2 files on the backup are LAM's own; rsync must neither copy source
+# PAR2 files over them nor (with --delete) remove them.
+RSYNC_ARGS = ("-a", "--itemize-changes", "--exclude=*.par2")
+
+# Archive packages (see lam.pack.packager) and the sidecars next to them.
+ARCHIVE_SUFFIXES = (".tar", ".iso", ".dmg")
+SIDECAR_SUFFIXES = (".manifest.csv", ".index.csv")
+
+
+class SyncError(Exception):
+    """Raised when rsync is unavailable or fails."""
+
+
+@dataclass(slots=True)
+class ChangeSet:
+    """Packages affected by a transfer, from its itemized log."""
+
+    packages: Counter[str] = field(default_factory=Counter)  # package → changed files
+    outside: list[str] = field(default_factory=list)  # changed files in no package
+    lines: int = 0
+    ignored: int = 0  # attribute-only updates, directories, symlinks, other output
+
+    def add(self, line: str, depth: int = 1) -> None:
+        """Account one line of the log."""
+        self.lines += 1
+        change = parse_line(line)
+        if change is None:
+            self.ignored += 1
+            return
+        parts = change.rstrip("/").split("/")
+        if len(parts) == depth and not change.endswith("/"):
+            # A file at the package level: an archive package, one of its
+            # sidecars, or a stray file (a deleted package directory itself
+            # ends with "/" and counts as a change of that package).
+            name = parts[-1].lower()
+            if name.endswith(ARCHIVE_SUFFIXES):
+                self.packages[change] += 1
+            elif name.endswith(SIDECAR_SUFFIXES):
+                self.ignored += 1
+            else:
+                self.outside.append(change)
+            return
+        if len(parts) < depth:
+            self.outside.append(change)
+            return
+        self.packages["/".join(parts[:depth])] += 1
+
+
+def parse_line(line: str) -> str | None:
+    """Return the path of a change that makes PAR2 data stale, else ``None``.
+
+    Deleted directories keep their trailing ``/``.
+    """
+    line = line.rstrip("\n")
+    match = _DELETING_RE.fullmatch(line)
+    if match is not None:
+        return _unescape(match.group(1))
+    match = _ITEM_RE.fullmatch(line)
+    if match is None:
+        return None
+    update, kind, _, path = match.groups()
+    if kind != "f" or update == ".":
+        return None
+    if update == "h":
+        path = path.partition(" => ")[0]  # "%n%L": name => link target
+    return _unescape(path)
+
+
+def parse(lines: Iterable[str], depth: int = 1) -> ChangeSet:
+    """Collect the packages (the first *depth* path components) changed in *lines*."""
+    changes = ChangeSet()
+    for line in lines:
+        changes.add(line, depth)
+    return changes
+
+
+def run(
+    source: Path, destination: Path, *, delete: bool = False, extra: Sequence[str] = ()
+) -> Iterator[str]:
+    """Mirror *source* into *destination* with rsync, yielding its itemized output.
+
+    The contents of *source* are copied (``source/``), so paths in the log
+    are relative to both roots. With *delete*, files missing from the
+    source are removed from the destination (PAR2 files excepted).
+
+    Raises
+    ------
+    SyncError
+        If rsync is not installed or exits with an error (after the
+        output has been consumed).
+    """
+    binary = shutil.which("rsync")
+    if binary is None:
+        raise SyncError(
+            "rsync not found. Install it (e.g. `brew install rsync` or `apt install rsync`), "
+            "or pass the itemized log of your own rsync run with --log."
+        )
+    cmd = [binary, *RSYNC_ARGS, *(["--delete"] if delete else []), *extra]
+    cmd += [f"{source}/", f"{destination}/"]
+    # stderr goes to a file: a full stderr pipe would block rsync while
+    # stdout is being consumed.
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=stderr, text=True, errors="surrogateescape"
+        )
+        assert process.stdout is not None
+        try:
+            yield from process.stdout
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", "replace").strip()
+            raise SyncError(f"rsync exited with code {returncode}.\nstderr: {message}")
+
+
+def _unescape(path: str) -> str:
+    # rsync writes unprintable bytes as \#ooo (octal).
+    if "\\#" not in path:
+        return path
+    raw = _ESCAPE_RE.sub(
+        lambda m: bytes([int(m.group(1), 8)]), path.encode("utf-8", "surrogateescape")
+    )
+    return raw.decode("utf-8", "surrogateescape")
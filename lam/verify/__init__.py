@@ -0,0 +1 @@
+"""Verify sub-package for LAM (scheduled integrity scrubs)."""
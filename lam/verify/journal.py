@@ -0,0 +1,93 @@
+"""Resume journal for ``lam verify``.
+
+A scrub over hundreds of packages can take days and will be interrupted.
+Every finished set is appended as one JSON line to a journal named after
+the scrubbed roots; a restarted scrub skips sets already recorded, as long
+as their index file is unchanged. When a scrub completes, the journal is
+closed with a ``{"complete": true}`` line and the next scrub of the same
+roots starts over (the finished journal is kept as ``*.last.jsonl``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+def journal_path(state_dir: Path, roots: list[Path]) -> Path:
+    """Return the journal file for a scrub of *roots*."""
+    key = "\0".join(sorted(str(r.resolve()) for r in roots))
+    return state_dir / f"scrub-{hashlib.sha256(key.encode()).hexdigest()[:16]}{JOURNAL_SUFFIX}"
+
+
+def signature(index_path: Path) -> list[int]:
+    """Identity of a PAR2 index file: a changed set is verified again."""
+    st = index_path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+class ScrubJournal:
+    """Append-only record of verified sets (thread-safe)."""
+
+    def __init__(self, path: Path, restart: bool = False) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        lines = self._read_lines()
+        if restart or (lines and lines[-1].get("complete")):
+            if path.exists():
+                os.replace(path, path.with_name(path.name.replace(JOURNAL_SUFFIX, ".last.jsonl")))
+            lines = []
+        for entry in lines:
+            if "index" in entry:
+                self._entries[entry["index"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, index_path: Path) -> dict[str, Any] | None:
+        """Return the recorded entry for *index_path* if the set is unchanged."""
+        entry = self._entries.get(str(index_path))
+        if entry is None:
+            return None
+        try:
+            if entry.get("signature") != signature(index_path):
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def record(self, entry: dict[str, Any]) -> None:
+        """Append *entry* (must contain ``index``) and flush it to disk."""
+        with self._lock:
+            self._entries[entry["index"]] = entry
+            self._append(entry)
+
+    def complete(self) -> None:
+        """Mark the scrub as finished; the next one starts fresh."""
+        with self._lock:
+            self._append({"complete": True})
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, sort_keys=True) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _read_lines(self) -> list[dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        entries: list[dict[str, Any]] = []
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # torn last line after a crash
+        return entries
@@ -0,0 +1,194 @@
+"""Scheduled PAR2 verification ("scrub") of many packages.
+
+Sets are grouped by the physical device their index file lives on. Each
+device gets exactly one worker thread that verifies its sets one after
+another, so two packages on the same spindle never compete for the head,
+while different devices are scrubbed in parallel. Partitions of one disk
+count as the same device (resolved via ``/sys/dev/block`` on Linux).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Literal
+
+from lam.pack import par2, par2_native
+from lam.pack.par2 import Par2Engine, Par2Error
+from lam.verify.journal import ScrubJournal, signature
+
+ScrubStatus = Literal["ok", "repairable", "damaged", "error"]
+
+VOLUME_RE = re.compile(r"\.vol\d+\+\d+\.par2$", re.IGNORECASE)
+_SYS_BLOCK = Path("/sys/dev/block")
+
+
+@dataclass(frozen=True, slots=True)
+class ScrubResult:
+    """Verification outcome of one PAR2 set."""
+
+    index_path: Path
+    device: str
+    status: ScrubStatus
+    detail: str = ""
+    size: int = 0
+    seconds: float = 0.0
+    resumed: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "index": str(self.index_path),
+            "device": self.device,
+            "status": self.status,
+            "detail": self.detail,
+            "size": self.size,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+# Called as every set finishes (including sets taken from the journal).
+ResultCallback = Callable[[ScrubResult], None]
+
+
+def discover_sets(roots: Iterable[Path]) -> list[Path]:
+    """Return the PAR2 index files below *roots* (volume files excluded), sorted.
+
+    Hidden directories such as the ``.lam-cache`` staging cache are skipped.
+    """
+    found: set[Path] = set()
+    for root in roots:
+        if root.is_file():
+            if _is_index(root.name):
+                found.add(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            found.update(Path(dirpath) / f for f in filenames if _is_index(f))
+    return sorted(found)
+
+
+def physical_device(path: Path) -> str:
+    """Return a stable name for the physical device holding *path*.
+
+    On Linux a partition is mapped to its parent disk (``sda1`` → ``sda``);
+    elsewhere, or for virtual file systems, the ``st_dev`` number is used.
+    """
+    st_dev = path.stat().st_dev
+    node = _SYS_BLOCK / f"{os.major(st_dev)}:{os.minor(st_dev)}"
+    try:
+        resolved = node.resolve(strict=True)
+    except OSError:
+        return f"dev-{os.major(st_dev)}:{os.minor(st_dev)}"
+    if (resolved / "partition").exists():
+        resolved = resolved.parent
+    return resolved.name
+
+
+def run_scrub(
+    index_paths: list[Path],
+    engine: Par2Engine = "par2cmdline",
+    *,
+    max_devices: int = 4,
+    journal: ScrubJournal | None = None,
+    device_of: Callable[[Path], str] = physical_device,
+    on_result: ResultCallback | None = None,
+) -> list[ScrubResult]:
+    """Verify every set in *index_paths*, one set at a time per physical device.
+
+    Parameters
+    ----------
+    index_paths:
+        PAR2 index files (see :func:`discover_sets`).
+    engine:
+        PAR2 engine used for verification (see :func:`lam.pack.par2.verify`).
+    max_devices:
+        Devices scrubbed concurrently.
+    journal:
+        Resume journal. Sets it already records (and that did not change
+        since) are not verified again; every finished set is recorded.
+    device_of:
+        Maps an index file to its device name.
+    on_result:
+        Called from the worker threads as every set finishes.
+
+    Returns
+    -------
+    list[ScrubResult]
+        One result per set, in the order of *index_paths*. Failures are
+        reported as ``error`` results, never raised.
+    """
+    queues: dict[str, list[Path]] = defaultdict(list)
+    results: dict[Path, ScrubResult] = {}
+    for index_path in index_paths:
+        try:
+            device = device_of(index_path)
+        except OSError as exc:
+            result = ScrubResult(index_path, "?", "error", str(exc))
+            results[index_path] = _report(result, on_result)
+            continue
+        previous = journal.lookup(index_path) if journal is not None else None
+        if previous is not None:
+            results[index_path] = _report(
+                ScrubResult(
+                    index_path,
+                    device,
+                    previous["status"],
+                    previous.get("detail", ""),
+                    previous.get("size", 0),
+                    previous.get("seconds", 0.0),
+                    resumed=True,
+                ),
+                on_result,
+            )
+            continue
+        queues[device].append(index_path)
+
+    def scrub_device(device: str) -> None:
+        for index_path in queues[device]:
+            result = _verify_one(index_path, device, engine)
+            if journal is not None and result.status != "error":
+                try:
+                    journal.record({**result.as_dict(), "signature": signature(index_path)})
+                except OSError:
+                    pass  # the set is then simply verified again on resume
+            results[index_path] = _report(result, on_result)
+
+    if queues:
+        workers = max(1, min(len(queues), max_devices))
+        with ThreadPoolExecutor(workers, thread_name_prefix="lam-verify") as pool:
+            # Largest queues first, so the longest device finishes as early as possible.
+            devices = sorted(queues, key=lambda d: -len(queues[d]))
+            for future in [pool.submit(scrub_device, device) for device in devices]:
+                future.result()
+    return [results[p] for p in index_paths]
+
+
+def _verify_one(index_path: Path, device: str, engine: Par2Engine) -> ScrubResult:
+    started = time.monotonic()
+    try:
+        size = par2_native.read_set(index_path).total_size
+        outcome = par2.verify(index_path, engine)
+    except (OSError, Par2Error) as exc:
+        return ScrubResult(index_path, device, "error", str(exc), 0, time.monotonic() - started)
+    return ScrubResult(
+        index_path, device, outcome.status, outcome.detail, size, time.monotonic() - started
+    )
+
+
+def _report(result: ScrubResult, on_result: ResultCallback | None) -> ScrubResult:
+    if on_result is not None:
+        on_result(result)
+    return result
+
+
+def _is_index(name: str) -> bool:
+    return name.lower().endswith(".par2") and not VOLUME_RE.search(name)
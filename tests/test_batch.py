@@ -0,0 +1,95 @@
+"""Tests for lam.pack.batch (pipelined multi-package packing)."""
+
+import threading
+
+import pytest
+
+from lam.pack import batch, par2
+
+
+@pytest.fixture()
+def parent(tmp_path):
+    root = tmp_path / "2025"
+    for name in ("Ostern", "Sommer", "Weihnachten"):
+        d = root / name
+        d.mkdir(parents=True)
+        (d / "clip.mov").write_bytes(name.encode() * 100)
+    (root / ".hidden").mkdir()
+    return root
+
+
+@pytest.fixture()
+def fake_par2(monkeypatch):
+    calls = []
+
+    def create(archive_path, redundancy, volumes=1, engine="par2cmdline", profile=None):
+        calls.append((archive_path.name, threading.current_thread().name))
+        out = archive_path.parent / f"{archive_path.stem}.par2"
+        out.write_bytes(b"p" * 8)
+        return [out]
+
+    monkeypatch.setattr(par2, "create", create)
+    return calls
+
+
+def test_child_directories_skip_hidden(parent):
+    assert [p.name for p in batch.child_directories(parent)] == ["Ostern", "Sommer", "Weihnachten"]
+
+
+def test_batch_packs_every_package(parent, tmp_path, fake_par2):
+    output = tmp_path / "out"
+    results = batch.run_batch(
+        batch.child_directories(parent), output, "tar", 10, archive_workers=2, par2_workers=2
+    )
+    assert [r.source_dir.name for r in results] == ["Ostern", "Sommer", "Weihnachten"]
+    assert all(r.ok for r in results)
+    for r in results:
+        assert r.archive_path == output / f"{r.source_dir.name}.tar"
+        assert r.file_count == 1
+        assert r.par2_size == 8
+        assert r.index_size > 0
+        assert r.total_size == r.archive_size + r.manifest_size + r.index_size + 8
+    # PAR2 ran on its own pool.
+    assert all(name.startswith("lam-par2") for _, name in fake_par2)
+
+
+def test_failures_are_reported_per_package(parent, tmp_path, fake_par2):
+    (parent / "Sommer" / "empty.txt").write_bytes(b"")
+    events = []
+    results = batch.run_batch(
+        batch.child_directories(parent),
+        tmp_path / "out",
+        "tar",
+        10,
+        on_event=lambda r, stage, event: events.append((r.source_dir.name, stage, event)),
+    )
+    failed = {r.source_dir.name: r for r in results if not r.ok}
+    assert list(failed) == ["Sommer"]
+    assert failed["Sommer"].failed_stage == "archive"
+    assert "0-byte" in failed["Sommer"].error
+    assert ("Sommer", "archive", "failed") in events
+    assert ("Ostern", "par2", "done") in events
+    assert {name for name, _ in fake_par2} == {"Ostern.tar", "Weihnachten.tar"}
+
+
+def test_par2_failure_keeps_archive(parent, tmp_path, monkeypatch):
+    def broken(*args, **kwargs):
+        raise par2.Par2Error("par2 exited with code 1")
+
+    monkeypatch.setattr(par2, "create", broken)
+    results = batch.run_batch([parent / "Ostern"], tmp_path / "out", "tar", 10)
+    (result,) = results
+    assert result.failed_stage == "par2"
+    assert result.archive_path.exists()
+
+
+def test_duplicate_names_are_rejected(tmp_path, fake_par2):
+    a = tmp_path / "a" / "Projekt"
+    b = tmp_path / "b" / "Projekt"
+    for d in (a, b):
+        d.mkdir(parents=True)
+        (d / "f.txt").write_text("x")
+    results = batch.run_batch([a, b], tmp_path / "out", "tar", 10)
+    assert results[0].ok
+    assert not results[1].ok
+    assert "Duplicate" in results[1].error
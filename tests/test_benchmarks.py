@@ -0,0 +1,77 @@
+"""Tests for the benchmark suite's dataset generator and regression check."""
+
+import hashlib
+
+import pytest
+
+from benchmarks import datasets, suite
+
+
+def _digest(root):
+    h = hashlib.sha256()
+    for path in sorted(root.rglob("*")):
+        h.update(str(path.relative_to(root)).encode())
+        if path.is_file():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+@pytest.mark.parametrize("shape", datasets.SHAPES)
+def test_datasets_are_deterministic(tmp_path, shape):
+    first = datasets.generate(shape, tmp_path / "a", scale=0.0002)
+    second = datasets.generate(shape, tmp_path / "b", scale=0.0002)
+    assert first.files > 0 and first.total_size > 0
+    assert (first.files, first.directories, first.total_size) == (
+        second.files,
+        second.directories,
+        second.total_size,
+    )
+    assert _digest(first.root) == _digest(second.root)
+    assert sum(p.stat().st_size for p in first.root.rglob("*") if p.is_file()) == first.total_size
+
+
+def test_generated_dataset_is_reused(tmp_path):
+    first = datasets.generate("mixed", tmp_path, scale=0.0002)
+    marker = first.root / "untouched"
+    marker.write_text("kept")
+    again = datasets.generate("mixed", tmp_path, scale=0.0002)
+    assert again == first and marker.exists()
+    with pytest.raises(ValueError, match="shape"):
+        datasets.generate("huge", tmp_path)
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    dataset = {"shape": "tiny", "scale": 0.01}
+    baseline = {
+        "dataset": dataset,
+        "stages": {
+            "scan": {"throughput": 1000.0},
+            "tar": {"throughput": 100.0},
+            "par2": {"throughput": 50.0, "engine": "par2cmdline"},
+        },
+    }
+    results = {
+        "dataset": dataset,
+        "stages": {
+            "scan": {"throughput": 900.0},
+            "tar": {"throughput": 80.0},
+            "par2": {"throughput": 5.0, "engine": "native"},  # other engine: not compared
+        },
+    }
+    assert suite.compare(results, baseline, 0.15) == [
+        ("scan", 1000.0, 900.0, False),
+        ("tar", 100.0, 80.0, True),
+    ]
+    with pytest.raises(ValueError, match="different dataset"):
+        suite.compare({**results, "dataset": {"shape": "deep"}}, baseline, 0.15)
+
+
+def test_run_suite_measures_requested_stages(tmp_path):
+    dataset = datasets.generate("deep", tmp_path / "data", scale=0.0002)
+    out = tmp_path / "out"
+    out.mkdir()
+    results = suite.run_suite(dataset, out, stages=("scan", "tar"))
+    assert list(results["stages"]) == ["scan", "tar"]
+    assert results["stages"]["tar"]["unit"] == "bytes/s"
+    assert results["stages"]["scan"]["throughput"] > 0
+    assert not list(out.iterdir())
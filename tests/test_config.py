@@ -55,3 +55,36 @@ def test_list_all_reflects_user_setting():
 def test_get_unknown_key_returns_none():
     value = cfg.get("nonexistent.key")
     assert value is None
+
+
+def test_config_file_is_parsed_once(monkeypatch):
+    cfg.set_value("pack.redundancy_percent", "25")
+    calls = []
+    original = cfg._load_raw
+    monkeypatch.setattr(cfg, "_load_raw", lambda: calls.append(1) or original())
+    for _ in range(5):
+        assert cfg.get("pack.redundancy_percent") == 25
+        assert cfg.get("pack.default_format") == "tar"
+    assert len(calls) == 1
+
+
+def test_snapshot_invalidated_by_external_edit():
+    cfg.set_value("pack.redundancy_percent", "25")
+    assert cfg.get("pack.redundancy_percent") == 25
+    cfg.CONFIG_FILE.write_text("[pack]\nredundancy_percent = 30\nextra = 1\n")
+    assert cfg.get("pack.redundancy_percent") == 30
+
+
+def test_list_all_returns_a_copy():
+    data = cfg.list_all()
+    data["pack"]["redundancy_percent"] = 99
+    assert cfg.get("pack.redundancy_percent") == 15
+
+
+def test_get_returns_copies_of_lists_and_tables():
+    cfg.CONFIG_FILE.parent.mkdir()
+    cfg.CONFIG_FILE.write_text('[backup.disks]\nARCHIV_A = ["/vault/2010"]\n')
+    cfg.get("backup.disks.ARCHIV_A").append("/vault/2011")
+    cfg.get("backup.disks")["ARCHIV_B"] = ["/vault/2012"]
+    cfg.list_all()["backup"]["disks"]["ARCHIV_A"].clear()
+    assert cfg.get("backup.disks") == {"ARCHIV_A": ["/vault/2010"]}
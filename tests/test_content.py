@@ -0,0 +1,211 @@
+"""Tests for lam.pack.content (media structure checks, decoding and the result cache)."""
+
+import os
+import struct
+import threading
+import time
+import zlib
+
+import pytest
+
+from lam.pack import content
+from lam.pack.scan import FileRecord, scan
+
+
+def _jpeg(scan_data: bytes = b"\x12\x34\xff\x00\x56", end: bool = True) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof = b"\xff\xc0" + struct.pack(">H", 11) + b"\x08\x00\x01\x00\x01\x01\x01\x11\x00"
+    sos = b"\xff\xda" + struct.pack(">H", 8) + b"\x01\x01\x00\x00\x3f\x00"
+    return b"\xff\xd8" + app0 + sof + sos + scan_data + (b"\xff\xd9" if end else b"")
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _png() -> bytes:
+    ihdr = struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", ihdr)
+        + _png_chunk(b"IDAT", zlib.compress(b"\x00\x00"))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def _mp4() -> bytes:
+    return _box(b"ftyp", b"isom\x00\x00\x02\x00") + _box(b"mdat", b"x" * 100) + _box(b"moov", b"")
+
+
+@pytest.fixture()
+def media(tmp_path):
+    root = tmp_path / "Urlaub"
+    root.mkdir()
+    (root / "a.jpg").write_bytes(_jpeg())
+    (root / "b.PNG").write_bytes(_png())
+    (root / "c.mp4").write_bytes(_mp4())
+    (root / "notes.txt").write_text("no check for text")
+    return root
+
+
+def test_valid_media_passes(media):
+    report = content.check_content(scan(media), "headers")
+    assert report.ok
+    assert report.checked == 3
+
+
+def test_jpeg_problems(tmp_path):
+    path = tmp_path / "x.jpg"
+    path.write_bytes(_jpeg(end=False))
+    assert "no end-of-image" in content.check_jpeg(path)
+    path.write_bytes(_jpeg()[:30])
+    assert "truncated" in content.check_jpeg(path)
+    path.write_bytes(b"GIF89a")
+    assert "not a JPEG" in content.check_jpeg(path)
+    # A camera trailer after the end-of-image marker is fine.
+    path.write_bytes(_jpeg() + b"\x00" * 64 + b"trailer")
+    assert content.check_jpeg(path) is None
+
+
+def test_png_problems(tmp_path):
+    path = tmp_path / "x.png"
+    data = bytearray(_png())
+    path.write_bytes(bytes(data[:-12]))
+    assert "no IEND" in content.check_png(path)
+    data[43] ^= 0xFF  # inside the IDAT payload
+    path.write_bytes(bytes(data))
+    assert "CRC mismatch in chunk 'IDAT'" in content.check_png(path)
+
+
+def test_mp4_problems(tmp_path):
+    path = tmp_path / "x.mp4"
+    path.write_bytes(_mp4()[:-4])
+    assert "truncated" in content.check_mp4(path)
+    path.write_bytes(_box(b"ftyp", b"isom") + _box(b"mdat", b"x" * 10))
+    assert "moov" in content.check_mp4(path)
+    large = struct.pack(">I4sQ", 1, b"mdat", 16 + 4) + b"data"
+    path.write_bytes(large + _box(b"moov", b""))
+    assert content.check_mp4(path) is None
+
+
+def test_all_failures_are_reported(media):
+    (media / "a.jpg").write_bytes(_jpeg(end=False))
+    (media / "c.mp4").write_bytes(b"\x00\x00\x01\x00moov")
+    report = content.check_content(scan(media), "headers")
+    assert [(i.path, i.check) for i in report.issues] == [
+        ("a.jpg", "headers"),
+        ("c.mp4", "headers"),
+    ]
+
+
+def test_decode_uses_stub_decoder_after_headers(media):
+    (media / "a.jpg").write_bytes(_jpeg(end=False))
+    (media / "d.mkv").write_bytes(b"matroska")
+    decoded = []
+
+    def decoder(path):
+        decoded.append(path.name)
+        return "corrupt frame" if path.name == "d.mkv" else None
+
+    report = content.check_content(scan(media), "decode", decoder=decoder)
+    # a.jpg already failed its structural check and is not decoded.
+    assert sorted(decoded) == ["b.PNG", "c.mp4", "d.mkv"]
+    assert [(i.path, i.check, i.message) for i in report.issues] == [
+        ("a.jpg", "headers", "truncated (no end-of-image marker)"),
+        ("d.mkv", "decode", "corrupt frame"),
+    ]
+
+
+def test_decodes_run_concurrently_up_to_workers(media):
+    for i in range(8):
+        (media / f"clip{i}.mkv").write_bytes(b"m")
+    lock = threading.Lock()
+    running = peak = 0
+
+    def decoder(path):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return None
+
+    content.check_content(scan(media), "decode", decoder=decoder, workers=3)
+    assert peak == 3
+
+
+def test_cache_skips_unchanged_files(media, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    calls = []
+
+    def decoder(path):
+        calls.append(path.name)
+        return None
+
+    first = content.check_content(
+        scan(media), "decode", decoder=decoder, cache=content.ContentCache(cache_path)
+    )
+    assert first.checked == 6 and first.cached == 0
+    calls.clear()
+    second = content.check_content(
+        scan(media), "decode", decoder=decoder, cache=content.ContentCache(cache_path)
+    )
+    assert (second.checked, second.cached, calls) == (0, 6, [])
+
+    # A modified file gets a new key and is checked again; its failure is cached too.
+    (media / "a.jpg").write_bytes(_jpeg(end=False))
+    os.utime(media / "a.jpg", ns=(1, 1))
+    third = content.check_content(
+        scan(media), "decode", decoder=decoder, cache=content.ContentCache(cache_path)
+    )
+    assert third.checked == 1 and calls == []
+    fourth = content.check_content(scan(media), "headers", cache=content.ContentCache(cache_path))
+    assert fourth.checked == 0
+    assert [i.path for i in fourth.issues] == ["a.jpg"]
+
+
+def test_cache_keeps_devices_apart(tmp_path):
+    # The same inode, size and mtime on two disks: a result must not carry over.
+    disk_a = FileRecord("a.jpg", 1000, 5, 0o100644, 0, 0, inode=12, device=2049)
+    disk_b = FileRecord("a.jpg", 1000, 5, 0o100644, 0, 0, inode=12, device=2065)
+    cache = content.ContentCache(tmp_path / "cache.json")
+    cache.put(disk_a, "headers", None)
+    cache.save()
+    reloaded = content.ContentCache(tmp_path / "cache.json")
+    assert reloaded.get(disk_a, "headers") == ""
+    assert reloaded.get(disk_b, "headers") is None
+
+
+def test_damaged_cache_is_ignored(media, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cache_path.write_text("{not json")
+    report = content.check_content(scan(media), cache=content.ContentCache(cache_path))
+    assert report.checked == 3
+
+
+def test_unreadable_file_is_an_issue(media, monkeypatch):
+    def broken(path):
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setitem(content.HEADER_CHECKS, ".jpg", broken)
+    report = content.check_content(scan(media))
+    assert [(i.path, i.message) for i in report.issues] == [
+        ("a.jpg", "cannot be read: Permission denied")
+    ]
+
+
+def test_missing_ffmpeg(media):
+    with pytest.raises(content.ContentError, match="not found"):
+        content.FfmpegDecoder("lam-no-such-ffmpeg")
+
+
+def test_off_and_unknown_level(media):
+    assert content.check_content(scan(media), "off").checked == 0
+    with pytest.raises(ValueError, match="Unknown"):
+        content.check_content(scan(media), "full")  # type: ignore[arg-type]
@@ -0,0 +1,87 @@
+"""Tests for lam.sync.coverage (NAS directories not assigned to any backup disk)."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from lam.sync import coverage
+
+
+@pytest.fixture()
+def nas(tmp_path):
+    root = tmp_path / "vault"
+    for directory, files in {
+        "2010/Urlaub": {"a.jpg": 100, "b.jpg": 200},
+        "2011": {"c.jpg": 300},
+        "Fotos/Familie/2024": {"d.jpg": 400},
+        "Fotos/Freunde/x/y": {"e.jpg": 500, "f.jpg": 600},
+        "Leer": {},
+    }.items():
+        (root / directory).mkdir(parents=True, exist_ok=True)
+        for name, size in files.items():
+            (root / directory / name).write_bytes(b"x" * size)
+    (root / "Fotos" / "index.html").write_bytes(b"y" * 50)
+    (root / "readme.txt").write_bytes(b"z" * 10)
+    os.symlink("2010", root / "latest")
+    return root
+
+
+def test_gaps_and_their_sizes(nas):
+    assignments = {"ARCHIV_A": [nas / "2010", nas / "2011"], "ARCHIV_B": [nas / "Fotos/Familie"]}
+    report = coverage.find_gaps(nas, assignments)
+    gaps = {(g.path.relative_to(nas).as_posix(), g.kind): (g.files, g.size) for g in report.gaps}
+    assert gaps == {
+        ("Leer", "tree"): (0, 0),
+        (".", "files"): (1, 10),
+        ("Fotos/Freunde", "tree"): (2, 1100),
+        ("Fotos", "files"): (1, 50),
+    }
+    assert report.uncovered_size == 1160
+    assert sorted((p.name, disks) for p, disks in report.covered) == [
+        ("2010", ("ARCHIV_A",)),
+        ("2011", ("ARCHIV_A",)),
+        ("Familie", ("ARCHIV_B",)),
+    ]
+    assert not report.missing and not report.errors
+
+
+def test_covered_subtrees_are_not_entered(nas, monkeypatch):
+    listed = []
+    original = os.scandir
+
+    def scandir(path):
+        listed.append(Path(path).relative_to(nas).as_posix())
+        return original(path)
+
+    monkeypatch.setattr(coverage.os, "scandir", scandir)
+    report = coverage.find_gaps(nas, {"A": [nas / "2010", nas / "Fotos"], "B": [nas / "2011"]})
+    assert "2010/Urlaub" not in listed and "Fotos/Familie" not in listed
+    assert [g.path.name for g in report.gaps] == ["Leer", "vault"]
+
+
+def test_root_inside_an_assignment(nas):
+    report = coverage.find_gaps(nas / "Fotos" / "Familie", {"B": [nas / "Fotos"]})
+    assert report.gaps == [] and report.covered == [(nas / "Fotos/Familie", ("B",))]
+
+
+def test_nothing_assigned(nas):
+    (gap,) = coverage.find_gaps(nas, {"A": [Path("/elsewhere")]}).gaps
+    assert (gap.path, gap.kind, gap.files, gap.size) == (nas, "tree", 8, 2160)
+
+
+def test_missing_and_nested_assignments(nas):
+    report = coverage.find_gaps(
+        nas,
+        {"A": [nas / "2010", nas / "2012"], "B": [nas / "2010/Urlaub", nas / "2011"]},
+    )
+    assert report.missing == [(nas / "2012", ("A",))]
+
+
+def test_parse_assignments(tmp_path):
+    parsed = coverage.parse_assignments({"A": ["/vault/2010/", "/vault/x/../2011"], "B": "/v"})
+    assert parsed == {"A": [Path("/vault/2010"), Path("/vault/2011")], "B": [Path("/v")]}
+    with pytest.raises(coverage.CoverageError, match="backup.disks.C"):
+        coverage.parse_assignments({"C": 42})
+    with pytest.raises(coverage.CoverageError, match="Not a directory"):
+        coverage.find_gaps(tmp_path / "missing", {})
@@ -0,0 +1,96 @@
+"""Tests for lam.pack.dedup (size → partial hash → full hash duplicate detection)."""
+
+import tarfile
+
+import pytest
+
+from lam.pack import dedup, manifest, packager
+from lam.pack.scan import scan
+
+PARTIAL = 16
+
+
+@pytest.fixture()
+def tree(tmp_path):
+    root = tmp_path / "Fotos"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    big = bytes(range(256)) * 4
+    (root / "a" / "big.raw").write_bytes(big)
+    (root / "b" / "big copy.raw").write_bytes(big)
+    # Same size, same head and tail, different middle: only the full hash tells.
+    (root / "b" / "big other.raw").write_bytes(big[:500] + b"X" + big[501:])
+    (root / "a" / "small.txt").write_bytes(b"hello")
+    (root / "b" / "small.txt").write_bytes(b"hello")
+    (root / "b" / "unique.txt").write_bytes(b"unique content")
+    (root / "b" / "same-size.txt").write_bytes(b"HELLO")
+    return root
+
+
+def test_groups_and_wasted_bytes(tree):
+    report = dedup.find_duplicates([scan(tree)], partial_size=PARTIAL, workers=2)
+    assert [[f.path for f in g.files] for g in report.groups] == [
+        ["a/big.raw", "b/big copy.raw"],
+        ["a/small.txt", "b/small.txt"],
+    ]
+    assert [g.wasted for g in report.groups] == [1024, 5]
+    assert report.wasted == 1029
+    assert report.files_scanned == 7
+
+
+def test_unique_sizes_are_never_read(tree):
+    report = dedup.find_duplicates([scan(tree)], partial_size=PARTIAL)
+    # Three 1 KiB files: partial hash (2 × 16 bytes each), all three collide and are
+    # hashed in full; the three 5-byte files are hashed in full directly. The file
+    # with a unique size is not read at all.
+    assert report.bytes_read == 3 * 2 * PARTIAL + 3 * 1024 + 3 * 5
+
+
+def test_partial_hash_rules_out_large_files(tmp_path):
+    root = tmp_path / "Videos"
+    root.mkdir()
+    for name, fill in (("a.mov", b"a"), ("b.mov", b"b"), ("c.mov", b"a")):
+        (root / name).write_bytes(fill * 4096)
+    report = dedup.find_duplicates([scan(root)], partial_size=PARTIAL)
+    assert [[f.path for f in g.files] for g in report.groups] == [["a.mov", "c.mov"]]
+    assert report.bytes_read == 3 * 2 * PARTIAL + 2 * 4096
+
+
+def test_duplicates_across_directories(tree, tmp_path):
+    other = tmp_path / "Backup"
+    other.mkdir()
+    (other / "hello.txt").write_bytes(b"hello")
+    report = dedup.find_duplicates([scan(tree), scan(other)], partial_size=PARTIAL)
+    group = next(g for g in report.groups if g.size == 5)
+    assert [f.absolute for f in group.files] == [
+        tree / "a" / "small.txt",
+        tree / "b" / "small.txt",
+        other / "hello.txt",
+    ]
+
+
+def test_link_targets_point_at_first_copy(tree):
+    report = dedup.find_duplicates([scan(tree)], partial_size=PARTIAL)
+    assert dedup.link_targets(report.groups) == {
+        "b/big copy.raw": "a/big.raw",
+        "b/small.txt": "a/small.txt",
+    }
+
+
+def test_skip_duplicates_archive_uses_hard_links(tree, tmp_path):
+    table = scan(tree)
+    links = dedup.link_targets(dedup.find_duplicates([table], partial_size=PARTIAL).groups)
+    plain = packager.create_archive(tree, tmp_path / "plain", table=table)
+    linked = packager.create_archive(tree, tmp_path / "linked", table=table, links=links)
+    assert linked.stat().st_size < plain.stat().st_size
+
+    with tarfile.open(linked) as tf:
+        member = tf.getmember("Fotos/b/big copy.raw")
+        assert member.islnk() and member.linkname == "Fotos/a/big.raw"
+        tf.extractall(tmp_path / "restored", filter="tar")
+    restored = tmp_path / "restored" / "Fotos"
+    assert (restored / "b" / "big copy.raw").read_bytes() == (tree / "a" / "big.raw").read_bytes()
+
+    rows = {e.path: e for e in manifest.read(manifest.manifest_path(linked))}
+    assert rows["Fotos/b/small.txt"].sha256 == rows["Fotos/a/small.txt"].sha256
+    assert rows["Fotos/b/big copy.raw"].size == 1024
@@ -0,0 +1,137 @@
+"""Tests for lam.pack.fingerprint (skip unchanged packages)."""
+
+import os
+
+import pytest
+
+from lam.pack import batch, fingerprint, par2, par2_tuning
+from lam.pack.scan import scan
+
+SETTINGS = fingerprint.PackSettings("tar", 15, 1)
+
+
+@pytest.fixture()
+def source(tmp_path):
+    root = tmp_path / "Urlaub"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.jpg").write_bytes(b"a" * 100)
+    (root / "sub" / "b.jpg").write_bytes(b"b" * 200)
+    return root
+
+
+@pytest.fixture()
+def outputs(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    files = [out / "Urlaub.tar", out / "Urlaub.par2"]
+    for f in files:
+        f.write_bytes(b"x" * 10)
+    return files
+
+
+def test_tree_digest_is_stable_and_tracks_changes(source):
+    digest = fingerprint.tree_digest(scan(source))
+    assert digest == fingerprint.tree_digest(scan(source))
+    os.utime(source / "a.jpg", ns=(1, 1))
+    assert fingerprint.tree_digest(scan(source)) != digest
+
+
+def test_current_outputs_round_trip(source, outputs, tmp_path):
+    cache = fingerprint.FingerprintCache(tmp_path / "out")
+    table = scan(source)
+    cache.record("Urlaub", table, SETTINGS, outputs)
+    digest = fingerprint.tree_digest(table)
+    assert cache.current_outputs("Urlaub", digest, SETTINGS) == [p.resolve() for p in outputs]
+    assert cache.archive_size("Urlaub") == 10 and cache.archive_size("Other") is None
+    # A fresh instance reads the persisted index.
+    reloaded = fingerprint.FingerprintCache(tmp_path / "out")
+    assert reloaded.current_outputs("Urlaub", digest, SETTINGS) is not None
+
+
+def test_current_outputs_invalidated(source, outputs, tmp_path):
+    cache = fingerprint.FingerprintCache(tmp_path / "out")
+    table = scan(source)
+    cache.record("Urlaub", table, SETTINGS, outputs)
+    digest = fingerprint.tree_digest(table)
+    assert cache.current_outputs("Urlaub", digest, fingerprint.PackSettings("tar", 20, 1)) is None
+    other_engine = fingerprint.PackSettings("tar", 15, 1, par2_engine="native")
+    assert cache.current_outputs("Urlaub", digest, other_engine) is None
+    other_blocks = fingerprint.PackSettings("tar", 15, 1, par2_block_size=4096)
+    assert cache.current_outputs("Urlaub", digest, other_blocks) is None
+    assert cache.current_outputs("Other", digest, SETTINGS) is None
+    outputs[1].write_bytes(b"changed output")
+    assert cache.current_outputs("Urlaub", digest, SETTINGS) is None
+
+
+def test_changed_files(source, outputs, tmp_path):
+    cache = fingerprint.FingerprintCache(tmp_path / "out")
+    assert cache.changed_files("Urlaub", scan(source)) == []
+    cache.record("Urlaub", scan(source), SETTINGS, outputs)
+    (source / "sub" / "b.jpg").write_bytes(b"B" * 300)
+    (source / "c.jpg").write_bytes(b"c")
+    assert cache.changed_files("Urlaub", scan(source)) == ["c.jpg", "sub/b.jpg"]
+
+
+def test_damaged_index_is_ignored(tmp_path):
+    cache_dir = tmp_path / fingerprint.CACHE_DIRNAME
+    cache_dir.mkdir()
+    (cache_dir / fingerprint.INDEX_FILENAME).write_text("{not json")
+    cache = fingerprint.FingerprintCache(tmp_path)
+    assert cache.current_outputs("x", "0" * 64, SETTINGS) is None
+
+
+def test_batch_skips_unchanged_packages(source, tmp_path, monkeypatch):
+    calls = []
+
+    def create(archive_path, redundancy, volumes=1, engine="par2cmdline", profile=None):
+        calls.append(archive_path.name)
+        out = archive_path.parent / f"{archive_path.stem}.par2"
+        out.write_bytes(b"p" * 8)
+        return [out]
+
+    monkeypatch.setattr(par2, "create", create)
+    output = tmp_path / "out"
+    cache = fingerprint.FingerprintCache(output)
+    first = batch.run_batch([source], output, "tar", 15, cache=cache)
+    assert first[0].ok and not first[0].skipped
+
+    second = batch.run_batch([source], output, "tar", 15, cache=cache)
+    assert second[0].skipped
+    assert second[0].total_size == first[0].total_size
+    assert second[0].archive_path == (output / "Urlaub.tar").resolve()
+    assert calls == ["Urlaub.tar"]
+
+    forced = batch.run_batch([source], output, "tar", 15, cache=cache, force=True)
+    assert not forced[0].skipped
+    assert calls == ["Urlaub.tar", "Urlaub.tar"]
+
+
+def test_batch_rebuilds_after_the_par2_profile_changes(source, tmp_path, monkeypatch):
+    blocks = []
+
+    def create(archive_path, redundancy, volumes=1, engine="par2cmdline", profile=None):
+        blocks.append(profile.block_size)
+        out = archive_path.parent / f"{archive_path.stem}.par2"
+        out.write_bytes(b"p" * 8)
+        return [out]
+
+    monkeypatch.setattr(par2, "create", create)
+    output = tmp_path / "out"
+    cache = fingerprint.FingerprintCache(output)
+
+    def run(block_count=None, engine="par2cmdline"):
+        profile = lambda size: par2_tuning.tune(size, 15, block_count=block_count)  # noqa: E731
+        (result,) = batch.run_batch(
+            [source], output, "tar", 15, engine=engine, par2_profile=profile, cache=cache
+        )
+        return result.skipped
+
+    assert not run()
+    assert run()
+    # A calibration that ends up with the same block size changes nothing …
+    assert run(block_count=par2_tuning.TARGET_BLOCK_COUNT)
+    # … another block size or engine rebuilds.
+    assert not run(block_count=2)
+    assert run(block_count=2)
+    assert not run(block_count=2, engine="native")
+    assert len(blocks) == 3 and blocks[0] != blocks[1]
@@ -0,0 +1,164 @@
+"""Tests for lam.pack.hashing (parallel SHA-256 manifests with a stat-keyed cache)."""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+from lam.pack import hashing, manifest
+from lam.pack.scan import FileRecord
+
+
+@pytest.fixture()
+def tree(tmp_path):
+    root = tmp_path / "Fotos"
+    (root / "2024" / "Urlaub").mkdir(parents=True)
+    (root / "b.jpg").write_bytes(b"b" * 1000)
+    (root / "2024" / "a.jpg").write_bytes(b"a" * 10)
+    (root / "2024" / "Urlaub" / "clip.mp4").write_bytes(os.urandom(hashing.SMALL_FILE * 3 + 7))
+    (root / "2024" / "leer.txt").write_bytes(b"")
+    os.symlink("b.jpg", root / "latest.jpg")
+    return root
+
+
+def _sha(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _one_device(path):
+    return "disk0"
+
+
+def test_manifest_is_sorted_and_correct(tree):
+    (report,) = hashing.hash_trees([tree], workers=4, device_of=_one_device)
+    assert report.ok
+    assert [e.path for e in report.entries] == [
+        "Fotos/2024/Urlaub/clip.mp4",
+        "Fotos/2024/a.jpg",
+        "Fotos/2024/leer.txt",
+        "Fotos/b.jpg",
+    ]
+    clip = report.entries[0]
+    assert clip.sha256 == _sha(tree / "2024" / "Urlaub" / "clip.mp4")
+    assert clip.size == hashing.SMALL_FILE * 3 + 7
+    assert report.entries[2].sha256 == hashlib.sha256(b"").hexdigest()
+    assert (report.hashed, report.cached) == (4, 0)
+
+
+def test_cache_skips_unchanged_files(tree, tmp_path, monkeypatch):
+    cache_path = tmp_path / "cache.json"
+    first = hashing.hash_trees(
+        [tree], cache=hashing.HashCache(cache_path), device_of=_one_device
+    )[0]
+
+    read = []
+    original = hashing.hash_file
+    monkeypatch.setattr(
+        hashing, "hash_file", lambda path, size=-1: read.append(path.name) or original(path, size)
+    )
+    (tree / "b.jpg").write_bytes(b"c" * 1000)
+    os.utime(tree / "b.jpg", ns=(1, 1))
+    second = hashing.hash_trees(
+        [tree], cache=hashing.HashCache(cache_path), device_of=_one_device
+    )[0]
+    assert read == ["b.jpg"]
+    assert (second.hashed, second.cached) == (1, 3)
+    assert second.entries[:3] == first.entries[:3]
+    assert second.entries[3].sha256 == hashlib.sha256(b"c" * 1000).hexdigest()
+
+
+def test_cache_keeps_devices_apart(tmp_path):
+    # Two disks mounted one after the other: same inode, size and mtime, other bytes.
+    disk_a = FileRecord("a.jpg", 1000, 5, 0o100644, 0, 0, inode=12, device=2049)
+    disk_b = FileRecord("a.jpg", 1000, 5, 0o100644, 0, 0, inode=12, device=2065)
+    cache = hashing.HashCache(tmp_path / "cache.json")
+    cache.put(disk_a, "aa" * 32)
+    cache.save()
+    reloaded = hashing.HashCache(tmp_path / "cache.json")
+    assert reloaded.get(disk_a) == "aa" * 32
+    assert reloaded.get(disk_b) is None
+
+
+def test_readers_are_capped_per_device(tmp_path, monkeypatch):
+    roots = []
+    for disk in ("hdd", "ssd"):
+        root = tmp_path / disk
+        root.mkdir()
+        for i in range(12):
+            (root / f"{i}.bin").write_bytes(bytes([i]) * 100)
+        roots.append(root)
+    lock = threading.Lock()
+    running = {"hdd": 0, "ssd": 0}
+    peak = dict(running)
+    original = hashing.hash_file
+
+    def slow_hash(path, size=-1):
+        device = path.parent.name
+        with lock:
+            running[device] += 1
+            peak[device] = max(peak[device], running[device])
+        time.sleep(0.01)
+        with lock:
+            running[device] -= 1
+        return original(path, size)
+
+    readers = {"hdd": 1, "ssd": 4}
+    monkeypatch.setattr(hashing, "hash_file", slow_hash)
+    monkeypatch.setattr(hashing, "readers_for", lambda device, workers: readers[device])
+    reports = hashing.hash_trees(roots, workers=8, device_of=lambda root: root.name)
+    assert [len(r.entries) for r in reports] == [12, 12]
+    assert peak == {"hdd": 1, "ssd": 4}
+
+
+def test_readers_for_rotational_disks(tmp_path, monkeypatch):
+    for device, rotational in (("sda", "1"), ("nvme0n1", "0")):
+        (tmp_path / device / "queue").mkdir(parents=True)
+        (tmp_path / device / "queue" / "rotational").write_text(f"{rotational}\n")
+    monkeypatch.setattr(hashing, "_SYS_BLOCK", tmp_path)
+    assert hashing.readers_for("sda", 8) == hashing.ROTATIONAL_READERS
+    assert hashing.readers_for("nvme0n1", 8) == 8
+    assert hashing.readers_for("dev-0:42", 8) == 8
+
+
+def test_unreadable_files_are_reported(tree):
+    target = tree / "2024" / "a.jpg"
+    target.chmod(0)
+    try:
+        if os.access(target, os.R_OK):
+            pytest.skip("running as root: permissions are not enforced")
+        (report,) = hashing.hash_trees([tree], device_of=_one_device)
+    finally:
+        target.chmod(0o644)
+    assert [name for name, _ in report.errors] == ["Fotos/2024/a.jpg"]
+    assert len(report.entries) == 3
+
+
+def test_single_file_root(tree, tmp_path):
+    archive = tmp_path / "Fotos.tar"
+    archive.write_bytes(b"archive")
+    (report,) = hashing.hash_trees([archive], device_of=_one_device)
+    assert [(e.path, e.sha256) for e in report.entries] == [("Fotos.tar", _sha(archive))]
+    # Not Fotos.manifest.csv: that is the member manifest of Fotos.tar.
+    assert hashing.default_output(archive).name == "Fotos.tar.manifest.csv"
+    assert hashing.default_output(tree) == manifest.manifest_path(tree)
+    assert hashing.default_output(tree, "sha256sum").name == "Fotos.sha256"
+
+
+def test_sha256sum_format(tree, tmp_path):
+    (tree / "back\\slash.txt").write_bytes(b"x")
+    (report,) = hashing.hash_trees([tree], device_of=_one_device)
+    path = hashing.write_manifest(tmp_path / "Fotos.sha256", report.entries, "sha256sum")
+    lines = path.read_text().splitlines()
+    assert lines[0] == f"{_sha(tree / '2024' / 'Urlaub' / 'clip.mp4')}  Fotos/2024/Urlaub/clip.mp4"
+    assert lines[-1] == f"\\{hashlib.sha256(b'x').hexdigest()}  Fotos/back\\\\slash.txt"
+    if shutil.which("sha256sum"):
+        subprocess.run(["sha256sum", "--strict", "-c", str(path)], cwd=tmp_path, check=True)
+
+
+def test_missing_root(tmp_path):
+    with pytest.raises(hashing.HashError, match="Cannot read"):
+        hashing.hash_trees([tmp_path / "missing"])
@@ -0,0 +1,170 @@
+"""Tests for lam.index (master index CSV and lookup sidecars)."""
+
+import hashlib
+
+import pytest
+
+from lam.index import master, sidecar
+from lam.index.master import IndexEntry, MasterIndex
+from lam.pack import manifest
+
+
+def _entry(i: int, name: str | None = None, disc: str = "BD-1") -> IndexEntry:
+    return IndexEntry(
+        sha256=hashlib.sha256(str(i).encode()).hexdigest(),
+        path=f"Pkg{i % 3}/dir/{name or f'file_{i}.jpg'}",
+        size=i,
+        mtime="2025-01-01T00:00:00Z",
+        package=f"Pkg{i % 3}",
+        disc=disc,
+    )
+
+
+@pytest.fixture()
+def index(tmp_path):
+    idx = MasterIndex(tmp_path / "master_index.csv")
+    idx.append(_entry(i) for i in range(500))
+    return idx
+
+
+def test_csv_is_plain_and_authoritative(index):
+    lines = index.csv_path.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == ",".join(master.FIELDS)
+    assert len(lines) == 501
+
+
+def test_find_hash_builds_sidecars(index):
+    wanted = _entry(123)
+    assert index.find_hash(wanted.sha256) == [wanted]
+    assert index.hash_path.exists() and index.names_path.exists()
+    assert index.find_hash(wanted.sha256.upper()) == [wanted]
+    assert index.find_hash("0" * 64) == []
+
+
+def test_find_hashes_in_one_pass(index):
+    index.refresh()
+    extra = _entry(7, disc="BD-9")
+    index.append([extra])  # in the unindexed tail
+    digests = [_entry(5).sha256.upper(), _entry(7).sha256, "0" * 64]
+    found = index.find_hashes(digests)
+    assert found == {_entry(5).sha256: [_entry(5)], _entry(7).sha256: [_entry(7), extra]}
+
+
+@pytest.mark.parametrize("query", ["file_42.", "FILE_42.", "_42", "e_", "4", ".jpg"])
+def test_find_name_matches_substring(index, query):
+    results = index.find_name(query, limit=1000)
+    expected = [e for e in (_entry(i) for i in range(500)) if query.casefold() in e.name]
+    assert sorted(results, key=lambda e: e.size) == expected
+
+
+def test_find_name_limit(index):
+    assert len(index.find_name("file", limit=7)) == 7
+
+
+def test_appended_rows_are_found_before_merge(index):
+    index.refresh()
+    covered = sidecar.Sidecar(index.hash_path, master.HASH_KEY).covered
+    extra = _entry(1000, name="Weihnachten ÄÖÜ.mov", disc="BD-2")
+    index.append([extra])
+    assert index.find_hash(extra.sha256) == [extra]
+    assert index.find_name("äöü") == [extra]
+    # Below the tail threshold the sidecar is left alone.
+    assert sidecar.Sidecar(index.hash_path, master.HASH_KEY).covered == covered
+
+
+def test_tail_is_merged_incrementally(index, monkeypatch):
+    index.refresh()
+    monkeypatch.setattr(master, "MAX_TAIL_BYTES", 0)
+    index.append(_entry(i) for i in range(500, 600))
+    index.refresh()
+    incremental = index.hash_path.read_bytes(), index.names_path.read_bytes()
+    index.refresh(force=True)
+    assert (index.hash_path.read_bytes(), index.names_path.read_bytes()) == incremental
+    assert len(sidecar.Sidecar(index.hash_path, master.HASH_KEY)) == 600
+
+
+def test_rewritten_csv_invalidates_sidecars(index):
+    index.refresh()
+    index.csv_path.write_text(",".join(master.FIELDS) + "\n", encoding="utf-8")
+    index.append([_entry(7, disc="BD-9")])
+    assert index.find_hash(_entry(7).sha256) == [_entry(7, disc="BD-9")]
+
+
+def test_spilled_runs_match_in_memory_build(index, monkeypatch):
+    index.refresh(force=True)
+    in_memory = index.names_path.read_bytes()
+    monkeypatch.setattr(sidecar, "RUN_RECORDS", 100)
+    index.refresh(force=True)
+    assert index.names_path.read_bytes() == in_memory
+
+
+def test_quoted_newlines_and_damaged_rows(tmp_path):
+    idx = MasterIndex(tmp_path / "master_index.csv")
+    odd = _entry(1, name='we"ird\nname.txt')
+    idx.append([odd])
+    with idx.csv_path.open("a", encoding="utf-8") as fh:
+        fh.write("garbage row\n")
+    idx.append([_entry(2)])
+    assert idx.find_name("ird\nna") == [odd]
+    assert idx.find_hash(_entry(2).sha256) == [_entry(2)]
+
+
+def test_add_archive_reads_manifest(tmp_path):
+    archive = tmp_path / "Urlaub.tar"
+    archive.write_bytes(b"")
+    manifest.write(
+        manifest.manifest_path(archive),
+        [manifest.ManifestEntry("Urlaub/a.jpg", 3, 0, "ab" * 32)],
+    )
+    idx = MasterIndex(tmp_path / "index" / "master_index.csv")
+    assert idx.add_archive(archive, disc="BD-7") == 1
+    (entry,) = idx.find_hash("ab" * 32)
+    assert (entry.package, entry.disc, entry.path) == ("Urlaub", "BD-7", "Urlaub/a.jpg")
+
+
+def test_readding_a_package_replaces_its_rows(index, tmp_path):
+    archive = tmp_path / "Pkg1.tar"
+    archive.write_bytes(b"")
+    rows = [manifest.ManifestEntry("Pkg1/new.jpg", 3, 0, "ab" * 32)]
+    manifest.write(manifest.manifest_path(archive), rows)
+    index.append([_entry(1, disc="BD-2")])
+    assert index.find_hash(_entry(1).sha256)  # builds the sidecars
+
+    assert index.add_archive(archive, disc="BD-1") == 1
+    assert index.add_archive(archive, disc="BD-1") == 1
+    assert [e.disc for e in index.find_hash(_entry(1).sha256)] == ["BD-2"]  # other disc kept
+    assert index.find_hash(_entry(4).sha256) == []  # Pkg1 row on BD-1: stale, dropped
+    assert index.find_hash(_entry(2).sha256) == [_entry(2)]  # other package kept
+    assert [e.path for e in index.find_hash("ab" * 32)] == ["Pkg1/new.jpg"]
+    assert index.find_name("file_4.jpg") == []
+    with index.csv_path.open() as fh:
+        assert sum(1 for line in fh if ",Pkg1,BD-1" in line) == 1
+
+
+def test_add_archive_of_a_dotted_loose_package(tmp_path):
+    package = tmp_path / "Reise.2024"
+    package.mkdir()
+    manifest.write(
+        manifest.manifest_path(package),
+        [manifest.ManifestEntry("Reise.2024/a.jpg", 3, 0, "cd" * 32)],
+    )
+    idx = MasterIndex(tmp_path / "index" / "master_index.csv")
+    assert idx.add_archive(package) == 1
+    assert idx.find_hash("cd" * 32)[0].package == "Reise.2024"
+
+
+def test_add_archive_keeps_non_utf8_names(tmp_path):
+    import os
+
+    name = os.fsdecode(b"Urlaub/caf\xe9.jpg")
+    archive = tmp_path / "Urlaub.tar"
+    archive.write_bytes(b"")
+    manifest.write(manifest.manifest_path(archive), [manifest.ManifestEntry(name, 3, 0, "ef" * 32)])
+    idx = MasterIndex(tmp_path / "index" / "master_index.csv")
+    assert idx.add_archive(archive) == 1
+    assert [e.path for e in idx.find_name(os.fsdecode(b"caf\xe9"))] == [name]
+
+
+def test_missing_index_raises(tmp_path):
+    with pytest.raises(master.MasterIndexError):
+        MasterIndex(tmp_path / "nope.csv").find_hash("0" * 64)
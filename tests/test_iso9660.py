@@ -0,0 +1,240 @@
+"""Tests for lam.pack.iso9660 (streaming ISO 9660 / Rock Ridge / Joliet writer)."""
+
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from lam.pack import iso9660
+from lam.pack.scan import scan
+
+SECTOR = 2048
+LONG_NAME = "Ein sehr langer Dateiname mit Ümlauten " * 6 + ".txt"
+
+
+class _Reader:
+    """Just enough of an ISO 9660 reader to check the writer's output."""
+
+    def __init__(self, path):
+        self.data = path.read_bytes()
+
+    def descriptor(self, number):
+        return self.data[(16 + number) * SECTOR : (17 + number) * SECTOR]
+
+    def root(self, joliet=False):
+        return self.descriptor(1 if joliet else 0)[156:190]
+
+    def records(self, record):
+        extent, size = _extent(record)
+        position, end = extent * SECTOR, extent * SECTOR + size
+        while position < end:
+            length = self.data[position]
+            if length == 0:
+                position = (position // SECTOR + 1) * SECTOR
+                continue
+            yield self.data[position : position + length]
+            position += length
+
+    def susp(self, record):
+        length = record[32]
+        area = record[33 + length + (1 - length % 2) :]
+        entries = []
+        while len(area) >= 4 and area[2]:
+            entry, area = area[: area[2]], area[area[2] :]
+            if entry[:2] == b"CE":
+                block, offset, size = (struct.unpack_from("<I", entry, i)[0] for i in (4, 12, 20))
+                start = block * SECTOR + offset
+                area = area + self.data[start : start + size]
+                continue
+            entries.append(entry)
+        return entries
+
+    def rr_name(self, record):
+        return b"".join(e[5:] for e in self.susp(record) if e[:2] == b"NM").decode()
+
+    def tree(self, joliet=False, record=None):
+        """Return {path: [records]} for every entry below *record* (root by default)."""
+        found = {}
+        record = record or self.root(joliet)
+        for child in list(self.records(record))[2:]:
+            identifier = child[33 : 33 + child[32]]
+            name = identifier.decode("utf-16-be") if joliet else self.rr_name(child)
+            found.setdefault(name, []).append(child)
+            if child[25] & 2:
+                for sub, records in self.tree(joliet, child).items():
+                    found[f"{name}/{sub}"] = records
+        return found
+
+    def content(self, records):
+        return b"".join(
+            self.data[e * SECTOR : e * SECTOR + s] for e, s in (_extent(r) for r in records)
+        )
+
+
+def _extent(record):
+    return struct.unpack_from("<I", record, 2)[0], struct.unpack_from("<I", record, 10)[0]
+
+
+@pytest.fixture()
+def source(tmp_path):
+    root = tmp_path / "Familie_2025"
+    (root / "sub" / "deeper").mkdir(parents=True)
+    (root / "photo.jpg").write_bytes(b"\xff\xd8" + bytes(range(256)) * 20)
+    (root / "Photo.JPG").write_text("same ISO name")
+    (root / "empty.bin").write_bytes(b"")
+    (root / "sub" / "doc.txt").write_text("archival document")
+    (root / "sub" / LONG_NAME).write_text("long")
+    (root / "sub" / "deeper" / "x.dat").write_bytes(b"x" * 5000)
+    os.symlink("../photo.jpg", root / "sub" / "link.jpg")
+    os.chmod(root / "sub" / "doc.txt", 0o640)
+    return root
+
+
+def _write(source, tmp_path):
+    image = tmp_path / "out.iso"
+    entries = iso9660.write_image(scan(source), image, source.name)
+    return image, entries
+
+
+def test_volume_descriptors(source, tmp_path):
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    pvd, svd, terminator = (reader.descriptor(i) for i in range(3))
+    assert pvd[:7] == b"\x01CD001\x01"
+    assert pvd[40:52] == b"FAMILIE_2025"
+    assert svd[:7] == b"\x02CD001\x01" and svd[88:91] == b"%/E"
+    assert terminator[:7] == b"\xffCD001\x01"
+    assert struct.unpack_from("<I", pvd, 80)[0] * SECTOR == image.stat().st_size
+    assert image.stat().st_size % SECTOR == 0
+
+
+def test_rock_ridge_tree_has_original_names_and_content(source, tmp_path):
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    tree = reader.tree()
+    assert set(tree) == {
+        "photo.jpg",
+        "Photo.JPG",
+        "empty.bin",
+        "sub",
+        "sub/deeper",
+        "sub/deeper/x.dat",
+        "sub/doc.txt",
+        f"sub/{LONG_NAME}",
+        "sub/link.jpg",
+    }
+    assert reader.content(tree["sub/doc.txt"]) == b"archival document"
+    assert reader.content(tree["photo.jpg"]) == (source / "photo.jpg").read_bytes()
+    assert reader.content(tree["empty.bin"]) == b""
+
+    px = next(e for e in reader.susp(tree["sub/doc.txt"][0]) if e[:2] == b"PX")
+    assert struct.unpack_from("<I", px, 4)[0] & 0o7777 == 0o640
+    sl = next(e for e in reader.susp(tree["sub/link.jpg"][0]) if e[:2] == b"SL")
+    assert sl[5:] == b"\x00\x02..\x00\x09photo.jpg"
+
+
+def test_iso_names_are_unique_d_characters(source, tmp_path):
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    names = [r[33 : 33 + r[32]] for r in list(reader.records(reader.root()))[2:]]
+    assert names == sorted(names)
+    assert len(set(names)) == len(names)
+    assert {b"PHOTO.JPG;1", b"PHOTO_1.JPG;1", b"EMPTY.BIN;1", b"SUB"} == set(names)
+
+
+def test_joliet_tree(source, tmp_path):
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    tree = reader.tree(joliet=True)
+    assert "sub/doc.txt" in tree and "Photo.JPG" in tree
+    assert "sub/link.jpg" not in tree  # symlinks are Rock Ridge only
+    (long_name,) = [n for n in tree if n.startswith("sub/Ein")]
+    assert len(long_name) - len("sub/") == iso9660.JOLIET_NAME_LENGTH
+    assert long_name.endswith(".txt")
+    assert reader.content(tree["sub/deeper/x.dat"]) == b"x" * 5000
+
+
+def test_path_tables_match_directories(source, tmp_path):
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    pvd = reader.descriptor(0)
+    size = struct.unpack_from("<I", pvd, 132)[0]
+    l_table = struct.unpack_from("<I", pvd, 140)[0]
+    m_table = struct.unpack_from(">I", pvd, 148)[0]
+    little = reader.data[l_table * SECTOR : l_table * SECTOR + size]
+    big = reader.data[m_table * SECTOR : m_table * SECTOR + size]
+    rows = []
+    position = 0
+    while position < size:
+        length, _, extent, parent = struct.unpack_from("<BBIH", little, position)
+        assert struct.unpack_from(">BBIH", big, position) == (length, 0, extent, parent)
+        rows.append((little[position + 8 : position + 8 + length], extent, parent))
+        position += 8 + length + length % 2
+    assert [(name, parent) for name, _, parent in rows] == [
+        (b"\0", 1),
+        (b"SUB", 1),
+        (b"DEEPER", 2),
+    ]
+    assert rows[0][1] == _extent(reader.root())[0]
+
+
+def test_manifest_entries_hash_streamed_content(source, tmp_path):
+    _, entries = _write(source, tmp_path)
+    by_path = {e.path: e for e in entries}
+    doc = by_path["Familie_2025/sub/doc.txt"]
+    assert doc.sha256 == hashlib.sha256(b"archival document").hexdigest()
+    assert doc.size == 17
+    assert "Familie_2025/sub/link.jpg" not in by_path
+
+
+def test_large_files_use_multiple_extents(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(iso9660, "MAX_EXTENT", 2 * SECTOR)
+    payload = bytes(range(256)) * 40  # 10240 bytes -> 3 extents
+    (source / "big.bin").write_bytes(payload)
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    for joliet in (False, True):
+        records = reader.tree(joliet)["big.bin"]
+        assert [r[25] & 0x80 for r in records] == [0x80, 0x80, 0]
+        assert reader.content(records) == payload
+
+
+def test_long_symlink_targets_span_entries(source, tmp_path):
+    target = "/".join(["component" * 20] * 8)
+    os.symlink(target, source / "far")
+    image, _ = _write(source, tmp_path)
+    reader = _Reader(image)
+    entries = [e for e in reader.susp(reader.tree()["far"][0]) if e[:2] == b"SL"]
+    assert len(entries) > 1
+    parts, component = [], b""
+    for entry in entries:
+        body = entry[5:]
+        while body:
+            flags, length = body[0], body[1]
+            component += body[2 : 2 + length]
+            if not flags & 1:
+                parts.append(component)
+                component = b""
+            body = body[2 + length :]
+    assert b"/".join(parts).decode() == target
+
+
+def test_file_changing_size_is_an_error(source, tmp_path):
+    table = scan(source)
+    (source / "sub" / "doc.txt").write_text("archival document, now longer")
+    with pytest.raises(iso9660.Iso9660Error, match="changed size"):
+        iso9660.write_image(table, tmp_path / "out.iso", source.name)
+
+
+@pytest.mark.skipif(shutil.which("bsdtar") is None, reason="bsdtar not installed")
+def test_bsdtar_extracts_image(source, tmp_path):
+    image, _ = _write(source, tmp_path)
+    target = tmp_path / "extracted"
+    target.mkdir()
+    subprocess.run(["bsdtar", "-xf", str(image), "-C", str(target)], check=True)
+    assert (target / "sub" / "doc.txt").read_text() == "archival document"
+    assert (target / "sub" / LONG_NAME).read_text() == "long"
+    assert os.readlink(target / "sub" / "link.jpg") == "../photo.jpg"
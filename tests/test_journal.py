@@ -0,0 +1,169 @@
+"""Tests for lam.pack.journal (checkpoints and resuming interrupted TAR archives)."""
+
+import hashlib
+
+import pytest
+
+from lam.pack import journal, packager, tarindex
+from lam.pack.manifest import ManifestEntry, manifest_path
+from lam.pack.payload import PayloadCopier
+from lam.pack.scan import scan
+
+IDENTITY = {"tree_digest": "abc", "settings": {"fmt": "tar"}}
+
+
+@pytest.fixture()
+def source(tmp_path):
+    root = tmp_path / "src" / "Familie_2025"
+    for d in range(3):
+        sub = root / f"d{d}"
+        sub.mkdir(parents=True)
+        for i in range(4):
+            (sub / f"f{i}.bin").write_bytes(bytes([d * 4 + i]) * (1000 + 700 * i))
+    (root / "d2" / "copy.bin").write_bytes(b"\x00" * 1000)  # duplicate of d0/f0.bin
+    return root
+
+
+def _reference(source, tmp_path, links=None):
+    out = tmp_path / "reference"
+    archive = packager.create_archive(source, out, "tar", table=scan(source), links=links)
+    return archive.read_bytes(), manifest_path(archive).read_text()
+
+
+def _interrupt_after(monkeypatch, files):
+    """Make the TAR writer fail with KeyboardInterrupt on file number *files* + 1."""
+    original = PayloadCopier.copy_file
+    calls = []
+
+    def copy_file(self, *args, **kwargs):
+        calls.append(args[0])
+        if len(calls) > files:
+            raise KeyboardInterrupt
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(PayloadCopier, "copy_file", copy_file)
+    return calls
+
+
+def _journal(output):
+    checkpoints = journal.PackJournal(output, "Familie_2025", IDENTITY)
+    checkpoints.checkpoint_bytes = 1  # after every member
+    return checkpoints
+
+
+def test_resume_appends_after_the_last_checkpoint(source, tmp_path, monkeypatch):
+    expected, expected_manifest = _reference(source, tmp_path)
+    out = tmp_path / "out"
+    _interrupt_after(monkeypatch, 5)
+    with pytest.raises(KeyboardInterrupt):
+        packager.create_archive(source, out, "tar", table=scan(source), journal=_journal(out))
+    monkeypatch.undo()
+
+    resumed = _journal(out)
+    # root, d0 and its 4 files, d1 and its first file
+    assert resumed.resumable and resumed.tar.members == 8
+    assert len(resumed.entries) == 5
+    (out / "Familie_2025.tar").open("ab").write(b"garbage from the interrupted member")
+    calls = _interrupt_after(monkeypatch, 10**6)
+    archive = packager.create_archive(source, out, "tar", table=scan(source), journal=resumed)
+    assert len(calls) == 13 - 5
+    assert archive.read_bytes() == expected
+    assert manifest_path(archive).read_text() == expected_manifest
+    assert tarindex.read(tarindex.index_path(archive)) == tarindex.scan_members(archive)
+
+
+def test_resume_keeps_hard_links_to_earlier_members(source, tmp_path, monkeypatch):
+    links = {"d2/copy.bin": "d0/f0.bin"}
+    expected, expected_manifest = _reference(source, tmp_path, links)
+    out = tmp_path / "out"
+    _interrupt_after(monkeypatch, 6)
+    with pytest.raises(KeyboardInterrupt):
+        packager.create_archive(
+            source, out, "tar", table=scan(source), links=links, journal=_journal(out)
+        )
+    monkeypatch.undo()
+    archive = packager.create_archive(
+        source, out, "tar", table=scan(source), links=links, journal=_journal(out)
+    )
+    assert archive.read_bytes() == expected
+    assert manifest_path(archive).read_text() == expected_manifest
+
+
+def test_damaged_archive_starts_over(source, tmp_path, monkeypatch):
+    expected, _ = _reference(source, tmp_path)
+    out = tmp_path / "out"
+    _interrupt_after(monkeypatch, 5)
+    with pytest.raises(KeyboardInterrupt):
+        packager.create_archive(source, out, "tar", table=scan(source), journal=_journal(out))
+    monkeypatch.undo()
+    checkpoints = _journal(out)
+    with (out / "Familie_2025.tar").open("r+b") as fh:
+        fh.seek(checkpoints.tar.last_offset)
+        fh.write(b"X")
+    calls = _interrupt_after(monkeypatch, 10**6)
+    archive = packager.create_archive(source, out, "tar", table=scan(source), journal=checkpoints)
+    assert len(calls) == 13
+    assert archive.read_bytes() == expected
+
+
+def test_other_identity_is_ignored(tmp_path):
+    checkpoints = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    checkpoints.complete_stage("archive", [_file(tmp_path / "Pkg.tar")])
+    assert journal.PackJournal(tmp_path, "Pkg", IDENTITY).resumable
+    other = journal.PackJournal(tmp_path, "Pkg", {**IDENTITY, "tree_digest": "def"})
+    assert not other.resumable
+    other.complete_stage("par2", [])
+    assert not journal.PackJournal(tmp_path, "Pkg", IDENTITY).resumable
+
+
+def test_completed_stage_requires_untouched_outputs(tmp_path):
+    archive = _file(tmp_path / "Pkg.tar")
+    checkpoints = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    checkpoints.complete_stage("archive", [archive])
+    reloaded = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    assert reloaded.completed("archive") == [archive.resolve()]
+    assert reloaded.completed("par2") is None
+    archive.write_bytes(b"changed!")
+    assert reloaded.completed("archive") is None
+
+
+def test_torn_last_line_is_dropped(tmp_path, archive_fd):
+    checkpoints = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    checkpoints.member_written(journal.TarCheckpoint(1, 512, "", 0), None, archive_fd)
+    checkpoints.checkpoint(archive_fd)
+    with checkpoints.path.open("a") as fh:
+        fh.write('{"stage": "arch')
+    reloaded = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    assert reloaded.tar == journal.TarCheckpoint(1, 512, "", 0)
+    reloaded.complete_stage("archive", [_file(tmp_path / "Pkg.tar")])
+    assert journal.PackJournal(tmp_path, "Pkg", IDENTITY).completed("archive") is not None
+
+
+def test_checkpoint_records_manifest_rows(tmp_path, archive_fd):
+    checkpoints = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    entry = ManifestEntry("Pkg/a", 3, 0, hashlib.sha256(b"abc").hexdigest())
+    checkpoints.member_written(journal.TarCheckpoint(2, 1536, "a", 512), entry, archive_fd)
+    assert journal.PackJournal(tmp_path, "Pkg", IDENTITY).tar is None  # not due yet
+    checkpoints.checkpoint(archive_fd)
+    reloaded = journal.PackJournal(tmp_path, "Pkg", IDENTITY)
+    assert reloaded.entries == [entry]
+    reloaded.discard()
+    assert not checkpoints.path.exists()
+
+
+def _file(path):
+    path.write_bytes(b"archive")
+    return path
+
+
+@pytest.fixture()
+def archive_fd(tmp_path):
+    with (tmp_path / "Pkg.tar").open("ab") as fh:
+        yield fh.fileno()
+
+
+def test_restart_ignores_checkpoints(tmp_path):
+    journal.PackJournal(tmp_path, "Pkg", IDENTITY).complete_stage(
+        "archive", [_file(tmp_path / "Pkg.tar")]
+    )
+    assert not journal.PackJournal(tmp_path, "Pkg", IDENTITY, restart=True).resumable
@@ -0,0 +1,176 @@
+"""Tests for lam.pack.loose (loose-file packages with batched PAR2 sets)."""
+
+import hashlib
+import os
+import re
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from lam.pack import loose, manifest, packager, par2
+from lam.pack.scan import scan
+
+
+@pytest.fixture()
+def source(tmp_path):
+    root = tmp_path / "src" / "Fotos_2025"
+    (root / "Urlaub").mkdir(parents=True)
+    (root / "cover.jpg").write_bytes(b"\xff\xd8" + b"c" * 3000)
+    for i in range(5):
+        (root / "Urlaub" / f"IMG_{i}.jpg").write_bytes(bytes([i]) * (100 + i))
+    (root / "Urlaub" / "clip.mp4").write_bytes(b"v" * 100_000)
+    os.symlink("cover.jpg", root / "latest.jpg")
+    os.chmod(root / "cover.jpg", 0o640)
+    return root
+
+
+def test_plan_groups_by_directory_and_size(source):
+    batches = loose.plan_sets(scan(source), "Fotos_2025")
+    by_stem = {b.stem: b for b in batches}
+    assert set(by_stem) == {"Fotos_2025", "Urlaub.01", "Urlaub.02"}
+    assert by_stem["Fotos_2025"].files == ("cover.jpg",)
+    # The 100 kB clip is more than SIZE_RATIO times the photos: a set of its own.
+    assert by_stem["Urlaub.01"].files == tuple(f"Urlaub/IMG_{i}.jpg" for i in range(5))
+    assert by_stem["Urlaub.02"].files == ("Urlaub/clip.mp4",)
+    assert by_stem["Urlaub.02"].directory == "Urlaub"
+    assert sum(b.size for b in batches) == scan(source).total_size
+
+
+def test_plan_bounds_files_and_size(source):
+    table = scan(source)
+    batches = loose.plan_sets(table, "Fotos_2025", max_files=2, size_ratio=10**9)
+    urlaub = [b for b in batches if b.directory == "Urlaub"]
+    assert [len(b.files) for b in urlaub] == [2, 2, 2]
+    batches = loose.plan_sets(table, "Fotos_2025", max_size=250, size_ratio=10**9)
+    assert all(b.size <= 250 or len(b.files) == 1 for b in batches)
+
+
+def test_plan_refuses_to_overwrite_source_par2(source):
+    (source / "Fotos_2025.par2").write_bytes(b"x" * 3000)
+    with pytest.raises(loose.LooseError, match="overwrite"):
+        loose.plan_sets(scan(source), "Fotos_2025")
+
+
+@pytest.mark.parametrize(
+    "name", ["Urlaub.02.vol00+01.par2", "Urlaub.01.par2", "Urlaub.01.VOL03+04.par2"]
+)
+def test_plan_refuses_to_overwrite_source_par2_volumes(source, name):
+    (source / "Urlaub" / name).write_bytes(b"x" * 120)
+    with pytest.raises(loose.LooseError, match=re.escape(f"overwrite the source file {name}")):
+        loose.plan_sets(scan(source), "Fotos_2025")
+
+
+def test_copy_tree_keeps_content_and_metadata(source, tmp_path):
+    target = tmp_path / "out" / "Fotos_2025"
+    entries = loose.copy_tree(scan(source), target, "Fotos_2025")
+    assert (target / "Urlaub" / "clip.mp4").read_bytes() == b"v" * 100_000
+    assert os.readlink(target / "latest.jpg") == "cover.jpg"
+    original = (source / "cover.jpg").stat()
+    copied = (target / "cover.jpg").stat()
+    assert copied.st_mode == original.st_mode and copied.st_mtime_ns == original.st_mtime_ns
+    rows = {e.path: e for e in entries}
+    assert rows["Fotos_2025/Urlaub/clip.mp4"].sha256 == hashlib.sha256(b"v" * 100_000).hexdigest()
+    assert len(rows) == 7
+    assert not list((tmp_path / "out").glob(".*lam-partial"))
+
+
+def test_copy_tree_replaces_previous_copy(source, tmp_path):
+    target = tmp_path / "out" / "Fotos_2025"
+    loose.copy_tree(scan(source), target, "Fotos_2025")
+    (target / "stale.txt").write_text("old")
+    (source / "cover.jpg").unlink()
+    loose.copy_tree(scan(source), target, "Fotos_2025")
+    assert not (target / "stale.txt").exists()
+    assert not (target / "cover.jpg").exists()
+
+
+def test_copy_tree_refuses_overlapping_output(source):
+    with pytest.raises(loose.LooseError, match="overlaps"):
+        loose.copy_tree(scan(source), source / "copy", "Fotos_2025")
+
+
+def test_packager_loose_format_writes_manifest(source, tmp_path):
+    package = packager.create_archive(source, tmp_path / "out", fmt="loose")
+    assert package == tmp_path / "out" / "Fotos_2025" and package.is_dir()
+    rows = manifest.read(manifest.manifest_path(package))
+    assert {r.path for r in rows} >= {"Fotos_2025/cover.jpg", "Fotos_2025/Urlaub/clip.mp4"}
+
+
+def test_dotted_package_names_keep_their_manifests_apart(source, tmp_path):
+    manifests = []
+    for year in ("2024", "2025"):
+        dotted = source.rename(source.parent / f"Reise.{year}")
+        package = packager.create_archive(dotted, tmp_path / "out", fmt="loose")
+        manifests.append(manifest.manifest_path(package))
+        source = dotted
+    assert [m.name for m in manifests] == ["Reise.2024.manifest.csv", "Reise.2025.manifest.csv"]
+    assert manifest.read(manifests[0])[0].path.startswith("Reise.2024/")
+
+
+def test_protect_runs_sets_in_parallel_with_par2cmdline(source, tmp_path, monkeypatch):
+    package = packager.create_archive(source, tmp_path / "out", fmt="loose")
+    batches = loose.plan_sets(scan(source), "Fotos_2025")
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        base = cmd[next(i for i, arg in enumerate(cmd) if arg.startswith("-B")) + 1]
+        Path(f"{base}.par2").write_bytes(b"index")
+        Path(f"{base}.vol0+1.par2").write_bytes(b"volume")
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(par2.shutil, "which", lambda name: "/usr/bin/par2")
+    monkeypatch.setattr(par2.subprocess, "run", fake_run)
+    files = loose.protect(package, batches, 10, workers=3)
+    assert len(calls) == 3
+    clip_call = next(c for c in calls if str(package / "Urlaub" / "clip.mp4") in c)
+    assert f"-B{package / 'Urlaub'}" in clip_call
+    assert clip_call[-2] == str(package / "Urlaub" / "Urlaub.02")
+    assert package / "Urlaub" / "Urlaub.02.par2" in files
+    assert package / "Urlaub" / "Urlaub.01.vol0+1.par2" in files
+    assert len(files) == 6
+
+
+def test_protect_tunes_sets_per_file(source, tmp_path, monkeypatch):
+    package = packager.create_archive(source, tmp_path / "out", fmt="loose")
+    batches = loose.plan_sets(scan(source), "Fotos_2025")
+    profiles = {}
+
+    def fake_create_set(base, files, redundancy, volumes, engine, profile):
+        profiles[base.name] = (profile, [f.stat().st_size for f in files])
+        return []
+
+    monkeypatch.setattr(loose.par2, "create_set", fake_create_set)
+    loose.protect(package, batches, 10)
+    profile, sizes = profiles["Urlaub.01"]
+    assert len(sizes) == 5
+    assert profile.block_count == sum(-(-size // profile.block_size) for size in sizes)
+
+
+def test_protect_reports_failed_sets(source, tmp_path, monkeypatch):
+    package = packager.create_archive(source, tmp_path / "out", fmt="loose")
+    batches = loose.plan_sets(scan(source), "Fotos_2025")
+    monkeypatch.setattr(par2.shutil, "which", lambda name: "/usr/bin/par2")
+    monkeypatch.setattr(
+        par2.subprocess, "run", lambda cmd, **kw: subprocess.CompletedProcess(cmd, 1, "", "boom")
+    )
+    with pytest.raises(par2.Par2Error, match="and 2 more"):
+        loose.protect(package, batches, 10)
+
+
+def test_protect_native_sets_verify(source, tmp_path):
+    pytest.importorskip("numpy")
+    package = packager.create_archive(source, tmp_path / "out", fmt="loose")
+    batches = loose.plan_sets(scan(source), "Fotos_2025")
+    files = loose.protect(package, batches, 20, engine="native", workers=2)
+    indexes = [f for f in files if not f.name.split(".")[-2].startswith("vol")]
+    assert sorted(p.name for p in indexes) == [
+        "Fotos_2025.par2",
+        "Urlaub.01.par2",
+        "Urlaub.02.par2",
+    ]
+    for index in indexes:
+        assert par2.verify(index, "native").status == "ok"
+    (package / "Urlaub" / "IMG_3.jpg").write_bytes(b"\0" * 103)
+    assert par2.verify(package / "Urlaub" / "Urlaub.01.par2", "native").status == "repairable"
@@ -0,0 +1,79 @@
+"""Tests for lam.pack.metrics (per-stage run metrics)."""
+
+import json
+import time
+
+import pytest
+
+from lam.pack.metrics import PipelineMetrics
+
+
+def test_stages_record_time_cpu_and_bytes():
+    run = PipelineMetrics()
+    with run.stage("scan"):
+        pass
+    with run.stage("archive") as stage:
+        time.sleep(0.02)
+        sum(range(200_000))  # some CPU
+        stage.add(read=1000, written=1500)
+    scan, archive = run.stages
+    assert scan.name == "scan" and scan.status == "ok"
+    assert archive.wall_seconds >= 0.02
+    assert archive.cpu_seconds >= 0
+    assert (archive.bytes_read, archive.bytes_written) == (1000, 1500)
+    assert archive.throughput == pytest.approx(1500 / archive.wall_seconds)
+    assert archive.peak_rss >= 0
+
+
+def test_failed_stage_is_recorded():
+    run = PipelineMetrics()
+    with pytest.raises(ValueError):
+        with run.stage("par2"):
+            raise ValueError("boom")
+    assert run.stages[0].status == "error"
+    assert run.totals().status == "error"
+
+
+def test_stages_cannot_nest():
+    run = PipelineMetrics()
+    with run.stage("archive"):
+        with pytest.raises(RuntimeError, match="inside"):
+            with run.stage("par2"):
+                pass
+
+
+def test_callbacks_and_live_snapshot():
+    events = []
+    run = PipelineMetrics(on_stage=lambda event, stage: events.append((event, stage.name)))
+    assert run.live() is None
+    with run.stage("archive") as stage:
+        stage.add(read=10)
+        live = run.live()
+        assert live.name == "archive" and live.status == "running"
+        assert live.bytes_read == 10
+    assert events == [("start", "archive"), ("end", "archive")]
+    assert run.live() is None
+
+
+def test_write_json(tmp_path):
+    run = PipelineMetrics()
+    with run.stage("scan") as stage:
+        stage.add(read=5)
+    with run.stage("archive") as stage:
+        stage.add(read=7, written=9)
+    path = tmp_path / "metrics.json"
+    run.write_json(path, source="/data/Familie_2025", outcome="packed")
+    data = json.loads(path.read_text())
+    assert data["source"] == "/data/Familie_2025"
+    assert data["outcome"] == "packed"
+    assert [s["name"] for s in data["stages"]] == ["scan", "archive"]
+    assert data["total"]["bytes_read"] == 12 and data["total"]["bytes_written"] == 9
+    assert data["total"]["wall_seconds"] >= sum(s["wall_seconds"] for s in data["stages"])
+    assert set(data["stages"][0]) >= {
+        "wall_seconds",
+        "cpu_seconds",
+        "throughput",
+        "disk_read",
+        "disk_written",
+        "peak_rss",
+    }
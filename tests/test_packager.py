@@ -62,13 +62,22 @@ def test_unknown_format_raises(source_dir, tmp_path):
         create_archive(source_dir, tmp_path, fmt="zip")  # type: ignore[arg-type]
 
 
-def test_iso_missing_tool(source_dir, tmp_path, monkeypatch):
-    """When hdiutil is absent, PackagerError is raised."""
+def test_iso_without_hdiutil_uses_builtin_writer(source_dir, tmp_path, monkeypatch):
+    """When hdiutil is absent, the built-in ISO 9660 writer is used."""
     import shutil
 
+    from lam.pack import manifest
+
     monkeypatch.setattr(shutil, "which", lambda _: None)
-    with pytest.raises(PackagerError, match="hdiutil"):
-        create_archive(source_dir, tmp_path, fmt="iso")
+    archive = create_archive(source_dir, tmp_path, fmt="iso")
+    assert archive == tmp_path / "Familie_2025.iso"
+    assert archive.read_bytes()[16 * 2048 + 1 : 16 * 2048 + 6] == b"CD001"
+    entries = {e.path for e in manifest.read(manifest.manifest_path(archive))}
+    assert entries == {
+        "Familie_2025/photo.jpg",
+        "Familie_2025/sub/doc.txt",
+        "Familie_2025/video.mp4",
+    }
 
 
 def test_dmg_missing_tool(source_dir, tmp_path, monkeypatch):
@@ -78,3 +87,76 @@ def test_dmg_missing_tool(source_dir, tmp_path, monkeypatch):
     monkeypatch.setattr(shutil, "which", lambda _: None)
     with pytest.raises(PackagerError, match="hdiutil"):
         create_archive(source_dir, tmp_path, fmt="dmg")
+
+
+def test_tar_writes_sha256_manifest(source_dir, tmp_path):
+    import hashlib
+
+    from lam.pack import manifest
+
+    output_dir = tmp_path / "output"
+    archive = create_archive(source_dir, output_dir, fmt="tar")
+
+    manifest_file = manifest.manifest_path(archive)
+    assert manifest_file == output_dir / "Familie_2025.manifest.csv"
+    entries = {e.path: e for e in manifest.read(manifest_file)}
+    assert set(entries) == {
+        "Familie_2025/photo.jpg",
+        "Familie_2025/sub/doc.txt",
+        "Familie_2025/video.mp4",
+    }
+    doc = entries["Familie_2025/sub/doc.txt"]
+    assert doc.size == len("archival document")
+    assert doc.sha256 == hashlib.sha256(b"archival document").hexdigest()
+    assert doc.mtime == int((source_dir / "sub" / "doc.txt").stat().st_mtime)
+
+
+def test_tar_member_order_is_sorted(source_dir, tmp_path):
+    archive = create_archive(source_dir, tmp_path / "output", fmt="tar")
+    with tarfile.open(archive, "r:") as tf:
+        names = tf.getnames()
+    assert names == [
+        "Familie_2025",
+        "Familie_2025/photo.jpg",
+        "Familie_2025/sub",
+        "Familie_2025/sub/doc.txt",
+        "Familie_2025/video.mp4",
+    ]
+
+
+def test_tar_matches_tarfile_output_byte_for_byte(source_dir, tmp_path):
+    import os
+
+    from lam.pack import packager
+    from lam.pack.scan import scan
+
+    (source_dir / "big.bin").write_bytes(bytes(range(256)) * 4099)  # above SMALL_FILE
+    os.symlink("sub/doc.txt", source_dir / "doc-link")
+    table = scan(source_dir)
+    archive = create_archive(source_dir, tmp_path / "output", fmt="tar", table=table)
+
+    reference = tmp_path / "reference.tar"
+    with tarfile.open(reference, "w:") as tf:
+        for record in table:
+            arcname = f"Familie_2025/{record.path}" if record.path else "Familie_2025"
+            info = packager._tarinfo(record, arcname, table.root)
+            if info.isreg():
+                with (table.root / record.path).open("rb") as f:
+                    tf.addfile(info, f)
+            else:
+                tf.addfile(info)
+    assert archive.read_bytes() == reference.read_bytes()
+
+
+@pytest.mark.parametrize("fmt", ["tar", "loose"])
+def test_manifest_keeps_non_utf8_names(source_dir, tmp_path, fmt):
+    import os
+
+    from lam.pack import manifest
+
+    name = os.fsdecode(b"caf\xe9.txt")  # Latin-1 name from an old volume
+    (source_dir / name).write_bytes(b"latin-1")
+    archive = create_archive(source_dir, tmp_path / "output", fmt=fmt)
+
+    paths = {e.path for e in manifest.read(manifest.manifest_path(archive))}
+    assert f"Familie_2025/{name}" in paths
@@ -0,0 +1,78 @@
+"""Tests for lam.pack.par2 (par2cmdline invocation)."""
+
+import shutil
+import subprocess
+
+import pytest
+
+from lam.pack import par2
+from lam.pack.par2_tuning import Par2Profile
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    path = tmp_path / "Familie_2025.tar"
+    path.write_bytes(b"\x00" * 4096)
+    return path
+
+
+@pytest.fixture()
+def recorded(monkeypatch):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    return calls
+
+
+def test_profile_flags_are_passed(archive, recorded):
+    profile = Par2Profile(block_size=2048, block_count=2, threads=6, memory_mb=512)
+    par2.create(archive, 15, 2, profile=profile)
+    (cmd,) = recorded
+    assert cmd[:4] == ["/usr/bin/par2", "create", "-r15", "-n2"]
+    assert {"-s2048", "-t6", "-m512"} <= set(cmd)
+    assert cmd[-1] == str(archive)
+
+
+def test_profile_is_auto_tuned(archive, recorded):
+    par2.create(archive, 10)
+    (cmd,) = recorded
+    assert any(arg.startswith("-s") for arg in cmd)
+    assert any(arg.startswith("-t") for arg in cmd)
+
+
+def test_missing_binary(archive, monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    with pytest.raises(par2.Par2Error, match="not found"):
+        par2.create(archive, 10)
+
+
+@pytest.mark.parametrize(
+    ("code", "status"), [(0, "ok"), (1, "repairable"), (2, "damaged")]
+)
+def test_verify_maps_exit_codes(archive, monkeypatch, code, status):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, code, "Loading.\nRepair is required.\n", "")
+
+    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    result = par2.verify(archive.with_suffix(".par2"))
+    assert result.status == status
+    assert result.detail == "Repair is required."
+    assert calls[0][:2] == ["/usr/bin/par2", "verify"]
+
+
+def test_verify_unexpected_exit_code_raises(archive, monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(
+        subprocess, "run", lambda cmd, **kw: subprocess.CompletedProcess(cmd, 3, "", "boom")
+    )
+    with pytest.raises(par2.Par2Error, match="code 3"):
+        par2.verify(archive.with_suffix(".par2"))
@@ -0,0 +1,205 @@
+"""Tests for lam.pack.par2_native (in-process PAR2 2.0 engine)."""
+
+import hashlib
+import random
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from lam.pack import par2, par2_native  # noqa: E402
+from lam.pack.par2_native import (  # noqa: E402
+    TYPE_FILE_DESC,
+    TYPE_IFSC,
+    TYPE_MAIN,
+    TYPE_RECOVERY,
+    iter_packets,
+)
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    rng = random.Random(42)
+    path = tmp_path / "Familie_2025.tar"
+    path.write_bytes(bytes(rng.getrandbits(8) for _ in range(50_001)))
+    return path
+
+
+def _gf_mul(a, b):
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        b >>= 1
+        a <<= 1
+        if a & 0x10000:
+            a ^= 0x1100B
+    return result
+
+
+def _gf_pow(a, n):
+    result = 1
+    for _ in range(n):
+        result = _gf_mul(result, a)
+    return result
+
+
+def _packets(paths):
+    found = {}
+    for path in paths:
+        for _, ptype, body in iter_packets(path):
+            found.setdefault(ptype, []).append(body)
+    return found
+
+
+def _input_slices(data, slice_size):
+    return [
+        data[i : i + slice_size].ljust(slice_size, b"\0") for i in range(0, len(data), slice_size)
+    ]
+
+
+def test_creates_index_and_volume(archive):
+    files = par2_native.create(archive, 10, block_count=20, workers=1)
+    names = [p.name for p in files]
+    assert names[0] == "Familie_2025.par2"
+    assert len(files) == 2
+    assert names[1].startswith("Familie_2025.vol0+")
+
+
+def test_critical_packets(archive):
+    files = par2_native.create(archive, 10, block_count=20, workers=1)
+    packets = _packets(files[:1])
+    (main,) = packets[TYPE_MAIN]
+    slice_size, file_count = struct.unpack_from("<QI", main)
+    assert slice_size % 4 == 0
+    assert file_count == 1
+
+    (desc,) = packets[TYPE_FILE_DESC]
+    data = archive.read_bytes()
+    assert desc[16:32] == hashlib.md5(data).digest()
+    assert struct.unpack_from("<Q", desc, 48)[0] == len(data)
+    assert desc[56:].rstrip(b"\0") == b"Familie_2025.tar"
+
+    (ifsc,) = packets[TYPE_IFSC]
+    slices = _input_slices(data, slice_size)
+    assert len(ifsc) == 16 + 20 * len(slices)
+    assert ifsc[16:32] == hashlib.md5(slices[0]).digest()
+
+
+def test_recovery_slices_match_reference(archive):
+    files = par2_native.create(archive, 40, block_count=8, workers=1)
+    packets = _packets(files)
+    slice_size = struct.unpack_from("<Q", packets[TYPE_MAIN][0])[0]
+    slices = _input_slices(archive.read_bytes(), slice_size)
+    recovery = {struct.unpack_from("<I", body)[0]: body[4:] for body in packets[TYPE_RECOVERY]}
+    assert sorted(recovery) == list(range(len(recovery)))
+
+    # Exponent 0: every coefficient is 1, so recovery is the XOR of all slices.
+    xor = bytearray(slice_size)
+    for s in slices:
+        for i, b in enumerate(s):
+            xor[i] ^= b
+    assert recovery[0] == bytes(xor)
+
+    # Exponent 1 and 2, first few words, against a straightforward GF(2^16) evaluation.
+    logs = par2_native._input_logs(len(slices))
+    for exponent in (1, 2):
+        for word in range(8):
+            expected = 0
+            for log, s in zip(logs, slices):
+                coeff = _gf_pow(_gf_pow(2, log), exponent)
+                expected ^= _gf_mul(coeff, struct.unpack_from("<H", s, word * 2)[0])
+            assert struct.unpack_from("<H", recovery[exponent], word * 2)[0] == expected
+
+
+def test_process_pool_output_is_identical(archive, tmp_path):
+    serial = [p.read_bytes() for p in par2_native.create(archive, 15, block_count=10, workers=1)]
+    for p in archive.parent.glob("*.par2"):
+        p.unlink()
+    pooled = par2_native.create(archive, 15, block_count=10, workers=3, memory_mb=1)
+    assert [p.read_bytes() for p in pooled] == serial
+
+
+def test_volumes_split_recovery_slices(archive):
+    files = par2_native.create(archive, 50, 3, block_count=12, workers=1)
+    volumes = files[1:]
+    assert len(volumes) == 3
+    counts = [len(_packets([v])[TYPE_RECOVERY]) for v in volumes]
+    assert sum(counts) == 6
+    assert max(counts) - min(counts) <= 1
+
+
+def test_progress_reports_completion(archive):
+    calls = []
+    par2_native.create(
+        archive, 10, block_count=20, workers=1, progress=lambda d, t: calls.append((d, t))
+    )
+    assert calls
+    assert calls[-1][0] == calls[-1][1]
+
+
+def test_par2_create_dispatches_to_native_engine(archive):
+    files = par2.create(archive, 10, engine="native")
+    assert (archive.parent / "Familie_2025.par2") in files
+
+
+def test_unknown_engine_raises(archive):
+    with pytest.raises(par2.Par2Error, match="Unknown PAR2 engine"):
+        par2.create(archive, 10, engine="quantum")  # type: ignore[arg-type]
+
+
+@pytest.mark.skipif(shutil.which("par2") is None, reason="par2cmdline not installed")
+def test_par2cmdline_verifies_and_repairs_native_output(archive):
+    files = par2_native.create(archive, 10, block_count=50, workers=2)
+    result = subprocess.run(["par2", "verify", str(files[0])], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    original = archive.read_bytes()
+    damaged = bytearray(original)
+    damaged[1000:1400] = b"\xaa" * 400
+    archive.write_bytes(bytes(damaged))
+    result = subprocess.run(["par2", "repair", str(files[0])], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert archive.read_bytes() == original
+
+
+def test_verify_intact_set(archive):
+    files = par2_native.create(archive, 10, block_count=20, workers=1)
+    result = par2_native.verify(files[0], chunk_size=4096)
+    assert result.ok
+    assert result.total_slices == 20
+    assert result.recovery_slices == 2
+
+
+def test_verify_detects_repairable_damage(archive):
+    files = par2_native.create(archive, 20, block_count=20, workers=1)
+    damaged = bytearray(archive.read_bytes())
+    damaged[1000:1100] = b"\xaa" * 100
+    archive.write_bytes(bytes(damaged))
+    result = par2_native.verify(files[0])
+    assert not result.ok
+    assert result.repairable
+    assert result.damaged_slices == 1
+    assert result.damaged_files == ("Familie_2025.tar",)
+    assert par2.verify(files[0], engine="native").status == "repairable"
+
+
+def test_verify_missing_file_is_damaged(archive):
+    files = par2_native.create(archive, 10, block_count=20, workers=1)
+    archive.unlink()
+    result = par2_native.verify(files[0])
+    assert result.missing_files == ("Familie_2025.tar",)
+    assert not result.repairable
+    assert par2.verify(files[0], engine="native").status == "damaged"
+
+
+def test_read_set_counts_recovery_slices_in_volumes(archive):
+    files = par2_native.create(archive, 50, 3, block_count=12, workers=1)
+    par2_set = par2_native.read_set(files[0])
+    assert par2_set.recovery_slices == 6
+    assert par2_set.total_size == archive.stat().st_size
+    files[1].unlink()
+    assert par2_native.read_set(files[0]).recovery_slices == 4
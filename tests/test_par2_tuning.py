@@ -0,0 +1,82 @@
+"""Tests for lam.pack.par2_tuning."""
+
+import time
+
+from lam.pack.par2_tuning import MAX_BLOCK_COUNT, Par2Profile, calibrate, candidates, tune
+
+GB = 1024**3
+
+
+def test_large_archive_profile():
+    profile = tune(25 * GB, 15, cpu_count=8, available_memory=32 * GB)
+    assert profile.block_size % 2048 == 0
+    assert profile.block_count <= MAX_BLOCK_COUNT
+    assert profile.block_count * profile.block_size >= 25 * GB
+    assert profile.threads == 8
+    # All recovery blocks fit into the budget -> single pass over the archive.
+    recovery_mb = 0.15 * 25 * 1024
+    assert profile.memory_mb >= recovery_mb
+
+
+def test_memory_is_capped_by_available_ram():
+    profile = tune(100 * GB, 15, cpu_count=4, available_memory=8 * GB)
+    assert profile.memory_mb == 4 * 1024
+
+
+def test_small_archive_uses_small_blocks():
+    profile = tune(10_000, 15, cpu_count=2, available_memory=GB)
+    assert profile.block_size % 4 == 0
+    assert profile.block_size < 2048
+    assert profile.memory_mb >= 64
+
+
+def test_preferred_block_size_respects_slice_limit():
+    assert tune(GB, block_size=1024 * 1024, cpu_count=1, available_memory=GB).block_size == (
+        1024 * 1024
+    )
+    profile = tune(100 * GB, block_size=4096, cpu_count=1, available_memory=GB)
+    assert profile.block_count <= MAX_BLOCK_COUNT
+
+
+def test_calibrated_block_count_scales_with_the_archive():
+    # What `lam par2 calibrate` stores is the sample's block count (~3856 here).
+    sample = tune(128 * 1024 * 1024, block_count=4000, cpu_count=1, available_memory=GB)
+    archive = tune(25 * GB, block_count=sample.block_count, cpu_count=1, available_memory=GB)
+    assert abs(archive.block_count - sample.block_count) <= 1
+    assert archive.block_size > 100 * sample.block_size
+
+
+def test_per_file_rounding_respects_slice_limit():
+    # A loose set of 1000 files: each file is rounded up to whole blocks.
+    sizes = [4 * GB // 1000 + 7 * i for i in range(1000)]
+    whole = tune(sum(sizes), block_count=MAX_BLOCK_COUNT, cpu_count=1, available_memory=GB)
+    assert sum(-(-size // whole.block_size) for size in sizes) > MAX_BLOCK_COUNT
+    profile = tune(
+        sum(sizes), block_count=MAX_BLOCK_COUNT, cpu_count=1, available_memory=GB, file_sizes=sizes
+    )
+    assert profile.block_count == sum(-(-size // profile.block_size) for size in sizes)
+    assert profile.block_count <= MAX_BLOCK_COUNT
+    assert profile.block_size % 2048 == 0
+
+
+def test_candidates_are_unique():
+    profiles = candidates(128 * 1024 * 1024)
+    assert len(profiles) == len(set(profiles))
+    assert len({p.block_size for p in profiles}) == 3
+
+
+def test_calibrate_sorts_fastest_first(tmp_path):
+    sample = tmp_path / "sample.bin"
+    sample.write_bytes(b"x" * 1024)
+    (tmp_path / "sample.par2").write_bytes(b"stale")
+    slow = Par2Profile(block_size=4, block_count=256, threads=1, memory_mb=64)
+    fast = Par2Profile(block_size=8, block_count=128, threads=2, memory_mb=64)
+    seen = []
+
+    def run(path, profile):
+        seen.append((profile, (tmp_path / "sample.par2").exists()))
+        time.sleep(0.02 if profile is slow else 0)
+
+    results = calibrate(sample, run, [slow, fast])
+    assert [p for p, _ in results] == [fast, slow]
+    assert all(not stale for _, stale in seen)
@@ -0,0 +1,81 @@
+"""Tests for lam.pack.payload (zero-copy payload transfers)."""
+
+import errno
+import hashlib
+import os
+
+import pytest
+
+from lam.pack import payload
+from lam.pack.payload import PayloadCopier
+
+DATA = bytes(range(256)) * 4096  # 1 MiB, above SMALL_FILE
+
+
+@pytest.fixture()
+def source(tmp_path):
+    path = tmp_path / "source.bin"
+    path.write_bytes(DATA)
+    return path
+
+
+def _copy(tmp_path, source, methods, size=len(DATA), chunk_size=300_000):
+    target = tmp_path / "target.bin"
+    digest = hashlib.sha256()
+    with target.open("wb", buffering=0) as out:
+        copier = PayloadCopier(out.fileno(), chunk_size, methods)
+        copier.copy_file(source, size, digest, header=b"HEAD", padding=3)
+    return target.read_bytes(), digest.hexdigest(), copier
+
+
+@pytest.mark.parametrize("method", payload.METHODS)
+def test_methods_produce_identical_output(source, tmp_path, method):
+    data, digest, copier = _copy(tmp_path, source, [method])
+    assert data == b"HEAD" + DATA + b"\0\0\0"
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert copier.stats[method] == len(DATA)
+
+
+def test_partial_copy_hashes_only_copied_bytes(source, tmp_path):
+    data, digest, _ = _copy(tmp_path, source, None, size=len(DATA) - 1000)
+    assert data == b"HEAD" + DATA[:-1000] + b"\0\0\0"
+    assert digest == hashlib.sha256(DATA[:-1000]).hexdigest()
+
+
+@pytest.mark.skipif(not hasattr(os, "copy_file_range"), reason="no copy_file_range")
+def test_unsupported_method_falls_back(source, tmp_path, monkeypatch):
+    def refuse(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(os, "copy_file_range", refuse)
+    data, digest, copier = _copy(tmp_path, source, ["copy_file_range", "read"])
+    assert data == b"HEAD" + DATA + b"\0\0\0"
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert copier.method == "read" and copier.stats["read"] == len(DATA)
+
+
+@pytest.mark.skipif(not hasattr(os, "copy_file_range"), reason="no copy_file_range")
+def test_other_errors_are_not_swallowed(source, tmp_path, monkeypatch):
+    def fail(*args):
+        raise OSError(errno.EIO, "I/O error")
+
+    monkeypatch.setattr(os, "copy_file_range", fail)
+    with pytest.raises(OSError, match="I/O error"):
+        _copy(tmp_path, source, ["copy_file_range", "read"])
+
+
+@pytest.mark.parametrize("method", payload.METHODS)
+def test_short_file_is_an_error(source, tmp_path, method):
+    with pytest.raises(OSError, match="shorter than"):
+        _copy(tmp_path, source, [method], size=len(DATA) + 10)
+
+
+def test_small_files_are_written_in_one_block(tmp_path):
+    source = tmp_path / "small.txt"
+    source.write_bytes(b"tiny")
+    data, digest, copier = _copy(tmp_path, source, None, size=4)
+    assert data == b"HEADtiny\0\0\0"
+    assert digest == hashlib.sha256(b"tiny").hexdigest()
+    assert copier.stats == {"small": 4}
+    with pytest.raises(OSError, match="shorter than"):
+        _copy(tmp_path, source, None, size=5)
@@ -0,0 +1,88 @@
+"""Tests for lam.pack.planner (disc bin-packing)."""
+
+import os
+import shutil
+
+import pytest
+
+from lam.pack import packager, planner
+from lam.pack.planner import Package, PlanError, plan
+
+
+def _packages(*sizes):
+    return [Package(f"p{i}", 1, size, size, 0) for i, size in enumerate(sizes)]
+
+
+@pytest.fixture()
+def ingest(tmp_path):
+    root = tmp_path / "Fotos_2025"
+    for name, size in (("Januar", 3000), ("Februar", 70_000), ("Maerz", 1)):
+        d = root / name
+        d.mkdir(parents=True)
+        (d / "bild.jpg").write_bytes(b"\xff" * size)
+        (d / ("sehr_langer_name_" * 8 + ".jpg")).write_bytes(b"x" * 10)
+    (root / ".DS_Store").write_bytes(b"x")
+    return root
+
+
+def test_tar_estimate_matches_real_archive(ingest, tmp_path):
+    packages = {p.name: p for p in planner.estimate_packages(ingest, "tar", 0)}
+    assert set(packages) == {"Januar", "Februar", "Maerz"}
+    for name, package in packages.items():
+        archive = packager.create_archive(ingest / name, tmp_path / "out", fmt="tar")
+        assert package.container_size == archive.stat().st_size
+        assert package.file_count == 2
+
+
+@pytest.mark.skipif(shutil.which("hdiutil") is not None, reason="hdiutil writes the ISO")
+def test_iso_estimate_matches_real_image(ingest, tmp_path):
+    # Many directories: each costs an ISO and a Joliet directory plus path table records.
+    nested = ingest / "Maerz"
+    for i in range(40):
+        (nested / f"Ordner mit langem Namen {i:02d}" / "Unterordner").mkdir(parents=True)
+        (nested / f"Ordner mit langem Namen {i:02d}" / "Unterordner" / "a.jpg").write_bytes(b"a")
+    os.symlink("./" * 150 + "bild.jpg", nested / ("verweis_" * 30))  # Rock Ridge CE area
+    packages = {p.name: p for p in planner.estimate_packages(ingest, "iso", 0)}
+    for name, package in packages.items():
+        image = packager.create_archive(ingest / name, tmp_path / "out", fmt="iso")
+        assert package.container_size == image.stat().st_size
+
+
+def test_par2_overhead_is_included(ingest):
+    without = {p.name: p for p in planner.estimate_packages(ingest, "tar", 0)}
+    with_par2 = {p.name: p for p in planner.estimate_packages(ingest, "tar", 15)}
+    for name in without:
+        extra = with_par2[name].size - without[name].size
+        assert extra >= 0.15 * without[name].container_size
+
+
+def test_first_fit_decreasing():
+    result = plan(_packages(6, 5, 4, 3, 2), 10, refine=False)
+    assert [[p.size for p in d.packages] for d in result.discs] == [[6, 4], [5, 3, 2]]
+    assert [d.fill_ratio for d in result.discs] == [1.0, 1.0]
+    assert result.lower_bound == 2
+
+
+def test_refinement_beats_ffd():
+    # FFD needs 4 discs here, 3 suffice.
+    packages = _packages(11, 39, 39, 58, 54, 35, 38, 21)
+    assert len(plan(packages, 100, refine=False).discs) == 4
+    result = plan(packages, 100)
+    assert result.refined
+    assert len(result.discs) == 3
+    assert all(d.used <= 100 for d in result.discs)
+    assert sorted(p.name for d in result.discs for p in d.packages) == sorted(
+        p.name for p in packages
+    )
+
+
+def test_oversized_package_raises():
+    with pytest.raises(PlanError, match="larger than one disc"):
+        plan(_packages(5, 11), 10)
+
+
+def test_many_packages():
+    sizes = [(i * 7919) % 5000 + 1 for i in range(20_000)]
+    result = plan(_packages(*sizes), 25_000)
+    assert sum(len(d.packages) for d in result.discs) == 20_000
+    assert len(result.discs) <= result.lower_bound + 1
@@ -0,0 +1,112 @@
+"""Tests for lam.pack.prefetch (physically ordered read-ahead for the TAR writer)."""
+
+import threading
+import time
+
+import pytest
+
+from lam.pack import packager, prefetch
+from lam.pack.manifest import manifest_path
+from lam.pack.scan import scan
+
+pytestmark = pytest.mark.skipif(
+    not prefetch._HAS_FADVISE, reason="posix_fadvise is not available"
+)
+
+
+@pytest.fixture()
+def advice(monkeypatch):
+    """Record (file name, hint) of every call to the kernel instead of making it."""
+    calls = []
+    lock = threading.Lock()
+
+    def record(path, hint, length=0):
+        with lock:
+            calls.append((path.name, hint))
+
+    monkeypatch.setattr(prefetch, "_advise", record)
+    return calls
+
+
+def _files(tmp_path, sizes):
+    return [
+        prefetch.SourceFile(tmp_path / f"{i:02}.bin", size, inode=1000 - i)
+        for i, size in enumerate(sizes)
+    ]
+
+
+def _reverse_inode(file):
+    return (1, file.inode)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_batches_are_announced_in_physical_order(tmp_path, advice):
+    files = _files(tmp_path, [100] * 8)
+    with prefetch.ReadScheduler(files, window_files=4, key=_reverse_inode) as scheduler:
+        _wait_for(lambda: scheduler.prefetched == 4)
+        time.sleep(0.05)
+        assert advice == [(f"{i:02}.bin", "willneed") for i in (3, 2, 1, 0)]
+        # Half the window consumed: the next batch is announced.
+        scheduler.consumed(0)
+        scheduler.consumed(1)
+        _wait_for(lambda: scheduler.prefetched == 6)
+    assert [name for name, hint in advice[4:] if hint == "willneed"] == ["05.bin", "04.bin"]
+    assert [name for name, hint in advice if hint == "dontneed"] == ["00.bin", "01.bin"]
+    assert scheduler.dropped == 2
+
+
+def test_window_is_bounded_in_bytes(tmp_path, advice):
+    files = _files(tmp_path, [400, 400, 400, 400])
+    with prefetch.ReadScheduler(files, window_bytes=1000) as scheduler:
+        _wait_for(lambda: scheduler.prefetched == 2)
+        time.sleep(0.05)
+        assert scheduler.prefetched == 2
+        for position in range(4):
+            scheduler.consumed(position)
+        time.sleep(0.05)
+    # Nothing is announced for files the writer already consumed.
+    assert sorted(name for name, hint in advice if hint == "willneed") == ["00.bin", "01.bin"]
+
+
+def test_start_skips_files_of_a_resumed_run(tmp_path, advice):
+    files = _files(tmp_path, [100] * 5)
+    scheduler = prefetch.ReadScheduler(files, key=_reverse_inode)
+    scheduler.start(3)
+    _wait_for(lambda: scheduler.prefetched == 2)
+    scheduler.close()
+    assert advice == [("04.bin", "willneed"), ("03.bin", "willneed")]
+
+
+def test_physical_key(tmp_path):
+    (tmp_path / "empty").write_bytes(b"")
+    (tmp_path / "data").write_bytes(b"x" * 10000)
+    empty = prefetch.SourceFile(tmp_path / "empty", 0, 42)
+    assert prefetch.physical_key(empty) == (1, 42)
+    kind, position = prefetch.physical_key(prefetch.SourceFile(tmp_path / "data", 10000, 43))
+    # An extent offset where FIEMAP works (ext4, XFS …), the inode on tmpfs and the like.
+    assert (kind, position) == (1, 43) or kind == 0
+
+
+def test_physical_read_order_writes_the_same_archive(tmp_path, advice):
+    root = tmp_path / "src" / "Familie_2025"
+    for d in range(3):
+        (root / f"d{d}").mkdir(parents=True)
+        for i in range(5):
+            (root / f"d{d}" / f"f{i}.bin").write_bytes(bytes([d * 5 + i]) * (500 + 300 * i))
+    (root / "d2" / "copy.bin").write_bytes(b"\x00" * 500)  # duplicate of d0/f0.bin
+    table = scan(root)
+    links = {"d2/copy.bin": "d0/f0.bin"}
+    walk = packager.create_archive(root, tmp_path / "walk", "tar", table=table, links=links)
+    physical = packager.create_archive(
+        root, tmp_path / "physical", "tar", table=table, links=links, read_order="physical"
+    )
+    assert physical.read_bytes() == walk.read_bytes()
+    assert manifest_path(physical).read_text() == manifest_path(walk).read_text()
+    dropped = sorted(name for name, hint in advice if hint == "dontneed")
+    assert len(dropped) == 15 and "copy.bin" not in dropped
@@ -0,0 +1,31 @@
+"""Tests for lam.pack.readahead (large sequential reads)."""
+
+from lam.pack import readahead
+
+
+def test_read_chunks_returns_whole_file(tmp_path):
+    path = tmp_path / "data.bin"
+    data = bytes(range(256)) * 41
+    path.write_bytes(data)
+    sizes = []
+    collected = bytearray()
+    for block in readahead.read_chunks(path, 4096):
+        sizes.append(len(block))
+        collected += block
+    assert bytes(collected) == data
+    assert sizes == [4096, 4096, len(data) - 8192]
+
+
+def test_read_chunks_exact_multiple_and_empty(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 8192)
+    assert [len(b) for b in readahead.read_chunks(path, 4096)] == [4096, 4096]
+    path.write_bytes(b"")
+    assert list(readahead.read_chunks(path, 4096)) == []
+
+
+def test_advise_ignores_unsupported_descriptors(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x")
+    with path.open("rb") as fh:
+        readahead.advise(fh.fileno(), 0, 0, "willneed")
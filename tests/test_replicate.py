@@ -0,0 +1,155 @@
+"""Tests for lam.pack.replicate (single-read fan-out of packages to several destinations)."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from lam.pack import packager, replicate
+from lam.pack.scan import scan
+
+
+@pytest.fixture()
+def package(tmp_path):
+    root = tmp_path / "src" / "Familie_2025"
+    (root / "Urlaub").mkdir(parents=True)
+    (root / "cover.jpg").write_bytes(b"c" * 3000)
+    (root / "Urlaub" / "clip.mp4").write_bytes(os.urandom(200_000))
+    archive = packager.create_archive(root, tmp_path / "staging", "tar", table=scan(root))
+    # Stand-ins for the PAR2 set.
+    (archive.parent / "Familie_2025.par2").write_bytes(b"PAR2 index")
+    (archive.parent / "Familie_2025.vol00+10.par2").write_bytes(os.urandom(5000))
+    (archive.parent / "Other.par2").write_bytes(b"not ours")
+    return archive
+
+
+def test_package_files_include_the_sidecars(package):
+    names = [f.name for f in replicate.package_files(package)]
+    assert names == [
+        "Familie_2025.tar",
+        "Familie_2025.manifest.csv",
+        "Familie_2025.index.csv",
+        "Familie_2025.par2",
+        "Familie_2025.vol00+10.par2",
+    ]
+
+
+def test_copies_are_written_and_verified(package, tmp_path, monkeypatch):
+    reads = []
+    original = open
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        if "r" in mode and str(file).startswith(str(package.parent)):
+            reads.append(os.path.basename(file))
+        return original(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    files = replicate.package_files(package)
+    destinations = [tmp_path / "bd-a", tmp_path / "bd-b", tmp_path / "hdd"]
+    reports = replicate.replicate(files, destinations, chunk_size=4096)
+    # Every source file is read once, however many destinations there are.
+    assert sorted(reads) == sorted(f.name for f in files)
+    for report in reports:
+        assert report.ok
+        assert (report.written, report.skipped, report.verified) == (5, 0, 5)
+        for file in files:
+            copy = report.destination / file.name
+            assert copy.read_bytes() == file.source.read_bytes()
+            assert copy.stat().st_mtime_ns == file.mtime_ns
+        assert not list(report.destination.glob(".*"))
+
+
+def test_rerun_skips_complete_copies(package, tmp_path):
+    files = replicate.package_files(package)
+    dest = tmp_path / "bd-a"
+    replicate.replicate(files, [dest])
+    (dest / "Familie_2025.par2").unlink()
+    (report,) = replicate.replicate(files, [dest])
+    assert (report.written, report.skipped, report.verified) == (1, 4, 1)
+    (report,) = replicate.replicate(files, [dest], force=True)
+    assert report.written == 5
+
+
+def test_failed_destination_does_not_stop_the_others(package, tmp_path):
+    blocked = tmp_path / "blocked"
+    blocked.write_bytes(b"a file where a directory should be")
+    files = replicate.package_files(package)
+    good, bad = replicate.replicate(files, [tmp_path / "good", blocked])
+    assert good.ok and good.verified == 5
+    assert not bad.ok and "Familie_2025.tar" in bad.error
+    assert bad.written == 0
+
+
+def test_slow_destination_lead_is_bounded(package, tmp_path, monkeypatch):
+    release = threading.Event()
+    written = {"fast": 0, "slow": 0}
+    original = replicate._Writer.write_chunk
+
+    def write_chunk(self, out, chunk):
+        name = self.report.destination.name
+        if name == "slow":
+            release.wait()
+        original(self, out, chunk)
+        written[name] += 1
+
+    monkeypatch.setattr(replicate._Writer, "write_chunk", write_chunk)
+    files = replicate.package_files(package)[:1]  # the 200 kB+ TAR: over 50 chunks
+    result = []
+    worker = threading.Thread(
+        target=lambda: result.extend(
+            replicate.replicate(
+                files, [tmp_path / "fast", tmp_path / "slow"], queue_depth=4, chunk_size=4096
+            )
+        )
+    )
+    worker.start()
+    deadline = time.monotonic() + 5
+    while written["fast"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    # The slow queue (4) plus the chunk it is stuck on plus the one the reader holds.
+    assert 4 <= written["fast"] <= 6
+    release.set()
+    worker.join(10)
+    assert [r.ok for r in result] == [True, True]
+    assert written["fast"] == written["slow"] > 50
+
+
+def test_source_errors_leave_no_partial_copies(package, tmp_path):
+    files = replicate.package_files(package)
+    missing = replicate.PackageFile(tmp_path / "gone.tar", "gone.tar", 10, 0, 0o644)
+    with pytest.raises(replicate.ReplicateError, match="gone.tar"):
+        replicate.replicate([files[0], missing], [tmp_path / "bd-a"])
+    assert sorted(p.name for p in (tmp_path / "bd-a").iterdir()) == ["Familie_2025.tar"]
+
+
+def test_loose_package(tmp_path):
+    source = tmp_path / "src" / "Fotos"
+    (source / "Urlaub").mkdir(parents=True)
+    (source / "Urlaub" / "IMG_1.jpg").write_bytes(b"i" * 500)
+    os.symlink("Urlaub/IMG_1.jpg", source / "latest.jpg")
+    package = packager.create_archive(source, tmp_path / "staging", "loose", table=scan(source))
+    files = replicate.package_files(package)
+    assert [f.name for f in files] == [
+        "Fotos/latest.jpg",
+        "Fotos/Urlaub/IMG_1.jpg",
+        "Fotos.manifest.csv",
+    ]
+    (report,) = replicate.replicate(files, [tmp_path / "hdd"])
+    assert report.ok and report.verified == 2
+    assert os.readlink(tmp_path / "hdd" / "Fotos" / "latest.jpg") == "Urlaub/IMG_1.jpg"
+
+
+def test_dotted_loose_package(tmp_path):
+    source = tmp_path / "src" / "Reise.2024"
+    source.mkdir(parents=True)
+    (source / "a.jpg").write_bytes(b"a" * 100)
+    package = packager.create_archive(source, tmp_path / "staging", "loose", table=scan(source))
+    names = [f.name for f in replicate.package_files(package)]
+    assert names == ["Reise.2024/a.jpg", "Reise.2024.manifest.csv"]
+
+
+def test_missing_package(tmp_path):
+    with pytest.raises(replicate.ReplicateError, match="not found"):
+        replicate.package_files(tmp_path / "Nope.tar")
@@ -0,0 +1,127 @@
+"""Tests for lam.pack.scan."""
+
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from lam.pack import scan as scan_module
+from lam.pack.scan import FileTable, scan
+
+
+@pytest.fixture()
+def tree(tmp_path):
+    root = tmp_path / "Projekt"
+    root.mkdir()
+    (root / "b.txt").write_text("bb")
+    (root / "a").mkdir()
+    (root / "a" / "z.bin").write_bytes(b"\x01" * 10)
+    (root / "a" / "deep").mkdir()
+    (root / "a" / "deep" / "x.txt").write_text("x")
+    (root / "c.txt").write_text("ccc")
+    return root
+
+
+def test_depth_first_sorted_order(tree):
+    table = scan(tree)
+    assert [r.path for r in table] == [
+        "",
+        "a",
+        "a/deep",
+        "a/deep/x.txt",
+        "a/z.bin",
+        "b.txt",
+        "c.txt",
+    ]
+
+
+def test_counts_and_sizes(tree):
+    table = scan(tree)
+    assert len(table) == 7
+    assert table.file_count == 4
+    assert table.total_size == 2 + 10 + 1 + 3
+    assert {r.path: r.size for r in table.files()} == {
+        "a/deep/x.txt": 1,
+        "a/z.bin": 10,
+        "b.txt": 2,
+        "c.txt": 3,
+    }
+
+
+def test_record_metadata_matches_stat(tree):
+    table = scan(tree)
+    record = next(r for r in table if r.path == "a/z.bin")
+    st = os.stat(tree / "a" / "z.bin")
+    assert record.is_file and not record.is_dir
+    assert record.mtime_ns == st.st_mtime_ns
+    assert record.mode == st.st_mode
+    assert table[1].is_dir
+    assert table[-1].path == "c.txt"
+
+
+def test_symlinks_are_not_followed(tree):
+    (tree / "link").symlink_to(tree / "b.txt")
+    table = scan(tree)
+    record = next(r for r in table if r.path == "link")
+    assert record.is_symlink
+    assert record.size == 0
+    assert table.file_count == 4
+
+
+def test_non_ascii_names(tree):
+    (tree / "Grüße ö.txt").write_text("hallo")
+    table = scan(tree)
+    assert "Grüße ö.txt" in [r.path for r in table]
+
+
+def test_concurrent_walk_matches_serial(tmp_path):
+    root = tmp_path / "wide"
+    for i in range(12):
+        for j in range(4):
+            d = root / f"d{i:02d}" / f"s{j}"
+            d.mkdir(parents=True)
+            (d / "f.txt").write_text(f"{i}-{j}")
+    (root / "top.txt").write_text("top")
+
+    serial = [(r.path, r.size, r.mode) for r in scan(root)]
+    for workers in (2, 8):
+        assert [(r.path, r.size, r.mode) for r in scan(root, workers=workers)] == serial
+
+
+def test_concurrent_walk_bounds_listings_ahead(tmp_path, monkeypatch):
+    root = tmp_path / "wide"
+    for i in range(300):
+        (root / f"d{i:03d}").mkdir(parents=True)
+        (root / f"d{i:03d}" / "f.txt").write_text(str(i))
+    serial = [r.path for r in scan(root)]
+
+    lock = threading.Lock()
+    counts = {"listed": 0, "entered": 0, "ahead": 0}
+    list_dir, append = scan_module._list_dir, FileTable.append
+
+    def slow_list_dir(directory, rel):
+        with lock:
+            counts["listed"] += 1
+        time.sleep(0.001)
+        return list_dir(directory, rel)
+
+    def counting_append(self, path, st):
+        append(self, path, st)
+        if stat.S_ISDIR(st.st_mode):
+            time.sleep(0.001)  # a slow consumer: unbounded workers would list everything
+            with lock:
+                counts["entered"] += 1
+                counts["ahead"] = max(counts["ahead"], counts["listed"] - counts["entered"])
+
+    monkeypatch.setattr(scan_module, "_list_dir", slow_list_dir)
+    monkeypatch.setattr(FileTable, "append", counting_append)
+    assert [r.path for r in scan(root, workers=4)] == serial
+    assert counts["listed"] == 301
+    assert counts["ahead"] <= scan_module.LOOKAHEAD * 4
+
+
+def test_concurrent_walk_propagates_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        scan(tmp_path / "missing", workers=4)
@@ -0,0 +1,65 @@
+"""Startup cost regression checks based on ``python -X importtime``.
+
+Wall-clock thresholds are too noisy for CI, so these tests pin down *which*
+modules the light-weight code paths import instead.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+# Modules that only the commands doing real work may pull in.
+HEAVY = (
+    "rich.table",
+    "rich.console",
+    "lam.pack",
+    "lam.index",
+    "tarfile",
+    "numpy",
+    "concurrent.futures",
+)
+
+
+def _imported_modules(code: str, tmp_path) -> dict[str, int]:
+    """Run *code* with ``-X importtime``; return imported module → cumulative µs."""
+    env = {"HOME": str(tmp_path), "PATH": "/usr/bin:/bin", "COLUMNS": "100"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    modules: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def _heavy(modules: dict[str, int]) -> list[str]:
+    return sorted(m for m in modules if any(m == h or m.startswith(h + ".") for h in HEAVY))
+
+
+def test_importing_cli_is_light(tmp_path):
+    modules = _imported_modules("import lam.cli", tmp_path)
+    assert "lam.cli" in modules
+    assert _heavy(modules) == []
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--help"],
+        ["config", "get", "pack.redundancy_percent"],
+        ["config", "set", "pack.par2_volumes", "2"],
+    ],
+)
+def test_light_commands_skip_heavy_imports(tmp_path, argv):
+    code = f"import sys; sys.argv = ['lam', *{argv!r}]; from lam.cli import app; app()"
+    modules = _imported_modules(code, tmp_path)
+    assert "lam.cli" in modules
+    assert _heavy(modules) == []
@@ -0,0 +1,182 @@
+"""Tests for lam.sync (rsync itemize logs and incremental PAR2 refresh)."""
+
+import shutil
+
+import pytest
+
+from lam.pack import par2
+from lam.sync import refresh, rsync
+
+# Recorded with `rsync -a --itemize-changes --delete --exclude=*.par2 src/ backup/`.
+LOG = """\
+sending incremental file list
+.d..t...... ./
+>f+++++++++ top-level.txt
+.d..t...... Fotos_2025/Urlaub/
+>f.st...... Fotos_2025/Urlaub/IMG_1.jpg
+>f+++++++++ Fotos_2025/Urlaub/IMG_\\#303\\#244.jpg
+.f...p..... Familie_2024/notes.txt
+cL+++++++++ Familie_2024/latest.jpg -> cover.jpg
+cd+++++++++ Familie_2024/Neu/
+hf+++++++++ Familie_2024/Neu/copy.jpg => Familie_2024/cover.jpg
+*deleting   Alt_2019/
+*deleting   Alt_2019/a.jpg
+"""
+
+
+def test_parse_line():
+    assert rsync.parse_line(">f.st...... Fotos/a b.jpg\n") == "Fotos/a b.jpg"
+    assert rsync.parse_line("<f+++++++++ Fotos/a.jpg") == "Fotos/a.jpg"
+    assert rsync.parse_line(".f...p..... Fotos/a.jpg") is None  # attributes only
+    assert rsync.parse_line(".d..t...... Fotos/") is None
+    assert rsync.parse_line("cL+++++++++ Fotos/l -> a.jpg") is None
+    assert rsync.parse_line("hf+++++++++ Fotos/b.jpg => Fotos/a.jpg") == "Fotos/b.jpg"
+    assert rsync.parse_line("*deleting   Fotos/old.jpg") == "Fotos/old.jpg"
+    assert rsync.parse_line("*deleting   Fotos/Alt/") == "Fotos/Alt/"
+    assert rsync.parse_line(">f+++++++++ \\#303\\#244.jpg") == "ä.jpg"
+    assert rsync.parse_line("sent 1,234 bytes  received 56 bytes") is None
+
+
+def test_parse_maps_changes_to_packages():
+    changes = rsync.parse(LOG.splitlines(keepends=True))
+    assert dict(changes.packages) == {"Fotos_2025": 2, "Familie_2024": 1, "Alt_2019": 2}
+    assert changes.outside == ["top-level.txt"]
+    assert changes.lines == 12
+    assert changes.ignored == 6
+
+
+def test_parse_depth():
+    changes = rsync.parse(LOG.splitlines(), depth=2)
+    assert dict(changes.packages) == {"Fotos_2025/Urlaub": 2, "Familie_2024/Neu": 1}
+    assert changes.outside == ["top-level.txt", "Alt_2019/", "Alt_2019/a.jpg"]
+
+
+@pytest.fixture()
+def backup(tmp_path):
+    pytest.importorskip("numpy")
+    root = tmp_path / "backup"
+    for package in ("Fotos_2025", "Familie_2024"):
+        (root / package / "Urlaub").mkdir(parents=True)
+        (root / package / "cover.jpg").write_bytes(package.encode() * 200)
+        for i in range(3):
+            (root / package / "Urlaub" / f"IMG_{i}.jpg").write_bytes(bytes([i]) * 5000)
+    for update in refresh.refresh(root, ["Fotos_2025", "Familie_2024"], 10, engine="native"):
+        assert update.status == "updated"
+    return root
+
+
+def test_refresh_replaces_sets_of_changed_packages_only(backup, tmp_path, monkeypatch):
+    package = backup / "Fotos_2025"
+    (package / "Urlaub" / "IMG_1.jpg").write_bytes(b"new!" * 1250)
+    (package / "Urlaub" / "Urlaub.07.par2").write_bytes(b"stale numbered set")
+    (package / "Urlaub" / "camera.par2").write_bytes(b"not LAM's" * 500)
+
+    scanned = []
+    original = refresh.scan
+    monkeypatch.setattr(refresh, "scan", lambda root: scanned.append(root) or original(root))
+    pending = refresh.PendingPackages(tmp_path / "state" / "pending.json")
+    changes = rsync.parse(LOG.splitlines())
+    updates = refresh.refresh(
+        backup, changes.packages, 10, engine="native", workers=2, pending=pending
+    )
+
+    assert [(u.package, u.status) for u in updates] == [
+        ("Alt_2019", "removed"),
+        ("Familie_2024", "updated"),
+        ("Fotos_2025", "updated"),
+    ]
+    assert sorted(p.name for p in scanned) == ["Familie_2024", "Fotos_2025"]
+    assert not (package / "Urlaub" / "Urlaub.07.par2").exists()
+    assert (package / "Urlaub" / "camera.par2").exists()
+    assert par2.verify(package / "Urlaub" / "Urlaub.par2", "native").status == "ok"
+    assert par2.verify(package / "Fotos_2025.par2", "native").status == "ok"
+    assert len(pending) == 0 and not pending.path.exists()
+
+    # A package that rsync did not touch is left alone.
+    untouched = {p: p.stat().st_mtime_ns for p in (backup / "Familie_2024").rglob("*.par2")}
+    scanned.clear()
+    refresh.refresh(backup, ["Fotos_2025"], 10, engine="native")
+    assert scanned == [package]
+    assert {p: p.stat().st_mtime_ns for p in untouched} == untouched
+
+
+def test_failed_packages_stay_pending(backup, tmp_path, monkeypatch):
+    def broken(*args, **kwargs):
+        raise par2.Par2Error("disk full")
+
+    monkeypatch.setattr(refresh.loose, "protect", broken)
+    state = tmp_path / "state" / "pending.json"
+    done = []
+    updates = refresh.refresh(
+        backup,
+        ["Fotos_2025", "../outside"],
+        10,
+        engine="native",
+        pending=refresh.PendingPackages(state),
+        on_done=done.append,
+    )
+    assert [(u.package, u.status) for u in updates] == [
+        ("../outside", "error"),
+        ("Fotos_2025", "error"),
+    ]
+    assert updates[1].detail == "disk full"
+    assert len(done) == 2
+    assert list(refresh.PendingPackages(state)) == ["../outside", "Fotos_2025"]
+
+    monkeypatch.undo()
+    pending = refresh.PendingPackages(state)
+    updates = refresh.refresh(backup, ["Fotos_2025"], 10, engine="native", pending=pending)
+    assert updates[0].ok
+    assert list(refresh.PendingPackages(state)) == ["../outside"]
+
+
+def test_archive_packages(tmp_path):
+    pytest.importorskip("numpy")
+    log = [
+        ">f+++++++++ Familie_2025.tar",
+        ">f+++++++++ Familie_2025.manifest.csv",
+        ">f+++++++++ Familie_2025.index.csv",
+        "*deleting   Alt_2019.iso",
+    ]
+    changes = rsync.parse(log)
+    assert dict(changes.packages) == {"Familie_2025.tar": 1, "Alt_2019.iso": 1}
+    assert changes.outside == [] and changes.ignored == 2
+
+    backup = tmp_path / "backup"
+    backup.mkdir()
+    (backup / "Familie_2025.tar").write_bytes(b"tar!" * 10_000)
+    (backup / "Familie_2025.par2").write_bytes(b"stale set from the last sync")
+    (backup / "Alt_2019.par2").write_bytes(b"orphaned set")
+    updates = refresh.refresh(backup, changes.packages, 10, engine="native")
+    assert [(u.package, u.status, u.sets) for u in updates] == [
+        ("Alt_2019.iso", "removed", 0),
+        ("Familie_2025.tar", "updated", 1),
+    ]
+    assert par2.verify(backup / "Familie_2025.par2", "native").status == "ok"
+    assert not (backup / "Alt_2019.par2").exists()
+
+
+def test_state_path_depends_on_destination(tmp_path):
+    a = refresh.state_path(tmp_path, tmp_path / "disk-a")
+    assert a == refresh.state_path(tmp_path, tmp_path / "disk-a")
+    assert a != refresh.state_path(tmp_path, tmp_path / "disk-b")
+    assert a.parent == tmp_path
+
+
+@pytest.mark.skipif(shutil.which("rsync") is None, reason="rsync not installed")
+def test_run_itemizes_a_local_transfer(tmp_path):
+    source, destination = tmp_path / "src", tmp_path / "dst"
+    (source / "Fotos_2025").mkdir(parents=True)
+    (source / "Fotos_2025" / "a.jpg").write_bytes(b"a")
+    (source / "Fotos_2025" / "a.par2").write_bytes(b"source PAR2")
+    destination.mkdir()
+    changes = rsync.parse(rsync.run(source, destination))
+    assert dict(changes.packages) == {"Fotos_2025": 1}
+    assert not (destination / "Fotos_2025" / "a.par2").exists()
+    assert rsync.parse(rsync.run(source, destination)).packages == {}
+
+
+def test_run_without_rsync(tmp_path, monkeypatch):
+    monkeypatch.setattr(rsync.shutil, "which", lambda name: None)
+    with pytest.raises(rsync.SyncError, match="--log"):
+        list(rsync.run(tmp_path, tmp_path))
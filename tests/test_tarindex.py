@@ -0,0 +1,123 @@
+"""Tests for lam.pack.tarindex (TAR member offset index and single-file extraction)."""
+
+import io
+import os
+import tarfile
+
+import pytest
+
+from lam.pack import manifest, packager, tarindex
+from lam.pack.scan import scan
+
+LONG_NAME = "Sommerurlaub_" + "ü" * 90 + ".mov"
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    root = tmp_path / "src" / "Familie_2025"
+    (root / "Urlaub").mkdir(parents=True)
+    (root / "cover.jpg").write_bytes(b"c" * 1000)
+    (root / "Urlaub" / "clip.mp4").write_bytes(os.urandom(300_000))
+    (root / "Urlaub" / LONG_NAME).write_bytes(b"m" * 5000)
+    (root / "Urlaub" / "copy.jpg").write_bytes(b"c" * 1000)
+    os.symlink("cover.jpg", root / "latest.jpg")
+    os.chmod(root / "cover.jpg", 0o640)
+    os.utime(root / "Urlaub" / "clip.mp4", (1_700_000_000, 1_700_000_000))
+    links = {"cover.jpg": "Urlaub/copy.jpg"}
+    return packager.create_archive(root, tmp_path / "out", "tar", table=scan(root), links=links)
+
+
+def test_written_index_matches_the_headers(archive):
+    written = tarindex.read(tarindex.index_path(archive))
+    assert written == tarindex.scan_members(archive)
+    by_path = {e.path: e for e in written}
+    clip = by_path["Familie_2025/Urlaub/clip.mp4"]
+    assert (clip.type, clip.size, clip.mtime) == ("0", 300_000, 1_700_000_000)
+    with archive.open("rb") as fh:
+        fh.seek(clip.data)
+        assert fh.read(clip.size) == (archive.parent.parent / "src").joinpath(
+            "Familie_2025/Urlaub/clip.mp4"
+        ).read_bytes()
+    assert by_path["Familie_2025/cover.jpg"].link == "Familie_2025/Urlaub/copy.jpg"
+    assert by_path["Familie_2025/latest.jpg"].type == "2"
+
+
+def test_extract_seeks_to_members_without_scanning(archive, tmp_path, monkeypatch):
+    def no_scan(path):
+        raise AssertionError("the index should have been used")
+
+    monkeypatch.setattr(tarindex, "scan_members", no_scan)
+    dest = tmp_path / "restore"
+    report = tarindex.extract(archive, ["Familie_2025/Urlaub/clip.mp4"], dest)
+    clip = dest / "Familie_2025" / "Urlaub" / "clip.mp4"
+    source = tmp_path / "src" / "Familie_2025" / "Urlaub" / "clip.mp4"
+    assert clip.read_bytes() == source.read_bytes()
+    assert clip.stat().st_mtime == 1_700_000_000
+    assert report.extracted == [clip]
+    assert (report.bytes_copied, report.verified, report.mismatches) == (300_000, 1, [])
+    assert not report.scanned
+
+
+def test_extract_directory_with_links(archive, tmp_path):
+    dest = tmp_path / "restore"
+    report = tarindex.extract(archive, ["Familie_2025/"], dest)
+    root = dest / "Familie_2025"
+    assert (root / "cover.jpg").read_bytes() == b"c" * 1000  # hard link → copy
+    assert (root / "Urlaub" / LONG_NAME).read_bytes() == b"m" * 5000
+    assert os.readlink(root / "latest.jpg") == "cover.jpg"
+    assert (root / "cover.jpg").stat().st_mode & 0o777 == 0o640
+    assert report.verified == 4
+    assert len(report.extracted) == 7
+
+
+def test_missing_index_is_rebuilt_from_the_headers(archive, tmp_path):
+    sidecar = tarindex.index_path(archive)
+    expected = sidecar.read_text()
+    sidecar.unlink()
+    report = tarindex.extract(archive, ["Familie_2025/cover.jpg"], tmp_path / "restore")
+    assert report.scanned
+    assert sidecar.read_text() == expected
+
+
+def test_stale_index_is_detected(archive, tmp_path):
+    # An index that belongs to a different archive: offsets point elsewhere.
+    entries = tarindex.read(tarindex.index_path(archive))
+    shifted = [
+        tarindex.IndexEntry(e.path, e.type, e.mode, e.mtime, e.size, e.header + 512, e.data + 512)
+        for e in entries
+    ]
+    tarindex.write(tarindex.index_path(archive), shifted)
+    report = tarindex.extract(archive, ["Familie_2025/Urlaub/clip.mp4"], tmp_path / "restore")
+    assert report.scanned and report.verified == 1
+    assert tarindex.read(tarindex.index_path(archive)) == entries
+
+
+def test_manifest_mismatch_is_reported(archive, tmp_path):
+    path = manifest.manifest_path(archive)
+    rows = [
+        manifest.ManifestEntry(e.path, e.size, e.mtime, "0" * 64 if "cover" in e.path else e.sha256)
+        for e in manifest.read(path)
+    ]
+    manifest.write(path, rows)
+    report = tarindex.extract(archive, ["Familie_2025/cover.jpg"], tmp_path / "restore")
+    assert report.mismatches == ["Familie_2025/cover.jpg"]
+
+
+def test_unknown_members(archive, tmp_path):
+    with pytest.raises(tarindex.TarIndexError, match="Not in Familie_2025.tar: Familie_2025/x"):
+        tarindex.extract(archive, ["Familie_2025/x", "Familie_2025/cover.jpg"], tmp_path)
+
+
+def test_foreign_archive_and_unsafe_paths(tmp_path):
+    path = tmp_path / "foreign.tar"
+    with tarfile.open(path, "w", format=tarfile.GNU_FORMAT) as tar:
+        for name, data in (("docs/readme.txt", b"hello"), ("../escape.txt", b"evil")):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    report = tarindex.extract(path, ["docs/readme.txt"], tmp_path / "restore")
+    assert report.scanned
+    assert (tmp_path / "restore" / "docs" / "readme.txt").read_bytes() == b"hello"
+    with pytest.raises(tarindex.TarIndexError, match="not a relative path"):
+        tarindex.extract(path, ["../escape.txt"], tmp_path / "restore")
+    assert not (tmp_path / "escape.txt").exists()
@@ -1,5 +1,7 @@
 """Tests for lam.pack.validator."""
 
+import os
+
 import pytest
 
 from lam.pack.validator import ValidationError, validate
@@ -44,3 +46,28 @@ def test_not_a_directory(tmp_path):
     f.write_text("hi")
     with pytest.raises(ValidationError, match="not a directory"):
         validate(f)
+
+
+def test_returns_reusable_file_table(tmp_path):
+    (tmp_path / "a.txt").write_text("hello")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text("world!")
+    table = validate(tmp_path)
+    assert table.file_count == 2
+    assert table.total_size == 11
+    assert validate(tmp_path, table=table) is table
+
+
+def test_unreadable_subdirectory(tmp_path, monkeypatch):
+    (tmp_path / "ok.txt").write_text("data")
+    (tmp_path / "locked").mkdir()
+    scandir = os.scandir
+
+    def deny(path):
+        if str(path).endswith("locked"):
+            raise PermissionError(13, "Permission denied", str(path))
+        return scandir(path)
+
+    monkeypatch.setattr("lam.pack.scan.os.scandir", deny)
+    with pytest.raises(ValidationError, match="Cannot read .*locked: Permission denied"):
+        validate(tmp_path)
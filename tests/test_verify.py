@@ -0,0 +1,135 @@
+"""Tests for lam.verify (scrub scheduling and resume journal)."""
+
+import threading
+import time
+
+import pytest
+
+from lam.pack.par2 import Par2Verification
+from lam.verify import scrub
+from lam.verify.journal import ScrubJournal, journal_path
+
+
+def _make_sets(root, names):
+    paths = []
+    for name in names:
+        (root / f"{name}.tar").write_bytes(b"x")
+        index = root / f"{name}.par2"
+        index.write_bytes(b"index")
+        (root / f"{name}.vol00+01.par2").write_bytes(b"volume")
+        paths.append(index)
+    return paths
+
+
+@pytest.fixture()
+def fake_verify(monkeypatch):
+    """Replace PAR2 verification by a short sleep that tracks concurrency per device."""
+    state = {"active": {}, "max_per_device": 0, "max_total": 0, "calls": []}
+    lock = threading.Lock()
+
+    def verify_one(index_path, device, engine):
+        with lock:
+            state["calls"].append(index_path.name)
+            state["active"][device] = state["active"].get(device, 0) + 1
+            state["max_per_device"] = max(state["max_per_device"], state["active"][device])
+            state["max_total"] = max(state["max_total"], sum(state["active"].values()))
+        time.sleep(0.02)
+        with lock:
+            state["active"][device] -= 1
+        status = "damaged" if "bad" in index_path.name else "ok"
+        return scrub.ScrubResult(index_path, device, status, "", 1, 0.02)
+
+    monkeypatch.setattr(scrub, "_verify_one", verify_one)
+    return state
+
+
+def test_discover_sets_skips_volumes_and_hidden_dirs(tmp_path):
+    (tmp_path / "disc1").mkdir()
+    (tmp_path / ".lam-cache").mkdir()
+    expected = _make_sets(tmp_path / "disc1", ["A", "B"])
+    (tmp_path / ".lam-cache" / "C.par2").write_bytes(b"")
+    assert scrub.discover_sets([tmp_path]) == expected
+    assert scrub.discover_sets([expected[0]]) == [expected[0]]
+
+
+def test_one_set_at_a_time_per_device(tmp_path, fake_verify):
+    paths = _make_sets(tmp_path, [f"P{i}" for i in range(8)])
+    devices = {p: f"sd{'ab'[i % 2]}" for i, p in enumerate(paths)}
+    results = scrub.run_scrub(paths, max_devices=4, device_of=devices.__getitem__)
+    assert [r.index_path for r in results] == paths
+    assert all(r.ok for r in results)
+    assert fake_verify["max_per_device"] == 1
+    assert fake_verify["max_total"] == 2
+
+
+def test_max_devices_limits_parallelism(tmp_path, fake_verify):
+    paths = _make_sets(tmp_path, [f"P{i}" for i in range(6)])
+    devices = {p: f"disk{i}" for i, p in enumerate(paths)}
+    scrub.run_scrub(paths, max_devices=2, device_of=devices.__getitem__)
+    assert fake_verify["max_total"] <= 2
+
+
+def test_journal_resumes_interrupted_scrub(tmp_path, fake_verify):
+    paths = _make_sets(tmp_path, ["A", "B", "bad"])
+    state = journal_path(tmp_path / "state", [tmp_path])
+    scrub.run_scrub(paths[:2], journal=ScrubJournal(state), device_of=lambda p: "sda")
+    fake_verify["calls"].clear()
+
+    journal = ScrubJournal(state)
+    assert len(journal) == 2
+    results = scrub.run_scrub(paths, journal=journal, device_of=lambda p: "sda")
+    assert fake_verify["calls"] == ["bad.par2"]
+    assert [r.resumed for r in results] == [True, True, False]
+    assert [r.status for r in results] == ["ok", "ok", "damaged"]
+
+    # A completed scrub starts over next time.
+    journal.complete()
+    assert len(ScrubJournal(state)) == 0
+    assert state.with_name(state.name.replace(".jsonl", ".last.jsonl")).exists()
+
+
+def test_journal_ignores_changed_sets_and_restart(tmp_path, fake_verify):
+    paths = _make_sets(tmp_path, ["A"])
+    state = tmp_path / "state" / "scrub.jsonl"
+    scrub.run_scrub(paths, journal=ScrubJournal(state), device_of=lambda p: "sda")
+    paths[0].write_bytes(b"rewritten index")
+    assert ScrubJournal(state).lookup(paths[0]) is None
+    assert len(ScrubJournal(state, restart=True)) == 0
+
+
+def test_verification_errors_are_reported_not_raised(tmp_path):
+    (index,) = _make_sets(tmp_path, ["A"])
+    (result,) = scrub.run_scrub([index], engine="native", device_of=lambda p: "sda")
+    assert result.status == "error"
+    assert "main packet" in result.detail
+
+
+def test_native_scrub_of_real_set(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    from lam.pack import par2_native
+
+    archive = tmp_path / "Familie_2025.tar"
+    archive.write_bytes(bytes(range(256)) * 200)
+    index = par2_native.create(archive, 10, block_count=10, workers=1)[0]
+    seen = []
+    (result,) = scrub.run_scrub(
+        scrub.discover_sets([tmp_path]), engine="native", on_result=seen.append
+    )
+    assert result.status == "ok"
+    assert result.size == archive.stat().st_size
+    assert result.index_path == index
+    assert seen == [result]
+
+
+def test_verify_result_status_passthrough(tmp_path, monkeypatch):
+    (index,) = _make_sets(tmp_path, ["A"])
+
+    class FakeSet:
+        total_size = 42
+
+    monkeypatch.setattr(scrub.par2_native, "read_set", lambda p: FakeSet())
+    monkeypatch.setattr(
+        scrub.par2, "verify", lambda p, engine: Par2Verification("repairable", "1 slice")
+    )
+    (result,) = scrub.run_scrub([index], device_of=lambda p: "sda")
+    assert (result.status, result.detail, result.size) == ("repairable", "1 slice", 42)